@@ -1,10 +1,18 @@
 # %%
 # %%
 # %% Imports
+# Import ist seiteneffektfrei: Excel-Profil wird erst bei Bedarf geladen (get_df2),
+# Raster, Winner-Auswertung und Plots laufen nur über main().
+import os
+from functools import lru_cache
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from IPython.display import display
+
+import profile_reduction
+import sim_kernel as sk
+import timeseries_io
+import wind_profile
 
 # %%
 # -----------------------------
@@ -144,19 +152,103 @@ assert "capex_eur_per_mw" in cost_params["wind"]
 assert "opex_eur_per_kw_per_year" in cost_params["wind"]
 
 
+# Reine Kostenparameter (wirken nur in cost_components_proxy, nicht auf die Simulation)
+COST_ONLY_KEY_TOKENS = ("capex", "opex", "project_lifetime_years")
+
+
+def _is_cost_only_key(key: str) -> bool:
+    return any(tok in str(key) for tok in COST_ONLY_KEY_TOKENS)
+
+
+def physical_cost_params(cp: dict = None) -> dict:
+    """
+    Teilmenge von cost_params, die die stündliche Simulation beeinflusst
+    (Wirkungsgrade, spez. Verbräuche, Verluste, Mindestlasten ...), ohne CAPEX/OPEX/Lebensdauer.
+    Dient als Schlüssel für gecachte Simulations-KPIs.
+    """
+    cp = cost_params if cp is None else cp
+    out = {}
+    for k, v in cp.items():
+        if _is_cost_only_key(k):
+            continue
+        if isinstance(v, dict):
+            sub = physical_cost_params(v)
+            if sub:
+                out[k] = sub
+        else:
+            out[k] = v
+    return out
+
+
+# Version der Simulationslogik (simulate_hourly_system, _batch, sim_kernel): bei jeder
+# Änderung, die KPIs verschiebt, erhöhen – gecachte KPIs (eval_cache, auch SQLite) verfallen.
+SIM_VERSION = 1
+
+# Modulkonstanten, die die Fahrweise der Simulation bestimmen (gehören mit in den Cache-Schlüssel)
+SIMULATION_CONSTANTS = (
+    "ships_per_year", "annual_nh3_prod_t", "hb_capacity_tNH3_per_day", "startup_buffer_ships",
+    "h2_soc_low_frac", "h2_soc_high_frac", "hb_min_frac_when_on", "el_ramp_frac_per_h",
+    "hb_ramp_frac_per_h", "nh3_target_level_ships", "nh3_deadband_ships", "h2_el_stop_frac",
+    "h2_el_start_frac", "years_sim",
+)
+
+
+def simulation_constants() -> dict:
+    """Aktuelle Werte der SIMULATION_CONSTANTS (zur Laufzeit gelesen) und SIM_VERSION."""
+    out = {name: globals()[name] for name in SIMULATION_CONSTANTS}
+    out["sim_version"] = SIM_VERSION
+    return out
+
+
+def merge_cost_params(overrides: dict = None, base: dict = None) -> dict:
+    """
+    Kopie von cost_params mit überschriebenen Kostenwerten (verschachteltes dict, z.B.
+    {"wind": {"capex_eur_per_mw": 1.8e6}}). Nur reine Kostenparameter (CAPEX/OPEX/Lebensdauer)
+    sind erlaubt, da physikalische Parameter eine neue Simulation erfordern würden.
+    """
+    import copy
+
+    merged = copy.deepcopy(cost_params if base is None else base)
+
+    def _merge(dst, src, path):
+        for k, v in (src or {}).items():
+            key_path = f"{path}.{k}" if path else str(k)
+            if isinstance(v, dict):
+                if not isinstance(dst.get(k), dict):
+                    raise ValueError(f"Unbekannter Kostenparameter: {key_path}")
+                _merge(dst[k], v, key_path)
+            else:
+                if k not in dst:
+                    raise ValueError(f"Unbekannter Kostenparameter: {key_path}")
+                if not _is_cost_only_key(k):
+                    raise ValueError(f"{key_path} ist kein reiner Kostenparameter (Simulation betroffen).")
+                dst[k] = float(v)
+
+    _merge(merged, overrides, "")
+    return merged
+
+
 # %%
-# %% Excel einlesen
-df = pd.read_excel("Wind Erzeugerprofil3.xlsx")
+# %% Excel einlesen (lazy, beim ersten Zugriff auf df2; Binär-Cache siehe wind_profile.py)
+WIND_PROFILE_XLSX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Wind Erzeugerprofil3.xlsx")
+WIND_PROFILE_SOURCE = os.environ.get("WIND_PROFILE_SOURCE", WIND_PROFILE_XLSX)  # .xlsx oder .csv
+
 
-p_gw = df["Leistung  Windpark [GW]"].astype(float)
-p_mw = (p_gw * 1000).clip(lower=0)
+def load_wind_profile(path: str = None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Liest das Windprofil und liefert df2 mit DatetimeIndex "t" und Spalte p_mw.
+
+    Beim ersten Aufruf wird die Quelle geparst und als .npy neben der Quelle gecacht
+    (Schlüssel: mtime + sha256); danach wird nur noch das Array gememory-mappt.
+    """
+    path = path or WIND_PROFILE_SOURCE
+    return wind_profile.load_profile_frame(path, use_cache=use_cache)
 
-t = pd.to_datetime(df["datetime"])
-df2 = pd.DataFrame({"t": t, "p_mw": p_mw}).set_index("t")
 
-annual_wind_mwh_base = df2["p_mw"].sum()
-print("Jahresenergie Windpark (s=1) [MWh]:", round(annual_wind_mwh_base, 1))
-print("Zeitschritte:", len(df2))
+@lru_cache(maxsize=None)
+def get_df2() -> pd.DataFrame:
+    """1-Jahres-Profil, wird beim ersten Aufruf geladen und danach gecacht."""
+    return load_wind_profile()
 
 # %% Derived assumptions
 years = float(cost_params["general"]["project_lifetime_years"])
@@ -166,9 +258,6 @@ hb_avail = float(cost_params["haber_bosch"]["availability"])
 hb_capacity_tNH3_per_year = annual_nh3_prod_t / hb_avail
 hb_capacity_tNH3_per_day = hb_capacity_tNH3_per_year / 365.0
 
-print("annual_nh3_prod_t [t/a]:", round(annual_nh3_prod_t, 1))
-print("HB capacity [t NH3/day]:", round(hb_capacity_tNH3_per_day, 2))
-
 # %%
 # -----------------------------
 # Mehrjahres-Windprofil erzeugen
@@ -186,13 +275,172 @@ def make_multi_year_profile(df_one_year: pd.DataFrame, years_sim: int = 2) -> pd
     return pd.concat(blocks)
 
 years_sim = 20            # Anzahl an Jahren, die simuliert werden
-df2_sim = make_multi_year_profile(df2, years_sim=years_sim)
 
-print("Sim hours:", len(df2_sim))
-print("Sim start/end:", df2_sim.index.min(), "->", df2_sim.index.max())
+
+@lru_cache(maxsize=None)
+def get_df2_sim() -> wind_profile.RepeatingProfile:
+    """
+    Mehrjahres-Profil (years_sim Jahre) als virtuelle Wiederholung von df2 (keine Kopien).
+    Für ein materialisiertes DataFrame: get_df2_sim().to_frame() bzw. make_multi_year_profile.
+    """
+    return wind_profile.RepeatingProfile(get_df2(), years_sim)
+
+
+def __getattr__(name):
+    # Kompatibilität: cf.df2 / cf.df2_sim / cf.annual_wind_mwh_base bleiben als Attribute nutzbar
+    if name == "df2":
+        return get_df2()
+    if name == "df2_sim":
+        return get_df2_sim()
+    if name == "annual_wind_mwh_base":
+        return float(get_df2()["p_mw"].sum())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # %%
+def failed_ship_budget(stop_on_first_failed_ship: bool = False, max_failed_ships=None) -> float:
+    """
+    Erlaubte Schiffsausfälle, bevor die Simulation abbricht (float("inf") = kein Abbruch).
+    stop_on_first_failed_ship=True entspricht max_failed_ships=0.
+    """
+    budget = float("inf") if max_failed_ships is None else float(max_failed_ships)
+    if budget < 0.0:
+        raise ValueError(f"max_failed_ships muss >= 0 sein: {max_failed_ships!r}")
+    if stop_on_first_failed_ship:
+        budget = 0.0
+    return budget
+
+
+TIMESERIES_FORMATS = ("dataframe", "columns", "structured")
+
+# aggregate -> Perioden-Frequenz (pandas Period)
+TIMESERIES_AGGREGATES = {"D": "D", "W": "W", "M": "M", "Y": "Y"}
+TIMESERIES_STATS = ("mean", "min", "max")
+
+# Blocklänge, wenn nur einzelne Kanäle stündlich ausgegeben werden
+TIMESERIES_BLOCK_HOURS = 8760
+
+
+def timeseries_output(buf: np.ndarray, index, n: int, fmt: str = "dataframe", columns=sk.TS_COLUMNS):
+    """
+    Spalten-Puffer (Zeilen = columns, Spalten = Stunden bzw. Perioden) der ersten n
+    Einträge im gewünschten Format:
+
+    "dataframe":  pd.DataFrame mit Index "t" (Spalten teilen sich den Puffer, keine Kopie)
+    "columns":    dict {"t": Zeitstempel-Array, Spalte: Array} – Sichten auf den Puffer
+    "structured": NumPy-Strukturarray mit Feld "t" und je einem Feld pro Spalte
+    """
+    t = np.asarray(index[:n])
+    if fmt == "dataframe":
+        return pd.DataFrame(buf[:, :n].T, index=pd.Index(t, name="t"), columns=list(columns), copy=False)
+    if fmt == "columns":
+        out = {"t": t}
+        out.update({col: buf[k, :n] for k, col in enumerate(columns)})
+        return out
+    if fmt == "structured":
+        rec = np.empty(n, dtype=[("t", t.dtype)] + [(col, buf.dtype) for col in columns])
+        rec["t"] = t
+        for k, col in enumerate(columns):
+            rec[col] = buf[k, :n]
+        return rec
+    raise ValueError(f"Unbekanntes timeseries_format: {fmt!r} (erlaubt: {', '.join(TIMESERIES_FORMATS)})")
+
+
+class TimeseriesCollector:
+    """
+    Nimmt die Zeitreihe blockweise entgegen (block: TS_COLUMNS x Blockstunden, Stunden
+    start..end-1), damit nicht immer alle Stunden x Spalten gehalten werden müssen:
+
+    - ohne channels/aggregate: ein Block über alle Stunden (wie bisher, keine Kopie)
+    - channels: nur diese Spalten werden je Block in die Ausgabe kopiert
+    - aggregate ("D"/"W"/"M"/"Y"): ein Block je Periode, daraus mean/min/max je Kanal
+      (Spalten "<kanal>_mean" usw. plus "hours"); Speicher = eine Periode
+
+    Die Engines schreiben in block und rufen advance(hours_done) am Blockende bzw. beim
+    Abbruch auf; result() liefert die Ausgabe im timeseries_format.
+    """
+
+    def __init__(self, df_profile, channels=None, aggregate=None, dtype=np.float64):
+        n_hours = len(df_profile)
+        self.index = df_profile.index
+        self.dtype = dtype
+        if channels is None:
+            self.channels = list(sk.TS_COLUMNS)
+        else:
+            self.channels = list(channels)
+            unknown = [c for c in self.channels if c not in sk.TS_COLUMNS]
+            if unknown or not self.channels:
+                raise ValueError(
+                    f"Unbekannte channels: {unknown or self.channels!r} (erlaubt: {', '.join(sk.TS_COLUMNS)})"
+                )
+        self.rows = [sk.TS_COLUMNS.index(c) for c in self.channels]
+        self.aggregate = aggregate
+
+        if aggregate is not None:
+            if aggregate not in TIMESERIES_AGGREGATES:
+                raise ValueError(
+                    f"Unbekanntes aggregate: {aggregate!r} (erlaubt: {', '.join(TIMESERIES_AGGREGATES)})"
+                )
+            if not isinstance(self.index, pd.DatetimeIndex):
+                raise ValueError("aggregate benötigt ein Profil mit Zeitstempeln (DatetimeIndex).")
+            periods = self.index.to_period(TIMESERIES_AGGREGATES[aggregate])
+            change = np.flatnonzero(periods[1:] != periods[:-1]) + 1
+            self.bounds = np.concatenate(([0], change, [n_hours])).astype(np.int64)
+            self.labels = periods[self.bounds[:-1]].start_time
+            self.columns = [f"{c}_{stat}" for c in self.channels for stat in TIMESERIES_STATS]
+            self.out = np.empty((len(self.columns), len(self.labels)), dtype=dtype)
+            self.hours = np.zeros(len(self.labels), dtype=np.int64)
+            self.block = np.empty((sk.N_TS, int(np.diff(self.bounds).max())), dtype=dtype)
+        elif channels is None:
+            self.bounds = np.array([0, n_hours], dtype=np.int64)
+            self.block = np.empty((sk.N_TS, n_hours), dtype=dtype)
+            self.out = self.block
+            self.columns = self.channels
+        else:
+            self.bounds = np.append(np.arange(0, n_hours, TIMESERIES_BLOCK_HOURS), n_hours).astype(np.int64)
+            self.block = np.empty((sk.N_TS, min(TIMESERIES_BLOCK_HOURS, n_hours)), dtype=dtype)
+            self.out = np.empty((len(self.rows), n_hours), dtype=dtype)
+            self.columns = self.channels
+        self.k = 0
+        self.n_out = 0
+
+    @property
+    def start(self) -> int:
+        return int(self.bounds[self.k])
+
+    @property
+    def end(self) -> int:
+        return int(self.bounds[min(self.k + 1, len(self.bounds) - 1)])
+
+    @property
+    def finished(self) -> bool:
+        return self.k >= len(self.bounds) - 1
+
+    def advance(self, hours_done: int) -> None:
+        """Block mit den Stunden start..hours_done-1 übernehmen und zum nächsten Block gehen."""
+        n = int(hours_done) - self.start
+        if n <= 0 or self.finished:
+            return
+        data = self.block[self.rows, :n] if self.aggregate is not None or self.out is not self.block else None
+        if self.aggregate is not None:
+            stats = (data.mean(axis=1), data.min(axis=1), data.max(axis=1))
+            for j, values in enumerate(stats):
+                self.out[j::len(TIMESERIES_STATS), self.k] = values
+            self.hours[self.k] = n
+            self.n_out = self.k + 1
+        else:
+            if data is not None:
+                self.out[:, self.start:self.start + n] = data
+            self.n_out = self.start + n
+        self.k += 1
+
+    def result(self, fmt: str = "dataframe"):
+        if self.aggregate is None:
+            return timeseries_output(self.out, self.index, self.n_out, fmt, self.columns)
+        buf = np.vstack([self.out[:, :self.n_out], self.hours[None, :self.n_out].astype(self.dtype)])
+        return timeseries_output(buf, self.labels, self.n_out, fmt, self.columns + ["hours"])
+
+
 def simulate_hourly_system(
     s: float,
     p_el_mw: float,
@@ -202,12 +450,79 @@ def simulate_hourly_system(
     water_tank_m3_max: float = 0.0,
     return_timeseries: bool = False,
     debug_ships: bool = False,
-    df_profile: pd.DataFrame = None
+    df_profile: pd.DataFrame = None,
+    engine: str = "python",
+    steady_state: bool = False,
+    steady_state_tol: float = 0.0,
+    stop_on_first_failed_ship: bool = False,
+    max_failed_ships: int = None,
+    timeseries_format: str = "dataframe",
+    timeseries_dtype=np.float64,
+    channels=None,
+    aggregate: str = None,
 ):
+    """
+    Stündliche Simulation EL -> LH2 -> HB -> NH3-Tank -> Schiff (inkl. RO/Wassertank).
+
+    df_profile: DataFrame mit Spalte p_mw (df2) oder wind_profile.RepeatingProfile (df2_sim);
+                Zeitstempel werden nur für return_timeseries=True benötigt.
+
+    engine="python": ursprüngliche Stundenschleife (Referenz)
+    engine="kernel": gleicher Ablauf als flacher Zustandsautomat auf float64-Arrays
+                     (sim_kernel, mit numba JIT-kompiliert, falls installiert)
+
+    steady_state=True (nur engine="kernel", RepeatingProfile ohne Zeitreihe): Jahr für Jahr
+        simulieren und abbrechen, sobald der Zustand am Jahresanfang (SOCs, Rampen,
+        Hysterese, Schiffsphase) dem Vorjahr entspricht; die restlichen Jahre werden
+        analytisch hochgerechnet (kpis["steady_state_year"], kpis["years_simulated"]).
+        Wird kein Steady State erreicht, ist das Ergebnis identisch zum vollen Lauf.
+        steady_state_tol: relative Toleranz des Zustandsvergleichs (0.0 = bitgleich).
+
+    df_profile als profile_reduction.ReducedProfile (immer engine="kernel", ohne Zeitreihe):
+        Screening auf repräsentativen Perioden; KPIs gelten hochgerechnet für das volle Profil,
+        Schiffs-KPIs aus stündlicher NH3-Abnahme geschätzt (siehe profile_reduction).
+
+    stop_on_first_failed_ship / max_failed_ships (opt-in): bricht die Stundenschleife ab,
+        sobald mehr als max_failed_ships Schiffe (bzw. das erste) nicht voll beladen werden.
+        Die KPIs gelten dann nur bis zum Abbruch (Teilsummen) und die Auslegung ist unzulässig;
+        kpis["terminated_early"], kpis["hours_simulated"]. Ohne Wirkung bei reduzierten Profilen.
+
+    return_timeseries=True: beide Engines schreiben in vorab allokierte Spalten-Puffer
+        (sim_kernel.TS_COLUMNS x Stunden, timeseries_dtype, z.B. np.float32 für halben
+        Speicher). timeseries_format: "dataframe" (Default, Index "t"), "columns"
+        (dict von Arrays) oder "structured" (Strukturarray), siehe timeseries_output().
+        channels=[...]: nur diese Spalten ausgeben; aggregate="D"/"W"/"M"/"Y": statt
+        Stundenwerten mean/min/max je Tag/Woche/Monat/Jahr, blockweise während der
+        Simulation berechnet (Speicher für eine Periode), siehe TimeseriesCollector.
+    """
     tech = technology.upper()
+    engine = str(engine).lower()
+    if engine not in ("python", "kernel"):
+        raise ValueError(f"Unbekannte engine: {engine!r} (erlaubt: 'python', 'kernel')")
+    if steady_state and engine != "kernel":
+        raise ValueError("steady_state=True benötigt engine='kernel'.")
+    reduced = isinstance(df_profile, profile_reduction.ReducedProfile)
+    if reduced:
+        if return_timeseries:
+            raise ValueError("Reduziertes Profil liefert keine Zeitreihe (return_timeseries=False).")
+        engine = "kernel"
+    if timeseries_format not in TIMESERIES_FORMATS:
+        raise ValueError(
+            f"Unbekanntes timeseries_format: {timeseries_format!r} (erlaubt: {', '.join(TIMESERIES_FORMATS)})"
+        )
 
     if df_profile is None:
-        df_profile = df2
+        df_profile = get_df2()
+    max_failed = failed_ship_budget(stop_on_first_failed_ship, max_failed_ships)
+    early_stop = max_failed < float("inf")
+    if reduced:
+        # Schiffsausfälle werden dort erst nach dem Lauf geschätzt
+        max_failed = float("inf")
+    hours_done = len(df_profile)
+    collector = (
+        TimeseriesCollector(df_profile, channels, aggregate, timeseries_dtype) if return_timeseries
+        else None
+    )
 
     el = cost_params["h2"]["electrolyzer"][tech]
     h2s = cost_params["h2"]["storage"]
@@ -336,8 +651,6 @@ def simulate_hourly_system(
     ro_make_total_m3 = 0.0
     water_short_total_m3 = 0.0
 
-    rows = [] if return_timeseries else None
-
     # -------------------------
     # Helper: RO <-> Power
     # -------------------------
@@ -464,234 +777,379 @@ def simulate_hourly_system(
         return float(p_ro_mw), float(ro_make_m3), float(soc_after)
 
     # -------------------------
-    # Loop
+    # Kernel-Engine: gleicher Ablauf als flacher Zustandsautomat (sim_kernel)
     # -------------------------
-    for hour_index, (ts, p_wind_base) in enumerate(df_profile["p_mw"].items()):
-        p_wind = float(p_wind_base) * float(s)
-
-        # Water Tank Verluste
-        if water_loss_frac_per_hour > 0.0:
-            soc_water_m3 *= (1.0 - water_loss_frac_per_hour)
-
-        # -------------------------
-        # KÜHLUNG FIRST: zieht Windstrom ab
-        # -------------------------
-        bog_kg = soc_h2_kg * loss_frac_per_hour
-        reliq_kg = bog_kg * h2_reliq_frac
-        p_h2_reliq_mw = (reliq_kg * h2_reliq_kwh_per_kg) / 1000.0
-        soc_h2_kg -= bog_kg
-
-        p_nh3_cooling_mw = (soc_nh3_t * nh3_cooling_kwh_per_t_per_day / 24.0) / 1000.0
-
-        h2_reliq_mwh_sum += p_h2_reliq_mw
-        nh3_cooling_mwh_sum += p_nh3_cooling_mw
-
-        # HB-Hilfsgrößen
-        nh3_possible_from_h2_kg = (soc_h2_kg * eta_out) / h2_kg_per_kg_nh3
-        nh3_possible_from_h2_t = nh3_possible_from_h2_kg / 1000.0
-
-        kwh_per_t_hb = hb_spec_kwh_per_kgNH3 * 1000.0
-        kwh_per_t_n2 = (n2_kg_per_kg_nh3 * 1000.0) * spec_kwh_per_kgN2
-        kwh_per_t_h2_out = (h2_kg_per_kg_nh3 * 1000.0) * h2_spec_kwh_per_kg_out
-        kwh_per_t_nh3_in = nh3_spec_kwh_per_t_in
-        kwh_per_t_hbchain = kwh_per_t_hb + kwh_per_t_n2 + kwh_per_t_h2_out + kwh_per_t_nh3_in
-
-        # Init pro Stunde
-        nh3_hb_t = 0.0
-        p_hbchain_mw = 0.0
-
-        p_el = 0.0
-        p_h2_in_mw = 0.0
-        p_el_total_mw = 0.0
-        h2_spill_kg = 0.0
-
-        p_ro_mw = 0.0
-        ro_make_m3 = 0.0
-        water_need_m3 = 0.0
-        water_short_m3 = 0.0
-
-        def run_hb(p_available_mw):
-            nonlocal nh3_possible_from_h2_t, nh3_hb_prev_t
-
-            if nh3_prod_total_t >= nh3_target_total_t - 1e-9:
-                nh3_hb_prev_t = 0.0
-                return 0.0, 0.0
-
-            # NH3 Level Control: wenn Tank "hoch genug", HB aus
-            if soc_nh3_t >= nh3_soc_high_t:
-                nh3_hb_prev_t = 0.0
-                return 0.0, 0.0
-
-            if nh3_possible_from_h2_t <= 0.0 or hb_capacity_tNH3_per_h <= 0.0:
-                nh3_hb_prev_t = 0.0
-                return 0.0, 0.0
-
-            # nur bis Zielniveau auffüllen
-            nh3_free_t = max(0.0, nh3_soc_target_t - soc_nh3_t)
-            if nh3_free_t <= 0.0:
-                nh3_hb_prev_t = 0.0
-                return 0.0, 0.0
-
-            if kwh_per_t_hbchain > 0.0:
-                nh3_power_limit_t = (p_available_mw * 1000.0) / kwh_per_t_hbchain
-            else:
-                nh3_power_limit_t = hb_capacity_tNH3_per_h
-
-            nh3_remaining_total_t = max(0.0, nh3_target_total_t - nh3_prod_total_t)
+    if engine == "kernel":
+        if isinstance(df_profile, (wind_profile.RepeatingProfile, profile_reduction.ReducedProfile)):
+            # Kernel läuft zyklisch über das Basisjahr (bzw. die Repräsentanten)
+            p_base = np.ascontiguousarray(df_profile.base, dtype=np.float64)
+        else:
+            p_base = np.ascontiguousarray(df_profile["p_mw"].to_numpy(dtype=np.float64))
+        n_hours = len(df_profile)
+
+        prm = np.zeros(sk.N_PARAMS, dtype=np.float64)
+        prm[sk.P_S] = float(s)
+        prm[sk.P_EL_MAX] = p_el_max
+        prm[sk.P_EL_MIN] = p_el_min
+        prm[sk.P_EL_STEP] = float(el_ramp_frac_per_h) * float(p_el_max)
+        prm[sk.P_H2_KG_PER_MWH] = h2_kg_per_mwh
+        prm[sk.P_ETA_IN] = eta_in
+        prm[sk.P_ETA_OUT] = eta_out
+        prm[sk.P_H2_LOSS_FRAC] = loss_frac_per_hour
+        prm[sk.P_H2_SPEC_IN] = h2_spec_kwh_per_kg_in
+        prm[sk.P_H2_RELIQ_KWH] = h2_reliq_kwh_per_kg
+        prm[sk.P_H2_RELIQ_FRAC] = h2_reliq_frac
+        prm[sk.P_H2_STORAGE_KG_MAX] = h2_storage_kg_max
+        prm[sk.P_H2_EL_STOP_KG] = h2_el_stop_kg
+        prm[sk.P_H2_EL_START_KG] = h2_el_start_kg
+        prm[sk.P_WATER_KG_PER_KGH2] = water_kg_per_kgH2
+        prm[sk.P_RO_SPEC_KWH_PER_M3] = ro_spec_kwh_per_m3
+        prm[sk.P_WATER_LOSS_FRAC] = water_loss_frac_per_hour
+        prm[sk.P_WATER_TANK_M3_MAX] = float(water_tank_m3_max)
+        prm[sk.P_HB_SPEC_KWH_PER_KG] = hb_spec_kwh_per_kgNH3
+        prm[sk.P_N2_SPEC_KWH_PER_KG] = spec_kwh_per_kgN2
+        prm[sk.P_H2_SPEC_OUT] = h2_spec_kwh_per_kg_out
+        prm[sk.P_NH3_SPEC_IN] = nh3_spec_kwh_per_t_in
+        prm[sk.P_NH3_SPEC_OUT] = nh3_spec_kwh_per_t_out
+        prm[sk.P_NH3_COOLING_KWH] = nh3_cooling_kwh_per_t_per_day
+        prm[sk.P_HB_CAP_T_PER_H] = hb_capacity_tNH3_per_h
+        prm[sk.P_HB_MIN_FRAC] = float(hb_min_frac_when_on)
+        prm[sk.P_HB_STEP] = float(hb_ramp_frac_per_h) * float(hb_capacity_tNH3_per_h)
+        prm[sk.P_NH3_STORAGE_T_MAX] = nh3_storage_t_max
+        prm[sk.P_NH3_SOC_TARGET_T] = nh3_soc_target_t
+        prm[sk.P_NH3_SOC_HIGH_T] = nh3_soc_high_t
+        prm[sk.P_NH3_TARGET_TOTAL_T] = nh3_target_total_t
+        prm[sk.P_NH3_PER_SHIP_T] = nh3_target_per_ship_t
+        prm[sk.P_SHIP_INTERVAL] = ship_interval
+        prm[sk.P_MAX_FAILED_SHIPS] = max_failed
+        if reduced:
+            prm[sk.P_NH3_TARGET_TOTAL_T] = np.inf
+            if not df_profile.ship_aligned(ship_interval):
+                # stündliche NH3-Abnahme statt Schiffsladungen
+                prm[sk.P_NH3_PER_SHIP_T] = float(annual_nh3_prod_t) / 8760.0
+                prm[sk.P_SHIP_INTERVAL] = 1.0
+                next_ship_time = 1.0
+        prm[sk.P_KWH_PER_T_HBCHAIN] = (
+            hb_spec_kwh_per_kgNH3 * 1000.0
+            + (n2_kg_per_kg_nh3 * 1000.0) * spec_kwh_per_kgN2
+            + (h2_kg_per_kg_nh3 * 1000.0) * h2_spec_kwh_per_kg_out
+            + nh3_spec_kwh_per_t_in
+        )
 
-            nh3_t = min(
-                hb_capacity_tNH3_per_h,
-                nh3_possible_from_h2_t,
-                nh3_power_limit_t,
-                nh3_free_t,
-                nh3_remaining_total_t
+        st = np.zeros(sk.N_STATE, dtype=np.float64)
+        st[sk.ST_SOC_H2_KG] = soc_h2_kg
+        st[sk.ST_SOC_NH3_T] = soc_nh3_t
+        st[sk.ST_SOC_WATER_M3] = soc_water_m3
+        st[sk.ST_EL_ALLOWED] = 1.0 if el_allowed else 0.0
+        st[sk.ST_P_STACK_PREV] = p_stack_prev
+        st[sk.ST_NH3_HB_PREV] = nh3_hb_prev_t
+        st[sk.ST_NEXT_SHIP_TIME] = next_ship_time
+        st[sk.ST_NH3_PROD_TOTAL_T] = nh3_prod_total_t
+
+        acc = np.zeros(sk.N_ACC, dtype=np.float64)
+        acc[sk.A_H2_SOC_MAX_KG] = h2_soc_max_kg
+        acc[sk.A_NH3_SOC_MAX_T] = nh3_soc_max_t
+        acc[sk.A_WATER_SOC_MAX_M3] = water_soc_max_m3
+
+        steady_info = None
+        if steady_state and isinstance(df_profile, wind_profile.RepeatingProfile) and not return_timeseries:
+            steady_info = sk.run_years_steady_state(
+                p_base, df_profile.n_repeats, prm, st, acc, tol=float(steady_state_tol)
             )
+            hours_done = steady_info[2]
+        elif reduced:
+            sk.run_weighted_periods(p_base, df_profile.period_hours, df_profile.weights, prm, st, acc)
+            if not df_profile.ship_aligned(ship_interval):
+                acc[sk.A_SHIP_COUNT], acc[sk.A_SHIPS_FAILED] = profile_reduction.offtake_shortfall_ships(
+                    acc[sk.A_SHIP_OUT_T], len(df_profile), annual_nh3_prod_t, ships_per_year
+                )
+        elif collector is not None:
+            while not collector.finished:
+                block_end = collector.end
+                hours_done = sk.run_hours(p_base, collector.start, block_end, prm, st, acc, collector.block)
+                collector.advance(hours_done)
+                if hours_done < block_end:
+                    break
+        else:
+            hours_done = sk.run_hours(p_base, 0, n_hours, prm, st, acc, sk.empty_timeseries())
+
+        soc_h2_kg = float(st[sk.ST_SOC_H2_KG])
+        soc_nh3_t = float(st[sk.ST_SOC_NH3_T])
+        soc_water_m3 = float(st[sk.ST_SOC_WATER_M3])
+        nh3_prod_total_t = float(st[sk.ST_NH3_PROD_TOTAL_T])
+
+        curtailed_mwh = float(acc[sk.A_CURTAILED_MWH])
+        ships_failed_count = int(round(acc[sk.A_SHIPS_FAILED]))
+        ship_count = int(round(acc[sk.A_SHIP_COUNT]))
+        el_energy_mwh_sum = float(acc[sk.A_EL_MWH])
+        hb_energy_mwh_sum = float(acc[sk.A_HB_MWH])
+        n2_energy_mwh_sum = float(acc[sk.A_N2_MWH])
+        ro_energy_mwh_sum = float(acc[sk.A_RO_MWH])
+        h2_store_in_mwh_sum = float(acc[sk.A_H2_IN_MWH])
+        h2_store_out_mwh_sum = float(acc[sk.A_H2_OUT_MWH])
+        nh3_store_in_mwh_sum = float(acc[sk.A_NH3_IN_MWH])
+        nh3_store_out_mwh_sum = float(acc[sk.A_NH3_OUT_MWH])
+        h2_reliq_mwh_sum = float(acc[sk.A_H2_RELIQ_MWH])
+        nh3_cooling_mwh_sum = float(acc[sk.A_NH3_COOLING_MWH])
+        nh3_spill_t_sum = float(acc[sk.A_NH3_SPILL_T])
+        ship_out_total_t = float(acc[sk.A_SHIP_OUT_T])
+        water_need_total_m3 = float(acc[sk.A_WATER_NEED_M3])
+        ro_make_total_m3 = float(acc[sk.A_RO_MAKE_M3])
+        water_short_total_m3 = float(acc[sk.A_WATER_SHORT_M3])
+        h2_soc_max_kg = float(acc[sk.A_H2_SOC_MAX_KG])
+        nh3_soc_max_t = float(acc[sk.A_NH3_SOC_MAX_T])
+        water_soc_max_m3 = float(acc[sk.A_WATER_SOC_MAX_M3])
+
+        out = collector.result(timeseries_format) if collector is not None else None
 
-            if nh3_t > 0.0 and nh3_t < hb_min_frac_when_on * hb_capacity_tNH3_per_h:
-                nh3_hb_prev_t = 0.0
-                return 0.0, 0.0
-
-            # -------- HB Ramp (bilanz-sicher) --------
-            nh3_step = float(hb_ramp_frac_per_h) * float(hb_capacity_tNH3_per_h)
-            nh3_t = max(0.0, min(nh3_hb_prev_t + nh3_step, max(nh3_hb_prev_t - nh3_step, nh3_t)))
-
-            p_used = (nh3_t * kwh_per_t_hbchain) / 1000.0
-            nh3_hb_prev_t = float(nh3_t)
-            return nh3_t, p_used
-
-        # -------------------------
-        # Dispatch (Kühlung abgezogen!)
-        # -------------------------
-        p_rem = max(0.0, p_wind - p_h2_reliq_mw - p_nh3_cooling_mw)
-
-        # HB zuerst
-        nh3_0, p0 = run_hb(p_rem)
-        nh3_hb_t += nh3_0
-        p_hbchain_mw += p0
-        p_rem = max(0.0, p_rem - p0)
-
-        # EL + RO gekoppelt (bilanz-sicher)
-        (p_el, p_h2_in_mw, p_el_total_mw, soc_h2_kg, h2_spill_kg,
-         p_ro_mw, ro_make_m3,
-         water_need_m3, soc_water_m3, water_short_m3,
-         p_rem, p_stack_used) = run_el_with_ro_and_tank(p_rem, soc_water_m3, soc_h2_kg, p_stack_prev)
-
-        p_stack_prev = p_stack_used
-
-        # Optional: Tank mit Rest füllen
-        p_ro2_mw, ro_make2_m3, soc_water_m3 = run_ro_fill_tank_with_rest(p_rem, soc_water_m3)
-        p_ro_mw += p_ro2_mw
-        ro_make_m3 += ro_make2_m3
-        p_rem = max(0.0, p_rem - p_ro2_mw)
-
-        # nach EL nochmal HB
-        nh3_possible_from_h2_kg = (soc_h2_kg * eta_out) / h2_kg_per_kg_nh3
-        nh3_possible_from_h2_t = nh3_possible_from_h2_kg / 1000.0
-
-        nh3_1, p1 = run_hb(p_rem)
-        nh3_hb_t += nh3_1
-        p_hbchain_mw += p1
-        p_rem = max(0.0, p_rem - p1)
-
-        # -------------------------
-        # Material + Energie aus HB
-        # -------------------------
-        if nh3_hb_t > 0.0:
-            h2_cons_kg = nh3_hb_t * 1000.0 * h2_kg_per_kg_nh3
-            soc_h2_kg = max(0.0, soc_h2_kg - (h2_cons_kg / eta_out))
-
-            soc_nh3_t += nh3_hb_t
-            nh3_prod_total_t += nh3_hb_t
-
-            if soc_nh3_t > nh3_storage_t_max:
-                nh3_spill_t_sum += (soc_nh3_t - nh3_storage_t_max)
-                soc_nh3_t = nh3_storage_t_max
-
-            hb_energy_mwh_sum += (nh3_hb_t * 1000.0 * hb_spec_kwh_per_kgNH3) / 1000.0
-
-            n2_need_kg = nh3_hb_t * 1000.0 * n2_kg_per_kg_nh3
-            n2_energy_mwh_sum += (n2_need_kg * spec_kwh_per_kgN2) / 1000.0
-
-            h2_store_out_mwh_sum += (h2_cons_kg * h2_spec_kwh_per_kg_out) / 1000.0
-            nh3_store_in_mwh_sum += (nh3_hb_t * nh3_spec_kwh_per_t_in) / 1000.0
-
-        # EL Energie
-        el_energy_mwh_sum += p_el
-        h2_store_in_mwh_sum += p_h2_in_mw
-
-        # RO Energie
-        ro_energy_mwh_sum += p_ro_mw
-
-        # Wasser Summen
-        water_need_total_m3 += water_need_m3
-        ro_make_total_m3 += ro_make_m3
-        water_short_total_m3 += water_short_m3
-
+    else:
         # -------------------------
-        # Schiff (kontinuierlich)
+        # Loop
         # -------------------------
-        p_nh3_out_mw = 0.0
-        loaded_t = 0.0
-        hour_number = hour_index + 1
-
-        if hour_number >= next_ship_time - 1e-9:
-            ship_count += 1
-
-            if soc_nh3_t >= nh3_target_per_ship_t:
-                loaded_t = nh3_target_per_ship_t
-                soc_nh3_t -= nh3_target_per_ship_t
-            else:
-                ships_failed_count += 1
-                loaded_t = soc_nh3_t
-                soc_nh3_t = 0.0
-
-            ship_out_total_t += loaded_t
-
-            p_nh3_out_mw = (loaded_t * nh3_spec_kwh_per_t_out) / 1000.0
-            nh3_store_out_mwh_sum += p_nh3_out_mw
-
-            next_ship_time += ship_interval
-
-        # Curtailment + Maxima
-        p_used_total = (
-            p_h2_reliq_mw +
-            p_nh3_cooling_mw +
-            p_hbchain_mw +
-            p_ro_mw +
-            p_el_total_mw +
-            p_nh3_out_mw
-        )
+        if isinstance(df_profile, wind_profile.RepeatingProfile):
+            # Zeitstempel kommen für die Zeitreihe aus df_profile.index
+            hour_items = df_profile.items(with_index=False)
+        else:
+            hour_items = df_profile["p_mw"].items()
+
+        for hour_index, (_, p_wind_base) in enumerate(hour_items):
+            p_wind = float(p_wind_base) * float(s)
+
+            # Water Tank Verluste
+            if water_loss_frac_per_hour > 0.0:
+                soc_water_m3 *= (1.0 - water_loss_frac_per_hour)
+
+            # -------------------------
+            # KÜHLUNG FIRST: zieht Windstrom ab
+            # -------------------------
+            bog_kg = soc_h2_kg * loss_frac_per_hour
+            reliq_kg = bog_kg * h2_reliq_frac
+            p_h2_reliq_mw = (reliq_kg * h2_reliq_kwh_per_kg) / 1000.0
+            soc_h2_kg -= bog_kg
+
+            p_nh3_cooling_mw = (soc_nh3_t * nh3_cooling_kwh_per_t_per_day / 24.0) / 1000.0
+
+            h2_reliq_mwh_sum += p_h2_reliq_mw
+            nh3_cooling_mwh_sum += p_nh3_cooling_mw
+
+            # HB-Hilfsgrößen
+            nh3_possible_from_h2_kg = (soc_h2_kg * eta_out) / h2_kg_per_kg_nh3
+            nh3_possible_from_h2_t = nh3_possible_from_h2_kg / 1000.0
+
+            kwh_per_t_hb = hb_spec_kwh_per_kgNH3 * 1000.0
+            kwh_per_t_n2 = (n2_kg_per_kg_nh3 * 1000.0) * spec_kwh_per_kgN2
+            kwh_per_t_h2_out = (h2_kg_per_kg_nh3 * 1000.0) * h2_spec_kwh_per_kg_out
+            kwh_per_t_nh3_in = nh3_spec_kwh_per_t_in
+            kwh_per_t_hbchain = kwh_per_t_hb + kwh_per_t_n2 + kwh_per_t_h2_out + kwh_per_t_nh3_in
+
+            # Init pro Stunde
+            nh3_hb_t = 0.0
+            p_hbchain_mw = 0.0
+
+            p_el = 0.0
+            p_h2_in_mw = 0.0
+            p_el_total_mw = 0.0
+            h2_spill_kg = 0.0
+
+            p_ro_mw = 0.0
+            ro_make_m3 = 0.0
+            water_need_m3 = 0.0
+            water_short_m3 = 0.0
+
+            def run_hb(p_available_mw):
+                nonlocal nh3_possible_from_h2_t, nh3_hb_prev_t
+
+                if nh3_prod_total_t >= nh3_target_total_t - 1e-9:
+                    nh3_hb_prev_t = 0.0
+                    return 0.0, 0.0
+
+                # NH3 Level Control: wenn Tank "hoch genug", HB aus
+                if soc_nh3_t >= nh3_soc_high_t:
+                    nh3_hb_prev_t = 0.0
+                    return 0.0, 0.0
+
+                if nh3_possible_from_h2_t <= 0.0 or hb_capacity_tNH3_per_h <= 0.0:
+                    nh3_hb_prev_t = 0.0
+                    return 0.0, 0.0
+
+                # nur bis Zielniveau auffüllen
+                nh3_free_t = max(0.0, nh3_soc_target_t - soc_nh3_t)
+                if nh3_free_t <= 0.0:
+                    nh3_hb_prev_t = 0.0
+                    return 0.0, 0.0
+
+                if kwh_per_t_hbchain > 0.0:
+                    nh3_power_limit_t = (p_available_mw * 1000.0) / kwh_per_t_hbchain
+                else:
+                    nh3_power_limit_t = hb_capacity_tNH3_per_h
+
+                nh3_remaining_total_t = max(0.0, nh3_target_total_t - nh3_prod_total_t)
+
+                nh3_t = min(
+                    hb_capacity_tNH3_per_h,
+                    nh3_possible_from_h2_t,
+                    nh3_power_limit_t,
+                    nh3_free_t,
+                    nh3_remaining_total_t
+                )
+
+                if nh3_t > 0.0 and nh3_t < hb_min_frac_when_on * hb_capacity_tNH3_per_h:
+                    nh3_hb_prev_t = 0.0
+                    return 0.0, 0.0
+
+                # -------- HB Ramp (bilanz-sicher) --------
+                nh3_step = float(hb_ramp_frac_per_h) * float(hb_capacity_tNH3_per_h)
+                nh3_t = max(0.0, min(nh3_hb_prev_t + nh3_step, max(nh3_hb_prev_t - nh3_step, nh3_t)))
+
+                p_used = (nh3_t * kwh_per_t_hbchain) / 1000.0
+                nh3_hb_prev_t = float(nh3_t)
+                return nh3_t, p_used
+
+            # -------------------------
+            # Dispatch (Kühlung abgezogen!)
+            # -------------------------
+            p_rem = max(0.0, p_wind - p_h2_reliq_mw - p_nh3_cooling_mw)
+
+            # HB zuerst
+            nh3_0, p0 = run_hb(p_rem)
+            nh3_hb_t += nh3_0
+            p_hbchain_mw += p0
+            p_rem = max(0.0, p_rem - p0)
+
+            # EL + RO gekoppelt (bilanz-sicher)
+            (p_el, p_h2_in_mw, p_el_total_mw, soc_h2_kg, h2_spill_kg,
+             p_ro_mw, ro_make_m3,
+             water_need_m3, soc_water_m3, water_short_m3,
+             p_rem, p_stack_used) = run_el_with_ro_and_tank(p_rem, soc_water_m3, soc_h2_kg, p_stack_prev)
+
+            p_stack_prev = p_stack_used
+
+            # Optional: Tank mit Rest füllen
+            p_ro2_mw, ro_make2_m3, soc_water_m3 = run_ro_fill_tank_with_rest(p_rem, soc_water_m3)
+            p_ro_mw += p_ro2_mw
+            ro_make_m3 += ro_make2_m3
+            p_rem = max(0.0, p_rem - p_ro2_mw)
+
+            # nach EL nochmal HB
+            nh3_possible_from_h2_kg = (soc_h2_kg * eta_out) / h2_kg_per_kg_nh3
+            nh3_possible_from_h2_t = nh3_possible_from_h2_kg / 1000.0
+
+            nh3_1, p1 = run_hb(p_rem)
+            nh3_hb_t += nh3_1
+            p_hbchain_mw += p1
+            p_rem = max(0.0, p_rem - p1)
+
+            # -------------------------
+            # Material + Energie aus HB
+            # -------------------------
+            if nh3_hb_t > 0.0:
+                h2_cons_kg = nh3_hb_t * 1000.0 * h2_kg_per_kg_nh3
+                soc_h2_kg = max(0.0, soc_h2_kg - (h2_cons_kg / eta_out))
+
+                soc_nh3_t += nh3_hb_t
+                nh3_prod_total_t += nh3_hb_t
+
+                if soc_nh3_t > nh3_storage_t_max:
+                    nh3_spill_t_sum += (soc_nh3_t - nh3_storage_t_max)
+                    soc_nh3_t = nh3_storage_t_max
+
+                hb_energy_mwh_sum += (nh3_hb_t * 1000.0 * hb_spec_kwh_per_kgNH3) / 1000.0
+
+                n2_need_kg = nh3_hb_t * 1000.0 * n2_kg_per_kg_nh3
+                n2_energy_mwh_sum += (n2_need_kg * spec_kwh_per_kgN2) / 1000.0
+
+                h2_store_out_mwh_sum += (h2_cons_kg * h2_spec_kwh_per_kg_out) / 1000.0
+                nh3_store_in_mwh_sum += (nh3_hb_t * nh3_spec_kwh_per_t_in) / 1000.0
+
+            # EL Energie
+            el_energy_mwh_sum += p_el
+            h2_store_in_mwh_sum += p_h2_in_mw
+
+            # RO Energie
+            ro_energy_mwh_sum += p_ro_mw
+
+            # Wasser Summen
+            water_need_total_m3 += water_need_m3
+            ro_make_total_m3 += ro_make_m3
+            water_short_total_m3 += water_short_m3
+
+            # -------------------------
+            # Schiff (kontinuierlich)
+            # -------------------------
+            p_nh3_out_mw = 0.0
+            loaded_t = 0.0
+            hour_number = hour_index + 1
+
+            if hour_number >= next_ship_time - 1e-9:
+                ship_count += 1
+
+                if soc_nh3_t >= nh3_target_per_ship_t:
+                    loaded_t = nh3_target_per_ship_t
+                    soc_nh3_t -= nh3_target_per_ship_t
+                else:
+                    ships_failed_count += 1
+                    loaded_t = soc_nh3_t
+                    soc_nh3_t = 0.0
+
+                ship_out_total_t += loaded_t
+
+                p_nh3_out_mw = (loaded_t * nh3_spec_kwh_per_t_out) / 1000.0
+                nh3_store_out_mwh_sum += p_nh3_out_mw
+
+                next_ship_time += ship_interval
+
+            # Curtailment + Maxima
+            p_used_total = (
+                p_h2_reliq_mw +
+                p_nh3_cooling_mw +
+                p_hbchain_mw +
+                p_ro_mw +
+                p_el_total_mw +
+                p_nh3_out_mw
+            )
 
-        curtailed_mwh += max(p_wind - p_used_total, 0.0)
+            curtailed_mwh += max(p_wind - p_used_total, 0.0)
+
+            h2_soc_max_kg = max(h2_soc_max_kg, soc_h2_kg)
+            nh3_soc_max_t = max(nh3_soc_max_t, soc_nh3_t)
+            water_soc_max_m3 = max(water_soc_max_m3, soc_water_m3)
+
+            if collector is not None:
+                # Reihenfolge = sim_kernel.TS_COLUMNS
+                collector.block[:, hour_index - collector.start] = (
+                    p_wind,
+                    p_h2_reliq_mw,
+                    p_nh3_cooling_mw,
+                    p_hbchain_mw,
+                    p_ro_mw,
+                    p_el,
+                    p_used_total,
+                    max(p_wind - p_used_total, 0.0),
+
+                    soc_h2_kg,
+                    soc_nh3_t,
+                    soc_water_m3,
+
+                    nh3_hb_t,
+                    loaded_t,
+                    h2_spill_kg,
+
+                    ro_make_m3,
+                    water_need_m3,
+                    water_short_m3,
+                )
+                if hour_index + 1 == collector.end:
+                    collector.advance(hour_index + 1)
+
+            if ships_failed_count > max_failed:
+                hours_done = hour_index + 1
+                break
 
-        h2_soc_max_kg = max(h2_soc_max_kg, soc_h2_kg)
-        nh3_soc_max_t = max(nh3_soc_max_t, soc_nh3_t)
-        water_soc_max_m3 = max(water_soc_max_m3, soc_water_m3)
+        if collector is not None:
+            # angebrochener Block nach Abbruch
+            collector.advance(hours_done)
 
-        if return_timeseries:
-            rows.append({
-                "t": ts,
-                "p_wind_mw": p_wind,
-                "p_h2_reliq_mw": p_h2_reliq_mw,
-                "p_nh3_cooling_mw": p_nh3_cooling_mw,
-                "p_hbchain_mw": p_hbchain_mw,
-                "p_ro_mw": p_ro_mw,
-                "p_el_mw": p_el,
-                "p_used_total_mw": p_used_total,
-                "curtail_mwh": max(p_wind - p_used_total, 0.0),
-
-                "h2_soc_kg": soc_h2_kg,
-                "nh3_soc_t": soc_nh3_t,
-                "water_soc_m3": soc_water_m3,
-
-                "nh3_prod_t": nh3_hb_t,
-                "ship_loaded_t": loaded_t,
-                "h2_spill_kg": h2_spill_kg,
-
-                "ro_make_m3": ro_make_m3,
-                "water_need_m3": water_need_m3,
-                "water_short_m3": water_short_m3,
-            })
+        out = collector.result(timeseries_format) if collector is not None else None
 
     # KPIs (Raster-kompatibel!)
     kpis = {
@@ -731,6 +1189,15 @@ def simulate_hourly_system(
         "water_short_total_m3": float(water_short_total_m3),
     }
 
+    if steady_state:
+        years_simulated, steady_year, _ = steady_info if steady_info is not None else (sim_years_est, -1, 0)
+        kpis["steady_state_year"] = int(steady_year)
+        kpis["years_simulated"] = float(years_simulated)
+
+    if early_stop:
+        kpis["terminated_early"] = bool(hours_done < len(df_profile))
+        kpis["hours_simulated"] = int(hours_done)
+
     if debug_ships:
         print("\n--- FINAL CHECK (Raster-kompatibel) ---")
         print("sim_years_est:", round(sim_years_est, 3))
@@ -746,7 +1213,6 @@ def simulate_hourly_system(
         print("Curtailment [GWh]:", round(curtailed_mwh / 1000.0, 3))
         print("Water end [m3]:", round(soc_water_m3, 2), "| Water max [m3]:", round(water_soc_max_m3, 2))
 
-    out = pd.DataFrame(rows).set_index("t") if return_timeseries else None
     return out, kpis
 
 
@@ -760,8 +1226,10 @@ def cost_components_proxy(
     nh3_storage_t: float,
     h2_storage_t_design: float,
     water_tank_m3_design: float,          # <- NEU (Design-Volumen)
-    technology: str = "AEL"
+    technology: str = "AEL",
+    cost_params_override: dict = None,    # z.B. merge_cost_params({...}) für Kosten-Sensitivitäten
 ):
+    cost_params = globals()["cost_params"] if cost_params_override is None else cost_params_override
     tech = technology.upper()
     years = float(cost_params["general"]["project_lifetime_years"])
 
@@ -880,209 +1348,761 @@ def cost_components_proxy(
     )
 
 
-# %%
-# %%
-# %% Raster (NH3-Speicher + Wassertank als Raster, inkl. RO/Tank-Kosten)
+# Namen der 19 Rückgabewerte von cost_components_proxy (gleiche Reihenfolge)
+COST_COLUMNS = [
+    "Wind_TOTAL", "Wind_CAPEX", "Wind_OPEX", "Wind_DAPEX",
+    "EL_CAPEX", "EL_OPEX_total",
+    "HB_CAPEX", "HB_OPEX_total",
+    "N2_CAPEX", "N2_OPEX_total",
+    "RO_CAPEX", "RO_OPEX_total",
+    "WATER_TANK_CAPEX", "WATER_TANK_OPEX_total",
+    "H2_STORE_CAPEX", "H2_STORE_OPEX_total",
+    "NH3_STORE_CAPEX", "NH3_STORE_OPEX_total",
 
-s_values = np.arange(0.95, 1.00001, 0.01)
-pel_values = np.arange(1000, 1200, 50)
-h2_storage_days_values = np.arange(1, 2.1, 1)
+    "Total_proxy",
+]
 
-nh3_storage_ships_values = np.arange(1, 1.51, 0.25)
-water_tank_m3_values = np.arange(500, 4501, 2000)
+# Spaltennamen im Raster/Batch-Ergebnis, falls ein DataFrame übergeben wird
+_COST_INPUT_ALIASES = {
+    "p_el_mw": "P_el_MW",
+    "nh3_storage_t": "NH3_storage_max_t",
+    "water_tank_m3_design": "water_tank_m3_max",
+    "technology": "tech",
+}
+
+
+def cost_components_proxy_vec(
+    s,
+    p_el_mw=None,
+    nh3_storage_t=None,
+    h2_storage_t_design=None,
+    water_tank_m3_design=None,
+    technology="AEL",
+    cost_params_override: dict = None,
+) -> pd.DataFrame:
+    """
+    cost_components_proxy für N Designs auf einmal -> DataFrame mit COST_COLUMNS.
+
+    Eingaben als Arrays gleicher Länge (Skalare werden verbreitert); technology als
+    String oder Array von Technologie-Codes ("AEL"/"PEM"). Alternativ ein DataFrame als
+    erstes Argument mit den Spalten der Argumentnamen oder der Raster-Spalten
+    (P_el_MW, NH3_storage_max_t, h2_storage_t_design, water_tank_m3_max, tech).
+    Gleiche Rechenreihenfolge wie die Skalar-Version -> bitgleiche Ergebnisse.
+    """
+    if isinstance(s, pd.DataFrame):
+        df = s
+
+        def col(name):
+            if name in df.columns:
+                return df[name].to_numpy()
+            return df[_COST_INPUT_ALIASES[name]].to_numpy()
+
+        s = col("s")
+        p_el_mw = col("p_el_mw")
+        nh3_storage_t = col("nh3_storage_t")
+        h2_storage_t_design = col("h2_storage_t_design")
+        water_tank_m3_design = col("water_tank_m3_design")
+        if "technology" in df.columns or "tech" in df.columns:
+            technology = col("technology")
+
+    s, p_el_mw, nh3_storage_t, h2_storage_t_design, water_tank_m3_design = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=np.float64))
+          for x in (s, p_el_mw, nh3_storage_t, h2_storage_t_design, water_tank_m3_design))
+    )
+    n = len(s)
+
+    cost_params = globals()["cost_params"] if cost_params_override is None else cost_params_override
+    years = float(cost_params["general"]["project_lifetime_years"])
 
-rows_ael = []
-rows_pem = []
-
-for s in s_values:
-    for pel in pel_values:
-        for h2_days in h2_storage_days_values:
-            h2_storage_t_candidate = (annual_h2_prod_t / 365.0) * float(h2_days)
-
-            for nh3_ships in nh3_storage_ships_values:
-                for w_tank_m3 in water_tank_m3_values:
-
-                    # ---------- AEL ----------
-                    _, kpi_ael = simulate_hourly_system(
-                        s=float(s),
-                        p_el_mw=float(pel),
-                        technology="AEL",
-                        h2_storage_t_max=float(h2_storage_t_candidate),
-                        nh3_storage_ships=float(nh3_ships),
-                        water_tank_m3_max=float(w_tank_m3),
-                        return_timeseries=False,
-                        df_profile=df2
-                    )
-
-                    (wind_total_a, wind_capex_a, wind_opex_a, wind_dapex_a,
-                     el_capex_a, el_opex_a,
-                     hb_capex_a, hb_opex_a,
-                     n2_capex_a, n2_opex_a,
-                     ro_capex_a, ro_opex_a,
-                     wt_capex_a, wt_opex_a,
-                     h2_capex_a, h2_opex_a,
-                     nh3_capex_a, nh3_opex_a,
-                     tot_a) = cost_components_proxy(
-                        s=float(s),
-                        p_el_mw=float(pel),
-                        nh3_storage_t=float(kpi_ael["nh3_storage_max_t"]),
-                        h2_storage_t_design=float(h2_storage_t_candidate),
-                        water_tank_m3_design=float(w_tank_m3),
-                        technology="AEL"
-                    )
-
-                    rows_ael.append((
-                        float(s), float(pel), float(h2_days), float(h2_storage_t_candidate),
-                        float(nh3_ships), float(w_tank_m3),
-
-                        float(kpi_ael["nh3_storage_max_t"]),
-                        float(kpi_ael["h2_storage_max_t"]),
-                        float(kpi_ael["water_storage_max_m3"]),
-                        float(kpi_ael["curtail_GWh_per_sim"]),
-                        int(kpi_ael["ships_failed_count"]),
-
-                        float(kpi_ael["EL_el_MWh_per_sim"]),
-                        float(kpi_ael["RO_el_MWh_per_sim"]),
-                        float(kpi_ael["HB_el_MWh_per_sim"]),
-                        float(kpi_ael["N2_el_MWh_per_sim"]),
-
-                        float(kpi_ael["H2_store_in_MWh_per_sim"]),
-                        float(kpi_ael["H2_store_out_MWh_per_sim"]),
-                        float(kpi_ael["NH3_store_in_MWh_per_sim"]),
-                        float(kpi_ael["NH3_store_out_MWh_per_sim"]),
-
-                        float(wind_total_a), float(wind_capex_a), float(wind_opex_a), float(wind_dapex_a),
-                        float(el_capex_a), float(el_opex_a),
-                        float(hb_capex_a), float(hb_opex_a),
-                        float(n2_capex_a), float(n2_opex_a),
-                        float(ro_capex_a), float(ro_opex_a),
-                        float(wt_capex_a), float(wt_opex_a),
-                        float(h2_capex_a), float(h2_opex_a),
-                        float(nh3_capex_a), float(nh3_opex_a),
-
-                        float(tot_a),
-                    ))
-
-                    # ---------- PEM ----------
-                    _, kpi_pem = simulate_hourly_system(
-                        s=float(s),
-                        p_el_mw=float(pel),
-                        technology="PEM",
-                        h2_storage_t_max=float(h2_storage_t_candidate),
-                        nh3_storage_ships=float(nh3_ships),
-                        water_tank_m3_max=float(w_tank_m3),
-                        return_timeseries=False,
-                        df_profile=df2
-                    )
-
-                    (wind_total_p, wind_capex_p, wind_opex_p, wind_dapex_p,
-                     el_capex_p, el_opex_p,
-                     hb_capex_p, hb_opex_p,
-                     n2_capex_p, n2_opex_p,
-                     ro_capex_p, ro_opex_p,
-                     wt_capex_p, wt_opex_p,
-                     h2_capex_p, h2_opex_p,
-                     nh3_capex_p, nh3_opex_p,
-                     tot_p) = cost_components_proxy(
-                        s=float(s),
-                        p_el_mw=float(pel),
-                        nh3_storage_t=float(kpi_pem["nh3_storage_max_t"]),
-                        h2_storage_t_design=float(h2_storage_t_candidate),
-                        water_tank_m3_design=float(w_tank_m3),
-                        technology="PEM"
-                    )
-
-                    rows_pem.append((
-                        float(s), float(pel), float(h2_days), float(h2_storage_t_candidate),
-                        float(nh3_ships), float(w_tank_m3),
-
-                        float(kpi_pem["nh3_storage_max_t"]),
-                        float(kpi_pem["h2_storage_max_t"]),
-                        float(kpi_pem["water_storage_max_m3"]),
-                        float(kpi_pem["curtail_GWh_per_sim"]),
-                        int(kpi_pem["ships_failed_count"]),
-
-                        float(kpi_pem["EL_el_MWh_per_sim"]),
-                        float(kpi_pem["RO_el_MWh_per_sim"]),
-                        float(kpi_pem["HB_el_MWh_per_sim"]),
-                        float(kpi_pem["N2_el_MWh_per_sim"]),
-
-                        float(kpi_pem["H2_store_in_MWh_per_sim"]),
-                        float(kpi_pem["H2_store_out_MWh_per_sim"]),
-                        float(kpi_pem["NH3_store_in_MWh_per_sim"]),
-                        float(kpi_pem["NH3_store_out_MWh_per_sim"]),
-
-                        float(wind_total_p), float(wind_capex_p), float(wind_opex_p), float(wind_dapex_p),
-                        float(el_capex_p), float(el_opex_p),
-                        float(hb_capex_p), float(hb_opex_p),
-                        float(n2_capex_p), float(n2_opex_p),
-                        float(ro_capex_p), float(ro_opex_p),
-                        float(wt_capex_p), float(wt_opex_p),
-                        float(h2_capex_p), float(h2_opex_p),
-                        float(nh3_capex_p), float(nh3_opex_p),
-
-                        float(tot_p),
-                    ))
-
-cols = [
+    # Technologie-Codes -> Index in die Elektrolyse-Parameter
+    tech_arr = np.broadcast_to(np.atleast_1d(np.asarray(technology, dtype=str)), (n,))
+    techs, tech_idx = np.unique(np.char.upper(tech_arr), return_inverse=True)
+    elps = [cost_params["h2"]["electrolyzer"][t] for t in techs]
+
+    def per_tech(key):
+        return np.array([float(e[key]) for e in elps], dtype=np.float64)[tech_idx]
+
+    # Skalare Komponenten (designunabhängig) über die Skalar-Version
+    (wind_total, wind_capex, wind_opex, wind_dapex, _el_capex, _el_opex_total,
+     hb_capex, hb_opex_total, n2_capex, n2_opex_total,
+     *_rest) = cost_components_proxy(0.0, 0.0, 0.0, 0.0, 0.0, str(techs[0]) if len(techs) else "AEL",
+                                     cost_params_override=cost_params)
+
+    # Elektrolyse
+    el_capex = per_tech("capex_usd_per_kw") * p_el_mw * 1000.0
+    el_opex_total = per_tech("opex_usd_per_kw_per_year") * p_el_mw * 1000.0 * years
+
+    # H2 / NH3 Speicher
+    h2p = cost_params["h2"]["storage"]
+    h2_capex = h2p["capex_usd_per_tH2"] * h2_storage_t_design
+    h2_opex_total = h2_capex * h2p["opex_fraction_per_year"] * years
+
+    nh3p = cost_params["nh3_storage"]
+    nh3_capex = nh3p["capex_usd_per_tNH3"] * nh3_storage_t
+    nh3_opex_total = nh3_capex * nh3p["opex_fraction_per_year"] * years
+
+    # RO – Design gekoppelt an EL Designleistung
+    rop = cost_params.get("water", {}).get("ro", {})
+    water_kg_per_kgH2 = float(rop.get("water_kg_per_kgH2", 10.0))
+    ro_capex_usd_per_m3pd = float(rop.get("capex_usd_per_m3_per_day", 1200.0))
+    ro_opex_frac = float(rop.get("opex_fraction_per_year", 0.05))
+    ro_opex_usd_per_m3 = float(rop.get("opex_usd_per_m3", 0.0))
+
+    h2_kg_per_h_design = (p_el_mw * 1000.0) / per_tech("spec_kwh_per_kgH2")
+    ro_m3_per_day_design = ((h2_kg_per_h_design * water_kg_per_kgH2) / 1000.0) * 24.0
+    ro_capex = ro_capex_usd_per_m3pd * ro_m3_per_day_design
+    ro_opex_total = ro_capex * ro_opex_frac * years
+    annual_water_m3 = (annual_h2_prod_t * 1000.0 * water_kg_per_kgH2) / 1000.0
+    ro_opex_total += ro_opex_usd_per_m3 * annual_water_m3 * years
+
+    # Water Tank
+    wtp = cost_params.get("water", {}).get("tank", {})
+    water_tank_capex = float(wtp.get("capex_usd_per_m3", 50.0)) * water_tank_m3_design
+    water_tank_opex_total = water_tank_capex * float(wtp.get("opex_fraction_per_year", 0.02)) * years
+
+    total_proxy = (
+        wind_total +
+        el_capex + el_opex_total +
+        hb_capex + hb_opex_total +
+        n2_capex + n2_opex_total +
+        ro_capex + ro_opex_total +
+        water_tank_capex + water_tank_opex_total +
+        h2_capex + h2_opex_total +
+        nh3_capex + nh3_opex_total
+    )
+
+    values = (
+        wind_total, wind_capex, wind_opex, wind_dapex,
+        el_capex, el_opex_total,
+        hb_capex, hb_opex_total,
+        n2_capex, n2_opex_total,
+        ro_capex, ro_opex_total,
+        water_tank_capex, water_tank_opex_total,
+        h2_capex, h2_opex_total,
+        nh3_capex, nh3_opex_total,
+        total_proxy,
+    )
+    return pd.DataFrame(
+        {name: np.broadcast_to(np.asarray(v, dtype=np.float64), (n,)).copy() for name, v in zip(COST_COLUMNS, values)}
+    )
+
+
+# %%
+# %%
+# %% Batch-Simulation: N Konfigurationen in einem Durchlauf über das Windprofil
+
+RASTER_COLUMNS = [
     "s", "P_el_MW", "h2_storage_days", "h2_storage_t_design",
     "nh3_storage_ships", "water_tank_m3_max",
 
     "NH3_storage_max_t", "H2_storage_max_t", "Water_storage_max_m3",
-    "Curtail_GWh_per_sim", "ships_failed_count",
+    "Curtail_GWh_per_sim", "ships_failed_count", "ship_out_total_t",
 
     "EL_el_MWh_per_sim", "RO_el_MWh_per_sim", "HB_el_MWh_per_sim", "N2_el_MWh_per_sim",
     "H2_store_in_MWh_per_sim", "H2_store_out_MWh_per_sim",
     "NH3_store_in_MWh_per_sim", "NH3_store_out_MWh_per_sim",
+] + COST_COLUMNS
 
-    "Wind_TOTAL", "Wind_CAPEX", "Wind_OPEX", "Wind_DAPEX",
-    "EL_CAPEX", "EL_OPEX_total",
-    "HB_CAPEX", "HB_OPEX_total",
-    "N2_CAPEX", "N2_OPEX_total",
-    "RO_CAPEX", "RO_OPEX_total",
-    "WATER_TANK_CAPEX", "WATER_TANK_OPEX_total",
-    "H2_STORE_CAPEX", "H2_STORE_OPEX_total",
-    "NH3_STORE_CAPEX", "NH3_STORE_OPEX_total",
 
-    "Total_proxy",
-]
+def simulate_hourly_system_batch(
+    configs,
+    df_profile: pd.DataFrame = None,
+    stop_on_first_failed_ship: bool = False,
+    max_failed_ships: int = None,
+) -> pd.DataFrame:
+    """
+    Simuliert N Konfigurationen gemeinsam: ein Durchlauf über das Stundenprofil,
+    alle Zustände (SOC H2/NH3/Wasser, Rampen, el_allowed-Hysterese, Schiffszähler)
+    als Arrays der Länge N. Gleiche Fahrweise wie simulate_hourly_system.
+
+    configs: DataFrame oder Liste von dicts mit den Spalten
+        s, P_el_MW, h2_storage_days (oder h2_storage_t_design),
+        nh3_storage_ships, water_tank_m3_max, tech ("AEL"/"PEM")
+
+    stop_on_first_failed_ship / max_failed_ships: wie simulate_hourly_system; Konfigurationen
+        über dem Ausfallbudget werden beim Schiff aus den Zustands-Arrays entfernt (die
+        übrigen laufen mit kleineren Arrays weiter). Zusätzliche Spalten
+        "terminated_early" und "hours_simulated".
+
+    Rückgabe: DataFrame mit den Raster-Spalten (wie res_ael/res_pem) + Spalte "tech".
+    """
+    if df_profile is None:
+        df_profile = get_df2()
+    max_failed = failed_ship_budget(stop_on_first_failed_ship, max_failed_ships)
+    early_stop = max_failed < float("inf")
+
+    cfg = pd.DataFrame(configs).reset_index(drop=True)
+    n_cfg = len(cfg)
+    if n_cfg == 0:
+        return pd.DataFrame(columns=RASTER_COLUMNS + ["tech"])
+
+    h2_t_per_day = float(annual_h2_prod_t) / 365.0
+    if "h2_storage_t_design" not in cfg.columns:
+        cfg["h2_storage_t_design"] = cfg["h2_storage_days"].astype(float) * h2_t_per_day
+    if "h2_storage_days" not in cfg.columns:
+        cfg["h2_storage_days"] = cfg["h2_storage_t_design"].astype(float) / h2_t_per_day
+    cfg["tech"] = cfg["tech"].astype(str).str.upper()
+
+    h2s = cost_params["h2"]["storage"]
+    hb  = cost_params["haber_bosch"]
+    n2  = cost_params["n2"]
+    nh3s = cost_params["nh3_storage"]
+    water = cost_params.get("water", {})
+    rop = water.get("ro", {})
+    tankp = water.get("tank", {})
+
+    # --- skalare Parameter (für alle Konfigurationen gleich) ---
+    h2_reliq_kwh_per_kg = float(h2s.get("reliq_kwh_per_kg_bog", 0.0))
+    h2_reliq_frac = float(h2s.get("reliq_frac", 0.0))
+    nh3_cooling_kwh_per_t_per_day = float(nh3s.get("cooling_kwh_per_tNH3_per_day", 0.0))
+    water_kg_per_kgH2 = float(rop.get("water_kg_per_kgH2", 9.0))
+    ro_spec_kwh_per_m3 = float(rop.get("spec_kwh_per_m3", 4.0))
+    water_loss_frac_per_hour = float(tankp.get("loss_frac_per_hour", 0.0))
+    hb_spec_kwh_per_kgNH3 = float(hb["spec_kwh_per_kgNH3"])
+    spec_kwh_per_kgN2 = float(n2["spec_kwh_per_kgN2"])
+    eta_in = float(h2s.get("eta_in", 1.0))
+    eta_out = float(h2s.get("eta_out", 1.0))
+    loss_frac_per_hour = float(h2s.get("loss_frac_per_hour", 0.0))
+    h2_spec_kwh_per_kg_in = float(h2s.get("spec_kwh_per_kg_in", 0.0))
+    h2_spec_kwh_per_kg_out = float(h2s.get("spec_kwh_per_kg_out", 0.0))
+    nh3_spec_kwh_per_t_in = float(nh3s.get("spec_kwh_per_t_in", 0.0))
+    nh3_spec_kwh_per_t_out = float(nh3s.get("spec_kwh_per_t_out", 0.0))
+
+    h2_kg_per_kg_nh3 = 6.0 / 34.0
+    n2_kg_per_kg_nh3 = 28.0 / 34.0
+    hb_capacity_tNH3_per_h = float(hb_capacity_tNH3_per_day) / 24.0
+    nh3_step = float(hb_ramp_frac_per_h) * float(hb_capacity_tNH3_per_h)
+    kwh_per_t_hbchain = (
+        hb_spec_kwh_per_kgNH3 * 1000.0
+        + (n2_kg_per_kg_nh3 * 1000.0) * spec_kwh_per_kgN2
+        + (h2_kg_per_kg_nh3 * 1000.0) * h2_spec_kwh_per_kg_out
+        + nh3_spec_kwh_per_t_in
+    )
+
+    nh3_target_per_ship_t = float(annual_nh3_prod_t) / float(ships_per_year)
+    ship_interval = 8760.0 / float(ships_per_year)
+    next_ship_time = ship_interval
+
+    if isinstance(df_profile, (wind_profile.RepeatingProfile, profile_reduction.ReducedProfile)):
+        p_base = np.asarray(df_profile.base, dtype=np.float64)
+    else:
+        p_base = df_profile["p_mw"].to_numpy(dtype=np.float64)
+    n_base = len(p_base)
+    n_hours = len(df_profile)
+    sim_years_est = float(n_hours) / 8760.0
+    nh3_target_total_t = sim_years_est * float(annual_nh3_prod_t)
+
+    # Gewicht je simulierter Stunde (1 beim vollen Profil)
+    reduced = isinstance(df_profile, profile_reduction.ReducedProfile)
+    if reduced:
+        # Einschwingen (Gewicht 0) + gewichteter Durchlauf, stündliche NH3-Abnahme (siehe profile_reduction)
+        _, hour_w = df_profile.sim_sequence()
+        n_hours = len(hour_w)
+        nh3_target_total_t = np.inf
+        ship_load_t = nh3_target_per_ship_t
+        if not df_profile.ship_aligned(ship_interval):
+            ship_load_t = float(annual_nh3_prod_t) / 8760.0
+            ship_interval = 1.0
+            next_ship_time = 1.0
+        max_failed = float("inf")
+    else:
+        hour_w = np.ones(n_hours)
+        ship_load_t = nh3_target_per_ship_t
+
+    # --- Parameter je Konfiguration (Arrays) ---
+    s_arr = cfg["s"].to_numpy(dtype=np.float64)
+    p_el_max = cfg["P_el_MW"].to_numpy(dtype=np.float64)
+    water_tank_design = cfg["water_tank_m3_max"].to_numpy(dtype=np.float64)
+    tank_cap = np.maximum(0.0, water_tank_design)
+    h2_storage_kg_max = cfg["h2_storage_t_design"].to_numpy(dtype=np.float64) * 1000.0
+
+    el_spec = np.empty(n_cfg)
+    el_min_load_frac = np.empty(n_cfg)
+    for tech in cfg["tech"].unique():
+        el = cost_params["h2"]["electrolyzer"][tech]
+        mask = (cfg["tech"] == tech).to_numpy()
+        el_spec[mask] = float(el["spec_kwh_per_kgH2"])
+        el_min_load_frac[mask] = float(el["min_load_frac"])
+
+    h2_kg_per_mwh = 1000.0 / el_spec
+    el_total_factor = 1.0 + (h2_kg_per_mwh * eta_in * h2_spec_kwh_per_kg_in / 1000.0)
+    p_el_min = el_min_load_frac * p_el_max
+    p_step = float(el_ramp_frac_per_h) * p_el_max
+    h2_el_stop_kg = float(h2_el_stop_frac) * h2_storage_kg_max
+    h2_el_start_kg = float(h2_el_start_frac) * h2_storage_kg_max
+
+    nh3_storage_ships_eff = np.maximum(cfg["nh3_storage_ships"].to_numpy(dtype=np.float64),
+                                       float(startup_buffer_ships) + 1.0)
+    nh3_storage_t_max = nh3_storage_ships_eff * nh3_target_per_ship_t
+    nh3_soc_target_t = np.minimum(float(nh3_target_level_ships) * nh3_target_per_ship_t, nh3_storage_t_max)
+    nh3_soc_high_t = np.minimum(float(nh3_target_level_ships + nh3_deadband_ships) * nh3_target_per_ship_t,
+                                nh3_storage_t_max)
+
+    # --- Zustände ---
+    soc_h2_kg = np.zeros(n_cfg)
+    soc_nh3_t = np.minimum(np.full(n_cfg, float(startup_buffer_ships) * nh3_target_per_ship_t), nh3_storage_t_max)
+    soc_water_m3 = np.zeros(n_cfg)
+    el_allowed = np.ones(n_cfg, dtype=bool)
+    p_stack_prev = np.zeros(n_cfg)
+    nh3_hb_prev_t = np.zeros(n_cfg)
+    nh3_prod_total_t = np.zeros(n_cfg)
+
+    # --- KPI-Summen ---
+    curtailed_mwh = np.zeros(n_cfg)
+    # gewichtet wie im Kernel (acc[A_SHIPS_FAILED] / acc[A_SHIP_COUNT]), am Ende gerundet
+    ships_failed_count = np.zeros(n_cfg)
+    ship_count = 0.0
+    el_energy_mwh_sum = np.zeros(n_cfg)
+    hb_energy_mwh_sum = np.zeros(n_cfg)
+    n2_energy_mwh_sum = np.zeros(n_cfg)
+    ro_energy_mwh_sum = np.zeros(n_cfg)
+    h2_store_in_mwh_sum = np.zeros(n_cfg)
+    h2_store_out_mwh_sum = np.zeros(n_cfg)
+    nh3_store_in_mwh_sum = np.zeros(n_cfg)
+    nh3_store_out_mwh_sum = np.zeros(n_cfg)
+    nh3_spill_t_sum = np.zeros(n_cfg)
+    ship_out_total_t = np.zeros(n_cfg)
+    h2_soc_max_kg = soc_h2_kg.copy()
+    nh3_soc_max_t = soc_nh3_t.copy()
+    water_soc_max_m3 = soc_water_m3.copy()
+
+    # Abbruch bei Schiffsausfällen: Originalindex der laufenden Konfigurationen,
+    # KPIs der abgebrochenen (Originalindizes, KPI-Arrays in Reihenfolge von kpi_arrays())
+    active = np.arange(n_cfg)
+    hours_simulated = np.full(n_cfg, len(df_profile), dtype=np.int64)
+    stopped = []
+
+    def kpi_arrays():
+        return (
+            nh3_soc_max_t, h2_soc_max_kg, water_soc_max_m3, curtailed_mwh, ships_failed_count,
+            ship_out_total_t, el_energy_mwh_sum, ro_energy_mwh_sum, hb_energy_mwh_sum,
+            n2_energy_mwh_sum, h2_store_in_mwh_sum, h2_store_out_mwh_sum,
+            nh3_store_in_mwh_sum, nh3_store_out_mwh_sum,
+        )
+
+    def run_hb(p_available_mw, nh3_possible_from_h2_t):
+        # Gleiche Abfragekette wie run_hb in simulate_hourly_system, als Masken
+        off = (
+            (nh3_prod_total_t >= nh3_target_total_t - 1e-9)
+            | (soc_nh3_t >= nh3_soc_high_t)
+            | (nh3_possible_from_h2_t <= 0.0)
+            | (hb_capacity_tNH3_per_h <= 0.0)
+        )
+        nh3_free_t = np.maximum(0.0, nh3_soc_target_t - soc_nh3_t)
+        off |= nh3_free_t <= 0.0
+
+        if kwh_per_t_hbchain > 0.0:
+            nh3_power_limit_t = (p_available_mw * 1000.0) / kwh_per_t_hbchain
+        else:
+            nh3_power_limit_t = np.full(n_cfg, hb_capacity_tNH3_per_h)
+        nh3_remaining_total_t = np.maximum(0.0, nh3_target_total_t - nh3_prod_total_t)
+
+        nh3_t = np.minimum(hb_capacity_tNH3_per_h, nh3_possible_from_h2_t)
+        nh3_t = np.minimum(nh3_t, nh3_power_limit_t)
+        nh3_t = np.minimum(nh3_t, nh3_free_t)
+        nh3_t = np.minimum(nh3_t, nh3_remaining_total_t)
+        off |= (nh3_t > 0.0) & (nh3_t < hb_min_frac_when_on * hb_capacity_tNH3_per_h)
+
+        nh3_t = np.maximum(0.0, np.minimum(nh3_hb_prev_t + nh3_step, np.maximum(nh3_hb_prev_t - nh3_step, nh3_t)))
+        nh3_t = np.where(off, 0.0, nh3_t)
+        nh3_hb_prev_t[:] = nh3_t
+        return nh3_t, (nh3_t * kwh_per_t_hbchain) / 1000.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for hour_index in range(n_hours):
+            p_wind = p_base[hour_index % n_base] * s_arr
+            w = hour_w[hour_index]
+
+            if water_loss_frac_per_hour > 0.0:
+                soc_water_m3 *= (1.0 - water_loss_frac_per_hour)
+
+            # Kühlung zuerst
+            bog_kg = soc_h2_kg * loss_frac_per_hour
+            reliq_kg = bog_kg * h2_reliq_frac
+            p_h2_reliq_mw = (reliq_kg * h2_reliq_kwh_per_kg) / 1000.0
+            soc_h2_kg -= bog_kg
+            p_nh3_cooling_mw = (soc_nh3_t * nh3_cooling_kwh_per_t_per_day / 24.0) / 1000.0
+
+            p_rem = np.maximum(0.0, p_wind - p_h2_reliq_mw - p_nh3_cooling_mw)
+
+            # HB zuerst
+            nh3_possible_from_h2_t = ((soc_h2_kg * eta_out) / h2_kg_per_kg_nh3) / 1000.0
+            nh3_hb_t, p_hbchain_mw = run_hb(p_rem, nh3_possible_from_h2_t)
+            p_rem = np.maximum(0.0, p_rem - p_hbchain_mw)
+
+            # EL + RO + Tank (H2-Level-Control mit Hysterese)
+            el_allowed = np.where(soc_h2_kg >= h2_el_stop_kg, False,
+                                  np.where(soc_h2_kg <= h2_el_start_kg, True, el_allowed))
+
+            p_el_candidate = np.minimum(p_el_max, p_rem / el_total_factor)
+            p_stack_target = np.where(p_el_candidate < p_el_min, 0.0, p_el_candidate)
+            p_stack = np.maximum(0.0, np.minimum(p_stack_prev + p_step, np.maximum(p_stack_prev - p_step, p_stack_target)))
+            p_stack = np.where(p_stack < p_el_min, 0.0, p_stack)
+            el_on = el_allowed & (p_rem > 0.0) & (p_stack_target > 0.0) & (p_stack > 0.0)
+            p_stack = np.where(el_on, p_stack, 0.0)
+
+            h2_prod_kg = p_stack * h2_kg_per_mwh
+            h2_in_kg = h2_prod_kg * eta_in
+
+            headroom_kg = np.maximum(0.0, h2_storage_kg_max - soc_h2_kg)
+            cut = (h2_in_kg > headroom_kg + 1e-12) & (h2_in_kg > 0)
+            scale = np.maximum(0.0, np.minimum(1.0, headroom_kg / h2_in_kg))
+            p_stack = np.where(cut, p_stack * scale, p_stack)
+
+            h2_prod_kg = p_stack * h2_kg_per_mwh
+            water_need_m3 = (h2_prod_kg * water_kg_per_kgH2) / 1000.0
+            water_from_tank = np.minimum(np.maximum(0.0, soc_water_m3), water_need_m3)
+            missing_m3 = np.maximum(0.0, water_need_m3 - water_from_tank)
+            h2_in_kg = h2_prod_kg * eta_in
+
+            p_in = (h2_in_kg * h2_spec_kwh_per_kg_in) / 1000.0
+            p_el_total = p_stack + p_in
+
+            p_left_for_ro = np.maximum(0.0, p_rem - p_el_total)
+            if ro_spec_kwh_per_m3 <= 0.0:
+                ro_possible_m3 = np.zeros(n_cfg)
+            else:
+                ro_possible_m3 = np.maximum(0.0, (p_left_for_ro * 1000.0) / ro_spec_kwh_per_m3)
+            ro_make_el = np.minimum(missing_m3, ro_possible_m3)
+            p_ro_el = np.maximum(0.0, (ro_make_el * ro_spec_kwh_per_m3) / 1000.0)
+
+            water_available_m3 = water_from_tank + ro_make_el
+            short = (water_need_m3 > water_available_m3 + 1e-12) & (water_need_m3 > 0.0)
+            scale = np.maximum(0.0, np.minimum(1.0, water_available_m3 / water_need_m3))
+            p_stack = np.where(short, p_stack * scale, p_stack)
+            h2_prod_kg = p_stack * h2_kg_per_mwh
+            water_need_m3 = (h2_prod_kg * water_kg_per_kgH2) / 1000.0
+            h2_in_kg = h2_prod_kg * eta_in
+            p_in = (h2_in_kg * h2_spec_kwh_per_kg_in) / 1000.0
+            p_el_total = p_stack + p_in
+            water_short_m3 = np.where(short & (water_need_m3 > water_available_m3 + 1e-12),
+                                      water_need_m3 - water_available_m3, 0.0)
+
+            soc_water_after = soc_water_m3 - water_from_tank + ro_make_el
+            soc_water_after = np.where(tank_cap > 0.0, np.minimum(tank_cap, soc_water_after), 0.0)
+            soc_h2_after = np.minimum(h2_storage_kg_max, soc_h2_kg + h2_in_kg)
+            p_rem_after = np.maximum(0.0, p_rem - (p_el_total + p_ro_el))
+
+            p_el = np.where(el_on, p_stack, 0.0)
+            p_h2_in_mw = np.where(el_on, p_in, 0.0)
+            p_el_total_mw = np.where(el_on, p_el_total, 0.0)
+            p_ro_mw = np.where(el_on, p_ro_el, 0.0)
+            ro_make_m3 = np.where(el_on, ro_make_el, 0.0)
+            water_need_m3 = np.where(el_on, water_need_m3, 0.0)
+            water_short_m3 = np.where(el_on, water_short_m3, 0.0)
+            soc_h2_kg = np.where(el_on, soc_h2_after, soc_h2_kg)
+            soc_water_m3 = np.where(el_on, soc_water_after, soc_water_m3)
+            p_rem = np.where(el_on, p_rem_after, p_rem)
+            p_stack_prev = p_el
+
+            # Tank mit Rest füllen
+            headroom = np.maximum(0.0, tank_cap - soc_water_m3)
+            fill = (tank_cap > 0.0) & (p_rem > 0.0) & (headroom > 0.0)
+            if ro_spec_kwh_per_m3 <= 0.0:
+                ro_possible2 = np.zeros(n_cfg)
+            else:
+                ro_possible2 = np.maximum(0.0, (p_rem * 1000.0) / ro_spec_kwh_per_m3)
+            ro_make2 = np.minimum(headroom, ro_possible2)
+            p_ro2 = np.maximum(0.0, (ro_make2 * ro_spec_kwh_per_m3) / 1000.0)
+            soc_water_m3 = np.where(fill, soc_water_m3 + ro_make2, soc_water_m3)
+            p_ro_mw = np.where(fill, p_ro_mw + p_ro2, p_ro_mw)
+            ro_make_m3 = np.where(fill, ro_make_m3 + ro_make2, ro_make_m3)
+            p_rem = np.where(fill, np.maximum(0.0, p_rem - p_ro2), p_rem)
+
+            # nach EL nochmal HB
+            nh3_possible_from_h2_t = ((soc_h2_kg * eta_out) / h2_kg_per_kg_nh3) / 1000.0
+            nh3_1, p1 = run_hb(p_rem, nh3_possible_from_h2_t)
+            nh3_hb_t = nh3_hb_t + nh3_1
+            p_hbchain_mw = p_hbchain_mw + p1
+
+            # Material + Energie aus HB
+            hb_on = nh3_hb_t > 0.0
+            h2_cons_kg = nh3_hb_t * 1000.0 * h2_kg_per_kg_nh3
+            soc_h2_kg = np.where(hb_on, np.maximum(0.0, soc_h2_kg - (h2_cons_kg / eta_out)), soc_h2_kg)
+            soc_nh3_t = np.where(hb_on, soc_nh3_t + nh3_hb_t, soc_nh3_t)
+            nh3_prod_total_t[:] = np.where(hb_on, nh3_prod_total_t + w * nh3_hb_t, nh3_prod_total_t)
+
+            spill = hb_on & (soc_nh3_t > nh3_storage_t_max)
+            nh3_spill_t_sum += w * np.where(spill, soc_nh3_t - nh3_storage_t_max, 0.0)
+            soc_nh3_t = np.where(spill, nh3_storage_t_max, soc_nh3_t)
+
+            hb_energy_mwh_sum += w * np.where(hb_on, (nh3_hb_t * 1000.0 * hb_spec_kwh_per_kgNH3) / 1000.0, 0.0)
+            n2_energy_mwh_sum += w * np.where(hb_on, (nh3_hb_t * 1000.0 * n2_kg_per_kg_nh3 * spec_kwh_per_kgN2) / 1000.0, 0.0)
+            h2_store_out_mwh_sum += w * np.where(hb_on, (h2_cons_kg * h2_spec_kwh_per_kg_out) / 1000.0, 0.0)
+            nh3_store_in_mwh_sum += w * np.where(hb_on, (nh3_hb_t * nh3_spec_kwh_per_t_in) / 1000.0, 0.0)
+
+            el_energy_mwh_sum += w * p_el
+            h2_store_in_mwh_sum += w * p_h2_in_mw
+            ro_energy_mwh_sum += w * p_ro_mw
+
+            # Schiff: Fahrplan ist für alle Konfigurationen gleich
+            p_nh3_out_mw = 0.0
+            ship_now = hour_index + 1 >= next_ship_time - 1e-9
+            if ship_now:
+                ok = soc_nh3_t >= ship_load_t
+                loaded_t = np.where(ok, ship_load_t, soc_nh3_t)
+                if w != 0.0:
+                    # Einschwing-Durchlauf (Gewicht 0) zählt nicht
+                    ship_count += w
+                    ships_failed_count += w * ~ok
+                ship_out_total_t += w * loaded_t
+                soc_nh3_t = np.where(ok, soc_nh3_t - ship_load_t, 0.0)
+                p_nh3_out_mw = (loaded_t * nh3_spec_kwh_per_t_out) / 1000.0
+                nh3_store_out_mwh_sum += w * p_nh3_out_mw
+                next_ship_time += ship_interval
+
+
+            p_used_total = (
+                p_h2_reliq_mw +
+                p_nh3_cooling_mw +
+                p_hbchain_mw +
+                p_ro_mw +
+                p_el_total_mw +
+                p_nh3_out_mw
+            )
+            curtailed_mwh += w * np.maximum(p_wind - p_used_total, 0.0)
+
+            np.maximum(h2_soc_max_kg, soc_h2_kg, out=h2_soc_max_kg)
+            np.maximum(nh3_soc_max_t, soc_nh3_t, out=nh3_soc_max_t)
+            np.maximum(water_soc_max_m3, soc_water_m3, out=water_soc_max_m3)
+
+            # Abbruch erst am Stundenende (alle Stunden-Arrays haben noch die alte Länge)
+            if ship_now and max_failed < float("inf"):
+                stop = ships_failed_count > max_failed
+                if stop.any():
+                    keep = ~stop
+                    hours_simulated[active[stop]] = hour_index + 1
+                    stopped.append((active[stop], [a[stop] for a in kpi_arrays()]))
+                    active = active[keep]
+                    n_cfg = len(active)
+                    (
+                        s_arr, p_el_max, tank_cap, h2_storage_kg_max, h2_kg_per_mwh, el_total_factor,
+                        p_el_min, p_step, h2_el_stop_kg, h2_el_start_kg,
+                        nh3_storage_t_max, nh3_soc_target_t, nh3_soc_high_t,
+                        soc_h2_kg, soc_nh3_t, soc_water_m3, el_allowed, p_stack_prev,
+                        nh3_hb_prev_t, nh3_prod_total_t, nh3_spill_t_sum,
+                        nh3_soc_max_t, h2_soc_max_kg, water_soc_max_m3, curtailed_mwh, ships_failed_count,
+                        ship_out_total_t, el_energy_mwh_sum, ro_energy_mwh_sum, hb_energy_mwh_sum,
+                        n2_energy_mwh_sum, h2_store_in_mwh_sum, h2_store_out_mwh_sum,
+                        nh3_store_in_mwh_sum, nh3_store_out_mwh_sum,
+                    ) = [a[keep] for a in (
+                        s_arr, p_el_max, tank_cap, h2_storage_kg_max, h2_kg_per_mwh, el_total_factor,
+                        p_el_min, p_step, h2_el_stop_kg, h2_el_start_kg,
+                        nh3_storage_t_max, nh3_soc_target_t, nh3_soc_high_t,
+                        soc_h2_kg, soc_nh3_t, soc_water_m3, el_allowed, p_stack_prev,
+                        nh3_hb_prev_t, nh3_prod_total_t, nh3_spill_t_sum,
+                    ) + kpi_arrays()]
+                    if n_cfg == 0:
+                        break
+
+    if stopped:
+        # KPI-Arrays wieder in Originalreihenfolge (laufende + abgebrochene Konfigurationen)
+        stopped.append((active, list(kpi_arrays())))
+        order = np.concatenate([idx for idx, _ in stopped])
+        merged = []
+        for k in range(len(stopped[0][1])):
+            full = np.empty(len(order), dtype=stopped[0][1][k].dtype)
+            full[order] = np.concatenate([vals[k] for _, vals in stopped])
+            merged.append(full)
+        (
+            nh3_soc_max_t, h2_soc_max_kg, water_soc_max_m3, curtailed_mwh, ships_failed_count,
+            ship_out_total_t, el_energy_mwh_sum, ro_energy_mwh_sum, hb_energy_mwh_sum,
+            n2_energy_mwh_sum, h2_store_in_mwh_sum, h2_store_out_mwh_sum,
+            nh3_store_in_mwh_sum, nh3_store_out_mwh_sum,
+        ) = merged
+        s_arr = cfg["s"].to_numpy(dtype=np.float64)
+        p_el_max = cfg["P_el_MW"].to_numpy(dtype=np.float64)
+
+    ships_failed_count = np.rint(ships_failed_count).astype(np.int64)
+    ship_count = int(round(ship_count))
+    if reduced and ship_interval == 1.0:
+        ship_count, ships_failed_count = profile_reduction.offtake_shortfall_ships(
+            ship_out_total_t, len(df_profile), annual_nh3_prod_t, ships_per_year
+        )
+
+    res = pd.DataFrame({
+        "s": s_arr,
+        "P_el_MW": p_el_max,
+        "h2_storage_days": cfg["h2_storage_days"].to_numpy(dtype=np.float64),
+        "h2_storage_t_design": cfg["h2_storage_t_design"].to_numpy(dtype=np.float64),
+        "nh3_storage_ships": cfg["nh3_storage_ships"].to_numpy(dtype=np.float64),
+        "water_tank_m3_max": water_tank_design,
+
+        "NH3_storage_max_t": nh3_soc_max_t,
+        "H2_storage_max_t": h2_soc_max_kg / 1000.0,
+        "Water_storage_max_m3": water_soc_max_m3,
+        "Curtail_GWh_per_sim": curtailed_mwh / 1000.0,
+        "ships_failed_count": ships_failed_count,
+        "ship_out_total_t": ship_out_total_t,
+
+        "EL_el_MWh_per_sim": el_energy_mwh_sum,
+        "RO_el_MWh_per_sim": ro_energy_mwh_sum,
+        "HB_el_MWh_per_sim": hb_energy_mwh_sum,
+        "N2_el_MWh_per_sim": n2_energy_mwh_sum,
+        "H2_store_in_MWh_per_sim": h2_store_in_mwh_sum,
+        "H2_store_out_MWh_per_sim": h2_store_out_mwh_sum,
+        "NH3_store_in_MWh_per_sim": nh3_store_in_mwh_sum,
+        "NH3_store_out_MWh_per_sim": nh3_store_out_mwh_sum,
+    })
+
+    costs = cost_components_proxy_vec(
+        s=s_arr,
+        p_el_mw=p_el_max,
+        nh3_storage_t=nh3_soc_max_t,
+        h2_storage_t_design=res["h2_storage_t_design"].to_numpy(),
+        water_tank_m3_design=water_tank_design,
+        technology=cfg["tech"].to_numpy(),
+    )
+    res = pd.concat([res, costs], axis=1)
+    res["tech"] = cfg["tech"].to_numpy()
+    if early_stop:
+        res["terminated_early"] = hours_simulated < len(df_profile)
+        res["hours_simulated"] = hours_simulated
+    return res
+
+
+# Kernel-KPI -> Spalte im Raster-/Batch-Ergebnis
+_KPI_RASTER_COLUMNS = {
+    "nh3_storage_max_t": "NH3_storage_max_t",
+    "h2_storage_max_t": "H2_storage_max_t",
+    "water_storage_max_m3": "Water_storage_max_m3",
+    "curtail_GWh_per_sim": "Curtail_GWh_per_sim",
+}
+
+
+def simulate_configs(configs, df_profile: pd.DataFrame = None, engine: str = "kernel") -> pd.DataFrame:
+    """
+    Wie simulate_hourly_system_batch (gleiche Spalten + "tech"), aber Konfiguration für
+    Konfiguration mit simulate_hourly_system(engine=...); mit dem Kernel deutlich schneller
+    als der Batch-Durchlauf.
+    """
+    if df_profile is None:
+        df_profile = get_df2()
+    cfg = pd.DataFrame(configs).reset_index(drop=True)
+    if len(cfg) == 0:
+        return pd.DataFrame(columns=RASTER_COLUMNS + ["tech"])
+
+    h2_t_per_day = float(annual_h2_prod_t) / 365.0
+    if "h2_storage_t_design" not in cfg.columns:
+        cfg["h2_storage_t_design"] = cfg["h2_storage_days"].astype(float) * h2_t_per_day
+    if "h2_storage_days" not in cfg.columns:
+        cfg["h2_storage_days"] = cfg["h2_storage_t_design"].astype(float) / h2_t_per_day
+    cfg["tech"] = cfg["tech"].astype(str).str.upper()
+
+    rows = []
+    for c in cfg.itertuples(index=False):
+        _, kpi = simulate_hourly_system(
+            s=float(c.s),
+            p_el_mw=float(c.P_el_MW),
+            technology=c.tech,
+            h2_storage_t_max=float(c.h2_storage_t_design),
+            nh3_storage_ships=float(c.nh3_storage_ships),
+            water_tank_m3_max=float(c.water_tank_m3_max),
+            return_timeseries=False,
+            df_profile=df_profile,
+            engine=engine,
+        )
+        rows.append({_KPI_RASTER_COLUMNS.get(k, k): v for k, v in kpi.items()})
+    kpis = pd.DataFrame(rows)
+
+    res = cfg[["s", "P_el_MW", "h2_storage_days", "h2_storage_t_design", "nh3_storage_ships", "water_tank_m3_max"]].copy()
+    kpi_cols = [c for c in RASTER_COLUMNS if c not in res.columns and c not in COST_COLUMNS]
+    res[kpi_cols] = kpis[kpi_cols].to_numpy()
+    res["ships_failed_count"] = res["ships_failed_count"].astype(np.int64)
+    costs = cost_components_proxy_vec(
+        s=res["s"].to_numpy(dtype=np.float64),
+        p_el_mw=res["P_el_MW"].to_numpy(dtype=np.float64),
+        nh3_storage_t=res["NH3_storage_max_t"].to_numpy(dtype=np.float64),
+        h2_storage_t_design=res["h2_storage_t_design"].to_numpy(dtype=np.float64),
+        water_tank_m3_design=res["water_tank_m3_max"].to_numpy(dtype=np.float64),
+        technology=cfg["tech"].to_numpy(),
+    )
+    res = pd.concat([res, costs], axis=1)
+    res["tech"] = cfg["tech"].to_numpy()
+    return res
 
-res_ael = pd.DataFrame(rows_ael, columns=cols)
-res_pem = pd.DataFrame(rows_pem, columns=cols)
 
-print("Raster fertig.")
-print("AEL rows:", len(res_ael), "| PEM rows:", len(res_pem))
-print("Feasible AEL:", int((res_ael["ships_failed_count"] == 0).sum()),
-      "| Feasible PEM:", int((res_pem["ships_failed_count"] == 0).sum()))
+# %%
+# %%
+# %% Raster (NH3-Speicher + Wassertank als Raster, inkl. RO/Tank-Kosten)
+
+s_values = np.arange(0.95, 1.00001, 0.01)
+pel_values = np.arange(1000, 1200, 50)
+h2_storage_days_values = np.arange(1, 2.1, 1)
+
+nh3_storage_ships_values = np.arange(1, 1.51, 0.25)
+water_tank_m3_values = np.arange(500, 4501, 2000)
+
+
+def run_raster(df_profile: pd.DataFrame = None):
+    """Raster über s, P_el, H2-Tage, NH3-Schiffe, Wassertank für AEL + PEM -> (res_ael, res_pem)."""
+    if df_profile is None:
+        df_profile = get_df2()
+
+    raster_configs = [
+        {
+            "s": float(s),
+            "P_el_MW": float(pel),
+            "h2_storage_days": float(h2_days),
+            "nh3_storage_ships": float(nh3_ships),
+            "water_tank_m3_max": float(w_tank_m3),
+            "tech": tech,
+        }
+        for tech in ("AEL", "PEM")
+        for s in s_values
+        for pel in pel_values
+        for h2_days in h2_storage_days_values
+        for nh3_ships in nh3_storage_ships_values
+        for w_tank_m3 in water_tank_m3_values
+    ]
+
+    # Kernel je Rasterpunkt (AEL + PEM); simulate_hourly_system_batch liefert dieselben Spalten
+    res_all = simulate_configs(raster_configs, df_profile=df_profile)
+
+    cols = RASTER_COLUMNS
+
+    res_ael = res_all[res_all["tech"] == "AEL"][cols].reset_index(drop=True)
+    res_pem = res_all[res_all["tech"] == "PEM"][cols].reset_index(drop=True)
+    return res_ael, res_pem
 
 
 # %%
 # %%
 # %% Top 3 + Winner
 
-res_ael_ok = res_ael[res_ael["ships_failed_count"] == 0].copy()
-res_pem_ok = res_pem[res_pem["ships_failed_count"] == 0].copy()
+def _display(obj):
+    try:
+        from IPython.display import display
+    except ImportError:
+        display = print
+    display(obj)
 
-print("AEL – Top 3 (feasible):")
-display(res_ael_ok.sort_values("Total_proxy").head(3).reset_index(drop=True))
 
-print("PEM – Top 3 (feasible):")
-display(res_pem_ok.sort_values("Total_proxy").head(3).reset_index(drop=True))
+def select_winner(res_ael: pd.DataFrame, res_pem: pd.DataFrame) -> pd.Series:
+    """Günstigste machbare Konfiguration (AEL/PEM); ohne machbare Lösung: minimal failures + Penalty."""
+    res_ael_ok = res_ael[res_ael["ships_failed_count"] == 0].copy()
+    res_pem_ok = res_pem[res_pem["ships_failed_count"] == 0].copy()
 
-res_ael_ok["tech"] = "AEL"
-res_pem_ok["tech"] = "PEM"
-combined_ok = pd.concat([res_ael_ok, res_pem_ok], ignore_index=True)
+    print("AEL – Top 3 (feasible):")
+    _display(res_ael_ok.sort_values("Total_proxy").head(3).reset_index(drop=True))
+
+    print("PEM – Top 3 (feasible):")
+    _display(res_pem_ok.sort_values("Total_proxy").head(3).reset_index(drop=True))
+
+    res_ael_ok["tech"] = "AEL"
+    res_pem_ok["tech"] = "PEM"
+    combined_ok = pd.concat([res_ael_ok, res_pem_ok], ignore_index=True)
+
+    if len(combined_ok) == 0:
+        print("WARNUNG: Keine fully-feasible Lösung. Wähle minimal failures + Penalty.")
+        res_ael_all = res_ael.copy(); res_ael_all["tech"] = "AEL"
+        res_pem_all = res_pem.copy(); res_pem_all["tech"] = "PEM"
+        combined_all = pd.concat([res_ael_all, res_pem_all], ignore_index=True)
+        penalty = 1e12
+        combined_all["Total_proxy_penalized"] = combined_all["Total_proxy"] + combined_all["ships_failed_count"] * penalty
+        return combined_all.loc[combined_all["Total_proxy_penalized"].idxmin()].copy()
+    return combined_ok.loc[combined_ok["Total_proxy"].idxmin()].copy()
 
-if len(combined_ok) == 0:
-    print("WARNUNG: Keine fully-feasible Lösung. Wähle minimal failures + Penalty.")
-    res_ael_all = res_ael.copy(); res_ael_all["tech"] = "AEL"
-    res_pem_all = res_pem.copy(); res_pem_all["tech"] = "PEM"
-    combined_all = pd.concat([res_ael_all, res_pem_all], ignore_index=True)
-    penalty = 1e12
-    combined_all["Total_proxy_penalized"] = combined_all["Total_proxy"] + combined_all["ships_failed_count"] * penalty
-    winner = combined_all.loc[combined_all["Total_proxy_penalized"].idxmin()].copy()
-else:
-    winner = combined_ok.loc[combined_ok["Total_proxy"].idxmin()].copy()
 
 def fmt_money(x):
     x = float(x)
@@ -1091,53 +2111,52 @@ def fmt_money(x):
     if x >= 1e3: return f"{x/1e3:.1f} Tsd. $"
     return f"{x:.0f} $"
 
-winner_table = pd.DataFrame([
-    ("Technologie", winner.get("tech","")),
-    ("Windfaktor s [-]", float(winner["s"])),
-    ("P_el [MW]", float(winner["P_el_MW"])),
-    ("H2-Speicher [Tage]", float(winner["h2_storage_days"])),
-    ("H2-Speicher [t H2] (Design)", float(winner["h2_storage_t_design"])),
 
-    ("NH3-Speicher [Ships]", float(winner["nh3_storage_ships"])),
-    ("Water Tank [m3] (Design)", float(winner["water_tank_m3_max"])),
+def winner_summary_table(winner) -> pd.DataFrame:
+    return pd.DataFrame([
+        ("Technologie", winner.get("tech","")),
+        ("Windfaktor s [-]", float(winner["s"])),
+        ("P_el [MW]", float(winner["P_el_MW"])),
+        ("H2-Speicher [Tage]", float(winner["h2_storage_days"])),
+        ("H2-Speicher [t H2] (Design)", float(winner["h2_storage_t_design"])),
+
+        ("NH3-Speicher [Ships]", float(winner["nh3_storage_ships"])),
+        ("Water Tank [m3] (Design)", float(winner["water_tank_m3_max"])),
 
-    ("NH3-Speicher max [t]", float(winner["NH3_storage_max_t"])),
-    ("Water SOC max [m3]", float(winner["Water_storage_max_m3"])),
+        ("NH3-Speicher max [t]", float(winner["NH3_storage_max_t"])),
+        ("Water SOC max [m3]", float(winner["Water_storage_max_m3"])),
 
-    ("Curtailment [GWh/sim]", float(winner["Curtail_GWh_per_sim"])),
-    ("Schiffsausfälle [#]", int(winner["ships_failed_count"])),
-    ("Gesamt-Proxy-Kosten", fmt_money(winner["Total_proxy"])),
-], columns=["Kennzahl","Wert"])
-display(winner_table)
+        ("Curtailment [GWh/sim]", float(winner["Curtail_GWh_per_sim"])),
+        ("Schiffsausfälle [#]", int(winner["ships_failed_count"])),
+        ("Gesamt-Proxy-Kosten", fmt_money(winner["Total_proxy"])),
+    ], columns=["Kennzahl","Wert"])
 
 
 # %%
 # %%
 # %% Winner Timeseries erzeugen (WICHTIG: out_winner + kpi_w)
-# Kernel-Reset-safe: wird jedes Mal sauber neu berechnet
-
-out_winner, kpi_w = simulate_hourly_system(
-    s=float(winner["s"]),
-    p_el_mw=float(winner["P_el_MW"]),
-    technology=str(winner.get("tech", "AEL")),
-    h2_storage_t_max=float(winner["h2_storage_t_design"]),
-    nh3_storage_ships=float(winner["nh3_storage_ships"]),
-    water_tank_m3_max=float(winner["water_tank_m3_max"]),
-    return_timeseries=True,
-    debug_ships=False,
-    df_profile=df2_sim  # <- WICHTIG: multi-year Profil für deine Projektjahre
-)
 
-print("out_winner ready:", out_winner.shape)
+def simulate_winner(winner, df_profile: pd.DataFrame = None):
+    """Winner erneut mit Zeitreihe simulieren (Default: multi-year Profil für die Projektjahre)."""
+    if df_profile is None:
+        df_profile = get_df2_sim()
+    return simulate_hourly_system(
+        s=float(winner["s"]),
+        p_el_mw=float(winner["P_el_MW"]),
+        technology=str(winner.get("tech", "AEL")),
+        h2_storage_t_max=float(winner["h2_storage_t_design"]),
+        nh3_storage_ships=float(winner["nh3_storage_ships"]),
+        water_tank_m3_max=float(winner["water_tank_m3_max"]),
+        return_timeseries=True,
+        debug_ships=False,
+        df_profile=df_profile
+    )
 
 
 # %%
 # %%
 # %% Plots: SOC über alle Jahre (H2, NH3, Water) – X-Achse als Projektjahr 1..N
 
-import numpy as np
-import matplotlib.pyplot as plt
-
 def apply_project_year_axis(ax, n, years_sim, hours_per_year=8760):
     tick_pos = [i * hours_per_year for i in range(years_sim) if i * hours_per_year < n]
     tick_lab = [f"Jahr {i+1}" for i in range(len(tick_pos))]
@@ -1146,225 +2165,219 @@ def apply_project_year_axis(ax, n, years_sim, hours_per_year=8760):
     ax.set_xticklabels(tick_lab, rotation=0)
     ax.set_xlabel("Projektjahr")
 
-# Stundenachse 0..n-1 (immer safe, egal ob DatetimeIndex oder RangeIndex)
-n = len(out_winner)
-t = np.arange(n)
-
-# H2
-plt.figure(figsize=(13, 4))
-ax = plt.gca()
-ax.plot(t, out_winner["h2_soc_kg"])
-ax.set_title("H2 Speicherfüllstand")
-ax.set_ylabel("H2 SOC [kg]")
-ax.grid(True)
-apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
-plt.tight_layout()
-plt.show()
-
-# NH3
-plt.figure(figsize=(13, 4))
-ax = plt.gca()
-ax.plot(t, out_winner["nh3_soc_t"])
-ax.set_title("NH3 Tankfüllstand")
-ax.set_ylabel("NH3 SOC [t]")
-ax.grid(True)
-apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
-plt.tight_layout()
-plt.show()
-
-# Water
-plt.figure(figsize=(13, 4))
-ax = plt.gca()
-ax.plot(t, out_winner["water_soc_m3"])
-ax.set_title("Wassertankfüllstand")
-ax.set_ylabel("Water SOC [m³]")
-ax.grid(True)
-apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
-plt.tight_layout()
-plt.show()
-
-# Ship Events auf NH3 Plot
-show_ship_events = True
-if show_ship_events and "ship_loaded_t" in out_winner.columns:
-    ship_mask = out_winner["ship_loaded_t"].to_numpy() > 0
 
+def plot_soc_all_years(out_winner, years_sim=years_sim, show_ship_events=True):
+    import matplotlib.pyplot as plt
+
+    # Stundenachse 0..n-1 (immer safe, egal ob DatetimeIndex oder RangeIndex)
+    n = len(out_winner)
+    t = np.arange(n)
+
+    # H2
     plt.figure(figsize=(13, 4))
     ax = plt.gca()
-    ax.plot(t, out_winner["nh3_soc_t"], label="NH3 SOC")
-
-    if ship_mask.any():
-        ship_pos = np.where(ship_mask)[0]  # <- garantiert Stundenpositionen
-        ax.scatter(ship_pos, out_winner.loc[ship_mask, "nh3_soc_t"], s=10, label="Abholung")
+    ax.plot(t, out_winner["h2_soc_kg"])
+    ax.set_title("H2 Speicherfüllstand")
+    ax.set_ylabel("H2 SOC [kg]")
+    ax.grid(True)
+    apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
+    plt.tight_layout()
+    plt.show()
 
-    ax.set_title("NH3 Tankfüllstand (mit Abholungen)")
+    # NH3
+    plt.figure(figsize=(13, 4))
+    ax = plt.gca()
+    ax.plot(t, out_winner["nh3_soc_t"])
+    ax.set_title("NH3 Tankfüllstand")
     ax.set_ylabel("NH3 SOC [t]")
     ax.grid(True)
     apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
-    if ship_mask.any():
-        ax.legend()
     plt.tight_layout()
     plt.show()
 
+    # Water
+    plt.figure(figsize=(13, 4))
+    ax = plt.gca()
+    ax.plot(t, out_winner["water_soc_m3"])
+    ax.set_title("Wassertankfüllstand")
+    ax.set_ylabel("Water SOC [m³]")
+    ax.grid(True)
+    apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
+    plt.tight_layout()
+    plt.show()
 
-# %%
-# %% SOC_Speicherstände – Zeitreihen als CSV ausgeben
-# Erwartet: out_winner (Timeseries DataFrame)
-
-import pandas as pd
-
-# -----------------------------
-# SOC-Zeitreihen zusammenstellen
-# -----------------------------
-SOC_Speicherstände = pd.DataFrame(index=out_winner.index)
-
-SOC_Speicherstände["H2_SOC_kg"]    = out_winner["h2_soc_kg"].astype(float)
-SOC_Speicherstände["H2_SOC_t"]     = out_winner["h2_soc_kg"].astype(float) / 1000.0
-SOC_Speicherstände["NH3_SOC_t"]    = out_winner["nh3_soc_t"].astype(float)
-SOC_Speicherstände["Water_SOC_m3"] = out_winner["water_soc_m3"].astype(float)
+    # Ship Events auf NH3 Plot
+    if show_ship_events and "ship_loaded_t" in out_winner.columns:
+        ship_mask = out_winner["ship_loaded_t"].to_numpy() > 0
 
-# Optional: Zeitspalte explizit mitschreiben
-SOC_Speicherstände_out = SOC_Speicherstände.copy()
-SOC_Speicherstände_out.insert(0, "time", SOC_Speicherstände_out.index)
+        plt.figure(figsize=(13, 4))
+        ax = plt.gca()
+        ax.plot(t, out_winner["nh3_soc_t"], label="NH3 SOC")
 
-# -----------------------------
-# CSV schreiben
-# -----------------------------
-csv_path = "SOC_Speicherstände.csv"
-SOC_Speicherstände_out.to_csv(csv_path, index=False)
+        if ship_mask.any():
+            ship_pos = np.where(ship_mask)[0]  # <- garantiert Stundenpositionen
+            ax.scatter(ship_pos, out_winner.loc[ship_mask, "nh3_soc_t"], s=10, label="Abholung")
 
-print(f"CSV exportiert: {csv_path}")
-print("Spalten:", list(SOC_Speicherstände_out.columns))
-print("Zeilen:", len(SOC_Speicherstände_out))
+        ax.set_title("NH3 Tankfüllstand (mit Abholungen)")
+        ax.set_ylabel("NH3 SOC [t]")
+        ax.grid(True)
+        apply_project_year_axis(ax, n, years_sim=years_sim, hours_per_year=8760)
+        if ship_mask.any():
+            ax.legend()
+        plt.tight_layout()
+        plt.show()
 
 
 # %%
-# %% NH3 Speicher – Jahr 10 mit Durchschnittslinie
+# %% SOC_Speicherstände / Winner-Zeitreihe exportieren (Parquet/Feather, optional CSV)
 
-import numpy as np
-import matplotlib.pyplot as plt
-
-YEAR = 10
-HOURS_PER_YEAR = 8760
+def soc_table(out_winner) -> pd.DataFrame:
+    """SOC-Zeitreihen (H2/NH3/Wasser) aus out_winner, mit Zeitspalte "time"."""
+    SOC_Speicherstände = pd.DataFrame(index=out_winner.index)
 
-start = (YEAR - 1) * HOURS_PER_YEAR
-end   = YEAR * HOURS_PER_YEAR
+    SOC_Speicherstände["H2_SOC_kg"]    = out_winner["h2_soc_kg"].astype(float)
+    SOC_Speicherstände["H2_SOC_t"]     = out_winner["h2_soc_kg"].astype(float) / 1000.0
+    SOC_Speicherstände["NH3_SOC_t"]    = out_winner["nh3_soc_t"].astype(float)
+    SOC_Speicherstände["Water_SOC_m3"] = out_winner["water_soc_m3"].astype(float)
 
-out_y10 = out_winner.iloc[start:end].copy()
-t = np.arange(len(out_y10))
+    # Optional: Zeitspalte explizit mitschreiben
+    SOC_Speicherstände_out = SOC_Speicherstände.copy()
+    SOC_Speicherstände_out.insert(0, "time", SOC_Speicherstände_out.index)
+    return SOC_Speicherstände_out
 
-nh3_mean = out_y10["nh3_soc_t"].mean()
 
-plt.figure(figsize=(12,4))
-plt.plot(t, out_y10["nh3_soc_t"], label="NH₃ SOC")
-plt.axhline(nh3_mean, color="red", linestyle="--",
-            label=f"Ø NH₃ = {nh3_mean:,.0f} t")
+WINNER_DESIGN_KEYS = (
+    "s", "P_el_MW", "h2_storage_days", "h2_storage_t_design", "nh3_storage_ships", "water_tank_m3_max",
+)
 
-plt.ylabel("NH₃ Speicherstand [t]")
-plt.xlabel("Stunde im Jahr")
-plt.title("NH₃-Speicherfüllstand – Jahr 10")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
 
-# %% H2 Speicher – Jahr 10 mit Durchschnittslinie
+def winner_export_metadata(winner=None) -> dict:
+    """Metadaten für Exporte: Design-Vektor und Technologie des Winners, cost_params-Hash."""
+    if winner is None:
+        return timeseries_io.export_metadata(cost_params=cost_params)
+    extra = {"total_proxy": float(winner["Total_proxy"])} if "Total_proxy" in winner else {}
+    return timeseries_io.export_metadata(
+        design={k: float(winner[k]) for k in WINNER_DESIGN_KEYS if k in winner},
+        technology=winner.get("tech", "AEL"),
+        cost_params=cost_params,
+        **extra,
+    )
 
-h2_mean = (out_y10["h2_soc_kg"] / 1000.0).mean()
 
-plt.figure(figsize=(12,4))
-plt.plot(t, out_y10["h2_soc_kg"] / 1000.0, label="H₂ SOC")
-plt.axhline(h2_mean, color="red", linestyle="--",
-            label=f"Ø H₂ = {h2_mean:,.1f} t")
+def export_soc(out_winner, path: str = "SOC_Speicherstände.parquet", winner=None, fmt: str = None) -> pd.DataFrame:
+    """SOC-Tabelle exportieren; Format aus der Endung (.parquet/.feather/.csv) oder fmt."""
+    SOC_Speicherstände_out = soc_table(out_winner)
+    fmt = timeseries_io.write_timeseries(SOC_Speicherstände_out, path, fmt=fmt, metadata=winner_export_metadata(winner))
 
-plt.ylabel("H₂ Speicherstand [t]")
-plt.xlabel("Stunde im Jahr")
-plt.title("H₂-Speicherfüllstand – Jahr 10")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
+    print(f"{fmt.upper()} exportiert: {path}")
+    print("Spalten:", list(SOC_Speicherstände_out.columns))
+    print("Zeilen:", len(SOC_Speicherstände_out))
+    return SOC_Speicherstände_out
 
-# %% Water Tank – Jahr 10 mit Durchschnittslinie (rot)
 
-import numpy as np
-import matplotlib.pyplot as plt
+def export_soc_csv(out_winner, csv_path: str = "SOC_Speicherstände.csv", winner=None) -> pd.DataFrame:
+    return export_soc(out_winner, csv_path, winner=winner, fmt="csv")
 
-YEAR = 10
-HOURS_PER_YEAR = 8760
 
-start = (YEAR - 1) * HOURS_PER_YEAR
-end   = YEAR * HOURS_PER_YEAR
+def export_winner_timeseries(out_winner, winner=None, path: str = "Winner_Zeitreihe.parquet", fmt: str = None) -> str:
+    """Volle Winner-Zeitreihe (alle Spalten, Index t als Spalte "time") exportieren."""
+    df = out_winner.rename_axis("time")
+    fmt = timeseries_io.write_timeseries(df, path, fmt=fmt, metadata=winner_export_metadata(winner), index=True)
+    print(f"{fmt.upper()} exportiert: {path} ({len(df)} Zeilen)")
+    return fmt
 
-out_y10 = out_winner.iloc[start:end].copy()
-t = np.arange(len(out_y10))
 
-water_mean = out_y10["water_soc_m3"].mean()
+# %%
+# %% Speicherfüllstände – Jahr N mit Durchschnittslinie (NH3, H2, Wasser, Kombifolie)
 
-plt.figure(figsize=(12,4))
-plt.plot(t, out_y10["water_soc_m3"], label="Water SOC")
-plt.axhline(water_mean, color="red", linestyle="--",
-            label=f"Ø Water = {water_mean:,.0f} m³")
+def plot_year_soc_with_mean(out_winner, year: int = 10, hours_per_year: int = 8760):
+    import matplotlib.pyplot as plt
 
-plt.ylabel("Wasser Speicherstand [m³]")
-plt.xlabel("Stunde im Jahr")
-plt.title("Wassertankfüllstand – Jahr 10")
-plt.grid(True)
-plt.legend()
-plt.tight_layout()
-plt.show()
+    start = (year - 1) * hours_per_year
+    end   = year * hours_per_year
 
+    out_y = out_winner.iloc[start:end].copy()
+    t = np.arange(len(out_y))
 
+    # NH3
+    nh3_mean = out_y["nh3_soc_t"].mean()
 
-# %%
-# %% Kombifolie (NH3 + H2) – Jahr 10 mit Durchschnittslinien (rot)
+    plt.figure(figsize=(12,4))
+    plt.plot(t, out_y["nh3_soc_t"], label="NH₃ SOC")
+    plt.axhline(nh3_mean, color="red", linestyle="--",
+                label=f"Ø NH₃ = {nh3_mean:,.0f} t")
 
-import numpy as np
-import matplotlib.pyplot as plt
+    plt.ylabel("NH₃ Speicherstand [t]")
+    plt.xlabel("Stunde im Jahr")
+    plt.title(f"NH₃-Speicherfüllstand – Jahr {year}")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
 
-YEAR = 10
-HOURS_PER_YEAR = 8760
+    # H2
+    h2_mean = (out_y["h2_soc_kg"] / 1000.0).mean()
 
-start = (YEAR - 1) * HOURS_PER_YEAR
-end   = YEAR * HOURS_PER_YEAR
+    plt.figure(figsize=(12,4))
+    plt.plot(t, out_y["h2_soc_kg"] / 1000.0, label="H₂ SOC")
+    plt.axhline(h2_mean, color="red", linestyle="--",
+                label=f"Ø H₂ = {h2_mean:,.1f} t")
 
-out_y10 = out_winner.iloc[start:end].copy()
-t = np.arange(len(out_y10))
+    plt.ylabel("H₂ Speicherstand [t]")
+    plt.xlabel("Stunde im Jahr")
+    plt.title(f"H₂-Speicherfüllstand – Jahr {year}")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
 
-nh3 = out_y10["nh3_soc_t"]
-h2  = out_y10["h2_soc_kg"] / 1000.0  # t
+    # Water
+    water_mean = out_y["water_soc_m3"].mean()
 
-nh3_mean = nh3.mean()
-h2_mean  = h2.mean()
+    plt.figure(figsize=(12,4))
+    plt.plot(t, out_y["water_soc_m3"], label="Water SOC")
+    plt.axhline(water_mean, color="red", linestyle="--",
+                label=f"Ø Water = {water_mean:,.0f} m³")
 
-fig, axes = plt.subplots(2, 1, figsize=(13, 7), sharex=True)
+    plt.ylabel("Wasser Speicherstand [m³]")
+    plt.xlabel("Stunde im Jahr")
+    plt.title(f"Wassertankfüllstand – Jahr {year}")
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
 
-# --- NH3 ---
-axes[0].plot(t, nh3, label="NH₃ SOC")
-axes[0].axhline(nh3_mean, color="red", linestyle="--",
-                label=f"Ø NH₃ = {nh3_mean:,.0f} t")
-axes[0].set_ylabel("NH₃ [t]")
-axes[0].set_title("Speicherfüllstände – Jahr 10")
-axes[0].grid(True)
-axes[0].legend()
-
-# --- H2 ---
-axes[1].plot(t, h2, label="H₂ SOC")
-axes[1].axhline(h2_mean, color="red", linestyle="--",
-                label=f"Ø H₂ = {h2_mean:,.1f} t")
-axes[1].set_ylabel("H₂ [t]")
-axes[1].set_xlabel("Stunde im Jahr")
-axes[1].grid(True)
-axes[1].legend()
+    # Kombifolie (NH3 + H2)
+    nh3 = out_y["nh3_soc_t"]
+    h2  = out_y["h2_soc_kg"] / 1000.0  # t
+
+    fig, axes = plt.subplots(2, 1, figsize=(13, 7), sharex=True)
+
+    # --- NH3 ---
+    axes[0].plot(t, nh3, label="NH₃ SOC")
+    axes[0].axhline(nh3_mean, color="red", linestyle="--",
+                    label=f"Ø NH₃ = {nh3_mean:,.0f} t")
+    axes[0].set_ylabel("NH₃ [t]")
+    axes[0].set_title(f"Speicherfüllstände – Jahr {year}")
+    axes[0].grid(True)
+    axes[0].legend()
+
+    # --- H2 ---
+    axes[1].plot(t, h2, label="H₂ SOC")
+    axes[1].axhline(h2_mean, color="red", linestyle="--",
+                    label=f"Ø H₂ = {h2_mean:,.1f} t")
+    axes[1].set_ylabel("H₂ [t]")
+    axes[1].set_xlabel("Stunde im Jahr")
+    axes[1].grid(True)
+    axes[1].legend()
 
-plt.tight_layout()
-plt.show()
+    plt.tight_layout()
+    plt.show()
 
 
 # %%
 # %%
 # %% Jahresdauerlinie + Elektrolyseur-Auslegung: Vollaststunden & Betriebsstunden
-import numpy as np
-import matplotlib.pyplot as plt
 
 def duration_curve_sizing(
     p_wind_mw: np.ndarray,
@@ -1376,6 +2389,8 @@ def duration_curve_sizing(
     Erstellt eine Jahresdauerlinie (Wind sortiert absteigend) und überlagert den Elektrolyseur.
     Annahme (Sizing): Elektrolyse nutzt Wind direkt bis P_el_rated; darunter nur wenn >= Mindestlast.
     """
+    import matplotlib.pyplot as plt
+
     p = np.asarray(p_wind_mw, dtype=float)
     p = np.clip(p, 0.0, None)
     n = len(p)
@@ -1461,82 +2476,38 @@ def electrolyzer_hours_from_timeseries(p_el_mw_ts: np.ndarray, p_el_rated_mw: fl
         "n_hours": int(len(p)),
     }
 
-# -----------------------------
-# ANWENDUNG AUF DEIN SETUP
-# -----------------------------
-# 1) Jahresdauerlinie für Wind (Sizing-Annäherung)
-#    -> nutze dein df2 (1 Jahr) und ggf. s
-s_for_plot = float(winner["s"]) if "winner" in globals() else 1.0
-p_el_rated = float(winner["P_el_MW"]) if "winner" in globals() else 1000.0
-
-p_wind_year = (df2["p_mw"].values * s_for_plot)  # MW, 1 Jahr
-
-sizing_kpis = duration_curve_sizing(
-    p_wind_year,
-    p_el_rated_mw=p_el_rated,
-    p_el_min_frac=float(cost_params["h2"]["electrolyzer"][str(winner["tech"]).upper()]["min_load_frac"])
-        if "winner" in globals() else 0.05,
-    title=f"Jahresdauerlinie + Elektrolyseur (s={s_for_plot:.2f}, P_el={p_el_rated:.0f} MW)"
-)
-
-print("\n--- Sizing aus Jahresdauerlinie (Wind -> EL direkt) ---")
-for k,v in sizing_kpis.items():
-    if "hours" in k or "h" in k:
-        pass
-print(sizing_kpis)
-
-# 2) Echte Vollaststunden/Betriebsstunden aus Simulation (falls out_winner vorhanden)
-if "out_winner" in globals() and out_winner is not None and "p_el_mw" in out_winner.columns:
-    sim_kpis = electrolyzer_hours_from_timeseries(
-        out_winner["p_el_mw"].values,
-        p_el_rated_mw=p_el_rated,
-        p_el_min_frac=float(cost_params["h2"]["electrolyzer"][str(winner["tech"]).upper()]["min_load_frac"])
-            if "winner" in globals() else 0.05,
-    )
-    print("\n--- Aus Simulation (out_winner['p_el_mw']) ---")
-    print(sim_kpis)
-else:
-    print("\nHinweis: out_winner['p_el_mw'] nicht gefunden -> Sim-KPIs werden übersprungen.")
-
 
 # %%
 # %%
 # %% Tabelle: Elektrolyse-Auslegung aus Jahresdauerlinie
 
-sizing_table = pd.DataFrame({
-    "Kennzahl": [
-        "Elektrolyse-Nennleistung",
-        "Mindestlast",
-        "Jahresenergie Elektrolyse",
-        "Rechnerische Vollaststunden",
-        "Betriebsstunden",
-        "Vollaststunden (Wind >= P_el)",
-        "Teillaststunden"
-    ],
-    "Wert": [
-        f"{sizing_kpis['P_el_rated_MW']:.0f} MW",
-        f"{sizing_kpis['P_el_min_MW']:.1f} MW",
-        f"{sizing_kpis['EL_energy_MWh_per_year_equiv']:.0f} MWh/a",
-        f"{sizing_kpis['EL_full_load_hours_equiv_h']:.0f} h/a",
-        f"{sizing_kpis['EL_operating_hours_h']} h/a",
-        f"{sizing_kpis['EL_full_load_hours_count_h']} h/a",
-        f"{sizing_kpis['EL_part_load_hours_h']} h/a",
-    ]
-})
-
-display(sizing_table)
-
+def sizing_table_from_kpis(sizing_kpis: dict) -> pd.DataFrame:
+    return pd.DataFrame({
+        "Kennzahl": [
+            "Elektrolyse-Nennleistung",
+            "Mindestlast",
+            "Jahresenergie Elektrolyse",
+            "Rechnerische Vollaststunden",
+            "Betriebsstunden",
+            "Vollaststunden (Wind >= P_el)",
+            "Teillaststunden"
+        ],
+        "Wert": [
+            f"{sizing_kpis['P_el_rated_MW']:.0f} MW",
+            f"{sizing_kpis['P_el_min_MW']:.1f} MW",
+            f"{sizing_kpis['EL_energy_MWh_per_year_equiv']:.0f} MWh/a",
+            f"{sizing_kpis['EL_full_load_hours_equiv_h']:.0f} h/a",
+            f"{sizing_kpis['EL_operating_hours_h']} h/a",
+            f"{sizing_kpis['EL_full_load_hours_count_h']} h/a",
+            f"{sizing_kpis['EL_part_load_hours_h']} h/a",
+        ]
+    })
 
 
 # %%
 # %% Energieübersicht (Winner) – NUR Technologienamen + gestapeltes Säulendiagramm inkl. Curtailment
 # Erwartet: kpi_w (aus simulate_hourly_system)
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from IPython.display import display
-
 def energy_breakdown_grouped(kpi_w: dict) -> pd.DataFrame:
     # Direktverbraucher
     el_mwh = float(kpi_w.get("EL_el_MWh_per_sim", 0.0))
@@ -1577,6 +2548,8 @@ def energy_breakdown_grouped(kpi_w: dict) -> pd.DataFrame:
     return dfE, summary
 
 def plot_stacked_energy_grouped(dfE: pd.DataFrame, title="Energieverteilung (gestapelt)"):
+    import matplotlib.pyplot as plt
+
     order = [
         "Elektrolyseur",
         "Umkehrosmose",
@@ -1602,34 +2575,11 @@ def plot_stacked_energy_grouped(dfE: pd.DataFrame, title="Energieverteilung (ges
     plt.tight_layout()
     plt.show()
 
-# --- Ausführen ---
-dfE_g, summaryE_g = energy_breakdown_grouped(kpi_w)
-
-print("Energie (gruppiert, aus KPI-Summen):")
-display(dfE_g.sort_values("Energie_MWh", ascending=False).reset_index(drop=True))
-
-print("\nZusammenfassung:")
-display(summaryE_g)
-
-plot_stacked_energy_grouped(dfE_g, title="Energieverteilung")
-
 
 # %%
 # %% KOSTEN-EXTRABLOCK (Winner): Tabelle (formatiert ohne Exponenten) + gestapelte CAPEX/OPEX Säulen + Kuchendiagramme
 # Erwartet: `winner` (eine Zeile/Series aus deinem Raster mit den Kostenfeldern)
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from IPython.display import display
-
-def fmt_money(x):
-    x = float(x)
-    if x >= 1e9: return f"{x/1e9:.2f} Mrd. $"
-    if x >= 1e6: return f"{x/1e6:.1f} Mio. $"
-    if x >= 1e3: return f"{x/1e3:.1f} Tsd. $"
-    return f"{x:.0f} $"
-
 def cost_breakdown_from_winner(winner) -> pd.DataFrame:
     components = [
         "Windpark",
@@ -1682,6 +2632,8 @@ def cost_breakdown_from_winner(winner) -> pd.DataFrame:
     return dfC
 
 def plot_costs_stacked_bars(dfC: pd.DataFrame, sort_by="Total_$"):
+    import matplotlib.pyplot as plt
+
     dfP = dfC.sort_values(sort_by, ascending=False).reset_index(drop=True)
 
     x = np.arange(len(dfP))
@@ -1700,6 +2652,8 @@ def plot_costs_stacked_bars(dfC: pd.DataFrame, sort_by="Total_$"):
     plt.show()
 
 def plot_cost_pies(dfC: pd.DataFrame, min_share_pct=2.0):
+    import matplotlib.pyplot as plt
+
     def compress(values, labels, min_share):
         total = float(np.sum(values))
         if total <= 0:
@@ -1732,35 +2686,8 @@ def plot_cost_pies(dfC: pd.DataFrame, min_share_pct=2.0):
     plt.tight_layout()
     plt.show()
 
-# --- Ausführen ---
-dfC = cost_breakdown_from_winner(winner)
-
-print("Kostenübersicht (Winner):")
-
-# -> Hier kommt der Trick: nur für die Anzeige formatieren (Strings), Daten bleiben in dfC numerisch für Plots
-dfC_disp = dfC.copy()
-for col in ["CAPEX_$", "OPEX_$", "Total_$"]:
-    dfC_disp[col] = dfC_disp[col].map(fmt_money)
-
-# Prozente hübsch runden
-for col in ["Anteil_Total_%", "Anteil_CAPEX_%", "Anteil_OPEX_%"]:
-    dfC_disp[col] = dfC_disp[col].map(lambda v: f"{float(v):.1f} %")
-
-display(dfC_disp.sort_values("Total_$", ascending=False).reset_index(drop=True))
-
-cap_sum = dfC["CAPEX_$"].sum()
-op_sum  = dfC["OPEX_$"].sum()
-tot_sum = dfC["Total_$"].sum()
-print("SUM CAPEX:", fmt_money(cap_sum), "| SUM OPEX:", fmt_money(op_sum), "| SUM Total:", fmt_money(tot_sum))
-
-plot_costs_stacked_bars(dfC, sort_by="Total_$")
-plot_cost_pies(dfC, min_share_pct=2.0)
-
 
 # %%
-import numpy as np
-import matplotlib.pyplot as plt
-
 def plot_electrolyzer_loadline_percent_one_year(
     out_ts,
     p_el_rated_mw: float,
@@ -1771,6 +2698,8 @@ def plot_electrolyzer_loadline_percent_one_year(
     Elektrolyseur-Lastlinie über 1 Jahr
     Y-Achse: Leistung in % der Nennleistung
     """
+    import matplotlib.pyplot as plt
+
     start = int(year_index * hours_per_year)
     end   = int(start + hours_per_year)
 
@@ -1813,19 +2742,8 @@ def plot_electrolyzer_loadline_percent_one_year(
     print(f"Energie: {energy_mwh:.0f} MWh/a")
     print(f"Rechnerische Vollaststunden: {flh_equiv:.0f} h/a")
 
-# Anwendung (Winner, erstes Jahr)
-plot_electrolyzer_loadline_percent_one_year(
-    out_winner,
-    p_el_rated_mw=float(winner["P_el_MW"]),
-    year_index=0,
-    hours_per_year=8760
-)
-
 
 # %%
-import numpy as np
-import matplotlib.pyplot as plt
-
 def plot_electrolyzer_duration_curve_percent_avg_year(
     out_ts,
     p_el_rated_mw: float,
@@ -1839,6 +2757,8 @@ def plot_electrolyzer_duration_curve_percent_avg_year(
     - sortieren absteigend
     - auf 8760 Punkte per Quantilen resamplen (typischer Jahresverlauf der Dauerlinie)
     """
+    import matplotlib.pyplot as plt
+
     if "p_el_mw" not in out_ts.columns:
         raise KeyError("Spalte 'p_el_mw' fehlt in out_ts.")
     if p_el_rated_mw <= 0:
@@ -1887,21 +2807,11 @@ def plot_electrolyzer_duration_curve_percent_avg_year(
     print(f"Vollaststunden (≥99 %): {full_load_hours} h/a")
     print(f"Rechnerische Vollaststunden: {flh_equiv:.0f} h/a")
 
-# Anwendung:
-plot_electrolyzer_duration_curve_percent_avg_year(
-    out_winner,
-    p_el_rated_mw=float(winner["P_el_MW"]),
-    hours_per_year=8760,
-    n_points=8760
-)
-
 
 # %%
 # %% RO- und ASU-Kapazität (pro Tag) sauber ausgeben
 # Erwartet: out_winner (DataFrame mit stündlichen Werten) und kpi_w (dict)
 
-import numpy as np
-
 def _first_existing(d: dict, keys):
     for k in keys:
         if k in d and d[k] is not None:
@@ -1976,8 +2886,133 @@ def print_ro_asu_capacity_per_day(out_winner, kpi_w):
     else:
         print("ASU/N₂-Kapazität: NICHT GEFUNDEN (weder in kpi_w noch als bekannte Timeseries-Spalte)")
 
-# Call
-print_ro_asu_capacity_per_day(out_winner, kpi_w)
 
+# %%
+# %% Gesamtablauf (Raster -> Winner -> Zeitreihe -> Plots/Export)
+
+def main():
+    df2 = get_df2()
+    annual_wind_mwh_base = df2["p_mw"].sum()
+    print("Jahresenergie Windpark (s=1) [MWh]:", round(annual_wind_mwh_base, 1))
+    print("Zeitschritte:", len(df2))
+
+    print("annual_nh3_prod_t [t/a]:", round(annual_nh3_prod_t, 1))
+    print("HB capacity [t NH3/day]:", round(hb_capacity_tNH3_per_day, 2))
+
+    df2_sim = get_df2_sim()
+    print("Sim hours:", len(df2_sim))
+    print("Sim start/end:", df2_sim.index.min(), "->", df2_sim.index.max())
+
+    # Raster
+    res_ael, res_pem = run_raster(df2)
+
+    print("Raster fertig.")
+    print("AEL rows:", len(res_ael), "| PEM rows:", len(res_pem))
+    print("Feasible AEL:", int((res_ael["ships_failed_count"] == 0).sum()),
+          "| Feasible PEM:", int((res_pem["ships_failed_count"] == 0).sum()))
+
+    # Top 3 + Winner
+    winner = select_winner(res_ael, res_pem)
+    _display(winner_summary_table(winner))
+
+    # Winner Timeseries (multi-year Profil für die Projektjahre)
+    out_winner, kpi_w = simulate_winner(winner, df_profile=df2_sim)
+    print("out_winner ready:", out_winner.shape)
+
+    plot_soc_all_years(out_winner, years_sim=years_sim)
+    export_soc(out_winner, "SOC_Speicherstände.parquet", winner=winner)
+    export_winner_timeseries(out_winner, winner, "Winner_Zeitreihe.parquet")
+    plot_year_soc_with_mean(out_winner, year=10, hours_per_year=8760)
+
+    # Jahresdauerlinie für Wind (Sizing-Annäherung) -> df2 (1 Jahr) und s des Winners
+    s_for_plot = float(winner["s"])
+    p_el_rated = float(winner["P_el_MW"])
+    el_min_frac = float(cost_params["h2"]["electrolyzer"][str(winner["tech"]).upper()]["min_load_frac"])
+
+    p_wind_year = (df2["p_mw"].values * s_for_plot)  # MW, 1 Jahr
+
+    sizing_kpis = duration_curve_sizing(
+        p_wind_year,
+        p_el_rated_mw=p_el_rated,
+        p_el_min_frac=el_min_frac,
+        title=f"Jahresdauerlinie + Elektrolyseur (s={s_for_plot:.2f}, P_el={p_el_rated:.0f} MW)"
+    )
+
+    print("\n--- Sizing aus Jahresdauerlinie (Wind -> EL direkt) ---")
+    print(sizing_kpis)
+
+    # Echte Vollaststunden/Betriebsstunden aus Simulation
+    if out_winner is not None and "p_el_mw" in out_winner.columns:
+        sim_kpis = electrolyzer_hours_from_timeseries(
+            out_winner["p_el_mw"].values,
+            p_el_rated_mw=p_el_rated,
+            p_el_min_frac=el_min_frac,
+        )
+        print("\n--- Aus Simulation (out_winner['p_el_mw']) ---")
+        print(sim_kpis)
+    else:
+        print("\nHinweis: out_winner['p_el_mw'] nicht gefunden -> Sim-KPIs werden übersprungen.")
+
+    _display(sizing_table_from_kpis(sizing_kpis))
+
+    # Energieübersicht
+    dfE_g, summaryE_g = energy_breakdown_grouped(kpi_w)
+
+    print("Energie (gruppiert, aus KPI-Summen):")
+    _display(dfE_g.sort_values("Energie_MWh", ascending=False).reset_index(drop=True))
+
+    print("\nZusammenfassung:")
+    _display(summaryE_g)
+
+    plot_stacked_energy_grouped(dfE_g, title="Energieverteilung")
+
+    # Kosten (Winner)
+    dfC = cost_breakdown_from_winner(winner)
+
+    print("Kostenübersicht (Winner):")
+
+    # nur für die Anzeige formatieren (Strings), Daten bleiben in dfC numerisch für Plots
+    dfC_disp = dfC.copy()
+    for col in ["CAPEX_$", "OPEX_$", "Total_$"]:
+        dfC_disp[col] = dfC_disp[col].map(fmt_money)
+
+    for col in ["Anteil_Total_%", "Anteil_CAPEX_%", "Anteil_OPEX_%"]:
+        dfC_disp[col] = dfC_disp[col].map(lambda v: f"{float(v):.1f} %")
+
+    _display(dfC_disp.sort_values("Total_$", ascending=False).reset_index(drop=True))
+
+    cap_sum = dfC["CAPEX_$"].sum()
+    op_sum  = dfC["OPEX_$"].sum()
+    tot_sum = dfC["Total_$"].sum()
+    print("SUM CAPEX:", fmt_money(cap_sum), "| SUM OPEX:", fmt_money(op_sum), "| SUM Total:", fmt_money(tot_sum))
+
+    plot_costs_stacked_bars(dfC, sort_by="Total_$")
+    plot_cost_pies(dfC, min_share_pct=2.0)
+
+    # Elektrolyseur: Lastlinie (erstes Jahr) + Dauerlinie (gemitteltes Jahr)
+    plot_electrolyzer_loadline_percent_one_year(
+        out_winner,
+        p_el_rated_mw=p_el_rated,
+        year_index=0,
+        hours_per_year=8760
+    )
+    plot_electrolyzer_duration_curve_percent_avg_year(
+        out_winner,
+        p_el_rated_mw=p_el_rated,
+        hours_per_year=8760,
+        n_points=8760
+    )
+
+    print_ro_asu_capacity_per_day(out_winner, kpi_w)
+
+    return {
+        "res_ael": res_ael,
+        "res_pem": res_pem,
+        "winner": winner,
+        "out_winner": out_winner,
+        "kpi_w": kpi_w,
+    }
 
 
+if __name__ == "__main__":
+    main()
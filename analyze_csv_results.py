@@ -1,19 +1,42 @@
 # -*- coding: utf-8 -*-
 """
-Analyse der Simulierte_Speicherstände.csv
+Analyse der simulierten Speicherstände (Simulierte_Speicherstände.parquet bzw. .csv)
 Extrahiert Maxima, Minima, Durchschnitte und wichtige KPIs
+
+Bevorzugt den Parquet-Export (timeseries_io, nur die benötigten Spalten werden gelesen);
+ein anderer Pfad (.parquet/.feather/.csv) kann als erstes Argument übergeben werden.
 """
 
-import pandas as pd
+import os
+import sys
+
 import numpy as np
 
-# CSV einlesen
+import timeseries_io
+
+COLUMNS = ['time', 'H2_SOC_kg', 'H2_SOC_t', 'NH3_SOC_t', 'Water_SOC_m3']
+DEFAULT_PATHS = ("Simulierte_Speicherstände.parquet", "Simulierte_Speicherstände.csv")
+
+if len(sys.argv) > 1:
+    path = sys.argv[1]
+else:
+    available = [p for p in DEFAULT_PATHS if os.path.exists(p)]
+    path = available[0] if available else DEFAULT_PATHS[-1]
+    if path.endswith(".parquet") and not timeseries_io.HAS_PYARROW:
+        path = DEFAULT_PATHS[-1]
+
+# Zeitreihe einlesen
 print("=" * 80)
 print("ANALYSE DER SIMULIERTEN SPEICHERSTÄNDE")
 print("=" * 80)
 print()
 
-df = pd.read_csv("Simulierte_Speicherstände.csv", parse_dates=['time'])
+df, meta = timeseries_io.read_timeseries(path, columns=COLUMNS)
+print(f"Datei: {path}")
+if meta.get("design"):
+    print(f"Design ({meta.get('technology', '?')}): {meta['design']}")
+if meta.get("cost_params_hash"):
+    print(f"cost_params-Hash: {meta['cost_params_hash']}")
 
 print(f"Anzahl Zeilen: {len(df):,}")
 print(f"Zeitraum: {df['time'].min()} bis {df['time'].max()}")
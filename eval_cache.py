@@ -0,0 +1,196 @@
+"""
+Memo-Cache für Konfigurationsbewertungen (gurobi_server).
+
+Zwei Stufen:
+- LRU im Speicher (OrderedDict, begrenzte Anzahl Einträge)
+- optional SQLite auf der Platte (überlebt Neustarts, von Pool-Workern gemeinsam nutzbar)
+
+Schlüssel werden aus kanonisierten Teilen gebildet (sortiertes JSON, floats über repr)
+und als sha256 abgelegt; Werte müssen JSON-serialisierbar sein.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+def _canon(obj):
+    # Zahlen einheitlich (1 == 1.0, numpy-Skalare wie Python-Skalare)
+    if isinstance(obj, (bool, np.bool_)):
+        return bool(obj)
+    if isinstance(obj, (int, float, np.integer, np.floating)):
+        return repr(float(obj))
+    if isinstance(obj, dict):
+        return {str(k): _canon(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [_canon(v) for v in obj]
+    return obj
+
+
+def make_key(**parts) -> str:
+    """Stabiler Cache-Schlüssel aus beliebigen (verschachtelten) Teilen."""
+    blob = json.dumps(_canon(parts), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def dict_fingerprint(d: Dict[str, Any]) -> str:
+    """Kurzer Hash z.B. für cost_params (jede Änderung invalidiert die Einträge)."""
+    return make_key(d=d)[:16]
+
+
+_PROFILE_FP: Dict[int, tuple] = {}
+
+
+def profile_fingerprint(df_profile) -> str:
+    """
+    Identität eines Stundenprofils (DataFrame mit p_mw, RepeatingProfile oder ReducedProfile):
+    sha1 der p_mw-Bytes + Länge, beim reduzierten Profil zusätzlich die Gewichte.
+    Pro Objekt gemerkt, damit große Raster nicht für jeden Kandidaten neu hashen.
+    """
+    if df_profile is None:
+        return "none"
+    hit = _PROFILE_FP.get(id(df_profile))
+    if hit is not None and hit[0] is df_profile:
+        return hit[1]
+
+    base = getattr(df_profile, "base", None)
+    if base is None:
+        base = df_profile["p_mw"].to_numpy(dtype=np.float64)
+    h = hashlib.sha1(np.ascontiguousarray(base, dtype=np.float64).tobytes())
+    extra = getattr(df_profile, "fingerprint_parts", None)
+    if extra is not None:
+        # reduziertes Profil: Gewichte/Periodenlänge gehören zur Identität
+        h.update(make_key(**extra()).encode("ascii"))
+    fp = f"{h.hexdigest()[:16]}x{len(df_profile)}"
+
+    if len(_PROFILE_FP) > 64:
+        _PROFILE_FP.clear()
+    _PROFILE_FP[id(df_profile)] = (df_profile, fp)
+    return fp
+
+
+class EvalCache:
+    """LRU-Speicher-Cache mit optionaler SQLite-Stufe und Hit/Miss-Zählern."""
+
+    def __init__(self, maxsize: int = 100_000, db_path: Optional[str] = None):
+        self.maxsize = int(maxsize)
+        self.db_path = db_path
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db_conn = None
+        self._db_pid = None
+
+    @property
+    def _db(self):
+        # Verbindung pro Prozess öffnen (nach fork darf die Eltern-Verbindung nicht genutzt werden)
+        if not self.db_path:
+            return None
+        if self._db_conn is None or self._db_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS eval_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.commit()
+            self._db_conn = conn
+            self._db_pid = os.getpid()
+        return self._db_conn
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str):
+        """Wert oder None (None wird daher nie als Wert gespeichert)."""
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._mem[key]
+            db = self._db
+            if db is not None:
+                row = db.execute("SELECT value FROM eval_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        if value is None:
+            return
+        with self._lock:
+            self._remember(key, value)
+            db = self._db
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO eval_cache (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value)),
+                )
+                db.commit()
+
+    def peek(self, key: str):
+        """Nur Speicher-Stufe, ohne Zähler und ohne LRU-Update."""
+        return self._mem.get(key)
+
+    def put_many(self, items, disk: bool = True) -> None:
+        """Mehrere (key, value)-Paare, auf der Platte in einer Transaktion."""
+        items = [(k, v) for k, v in items if v is not None]
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+            db = self._db if disk else None
+            if db is not None and items:
+                db.executemany(
+                    "INSERT OR REPLACE INTO eval_cache (key, value) VALUES (?, ?)",
+                    [(k, json.dumps(v)) for k, v in items],
+                )
+                db.commit()
+
+    def clear(self, disk: bool = False) -> None:
+        with self._lock:
+            self._mem.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            db = self._db
+            if disk and db is not None:
+                db.execute("DELETE FROM eval_cache")
+                db.commit()
+
+    def add_counts(self, hits: int = 0, misses: int = 0, disk_hits: int = 0) -> None:
+        """Zähler aus anderen Prozessen (Pool-Worker) übernehmen."""
+        with self._lock:
+            self.hits += int(hits)
+            self.misses += int(misses)
+            self.disk_hits += int(disk_hits)
+
+    def counts(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            out = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "memory_entries": len(self._mem),
+                "memory_maxsize": self.maxsize,
+                "disk_path": self.db_path,
+            }
+            db = self._db
+            if db is not None:
+                out["disk_entries"] = int(db.execute("SELECT COUNT(*) FROM eval_cache").fetchone()[0])
+            return out
@@ -13,21 +13,101 @@ Nutzung:
     pip install flask
     pip install gurobipy   # optional, mit gültiger Lizenz
     python gurobi_server.py
+
+Parallele Gitterbewertung: params["workers"] im Request (oder Umgebungsvariable
+GUROBI_SERVER_WORKERS); workers > 1 verteilt die Kandidaten blockweise auf einen
+Prozess-Pool, workers <= 0 nutzt alle CPU-Kerne. Das Profil des Requests (auch das
+reduzierte Screening-Profil) wird dafuer einmal ueber profile_registry.py veroeffentlicht
+und von den Workern zero-copy gemappt statt je Worker geladen bzw. neu reduziert.
+
+Bewertungs-Cache (eval_cache.py): Simulations-KPIs je (Entscheidung, Technologie, Profil,
+physikalische cost_params, Fahrweise-Konstanten und cf.SIM_VERSION) im LRU-Speicher,
+optional in SQLite (GUROBI_EVAL_CACHE_DB). Zaehler unter GET /eval_cache, Leeren mit
+DELETE /eval_cache; params["cache"] = False schaltet ihn ab.
+
+Zwei Stufen: Stufe 1 liefert die KPIs (candidate_kpis, gecacht), Stufe 2 bewertet sie
+mit den Kostenparametern (price_kpi_table). Reine Kostenparameter (usd_to_eur,
+project_lifetime_years, Stack-Anteil, params["cost_params"] mit CAPEX/OPEX-Overrides)
+loesen daher keine Neusimulation aus; POST /price_designs rechnet Kostenszenarien
+fuer ein ganzes Gitter nur in Stufe 2.
+
+MILP (milp_model.py): POST /optimize_milp loest Fahrweise + Auslegung in einem Modell
+(gurobipy, sonst HiGHS ueber scipy), optional mit Zeitaggregation
+(params["milp"]["aggregation"], Default {"method": "rep_days", "n_days": 12} mit
+tagesuebergreifender Speicherkopplung; alternativ {"method": "blocks", "hours": 6}).
+
+Suchstrategie (search_strategies.py): "search" im Request-Body oder in params, z.B.
+"refine" oder {"strategy": "surrogate", "max_evals": 400}. Default "grid" bewertet das
+volle Gitter; die Antwort enthaelt unter "search" Bewertungen und Simulationen.
+"frontier" ({"strategy": "frontier", "verify": 50}) nutzt die Monotonie der Machbarkeit
+in pel/H2-Tagen/NH3-Schiffen/Wassertank und simuliert nur die Machbarkeitsgrenze plus
+die zulaessigen Kandidaten; "search.pruning" nennt die uebersprungenen Simulationen und
+Verstoesse in der Stichprobe.
+
+Abbruch unzulaessiger Auslegungen: params["stop_on_first_failed_ship"] = true oder
+params["max_failed_ships"] = n beendet die Simulation eines Kandidaten, sobald mehr als
+n Schiffe (bzw. das erste) nicht voll beladen werden. Die Auslegung ist dann ohnehin
+unzulaessig; ihre Strafkosten zaehlen nur die Ausfaelle bis zum Abbruch.
+
+Asynchrone Jobs (job_queue.py): POST /jobs nimmt denselben Body wie /optimize_gurobi an
+und antwortet sofort mit einer Job-ID; GET /jobs/<id> liefert Fortschritt (Kandidaten
+done/total, bisher bester Kandidat, ETA, Queue-Position), GET /jobs/<id>/result das
+Ergebnis, DELETE /jobs/<id> bricht ab. Die Jobs laufen in einem begrenzten Thread-Pool
+(GUROBI_JOB_WORKERS, Default 1) mit Warteschlange (GUROBI_JOB_QUEUE, Default 16).
+GET /jobs/<id>/events streamt den Fortschritt als Server-Sent Events (?format=ndjson:
+eine JSON-Zeile je Ereignis): Kandidaten bewertet, Simulationen/s, bisher bester
+costPerKg mit Entscheidungsvektor, Anteil zulaessiger Kandidaten und die neuen Punkte
+der Konvergenzkurve. Der Stream endet mit Ereignis "end", sobald der Job fertig ist.
+
+Windprofile (profile_store.py): POST /profiles laedt eine CSV/Excel/Parquet-Zeitreihe hoch
+und liefert eine profile_id; GET /profiles listet sie, DELETE /profiles/<id> entfernt sie.
+"profile_id" im Body (oder in params) von /optimize_gurobi, /jobs, /gurobi_daily_profile,
+/optimize_milp und /price_designs ersetzt dann das Standardprofil (use_multiyear
+wiederholt es wie df2_sim). Die Quelle wird einmal geparst (.npy-Cache unter
+GUROBI_PROFILE_DIR), geladene Profile liegen in einem LRU mit Byte-Budget
+(GUROBI_PROFILE_CACHE_MB, Default 256).
+
+Wetterjahr-Ensemble (weather_ensemble.py): POST /ensemble bewertet Auslegungen gegen
+mehrere echte Wetterjahre (hochgeladene Profile nach Kalenderjahr zerlegt) statt gegen
+ein wiederholtes Jahr, einzeln ("years") oder als zufaellige Jahresfolgen ("stitched"),
+und liefert je Auslegung P50/P90-Kosten, schlimmsten Fall Schiffsausfaelle und maximale
+Speicherstaende. Mit workers > 1 laufen die Mitglieder parallel; jedes wird einmal ueber
+profile_registry veroeffentlicht.
+
+Profilreduktion (profile_reduction.py): params["profile_reduction"] = {"k": 12, "period": "day"}
+(oder true / k) sucht auf k repraesentativen Perioden (Screening). Das Screening ist
+optimistisch (Schiffsausfaelle werden eher unterschaetzt); die guenstigsten zulaessigen
+Kandidaten werden daher blockweise (verify_top) auf dem vollen Profil nachgerechnet, bis
+zulaessige gefunden sind. Die Antwort enthaelt unter "screening" die KPI-Abweichung
+reduziert vs. voll fuer die nachgerechneten Kandidaten.
 """
 
 from __future__ import annotations
 
 import sys
 import io
+import json
 
 if sys.stdout.encoding != "utf-8":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 if sys.stderr.encoding != "utf-8":
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8")
 
-from typing import Dict, Any, List, Tuple
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from flask import Flask, Response, request, jsonify, stream_with_context
 
-from flask import Flask, request, jsonify
+import eval_cache
+import job_queue
+import profile_registry
+import profile_store
+import search_strategies
+import weather_ensemble
 
 try:
     import gurobipy as gp
@@ -38,6 +118,9 @@ except ImportError:
 
 try:
     import Code_Final as cf
+    import milp_model
+    import profile_reduction
+    import wind_profile
     HAS_CODE_FINAL = True
 except Exception:
     HAS_CODE_FINAL = False
@@ -46,6 +129,48 @@ except Exception:
 app = Flask(__name__)
 
 
+# Bewertungs-Cache: LRU im Speicher + optional SQLite (GUROBI_EVAL_CACHE_DB=pfad.sqlite)
+EVAL_CACHE = eval_cache.EvalCache(
+    maxsize=int(os.environ.get("GUROBI_EVAL_CACHE_SIZE", "100000")),
+    db_path=os.environ.get("GUROBI_EVAL_CACHE_DB") or None,
+)
+
+# Hochgeladene Windprofile (POST /profiles): Quellen + .npy-Cache unter GUROBI_PROFILE_DIR,
+# geparste Arrays im LRU mit Byte-Budget (GUROBI_PROFILE_CACHE_MB)
+PROFILES = profile_store.ProfileStore(
+    os.environ.get("GUROBI_PROFILE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+    max_bytes=int(float(os.environ.get("GUROBI_PROFILE_CACHE_MB", "256")) * 2**20),
+)
+
+# Jobs fuer lange Optimierungen: begrenzter Thread-Pool + Warteschlange
+JOBS = job_queue.JobManager(
+    max_workers=int(os.environ.get("GUROBI_JOB_WORKERS", "1")),
+    max_queued=int(os.environ.get("GUROBI_JOB_QUEUE", "16")),
+)
+
+# KPIs je (Entscheidung, Technologie), die im Cache abgelegt werden
+CACHED_KPI_KEYS = (
+    "ships_failed_count",
+    "nh3_storage_max_t",
+    "h2_storage_max_t",
+    "water_storage_max_m3",
+    "curtail_GWh_per_sim",
+    "sim_years_est",
+    "ship_out_total_t",
+    "hours_simulated",
+)
+
+# Spaltennamen der Batch-Simulation -> KPI-Namen von simulate_hourly_system
+BATCH_KPI_COLUMNS = {
+    "ships_failed_count": "ships_failed_count",
+    "nh3_storage_max_t": "NH3_storage_max_t",
+    "h2_storage_max_t": "H2_storage_max_t",
+    "water_storage_max_m3": "Water_storage_max_m3",
+    "curtail_GWh_per_sim": "Curtail_GWh_per_sim",
+    "ship_out_total_t": "ship_out_total_t",
+}
+
+
 # Feste Mindestgrenzen: nicht unterschreiten, damit H2-Bedarf Stahlwerk erfüllt werden kann.
 # Abgeleitet aus Code_Final-Raster (pel 1000+, h2_days 1+, nh3_ships 1+, water 500+).
 MINIMUM_BOUNDS = {
@@ -56,21 +181,101 @@ MINIMUM_BOUNDS = {
 }
 
 
+_MULTIYEAR_PROFILES: Dict[str, Tuple[Any, Any]] = {}
+
+
+def uploaded_profile(profile_id: str, multiyear: bool):
+    """Hochgeladenes Profil (PROFILES); multiyear -> years_sim-fache Wiederholung wie df2_sim."""
+    base = PROFILES.get(str(profile_id))
+    if not multiyear:
+        return base
+    hit = _MULTIYEAR_PROFILES.get(profile_id)
+    if hit is None or hit[0] is not base:
+        if len(_MULTIYEAR_PROFILES) > 16:
+            _MULTIYEAR_PROFILES.clear()
+        hit = (base, wind_profile.RepeatingProfile(base, cf.years_sim))
+        _MULTIYEAR_PROFILES[profile_id] = hit
+    return hit[1]
+
+
+def request_params(data: Dict[str, Any]) -> Dict[str, Any]:
+    """params des Requests; ein profile_id auf oberster Ebene wird in params uebernommen."""
+    params = dict(data.get("params") or {})
+    if data.get("profile_id") and not params.get("profile_id"):
+        params["profile_id"] = data["profile_id"]
+    return params
+
+
 def get_hourly_profile(params: Dict[str, Any]):
-    """Stuendliches Windprofil: df2 (1 Jahr) oder df2_sim (Mehrjahr), falls use_multiyear."""
+    """
+    Stuendliches Windprofil: df2 (1 Jahr) oder df2_sim (Mehrjahr), falls use_multiyear.
+    Mit params["profile_id"] statt df2 das hochgeladene Profil (POST /profiles);
+    profile_store.UnknownProfile, falls die ID nicht registriert ist.
+
+    Geladen ueber Code_Final.get_df2() -> wind_profile-Binaercache (.npy, memory-mapped),
+    d.h. Excel wird nur beim allerersten Start geparst, auch in Pool-Workern.
+    """
     if not HAS_CODE_FINAL:
         return None
-    df2_sim = getattr(cf, "df2_sim", None)
-    if params.get("use_multiyear") and df2_sim is not None:
-        return df2_sim
-    return getattr(cf, "df2", None)
+    try:
+        if params.get("screening") and reduction_options(params):
+            return reduced_hourly_profile(params)
+        if params.get("profile_id"):
+            return uploaded_profile(params["profile_id"], bool(params.get("use_multiyear")))
+        if params.get("use_multiyear"):
+            return cf.get_df2_sim()
+        return cf.get_df2()
+    except profile_store.UnknownProfile:
+        raise
+    except (OSError, ValueError, KeyError) as e:
+        # Profil (Excel) fehlt oder ist unlesbar -> Heuristik statt Simulation
+        print(f"Windprofil nicht verfuegbar: {e}")
+        return None
+
+
+def reduction_options(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    params["profile_reduction"]: true, k oder {"k", "period" ("day"/"week"/Stunden), "seed",
+    "verify_top" (Kandidaten je Nachrechnungsblock), "max_verify"}; None = aus.
+    """
+    spec = params.get("profile_reduction")
+    if not spec:
+        return None
+    if spec is True:
+        spec = {}
+    elif isinstance(spec, (int, float)):
+        spec = {"k": int(spec)}
+    opts = {"k": 12, "period": "day", "seed": 0, "verify_top": 16, "max_verify": 512}
+    opts.update(spec)
+    profile_reduction.period_hours_of(opts["period"])
+    return opts
+
+
+_REDUCED_PROFILES: Dict[tuple, Any] = {}
+
+
+def reduced_hourly_profile(params: Dict[str, Any]):
+    """Reduziertes Profil zum vollen Profil des Requests (pro Prozess gemerkt)."""
+    opts = reduction_options(params)
+    full = get_hourly_profile(dict(params, screening=False))
+    if full is None:
+        return None
+    key = (eval_cache.profile_fingerprint(full), int(opts["k"]), str(opts["period"]), int(opts["seed"]))
+    reduced = _REDUCED_PROFILES.get(key)
+    if reduced is None:
+        reduced = profile_reduction.reduce_profile(full, k=int(opts["k"]), period=opts["period"],
+                                                   seed=int(opts["seed"]))
+        if len(_REDUCED_PROFILES) > 16:
+            _REDUCED_PROFILES.clear()
+        _REDUCED_PROFILES[key] = reduced
+    return reduced
 
 
 @app.after_request
 def add_cors_headers(response):
     response.headers["Access-Control-Allow-Origin"] = "*"
     response.headers["Access-Control-Allow-Headers"] = "Content-Type"
-    response.headers["Access-Control-Allow-Methods"] = "POST, OPTIONS"
+    response.headers["Access-Control-Allow-Methods"] = "GET, POST, DELETE, OPTIONS"
     return response
 
 
@@ -88,6 +293,206 @@ def index() -> Any:
     )
 
 
+def simulation_options(params: Dict[str, Any], df_profile) -> Dict[str, Any]:
+    """
+    Zusatzargumente fuer cf.simulate_hourly_system: immer engine="kernel" (numba-Kernel,
+    gleiche KPIs wie die Python-Schleife, je Konfiguration am schnellsten). Beim
+    Mehrjahresprofil (use_multiyear) zusaetzlich Steady-State-Abbruch (params["steady_state"],
+    Default an): sobald sich ein Jahr wiederholt, werden die restlichen Jahre hochgerechnet.
+    """
+    if not HAS_CODE_FINAL:
+        return {}
+    if isinstance(df_profile, cf.wind_profile.RepeatingProfile) and params.get("steady_state", True):
+        return {
+            "engine": "kernel",
+            "steady_state": True,
+            "steady_state_tol": float(params.get("steady_state_tol", 0.0)),
+        }
+    return {"engine": "kernel"}
+
+
+def use_batch_simulation(params: Dict[str, Any], df_profile) -> bool:
+    """
+    Batch-Simulation (cf.simulate_hourly_system_batch) nur auf Wunsch (params["batch"]=True)
+    und ohne Steady-State-Abbruch; Default ist der Kernel Kandidat fuer Kandidat.
+    """
+    return bool(params.get("batch", False)) and not simulation_options(params, df_profile).get("steady_state")
+
+
+def early_stop_options(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Abbruch bei Schiffsausfaellen (params["stop_on_first_failed_ship"] / params["max_failed_ships"]),
+    als Zusatzargumente fuer cf.simulate_hourly_system(_batch); leer, wenn nicht angefordert.
+    """
+    stop_first = bool(params.get("stop_on_first_failed_ship", False))
+    max_failed = params.get("max_failed_ships")
+    if not stop_first and max_failed is None:
+        return {}
+    return {
+        "stop_on_first_failed_ship": stop_first,
+        "max_failed_ships": None if max_failed is None else int(max_failed),
+    }
+
+
+def annual_h2_target_t(params: Dict[str, Any]) -> float:
+    return float(params.get("annual_h2_t") or getattr(cf, "annual_h2_prod_t", 120800.0))
+
+
+def h2_storage_design_t(params: Dict[str, Any], h2_days: float) -> float:
+    return (annual_h2_target_t(params) / 365.0) * float(h2_days)
+
+
+def evaluation_cache_key(
+    params: Dict[str, Any],
+    decision: Dict[str, float],
+    tech: str,
+    df_profile,
+) -> str:
+    """
+    Cache-Schluessel einer Simulation: kanonisierte Entscheidung, Technologie,
+    Profil-Identitaet, simulationsrelevante Request-Parameter (H2-Speicher-Auslegung,
+    Engine/Steady-State, Abbruch bei Schiffsausfaellen), Fingerprint der physikalischen cost_params
+    (cf.physical_cost_params: ohne CAPEX/OPEX, Kostenaenderungen behalten die KPIs) sowie der
+    Fahrweise-Konstanten und der Simulationsversion (cf.simulation_constants, cf.SIM_VERSION).
+    """
+    return eval_cache.make_key(
+        kind="kpi",
+        decision={k: float(decision[k]) for k in ("s", "pel", "h2_days", "nh3_ships", "water_tank")},
+        tech=tech,
+        profile=eval_cache.profile_fingerprint(df_profile),
+        h2_storage_t_design=h2_storage_design_t(params, decision["h2_days"]),
+        sim={**simulation_options(params, df_profile), **early_stop_options(params)},
+        physics=eval_cache.dict_fingerprint(cf.physical_cost_params()),
+        constants=eval_cache.dict_fingerprint(cf.simulation_constants()),
+    )
+
+
+def _kpi_subset(kpi: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for key in CACHED_KPI_KEYS:
+        if key in kpi:
+            v = kpi[key]
+            out[key] = int(v) if key in ("ships_failed_count", "hours_simulated") else float(v)
+    return out
+
+
+def simulate_kpis(
+    params: Dict[str, Any],
+    decision: Dict[str, float],
+    tech: str,
+    df_profile,
+) -> Dict[str, Any]:
+    """Stuendliche Simulation einer Entscheidung fuer eine Technologie (KPIs, mit Cache)."""
+    use_cache = params.get("cache", True)
+    key = evaluation_cache_key(params, decision, tech, df_profile) if use_cache else None
+    if key is not None:
+        hit = EVAL_CACHE.get(key)
+        if hit is not None:
+            return hit
+
+    _, kpi = cf.simulate_hourly_system(
+        s=float(decision["s"]),
+        p_el_mw=float(decision["pel"]),
+        technology=tech,
+        h2_storage_t_max=h2_storage_design_t(params, decision["h2_days"]),
+        nh3_storage_ships=float(decision["nh3_ships"]),
+        water_tank_m3_max=float(decision["water_tank"]),
+        return_timeseries=False,
+        df_profile=df_profile,
+        **simulation_options(params, df_profile),
+        **early_stop_options(params),
+    )
+    kpi = _kpi_subset(kpi)
+    if key is not None:
+        EVAL_CACHE.put(key, kpi)
+    return kpi
+
+
+# -----------------------------
+# Stufe 2: Kostenbewertung aus KPI-Tabellen (ohne Simulation)
+# -----------------------------
+def cost_settings(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Kostenrelevante Request-Parameter: annual_h2_t, Lebensdauer (Nenner), usd_to_eur,
+    Stack-Parameter und cost_params mit params["cost_params"]-Overrides (nur CAPEX/OPEX).
+    """
+    overrides = params.get("cost_params") or None
+    return {
+        "annual_h2_t": annual_h2_target_t(params),
+        "years": float(
+            params.get("project_lifetime_years")
+            or (cf.cost_params["general"]["project_lifetime_years"] if hasattr(cf, "cost_params") else 20)
+        ),
+        "usd_to_eur": float(params.get("usd_to_eur", 0.92)),
+        "stack_life_years": float(params.get("electrolyzer_stack_lifetime_years", 10.0)),
+        "stack_share": float(params.get("electrolyzer_stack_capex_share", 0.4)),
+        "cost_params": cf.merge_cost_params(overrides) if overrides else None,
+    }
+
+
+def price_kpi_table(
+    params: Dict[str, Any],
+    jobs: List[Tuple[str, Dict[str, float]]],
+    kpis: List[Dict[str, Any]],
+    settings: Optional[Dict[str, Any]] = None,
+) -> np.ndarray:
+    """
+    Kosten pro kg H2 (EUR) fuer eine KPI-Tabelle: jobs[i] = (tech, decision), kpis[i] aus
+    Stufe 1. Schiffsausfaelle -> Strafkosten 1e6 + 1e5 * Ausfaelle (wie evaluate_configuration).
+    Stack-Erneuerung wird erst in evaluate_configuration_detailed beruecksichtigt.
+    """
+    settings = settings or cost_settings(params)
+    n = len(jobs)
+    ships_failed = np.array([int(k.get("ships_failed_count", 0)) for k in kpis], dtype=np.int64)
+    total_proxy = np.zeros(n)
+    ok = np.flatnonzero(ships_failed == 0)
+    if len(ok):
+        decisions = [jobs[i][1] for i in ok]
+        total_proxy[ok] = cf.cost_components_proxy_vec(
+            s=np.array([float(d["s"]) for d in decisions]),
+            p_el_mw=np.array([float(d["pel"]) for d in decisions]),
+            nh3_storage_t=np.array([float(kpis[i].get("nh3_storage_max_t", 0.0)) for i in ok]),
+            h2_storage_t_design=np.array([h2_storage_design_t(params, d["h2_days"]) for d in decisions]),
+            water_tank_m3_design=np.array([float(d["water_tank"]) for d in decisions]),
+            technology=[jobs[i][0] for i in ok],
+            cost_params_override=settings["cost_params"],
+        )["Total_proxy"].to_numpy()
+
+    denom = settings["annual_h2_t"] * 1000.0 * settings["years"]
+    if denom <= 0:
+        trial = np.full(n, 1e6)
+    else:
+        trial = total_proxy * settings["usd_to_eur"] / denom
+    return np.where(ships_failed > 0, 1e6 + 1e5 * ships_failed, trial)
+
+
+def best_tech_per_candidate(
+    n: int,
+    trial: np.ndarray,
+    ships_failed: np.ndarray,
+) -> Tuple[List[float], List[bool], List[str]]:
+    """AEL-/PEM-Zeilen (erst n AEL, dann n PEM) zu (cost, feasible, tech) je Kandidat zusammenfassen."""
+    trial_ael, trial_pem = trial[:n], trial[n:]
+    best_cost = np.minimum(trial_ael, trial_pem)
+    any_feasible = (ships_failed[:n] == 0) | (ships_failed[n:] == 0)
+
+    costs = [float(max(c, 0.1)) for c in best_cost]
+    feasible = [bool(f and c < 1e5) for f, c in zip(any_feasible, best_cost)]
+    # wie in evaluate_configuration: PEM nur, wenn strikt guenstiger
+    techs = ["PEM" if p < a else "AEL" for a, p in zip(trial_ael, trial_pem)]
+    return costs, feasible, techs
+
+
+def trial_cost_from_kpi(
+    params: Dict[str, Any],
+    decision: Dict[str, float],
+    tech: str,
+    kpi: Dict[str, Any],
+) -> float:
+    """Kosten pro kg H2 (EUR) einer einzelnen (Entscheidung, Technologie) aus ihren KPIs."""
+    return float(price_kpi_table(params, [(tech, decision)], [kpi])[0])
+
+
 def evaluate_configuration(
     params: Dict[str, Any],
     decision: Dict[str, float],
@@ -95,6 +500,20 @@ def evaluate_configuration(
 ) -> Tuple[float, bool]:
     """
     Bewertet eine Konfiguration: Kosten pro kg H2 (EUR) und Machbarkeit (ships_failed == 0).
+    Siehe evaluate_configuration_with_tech().
+    """
+    cost, feasible, _tech = evaluate_configuration_with_tech(params, decision, df_profile)
+    return (cost, feasible)
+
+
+def evaluate_configuration_with_tech(
+    params: Dict[str, Any],
+    decision: Dict[str, float],
+    df_profile=None,
+) -> Tuple[float, bool, Optional[str]]:
+    """
+    Bewertet eine Konfiguration: Kosten pro kg H2 (EUR), Machbarkeit (ships_failed == 0)
+    und guenstigste Technologie (AEL/PEM; None bei Heuristik-Fallback).
 
     Verwendet stündliche Simulation (simulate_hourly_system) und cost_components_proxy.
     Alle kostenbeeinflussenden Parameter (Wind, EL, H2/NH3-Speicher, RO, N2, HB, Water-Tank)
@@ -109,77 +528,22 @@ def evaluate_configuration(
 
     if HAS_CODE_FINAL and df_profile is not None:
         try:
-            annual_h2_t = float(
-                params.get("annual_h2_t")
-                or getattr(cf, "annual_h2_prod_t", 120800.0)
-            )
-            years = float(
-                params.get("project_lifetime_years")
-                or (cf.cost_params["general"]["project_lifetime_years"] if hasattr(cf, "cost_params") else 20)
-            )
-            usd_to_eur = float(params.get("usd_to_eur", 0.92))
-            # Zusatz: Stack-Lebensdauer und Stack-Kostenanteil (Literaturwerte, anpassbar über params)
-            stack_life_years = float(params.get("electrolyzer_stack_lifetime_years", 10.0))
-            stack_share = float(params.get("electrolyzer_stack_capex_share", 0.4))
-
-            h2_storage_t_design = (annual_h2_t / 365.0) * h2_days
-
             best_cost = float("inf")
             best_tech = "AEL"
             any_feasible = False
 
             for tech in ("AEL", "PEM"):
-                _, kpi = cf.simulate_hourly_system(
-                    s=s,
-                    p_el_mw=pel,
-                    technology=tech,
-                    h2_storage_t_max=h2_storage_t_design,
-                    nh3_storage_ships=nh3_ships,
-                    water_tank_m3_max=water_tank,
-                    return_timeseries=False,
-                    df_profile=df_profile,
-                )
-
-                ships_failed = int(kpi.get("ships_failed_count", 0))
-                feasible = ships_failed == 0
-
-                if ships_failed > 0:
-                    trial_cost = 1e6 + 1e5 * ships_failed
-                else:
+                kpi = simulate_kpis(params, decision, tech, df_profile)
+                if int(kpi.get("ships_failed_count", 0)) == 0:
                     any_feasible = True
-                    nh3_storage_t = float(kpi.get("nh3_storage_max_t", 0.0))
-                    (
-                        _w,
-                        *_o,
-                        total_proxy,
-                    ) = cf.cost_components_proxy(
-                        s=s,
-                        p_el_mw=pel,
-                        nh3_storage_t=nh3_storage_t,
-                        h2_storage_t_design=h2_storage_t_design,
-                        water_tank_m3_design=water_tank,
-                        technology=tech,
-                    )
-                    annual_h2_kg = annual_h2_t * 1000.0
-                    denom = annual_h2_kg * years
-                    if denom <= 0:
-                        trial_cost = 1e6
-                    else:
-                        # Stack-Erneuerung approximieren: zusätzliche CAPEX über Lebensdauer
-                        # Stack-Anteil stack_share * el_capex, alle stack_life_years ein Tausch
-                        # el_capex steckt im Rückgabewert an Position el_capex (Index 5 im Tuple)
-                        # -> wir nutzen hier eine grobe Approx.: repl_factor * (stack_share * el_capex)
-                        # Hinweis: Hier haben wir el_capex im *_o-Tuple nicht explizit; daher
-                        # wird die detaillierte Stack-Korrektur in evaluate_configuration_detailed vorgenommen.
-                        total_eur = float(total_proxy) * usd_to_eur
-                        trial_cost = total_eur / denom
+                trial_cost = trial_cost_from_kpi(params, decision, tech, kpi)
 
                 if trial_cost < best_cost:
                     best_cost = trial_cost
                     best_tech = tech
 
             cost = float(max(best_cost, 0.1))
-            return (cost, any_feasible and best_cost < 1e5)
+            return (cost, any_feasible and best_cost < 1e5, best_tech)
 
         except Exception as exc:
             print("WARNUNG: evaluate_configuration (Code_Final) fehlgeschlagen:", str(exc))
@@ -187,7 +551,318 @@ def evaluate_configuration(
     # Fallback: Heuristik
     base = float(params.get("base_cost_per_kg", 3.0))
     cost = base + 0.0008 * pel + 0.05 * h2_days + 0.15 * nh3_ships + 0.00001 * water_tank - 0.5 * (s - 1.0)
-    return (max(cost, 0.1), True)
+    return (max(cost, 0.1), True, None)
+
+
+def candidate_kpis_batch(
+    params: Dict[str, Any],
+    candidates: List[Dict[str, float]],
+    df_profile,
+) -> Tuple[List[Tuple[str, Dict[str, float]]], List[Dict[str, Any]]]:
+    """
+    Stufe 1: KPI-Tabelle fuer alle Kandidaten (erst alle AEL, dann alle PEM). Bereits
+    gecachte (Kandidat, Technologie)-Paare werden nicht erneut simuliert, die uebrigen
+    in einem gemeinsamen Durchlauf (cf.simulate_hourly_system_batch) und dann gecacht.
+    """
+    jobs = [(tech, c) for tech in ("AEL", "PEM") for c in candidates]
+    use_cache = params.get("cache", True)
+    keys = [evaluation_cache_key(params, c, tech, df_profile) if use_cache else None for tech, c in jobs]
+    kpis: List[Optional[Dict[str, Any]]] = [EVAL_CACHE.get(k) if k is not None else None for k in keys]
+
+    missing = [i for i, kpi in enumerate(kpis) if kpi is None]
+    if missing:
+        configs = [
+            {
+                "s": float(jobs[i][1]["s"]),
+                "P_el_MW": float(jobs[i][1]["pel"]),
+                "h2_storage_days": float(jobs[i][1]["h2_days"]),
+                "h2_storage_t_design": h2_storage_design_t(params, jobs[i][1]["h2_days"]),
+                "nh3_storage_ships": float(jobs[i][1]["nh3_ships"]),
+                "water_tank_m3_max": float(jobs[i][1]["water_tank"]),
+                "tech": jobs[i][0],
+            }
+            for i in missing
+        ]
+        res = cf.simulate_hourly_system_batch(configs, df_profile=df_profile, **early_stop_options(params))
+        cols = {name: res[col].to_numpy() for name, col in BATCH_KPI_COLUMNS.items()}
+        sim_years_est = float(len(df_profile)) / 8760.0
+        for j, i in enumerate(missing):
+            kpi = {name: float(arr[j]) for name, arr in cols.items()}
+            kpi["ships_failed_count"] = int(cols["ships_failed_count"][j])
+            if "hours_simulated" in res:
+                kpi["hours_simulated"] = int(res["hours_simulated"].iat[j])
+            kpi["sim_years_est"] = sim_years_est
+            kpis[i] = kpi
+        if use_cache:
+            EVAL_CACHE.put_many((keys[i], kpis[i]) for i in missing)
+    return jobs, kpis
+
+
+def candidate_kpis(
+    params: Dict[str, Any],
+    candidates: List[Dict[str, float]],
+    df_profile,
+) -> Tuple[List[Tuple[str, Dict[str, float]]], List[Dict[str, Any]]]:
+    """Stufe 1: KPIs je (Technologie, Kandidat) mit dem Kernel, bei params["batch"] ueber candidate_kpis_batch."""
+    if use_batch_simulation(params, df_profile):
+        return candidate_kpis_batch(params, candidates, df_profile)
+    jobs = [(tech, c) for tech in ("AEL", "PEM") for c in candidates]
+    return jobs, [simulate_kpis(params, c, tech, df_profile) for tech, c in jobs]
+
+
+def evaluate_candidates_batch(
+    params: Dict[str, Any],
+    candidates: List[Dict[str, float]],
+    df_profile,
+) -> Tuple[List[float], List[bool], List[str]]:
+    """
+    Bewertet alle Kandidaten (AEL + PEM): Stufe 1 (KPIs, Batch-Simulation + Cache),
+    Stufe 2 (price_kpi_table). Gleiche Kosten-/Machbarkeitslogik wie evaluate_configuration().
+    """
+    jobs, kpis = candidate_kpis_batch(params, candidates, df_profile)
+    ships_failed = np.array([int(kpi["ships_failed_count"]) for kpi in kpis])
+    trial = price_kpi_table(params, jobs, kpis)
+    return best_tech_per_candidate(len(candidates), trial, ships_failed)
+
+
+def evaluate_candidates_serial(
+    params: Dict[str, Any],
+    candidates: List[Dict[str, float]],
+    df_profile,
+) -> List[Tuple[float, bool, Optional[str]]]:
+    """
+    Bewertet Kandidaten im aktuellen Prozess: Kandidat fuer Kandidat mit dem Kernel,
+    mit params["batch"] ueber die Batch-Simulation (siehe use_batch_simulation).
+    Rueckgabe: (cost, feasible, tech) je Kandidat.
+    """
+    if HAS_CODE_FINAL and df_profile is not None and use_batch_simulation(params, df_profile):
+        try:
+            costs, feasible_mask, techs = evaluate_candidates_batch(params, candidates, df_profile)
+            return list(zip(costs, feasible_mask, techs))
+        except Exception as exc:
+            print("WARNUNG: evaluate_candidates_batch fehlgeschlagen:", str(exc))
+    return [evaluate_configuration_with_tech(params, c, df_profile) for c in candidates]
+
+
+# -----------------------------
+# Parallele Gitterbewertung (ProcessPoolExecutor)
+# -----------------------------
+_POOL_LOCK = threading.Lock()
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+
+
+def _pool_init() -> None:
+    """Worker-Start: Code_Final (inkl. Windprofil) einmal pro Prozess laden."""
+    if HAS_CODE_FINAL:
+        get_hourly_profile({})
+
+
+def _pool_eval_chunk(
+    chunk_index: int,
+    params: Dict[str, Any],
+    chunk: List[Dict[str, float]],
+    profile_name: Optional[str] = None,
+):
+    """
+    Worker: bewertet einen Kandidaten-Block gegen das Profil des Hauptprozesses, das ueber
+    profile_registry geteilt wird (zero-copy, kein eigenes Laden/Reduzieren im Worker);
+    ohne profile_name gegen das prozesslokale Profil.
+    Liefert zusaetzlich die Cache-Zaehler-Differenz und die KPI-Eintraege des Blocks,
+    damit der Hauptprozess (Endpoint /eval_cache, Detailbewertung) sie kennt.
+    """
+    df_profile = profile_registry.attach(profile_name) if profile_name else get_hourly_profile(params)
+    before = EVAL_CACHE.counts()
+    results = evaluate_candidates_serial(params, chunk, df_profile)
+    after = EVAL_CACHE.counts()
+    delta = {k: after[k] - before[k] for k in after}
+
+    entries = []
+    if params.get("cache", True) and HAS_CODE_FINAL and df_profile is not None:
+        for c in chunk:
+            for tech in ("AEL", "PEM"):
+                key = evaluation_cache_key(params, c, tech, df_profile)
+                entries.append((key, EVAL_CACHE.peek(key)))
+    return chunk_index, results, delta, entries
+
+
+def _fully_cached(params: Dict[str, Any], candidate: Dict[str, float], df_profile) -> bool:
+    return all(
+        EVAL_CACHE.peek(evaluation_cache_key(params, candidate, tech, df_profile)) is not None
+        for tech in ("AEL", "PEM")
+    )
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Prozess-Pool (wiederverwendet, solange die Worker-Anzahl gleich bleibt)."""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = ProcessPoolExecutor(max_workers=workers, initializer=_pool_init)
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def resolve_worker_count(params: Dict[str, Any]) -> int:
+    """Worker-Anzahl aus params["workers"] bzw. Umgebungsvariable GUROBI_SERVER_WORKERS (Default 1)."""
+    raw = params.get("workers", os.environ.get("GUROBI_SERVER_WORKERS", 1))
+    try:
+        workers = int(raw)
+    except (TypeError, ValueError):
+        workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def evaluate_candidates(
+    params: Dict[str, Any],
+    candidates: List[Dict[str, float]],
+    df_profile,
+) -> List[Tuple[float, bool, Optional[str]]]:
+    """
+    Bewertet alle Kandidaten, bei workers > 1 blockweise im Prozess-Pool.
+    Die Ergebnisreihenfolge entspricht immer der Kandidatenreihenfolge
+    (unabhaengig davon, in welcher Reihenfolge die Bloecke fertig werden).
+    """
+    workers = resolve_worker_count(params)
+    if workers <= 1 or len(candidates) <= 1:
+        return evaluate_candidates_serial(params, candidates, df_profile)
+
+    # bereits vollstaendig gecachte Kandidaten direkt im Hauptprozess bewerten
+    todo = list(range(len(candidates)))
+    results: List[Optional[Tuple[float, bool, Optional[str]]]] = [None] * len(candidates)
+    if params.get("cache", True) and HAS_CODE_FINAL and df_profile is not None:
+        cached = [i for i in todo if _fully_cached(params, candidates[i], df_profile)]
+        if cached:
+            for i, r in zip(cached, evaluate_candidates_serial(params, [candidates[i] for i in cached], df_profile)):
+                results[i] = r
+            cached_set = set(cached)
+            todo = [i for i in todo if i not in cached_set]
+    if not todo:
+        return results
+
+    chunk_size = int(params.get("chunk_size") or 0)
+    if chunk_size <= 0:
+        chunk_size = max(1, -(-len(todo) // (workers * 4)))
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+
+    # Profil einmal fuer alle Worker veroeffentlichen (gleicher Inhalt -> gleiche Datei)
+    profile_name = profile_registry.publish(df_profile) if df_profile is not None else None
+    pool = get_process_pool(workers)
+    futures = [
+        pool.submit(_pool_eval_chunk, k, params, [candidates[i] for i in chunk], profile_name)
+        for k, chunk in enumerate(chunks)
+    ]
+
+    # Ergebnisse in Einreichungsreihenfolge einsammeln -> deterministisch
+    for k, fut in enumerate(futures):
+        chunk_index, chunk_results, cache_delta, cache_entries = fut.result()
+        assert chunk_index == k
+        for i, r in zip(chunks[k], chunk_results):
+            results[i] = r
+        EVAL_CACHE.add_counts(**cache_delta)
+        EVAL_CACHE.put_many(cache_entries, disk=False)
+    return results
+
+
+# -----------------------------
+# Wetterjahr-Ensemble (weather_ensemble.py)
+# -----------------------------
+def _pool_member_kpis(
+    params: Dict[str, Any],
+    chunk: List[Dict[str, float]],
+    profile_name: str,
+):
+    """
+    Worker: KPI-Tabelle (erst AEL, dann PEM) eines Kandidaten-Blocks gegen ein
+    Ensemble-Mitglied, das zero-copy aus profile_registry gemappt wird.
+    Liefert wie _pool_eval_chunk die Cache-Zaehler-Differenz und die KPI-Eintraege.
+    """
+    df_profile = profile_registry.attach(profile_name)
+    before = EVAL_CACHE.counts()
+    jobs, kpis = candidate_kpis(params, chunk, df_profile)
+    after = EVAL_CACHE.counts()
+    delta = {k: after[k] - before[k] for k in after}
+
+    entries = []
+    if params.get("cache", True):
+        entries = [
+            (evaluation_cache_key(params, c, tech, df_profile), kpi)
+            for (tech, c), kpi in zip(jobs, kpis)
+        ]
+    return kpis, delta, entries
+
+
+def ensemble_weather_years(params: Dict[str, Any], spec: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Wetterjahre des Ensembles: spec["profile_ids"] (hochgeladene Profile, POST /profiles;
+    Default params["profile_id"]) bzw. df2, jeweils nach Kalenderjahr zerlegt.
+    Kommt ein Jahr in mehreren Profilen vor, wird der Profilname vorangestellt.
+    """
+    ids = list(spec.get("profile_ids") or ([params["profile_id"]] if params.get("profile_id") else []))
+    if not ids:
+        return weather_ensemble.split_weather_years(cf.get_df2())
+    split = [weather_ensemble.split_weather_years(PROFILES.get(profile_id)) for profile_id in ids]
+    labels = [label for years in split for label, _ in years]
+    if len(set(labels)) == len(labels):
+        return [member for years in split for member in years]
+    return [
+        (f"{PROFILES.meta(profile_id)['name']}:{label}", df)
+        for profile_id, years in zip(ids, split)
+        for label, df in years
+    ]
+
+
+def ensemble_kpis(
+    params: Dict[str, Any],
+    candidates: List[Dict[str, float]],
+    members: List[Tuple[str, Any]],
+    keep_published: bool = True,
+) -> Tuple[List[Tuple[str, Dict[str, float]]], List[List[Dict[str, Any]]]]:
+    """
+    Stufe 1 fuer jedes Ensemble-Mitglied: (jobs, kpis[m]) wie candidate_kpis.
+    Bei workers > 1 laufen (Mitglied, Kandidaten-Block)-Aufgaben im Prozess-Pool; jedes
+    Mitglied wird dafuer einmal ueber profile_registry veroeffentlicht, nicht je Aufgabe
+    kopiert. keep_published=False entfernt die Registry-Dateien danach wieder
+    (zufaellige Jahresfolgen, die nur fuer diesen Request entstehen).
+    """
+    jobs = [(tech, c) for tech in ("AEL", "PEM") for c in candidates]
+    workers = resolve_worker_count(params)
+    if workers <= 1:
+        return jobs, [candidate_kpis(params, candidates, df)[1] for _, df in members]
+
+    chunk_size = int(params.get("chunk_size") or 0)
+    if chunk_size <= 0:
+        chunk_size = max(1, -(-len(candidates) * len(members) // (workers * 4)))
+    chunk_size = min(chunk_size, len(candidates))
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+
+    names = [profile_registry.publish(df) for _, df in members]
+    try:
+        pool = get_process_pool(workers)
+        futures = [
+            [pool.submit(_pool_member_kpis, params, chunk, name) for chunk in chunks]
+            for name in names
+        ]
+        out = []
+        for member_futures in futures:
+            ael: List[Dict[str, Any]] = []
+            pem: List[Dict[str, Any]] = []
+            for chunk, fut in zip(chunks, member_futures):
+                kpis, cache_delta, cache_entries = fut.result()
+                ael.extend(kpis[:len(chunk)])
+                pem.extend(kpis[len(chunk):])
+                EVAL_CACHE.add_counts(**cache_delta)
+                EVAL_CACHE.put_many(cache_entries, disk=False)
+            out.append(ael + pem)
+    finally:
+        if not keep_published:
+            for name in names:
+                profile_registry.unpublish(name)
+    return jobs, out
 
 
 def evaluate_configuration_detailed(
@@ -217,21 +892,15 @@ def evaluate_configuration_detailed(
     s = float(decision["s"])
     pel = float(decision["pel"])
     h2_days = float(decision["h2_days"])
-    nh3_ships = float(decision["nh3_ships"])
     water_tank = float(decision["water_tank"])
 
     try:
-        annual_h2_t = float(
-            params.get("annual_h2_t")
-            or getattr(cf, "annual_h2_prod_t", 120800.0)
-        )
-        years = float(
-            params.get("project_lifetime_years")
-            or (cf.cost_params["general"]["project_lifetime_years"] if hasattr(cf, "cost_params") else 20)
-        )
-        usd_to_eur = float(params.get("usd_to_eur", 0.92))
-        stack_life_years = float(params.get("electrolyzer_stack_lifetime_years", 10.0))
-        stack_share = float(params.get("electrolyzer_stack_capex_share", 0.4))
+        settings = cost_settings(params)
+        annual_h2_t = settings["annual_h2_t"]
+        years = settings["years"]
+        usd_to_eur = settings["usd_to_eur"]
+        stack_life_years = settings["stack_life_years"]
+        stack_share = settings["stack_share"]
 
         h2_storage_t_design = (annual_h2_t / 365.0) * h2_days
 
@@ -240,58 +909,8 @@ def evaluate_configuration_detailed(
         best_kpi = None
 
         for tech in ("AEL", "PEM"):
-            _, kpi = cf.simulate_hourly_system(
-                s=s,
-                p_el_mw=pel,
-                technology=tech,
-                h2_storage_t_max=h2_storage_t_design,
-                nh3_storage_ships=nh3_ships,
-                water_tank_m3_max=water_tank,
-                return_timeseries=False,
-                df_profile=df_profile,
-            )
-
-            ships_failed = int(kpi.get("ships_failed_count", 0))
-            if ships_failed > 0:
-                trial_cost = 1e6 + 1e5 * ships_failed
-            else:
-                nh3_storage_t = float(kpi.get("nh3_storage_max_t", 0.0))
-                (
-                    wind_total,
-                    wind_capex,
-                    wind_opex,
-                    wind_dapex,
-                    el_capex,
-                    el_opex_total,
-                    hb_capex,
-                    hb_opex_total,
-                    n2_capex,
-                    n2_opex_total,
-                    ro_capex,
-                    ro_opex_total,
-                    water_tank_capex,
-                    water_tank_opex_total,
-                    h2_capex,
-                    h2_opex_total,
-                    nh3_capex,
-                    nh3_opex_total,
-                    total_proxy,
-                ) = cf.cost_components_proxy(
-                    s=s,
-                    p_el_mw=pel,
-                    nh3_storage_t=nh3_storage_t,
-                    h2_storage_t_design=h2_storage_t_design,
-                    water_tank_m3_design=water_tank,
-                    technology=tech,
-                )
-
-                annual_h2_kg = annual_h2_t * 1000.0
-                denom = annual_h2_kg * years
-                if denom <= 0:
-                    trial_cost = 1e6
-                else:
-                    total_eur = float(total_proxy) * usd_to_eur
-                    trial_cost = total_eur / denom
+            kpi = simulate_kpis(params, decision, tech, df_profile)
+            trial_cost = trial_cost_from_kpi(params, decision, tech, kpi)
 
             if trial_cost < best_cost:
                 best_cost = trial_cost
@@ -333,6 +952,7 @@ def evaluate_configuration_detailed(
             h2_storage_t_design=h2_storage_t_design,
             water_tank_m3_design=water_tank,
             technology=best_tech,
+            cost_params_override=settings["cost_params"],
         )
 
         annual_h2_kg = annual_h2_t * 1000.0
@@ -396,6 +1016,26 @@ def evaluate_configuration_detailed(
         result["costPerKg"] = float(cost)
         return result
 
+# Default-Gittergrenzen fuer /optimize_gurobi und /price_designs
+GRID_DEFAULTS = {
+    "s_min": 0.95,
+    "s_max": 1.0,
+    "s_step": 0.01,
+    "pel_min": 1000.0,
+    "pel_max": 2500.0,
+    "pel_step": 100.0,
+    "h2_min": 1.0,
+    "h2_max": 7.0,
+    "h2_step": 1.0,
+    "nh3_min": 3.0,
+    "nh3_max": 8.0,
+    "nh3_step": 1.0,
+    "water_min": 500.0,
+    "water_max": 10000.0,
+    "water_step": 2000.0,
+}
+
+
 def compute_minimum_bounds(params: Dict[str, Any]) -> Dict[str, float]:
     """
     Feste Mindestgrenzen fuer das Suchgitter. Unterschreiten nicht erlaubt, damit
@@ -464,64 +1104,202 @@ def generate_candidate_grid(bounds: Dict[str, float]) -> List[Dict[str, float]]:
     return out
 
 
+SCREENING_KPIS = ("curtail_GWh_per_sim", "h2_storage_max_t", "nh3_storage_max_t", "ship_out_total_t")
+
+
+def verify_screened(
+    params: Dict[str, Any],
+    search: Dict[str, Any],
+    df_profile,
+    screen_params: Dict[str, Any],
+    screen_profile,
+    opts: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Rechnet die im Screening guenstigsten zulaessigen Kandidaten blockweise (verify_top)
+    auf dem vollen Profil nach, bis ein Block zulaessige enthaelt (hoechstens max_verify).
+    Rueckgabe: search-Ergebnis mit den nachgerechneten Kandidaten (volle Kosten) und
+    Screening-Info inkl. KPI-Abweichung reduziert vs. voll.
+    """
+    order = sorted((i for i, ok in enumerate(search["feasible"]) if ok), key=lambda i: search["costs"][i])
+    verify_top = max(1, int(opts["verify_top"]))
+    max_verify = max(verify_top, int(opts["max_verify"]))
+
+    verified: List[Dict[str, float]] = []
+    results: List[Tuple[float, bool, Optional[str]]] = []
+    for start in range(0, min(len(order), max_verify), verify_top):
+        block = [search["candidates"][i] for i in order[start:start + verify_top]]
+        results += evaluate_candidates(params, block, df_profile)
+        verified += block
+        if any(ok for _, ok, _ in results):
+            break
+
+    kpi_errors = {}
+    if verified:
+        _, red = candidate_kpis(screen_params, verified, screen_profile)
+        _, full = candidate_kpis(params, verified, df_profile)
+        # abgebrochene Simulationen (early_stop_options) haben nur Teil-KPIs
+        complete = [j for j, k in enumerate(full) if k.get("hours_simulated", len(df_profile)) >= len(df_profile)]
+        for name in SCREENING_KPIS if complete else ():
+            est = np.array([red[j][name] for j in complete], dtype=np.float64)
+            ref = np.array([full[j][name] for j in complete], dtype=np.float64)
+            rel = np.abs(est - ref) / np.maximum(np.abs(ref), 1e-9)
+            kpi_errors[name] = {"mean_abs_rel_error": float(rel.mean()), "max_abs_rel_error": float(rel.max())}
+
+    info = {
+        **screen_profile.info(),
+        "screened": search["evaluations"],
+        "screened_feasible": len(order),
+        "verified": len(verified),
+        "verified_feasible": int(sum(ok for _, ok, _ in results)),
+        "kpi_errors": kpi_errors,
+    }
+    verified_search = dict(
+        search,
+        candidates=verified,
+        costs=[r[0] for r in results],
+        feasible=[r[1] for r in results],
+        techs=[r[2] for r in results],
+    )
+    return verified_search, info
+
+
 @app.route("/optimize_gurobi", methods=["OPTIONS"])
 def optimize_gurobi_options() -> Any:
     return ("", 204)
 
 
-@app.route("/optimize_gurobi", methods=["POST"])
-def optimize_gurobi() -> Any:
-    data = request.get_json(force=True) or {}
+def progress_evaluator(
+    evaluate, job, total: Optional[int], chunk_size: int = 1024, use_cache: bool = True
+):
+    """
+    Wrapper um evaluate(candidates) fuer Jobs (POST /jobs): bewertet blockweise, meldet nach
+    jedem Block Fortschritt und bisher guenstigsten zulaessigen Kandidaten (job.report)
+    und bricht ab, sobald der Job geloescht wurde (job.check_cancelled).
+
+    job.metrics: evaluated, feasible, feasible_fraction, simulations (Cache-Misses bzw. ohne
+    Cache 2 je Kandidat) und sims_per_s seit Beginn der Bewertung.
+    """
+    chunk_size = max(1, int(chunk_size))
+    state: Dict[str, Any] = {"done": 0, "feasible": 0, "best": None}
+    misses_before = EVAL_CACHE.misses
+    t0 = time.time()
+    job.report(done=0, total=total)
+
+    def wrapped(candidates: List[Dict[str, float]]) -> List[Tuple[float, bool, Optional[str]]]:
+        out: List[Tuple[float, bool, Optional[str]]] = []
+        for start in range(0, len(candidates), chunk_size):
+            job.check_cancelled()
+            part = candidates[start:start + chunk_size]
+            results = evaluate(part)
+            out += results
+            for c, (cost, ok, tech) in zip(part, results):
+                if not ok:
+                    continue
+                state["feasible"] += 1
+                if state["best"] is None or cost < state["best"]["costPerKg"]:
+                    state["best"] = dict(c, costPerKg=float(cost), technology=tech)
+            state["done"] += len(part)
+            done = state["done"] if total is None else min(state["done"], total)
+            sims = int(EVAL_CACHE.misses - misses_before) if use_cache else 2 * state["done"]
+            elapsed = max(time.time() - t0, 1e-9)
+            job.report(done=done, best=state["best"], metrics={
+                "evaluated": state["done"],
+                "feasible": state["feasible"],
+                "feasible_fraction": state["feasible"] / state["done"],
+                "simulations": sims,
+                "sims_per_s": sims / elapsed,
+            })
+        return out
+
+    return wrapped
+
+
+def run_optimization(data: Dict[str, Any], job=None) -> Tuple[Dict[str, Any], int]:
+    """
+    Gittersuche wie POST /optimize_gurobi -> (Antwort-Dict, HTTP-Status). Mit job
+    (job_queue.Job) wird der Fortschritt gemeldet und DELETE /jobs/<id> beachtet.
+    """
     bounds = data.get("bounds", {}) or {}
-    params = data.get("params", {}) or {}
+    params = request_params(data)
 
     try:
-        defaults = {
-            "s_min": 0.95,
-            "s_max": 1.0,
-            "s_step": 0.01,
-            "pel_min": 1000.0,
-            "pel_max": 2500.0,
-            "pel_step": 100.0,
-            "h2_min": 1.0,
-            "h2_max": 7.0,
-            "h2_step": 1.0,
-            "nh3_min": 3.0,
-            "nh3_max": 8.0,
-            "nh3_step": 1.0,
-            "water_min": 500.0,
-            "water_max": 10000.0,
-            "water_step": 2000.0,
-        }
-
         minimum_bounds = compute_minimum_bounds(params)
-        grid_bounds = clamp_grid_bounds(bounds, minimum_bounds, defaults)
+        grid_bounds = clamp_grid_bounds(bounds, minimum_bounds, GRID_DEFAULTS)
 
-        candidates = generate_candidate_grid(grid_bounds)
-        if not candidates:
-            return jsonify(
+        search_opts = search_strategies.parse_search_options(data.get("search", params.get("search")))
+        lattice = search_strategies.Lattice.from_bounds(grid_bounds)
+        if lattice.size == 0:
+            return dict(
                 success=False,
                 message="Keine Kandidaten im Gitter (evtl. Min > Max nach Clamp).",
             ), 400
 
-        df_profile = get_hourly_profile(params) if HAS_CODE_FINAL else None
-        if HAS_CODE_FINAL and df_profile is None:
-            df_profile = cf.df2
+        df_profile = get_hourly_profile(params)
 
         n_hours = len(df_profile) if df_profile is not None else 0
         sim_note = f"Stuendliche Simulation, {n_hours} h" if n_hours else "keine Zeitreihe"
+        workers = resolve_worker_count(params)
+        if workers > 1:
+            sim_note += f", {workers} Worker-Prozesse"
+        if simulation_options(params, df_profile).get("steady_state"):
+            sim_note += ", Steady-State-Abbruch"
+        if early_stop_options(params):
+            sim_note += ", Abbruch bei Schiffsausfall"
+
+        reduction = reduction_options(params)
+        screen_params, screen_profile = params, df_profile
+        if reduction and df_profile is not None:
+            screen_params = dict(params, screening=True)
+            screen_profile = get_hourly_profile(screen_params)
+            sim_note += f", Screening auf {screen_profile.k} repr. Perioden"
+
+        evaluate = lambda batch: evaluate_candidates(screen_params, batch, screen_profile)  # noqa: E731
+        if job is not None:
+            # Gesamtzahl nur bekannt, wenn die Strategie (hoechstens) das ganze Gitter bewertet
+            total = lattice.size if search_opts["strategy"] in ("grid", "frontier") else None
+            if search_opts.get("max_evals"):
+                total = min(int(search_opts["max_evals"]), lattice.size)
+            job.report(phase="screening" if screen_profile is not df_profile else "search")
+            evaluate = progress_evaluator(
+                evaluate, job, total, int(params.get("progress_chunk") or 1024),
+                use_cache=bool(params.get("cache", True)),
+            )
 
-        costs: List[float] = []
-        feasible_mask: List[bool] = []
-        for c in candidates:
-            cost, feasible = evaluate_configuration(params, c, df_profile)
-            costs.append(cost)
-            feasible_mask.append(feasible)
+        misses_before = EVAL_CACHE.misses
+        search = search_strategies.run_search(lattice, evaluate, **search_opts)
+        if job is not None:
+            # Suche beendet (frontier/max_evals bewerten ggf. weniger als total)
+            job.report(done=job.total if job.total is not None else search["evaluations"])
+            job.check_cancelled()
+        screening = None
+        if screen_profile is not df_profile:
+            if job is not None:
+                job.report(phase="verify")
+            search, screening = verify_screened(params, search, df_profile, screen_params, screen_profile, reduction)
+        candidates = search["candidates"]
+        costs: List[float] = search["costs"]
+        feasible_mask: List[bool] = search["feasible"]
+        search_info = {
+            "strategy": search["strategy"],
+            "evaluations": search["evaluations"],
+            "iterations": search["iterations"],
+            "grid_size": search["grid_size"],
+            # Simulationen = Cache-Misses (je Kandidat AEL + PEM); ohne Cache 2 je Bewertung
+            "simulations": (
+                int(EVAL_CACHE.misses - misses_before) if params.get("cache", True)
+                else 2 * search["evaluations"]
+            ),
+        }
+        if "pruning" in search:
+            search_info["pruning"] = search["pruning"]
+        if screening is not None:
+            search_info["screening"] = screening
 
         feasible_indices = [i for i in range(len(candidates)) if feasible_mask[i]]
         if not feasible_indices:
             h2_demand = params.get("h2_steel_demand_t", 110000.0)
-            return jsonify(
+            return dict(
                 success=False,
                 message=(
                     f"Keine zulaessige Konfiguration. Der H2-Bedarf Stahlwerk "
@@ -530,6 +1308,7 @@ def optimize_gurobi() -> Any:
                     f"H2-Tage>={minimum_bounds['h2_days_min']:.0f}, NH3-Schiffe>={minimum_bounds['nh3_ships_min']:.1f}, "
                     f"Water>={minimum_bounds['water_tank_min']:.0f} m3."
                 ),
+                search=search_info,
             ), 400
 
         best_idx = min(feasible_indices, key=lambda i: costs[i])
@@ -544,6 +1323,8 @@ def optimize_gurobi() -> Any:
         nh3_storage_t = annual_nh3_t / 12.0 * best["nh3_ships"]
 
         # Detaillierte Bewertung der besten Konfiguration (inkl. Technologie & Komponenten)
+        if job is not None:
+            job.report(phase="details")
         details = evaluate_configuration_detailed(params, best, df_profile=df_profile)
         tech = details.get("technology")
         comp_per_kg = details.get("componentsPerKg") or {}
@@ -560,15 +1341,538 @@ def optimize_gurobi() -> Any:
         if kpi:
             best["kpi"] = kpi
 
+        return dict(
+            success=True,
+            message=(
+                f"Optimierung erfolgreich ({search_info['strategy']}, {search_info['evaluations']}/"
+                f"{search_info['grid_size']} Kandidaten, {sim_note}). Feste Minima eingehalten."
+            ),
+            best=best,
+            search=search_info,
+        ), 200
+
+    except ValueError as exc:
+        return dict(success=False, message=str(exc)), 400
+
+    except profile_store.UnknownProfile as exc:
+        return dict(success=False, message=f"Unbekanntes Profil: {exc.args[0]}"), 404
+
+    except job_queue.JobCancelled:
+        raise
+
+    except Exception as exc:
+        err = str(exc).encode("utf-8", errors="replace").decode("utf-8")
+        return dict(success=False, message=f"Fehler in /optimize_gurobi: {err}"), 500
+
+
+@app.route("/optimize_gurobi", methods=["POST"])
+def optimize_gurobi() -> Any:
+    payload, status = run_optimization(request.get_json(force=True) or {})
+    return jsonify(**payload), status
+
+
+# -----------------------------
+# Asynchrone Jobs (job_queue.py)
+# -----------------------------
+def _run_optimization_job(job, data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    return run_optimization(data, job=job)
+
+
+def _job_snapshot(job) -> Dict[str, Any]:
+    snap = job.snapshot()
+    snap["queue_position"] = JOBS.queue_position(job)
+    snap["links"] = {
+        "status": f"/jobs/{job.id}",
+        "result": f"/jobs/{job.id}/result",
+        "events": f"/jobs/{job.id}/events",
+    }
+    return snap
+
+
+# Abstand der Keep-alive-Ereignisse im Event-Stream, wenn sich nichts aendert (s)
+JOB_EVENT_HEARTBEAT_S = 15.0
+
+
+def job_events(job, fmt: str = "sse", heartbeat_s: float = JOB_EVENT_HEARTBEAT_S):
+    """
+    Generator fuer GET /jobs/<id>/events: ein Ereignis je Fortschrittsmeldung des Jobs
+    (job.wait_for_update). Jedes Ereignis enthaelt den Job-Status plus "best_history" mit
+    den seit dem letzten Ereignis neuen Verbesserungen (done, elapsed_s, best). Bleibt der
+    Job heartbeat_s lang unveraendert, folgt ein Keep-alive (SSE-Kommentar bzw. NDJSON-Zeile
+    {"event": "heartbeat"}). Letztes Ereignis: "end" mit dem Endstatus.
+    """
+    def encode(event: str, payload: Dict[str, Any]) -> str:
+        if fmt == "ndjson":
+            return json.dumps(dict(payload, event=event)) + "\n"
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    version = -1
+    sent = 0
+    while True:
+        new_version = job.wait_for_update(version, timeout=heartbeat_s)
+        if new_version == version:
+            yield ": keep-alive\n\n" if fmt != "ndjson" else json.dumps({"event": "heartbeat"}) + "\n"
+            continue
+        version = new_version
+        snap = _job_snapshot(job)
+        history = job.best_history[sent:]
+        sent += len(history)
+        snap["best_history"] = history
+        finished = snap["status"] in job_queue.FINISHED_STATES
+        yield encode("end" if finished else "progress", snap)
+        if finished:
+            return
+
+
+@app.route("/jobs", methods=["OPTIONS"])
+@app.route("/jobs/<job_id>", methods=["OPTIONS"])
+@app.route("/jobs/<job_id>/result", methods=["OPTIONS"])
+@app.route("/jobs/<job_id>/events", methods=["OPTIONS"])
+def jobs_options(job_id: Optional[str] = None) -> Any:
+    return ("", 204)
+
+
+@app.route("/jobs", methods=["POST"])
+def jobs_submit() -> Any:
+    """Optimierung einreihen (Body wie /optimize_gurobi) -> 202 mit Job-Status, 429 bei voller Queue."""
+    data = request.get_json(force=True) or {}
+    try:
+        job = JOBS.submit(_run_optimization_job, data, kind="optimize_gurobi")
+    except job_queue.QueueFull as exc:
+        return jsonify(success=False, message=str(exc), queue=JOBS.counts()), 429
+    return jsonify(success=True, job=_job_snapshot(job)), 202
+
+
+@app.route("/jobs", methods=["GET"])
+def jobs_list() -> Any:
+    return jsonify(success=True, queue=JOBS.counts(), jobs=JOBS.list())
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def jobs_status(job_id: str) -> Any:
+    """Fortschritt: Kandidaten done/total, bisher bester Kandidat, ETA, Queue-Position."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify(success=False, message=f"Unbekannter Job: {job_id}"), 404
+    return jsonify(success=True, job=_job_snapshot(job))
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def jobs_events(job_id: str) -> Any:
+    """
+    Fortschritt als Stream: text/event-stream (Default) oder ?format=ndjson
+    (application/x-ndjson). Siehe job_events().
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify(success=False, message=f"Unbekannter Job: {job_id}"), 404
+    fmt = "ndjson" if request.args.get("format") == "ndjson" else "sse"
+    mimetype = "application/x-ndjson" if fmt == "ndjson" else "text/event-stream"
+    response = Response(stream_with_context(job_events(job, fmt)), mimetype=mimetype)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def jobs_result(job_id: str) -> Any:
+    """
+    Ergebnis wie die Antwort von /optimize_gurobi (gleicher HTTP-Status). Solange der Job
+    wartet oder laeuft: 202 mit Status; abgebrochen: 410; Fehler im Job: 500.
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify(success=False, message=f"Unbekannter Job: {job_id}"), 404
+    if job.status == job_queue.DONE:
+        payload, status = job.result
+        return jsonify(**payload), status
+    if job.status == job_queue.CANCELLED:
+        return jsonify(success=False, message="Job wurde abgebrochen.", job=_job_snapshot(job)), 410
+    if job.status == job_queue.FAILED:
+        return jsonify(success=False, message=f"Fehler im Job: {job.error}", job=_job_snapshot(job)), 500
+    return jsonify(success=False, message="Job noch nicht fertig.", job=_job_snapshot(job)), 202
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def jobs_cancel(job_id: str) -> Any:
+    """Wartenden Job entfernen bzw. laufenden beim naechsten Bewertungsblock abbrechen."""
+    job = JOBS.cancel(job_id)
+    if job is None:
+        return jsonify(success=False, message=f"Unbekannter Job: {job_id}"), 404
+    return jsonify(success=True, job=_job_snapshot(job))
+
+
+@app.route("/optimize_milp", methods=["OPTIONS"])
+def optimize_milp_options() -> Any:
+    return ("", 204)
+
+
+@app.route("/optimize_milp", methods=["POST"])
+def optimize_milp() -> Any:
+    """
+    Auslegung per MILP statt Gittersuche. Body wie /optimize_gurobi; Optionen unter
+    params["milp"]: aggregation, integer, backend ("auto"/"gurobi"/"highs"), time_limit,
+    mip_gap, shortfall_penalty_usd_per_t, aux_deficit_penalty_usd_per_mwh (ungedeckte
+    Nebenverbraucher bei Flaute), verify (Auslegung stuendlich nachsimulieren), repair_evals
+    (ist die Auslegung in der regelbasierten Simulation unzulaessig, Pattern-Search auf dem
+    Gitter ab dem naechsten Gitterpunkt mit hoechstens so vielen Bewertungen; 0 = aus).
+    """
+    data = request.get_json(force=True) or {}
+    bounds = data.get("bounds", {}) or {}
+    params = request_params(data)
+    opts = dict(params.get("milp") or data.get("milp") or {})
+
+    if not HAS_CODE_FINAL:
+        return jsonify(success=False, message="Code_Final.py nicht verfuegbar."), 503
+    try:
+        grid_bounds = clamp_grid_bounds(bounds, compute_minimum_bounds(params), GRID_DEFAULTS)
+        df_profile = get_hourly_profile(dict(params, use_multiyear=False))
+        if df_profile is None:
+            return jsonify(success=False, message="Kein Stundenprofil verfuegbar."), 503
+
+        settings = cost_settings(params)
+        result = milp_model.optimize_design(
+            df_profile["p_mw"].to_numpy(dtype=np.float64),
+            grid_bounds,
+            annual_h2_t=settings["annual_h2_t"],
+            aggregation=opts.get("aggregation", {"method": "rep_days", "n_days": 12}),
+            integer=bool(opts.get("integer", True)),
+            backend=opts.get("backend", "auto"),
+            time_limit=opts.get("time_limit", 300.0),
+            mip_gap=opts.get("mip_gap", 0.005),
+            shortfall_penalty_usd_per_t=float(opts.get("shortfall_penalty_usd_per_t", 1e5)),
+            cost_params_override=settings["cost_params"],
+            aux_deficit_penalty_usd_per_mwh=float(opts.get("aux_deficit_penalty_usd_per_mwh", 1e5)),
+        )
+        run = result["best"]
+        if run is None:
+            return jsonify(success=False, message="MILP ohne Loesung.", milp=result["runs"]), 400
+
+        denom = settings["annual_h2_t"] * 1000.0 * settings["years"]
+        best = dict(run["design"])
+        best["technology"] = run["technology"]
+        best["costPerKg"] = float(run["total_proxy_usd"] * settings["usd_to_eur"] / denom) if denom > 0 else None
+        best["h2Storage"] = run["h2_storage_t"]
+        best["nh3Storage"] = run["nh3_storage_t"]
+
+        if opts.get("verify", True):
+            # gleiche Auslegung mit der regelbasierten Stundensimulation pruefen
+            best["simulation"] = evaluate_configuration_detailed(params, run["design"], df_profile=df_profile)
+            repair_evals = int(opts.get("repair_evals", 150))
+            if not best["simulation"].get("feasible") and repair_evals > 0:
+                # MILP-Fahrweise ist eine Relaxation der Regeln -> naechste zulaessige Gitter-Auslegung
+                lattice = search_strategies.Lattice.from_bounds(grid_bounds)
+                search = search_strategies.run_search(
+                    lattice,
+                    lambda batch: evaluate_candidates(params, batch, df_profile),
+                    strategy="pattern",
+                    start=lattice.nearest(run["design"]),
+                    max_evals=repair_evals,
+                )
+                ok = [i for i, f in enumerate(search["feasible"]) if f]
+                if ok:
+                    i = min(ok, key=lambda j: search["costs"][j])
+                    repaired = dict(search["candidates"][i])
+                    details = evaluate_configuration_detailed(params, repaired, df_profile=df_profile)
+                    repaired["costPerKg"] = float(details.get("costPerKg", search["costs"][i]))
+                    repaired["technology"] = details.get("technology") or search["techs"][i]
+                    repaired["evaluations"] = search["evaluations"]
+                    repaired["simulation"] = details
+                    best["repaired"] = repaired
+
         return jsonify(
             success=True,
-            message=f"Optimierung erfolgreich (Grid, {sim_note}). Feste Minima eingehalten.",
+            message=(
+                f"MILP ({run['backend']}, {result['aggregation']['method']}, {result['n_steps']} Zeitschritte): "
+                f"{run['technology']} in {sum(r['solve_s'] for r in result['runs']):.1f} s"
+            ),
             best=best,
+            milp={k: result[k] for k in ("runs", "aggregation", "n_steps", "build_s")},
         )
+    except ValueError as exc:
+        return jsonify(success=False, message=str(exc)), 400
+    except profile_store.UnknownProfile as exc:
+        return jsonify(success=False, message=f"Unbekanntes Profil: {exc.args[0]}"), 404
+    except Exception as exc:
+        err = str(exc).encode("utf-8", errors="replace").decode("utf-8")
+        return jsonify(success=False, message=f"Fehler in /optimize_milp: {err}"), 500
+
+
+COST_SCENARIO_KEYS = ("name", "cost_params", "params")
+
+
+def validate_cost_scenarios(scenarios: Any) -> List[Dict[str, Any]]:
+    """
+    cost_scenarios fuer /price_designs pruefen, bevor simuliert wird: Liste von
+    {"name", "cost_params", "params"}; unbekannte Schluessel (z.B. ein flaches
+    Override-dict) oder unbekannte / nicht reine Kostenparameter -> ValueError.
+    """
+    if not isinstance(scenarios, list):
+        raise ValueError("cost_scenarios muss eine Liste sein.")
+    for i, scenario in enumerate(scenarios):
+        if not isinstance(scenario, dict):
+            raise ValueError(f"cost_scenarios[{i}] muss ein Objekt sein.")
+        unknown = sorted(set(scenario) - set(COST_SCENARIO_KEYS))
+        if unknown:
+            raise ValueError(
+                f"cost_scenarios[{i}]: unbekannte Schluessel {unknown} "
+                f"(erlaubt: {', '.join(COST_SCENARIO_KEYS)}; Overrides unter \"cost_params\")"
+            )
+        if not isinstance(scenario.get("params") or {}, dict):
+            raise ValueError(f"cost_scenarios[{i}].params muss ein Objekt sein.")
+        if scenario.get("cost_params"):
+            try:
+                cf.merge_cost_params(scenario["cost_params"])
+            except ValueError as exc:
+                raise ValueError(f"cost_scenarios[{i}]: {exc}") from None
+    return scenarios
+
+
+@app.route("/price_designs", methods=["POST"])
+def price_designs() -> Any:
+    """
+    Kosten-Sensitivitaet ohne Neusimulation: KPIs der Kandidaten (Gitter aus "bounds"
+    oder Liste "candidates") kommen aus dem Cache (Stufe 1, fehlende werden einmal
+    simuliert), danach wird je Kostenszenario nur Stufe 2 gerechnet.
+
+    Body: {"bounds" | "candidates", "params", "top": 10, "cost_scenarios": [
+               {"name": "...", "cost_params": {...Overrides}, "params": {...}}, ...]}
+    Ohne "cost_params" im Szenario (bzw. ohne cost_scenarios) gilt params["cost_params"].
+    usd_to_eur, project_lifetime_years usw. koennen je Szenario unter "params" angegeben
+    werden. Unbekannte Szenario-Schluessel oder Kostenparameter -> 400.
+    """
+    data = request.get_json(force=True) or {}
+    params = request_params(data)
+    top = int(data.get("top", 10))
+
+    if not HAS_CODE_FINAL:
+        return jsonify(success=False, message="Code_Final.py nicht verfuegbar."), 503
+    try:
+        candidates = data.get("candidates")
+        if candidates is None:
+            grid_bounds = clamp_grid_bounds(data.get("bounds", {}) or {}, compute_minimum_bounds(params), GRID_DEFAULTS)
+            candidates = generate_candidate_grid(grid_bounds)
+        candidates = [{k: float(c[k]) for k in ("s", "pel", "h2_days", "nh3_ships", "water_tank")} for c in candidates]
+        if not candidates:
+            return jsonify(success=False, message="Keine Kandidaten."), 400
+        scenarios = validate_cost_scenarios(data.get("cost_scenarios") or [{}])
+
+        df_profile = get_hourly_profile(params)
+        if df_profile is None:
+            return jsonify(success=False, message="Kein Stundenprofil verfuegbar."), 503
+
+        misses_before = EVAL_CACHE.misses
+        t0 = time.perf_counter()
+        jobs, kpis = candidate_kpis(params, candidates, df_profile)
+        t_kpi = time.perf_counter() - t0
+        ships_failed = np.array([int(k["ships_failed_count"]) for k in kpis])
+
+        out = []
+        t0 = time.perf_counter()
+        for scenario in scenarios:
+            scenario_params = dict(params)
+            scenario_params.update(scenario.get("params", {}) or {})
+            overrides = scenario.get("cost_params", params.get("cost_params"))
+            scenario_params["cost_params"] = overrides
+            trial = price_kpi_table(scenario_params, jobs, kpis)
+            costs, feasible, techs = best_tech_per_candidate(len(candidates), trial, ships_failed)
+            ranked = sorted((i for i in range(len(candidates)) if feasible[i]), key=lambda i: costs[i])[:top]
+            out.append({
+                "name": scenario.get("name"),
+                "n_feasible": int(sum(feasible)),
+                "designs": [dict(candidates[i], costPerKg=costs[i], technology=techs[i]) for i in ranked],
+            })
+        t_cost = time.perf_counter() - t0
 
+        return jsonify(
+            success=True,
+            n_candidates=len(candidates),
+            simulations=int(EVAL_CACHE.misses - misses_before) if params.get("cache", True) else len(jobs),
+            timings_ms={"kpis": round(1000.0 * t_kpi, 3), "costs": round(1000.0 * t_cost, 3)},
+            scenarios=out,
+        )
+    except ValueError as exc:
+        return jsonify(success=False, message=str(exc)), 400
+    except profile_store.UnknownProfile as exc:
+        return jsonify(success=False, message=f"Unbekanntes Profil: {exc.args[0]}"), 404
     except Exception as exc:
         err = str(exc).encode("utf-8", errors="replace").decode("utf-8")
-        return jsonify(success=False, message=f"Fehler in /optimize_gurobi: {err}"), 500
+        return jsonify(success=False, message=f"Fehler in /price_designs: {err}"), 500
+
+
+@app.route("/ensemble", methods=["OPTIONS"])
+def ensemble_options() -> Any:
+    return ("", 204)
+
+
+@app.route("/ensemble", methods=["POST"])
+def ensemble() -> Any:
+    """
+    Auslegungen gegen mehrere Wetterjahre statt gegen ein wiederholtes Jahr (df2_sim).
+
+    Body: {"candidates": [{s, pel, h2_days, nh3_ships, water_tank[, technology]}] | "bounds",
+           "params", "ensemble": {"profile_ids": [...], "mode": "years" | "stitched",
+           "n_sequences": 16, "n_years": years_sim, "seed": 0, "members": false}, "top": 10}
+
+    mode "years": jede Auslegung gegen jedes Wetterjahr einzeln; "stitched": gegen
+    n_sequences zufaellige Jahresfolgen ueber n_years Jahre. Je Auslegung: Verteilung der
+    Kosten (P50/P90), Anteil zulaessiger Mitglieder, schlimmster Fall Schiffsausfaelle und
+    maximale Speicherstaende; ohne "technology" gilt die Technologie mit niedrigerem P90.
+    Sortiert nach P90-Kosten. params["workers"] verteilt die Mitglieder auf den Prozess-Pool.
+    """
+    data = request.get_json(force=True) or {}
+    params = request_params(data)
+    spec = dict(data.get("ensemble") or params.get("ensemble") or {})
+
+    if not HAS_CODE_FINAL:
+        return jsonify(success=False, message="Code_Final.py nicht verfuegbar."), 503
+    try:
+        candidates = data.get("candidates")
+        if candidates is None:
+            grid_bounds = clamp_grid_bounds(data.get("bounds", {}) or {}, compute_minimum_bounds(params), GRID_DEFAULTS)
+            candidates = generate_candidate_grid(grid_bounds)
+        fixed_tech = [c.get("technology") for c in candidates]
+        if any(t not in (None, "AEL", "PEM") for t in fixed_tech):
+            return jsonify(success=False, message="technology muss AEL oder PEM sein."), 400
+        candidates = [{k: float(c[k]) for k in ("s", "pel", "h2_days", "nh3_ships", "water_tank")} for c in candidates]
+        if not candidates:
+            return jsonify(success=False, message="Keine Kandidaten."), 400
+        top = int(data.get("top", len(candidates) if data.get("candidates") is not None else 10))
+
+        mode = spec.get("mode", "years")
+        members = weather_ensemble.ensemble_members(
+            ensemble_weather_years(params, spec),
+            mode=mode,
+            n_sequences=int(spec.get("n_sequences", 16)),
+            n_years=int(spec.get("n_years", cf.years_sim)),
+            seed=int(spec.get("seed", 0)),
+        )
+        labels = [label for label, _ in members]
+
+        misses_before = EVAL_CACHE.misses
+        t0 = time.perf_counter()
+        jobs, member_kpis = ensemble_kpis(params, candidates, members, keep_published=(mode == "years"))
+        t_kpi = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        settings = cost_settings(params)
+        trial = np.array([price_kpi_table(params, jobs, kpis, settings) for kpis in member_kpis])
+        n = len(candidates)
+        designs = []
+        for i, c in enumerate(candidates):
+            rows = {"AEL": i, "PEM": n + i}
+            summaries = {
+                tech: weather_ensemble.summarize_members(
+                    trial[:, row], [kpis[row] for kpis in member_kpis],
+                    labels=labels if spec.get("members") else None,
+                )
+                for tech, row in rows.items()
+                if fixed_tech[i] in (None, tech)
+            }
+            if fixed_tech[i] is not None:
+                tech = fixed_tech[i]
+            else:
+                # wie evaluate_configuration: PEM nur, wenn strikt guenstiger
+                tech = "PEM" if summaries["PEM"]["cost"]["p90"] < summaries["AEL"]["cost"]["p90"] else "AEL"
+            designs.append(dict(c, technology=tech, **summaries[tech]))
+        designs.sort(key=lambda d: (d["cost"]["p90"], d["cost"]["p50"]))
+        t_cost = time.perf_counter() - t0
+
+        return jsonify(
+            success=True,
+            mode=mode,
+            n_members=len(members),
+            members=labels,
+            n_candidates=n,
+            simulations=int(EVAL_CACHE.misses - misses_before) if params.get("cache", True) else len(jobs) * len(members),
+            timings_ms={"kpis": round(1000.0 * t_kpi, 3), "costs": round(1000.0 * t_cost, 3)},
+            designs=designs[:top],
+        )
+    except ValueError as exc:
+        return jsonify(success=False, message=str(exc)), 400
+    except profile_store.UnknownProfile as exc:
+        return jsonify(success=False, message=f"Unbekanntes Profil: {exc.args[0]}"), 404
+    except Exception as exc:
+        err = str(exc).encode("utf-8", errors="replace").decode("utf-8")
+        return jsonify(success=False, message=f"Fehler in /ensemble: {err}"), 500
+
+
+@app.route("/eval_cache", methods=["GET"])
+def eval_cache_stats() -> Any:
+    """Hit/Miss-Zaehler und Fuellstand des Bewertungs-Caches."""
+    return jsonify(success=True, cache=EVAL_CACHE.stats())
+
+
+@app.route("/eval_cache", methods=["DELETE"])
+def eval_cache_clear() -> Any:
+    """Cache leeren; ?disk=1 leert zusaetzlich die SQLite-Stufe."""
+    disk = request.args.get("disk", "0").lower() in ("1", "true", "yes")
+    EVAL_CACHE.clear(disk=disk)
+    return jsonify(success=True, cache=EVAL_CACHE.stats())
+
+
+# -----------------------------
+# Windprofile (profile_store.py)
+# -----------------------------
+@app.route("/profiles", methods=["OPTIONS"])
+@app.route("/profiles/<profile_id>", methods=["OPTIONS"])
+def profiles_options(profile_id: Optional[str] = None) -> Any:
+    return ("", 204)
+
+
+@app.route("/profiles", methods=["POST"])
+def profiles_upload() -> Any:
+    """
+    Profil hochladen: multipart-Feld "file" oder roher Body mit ?filename=name.csv
+    (.csv/.xlsx/.parquet). Optionale Felder (Form oder Query): name, time_col, power_col,
+    power_to_mw (Default wie beim Excel-Profil: "datetime", "Leistung  Windpark [GW]", GW -> MW).
+    -> 201 mit Metadaten inkl. profile_id (gleiche Datei: gleiche ID, 200).
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        filename, data = upload.filename or "", upload.read()
+    else:
+        filename, data = request.args.get("filename", ""), request.get_data()
+    if not data:
+        return jsonify(success=False, message="Keine Profildatei (Feld 'file' oder Body)."), 400
+
+    def option(key: str) -> Optional[str]:
+        return request.form.get(key) or request.args.get(key) or None
+
+    known = {m["profile_id"] for m in PROFILES.list()}
+    try:
+        power_to_mw = option("power_to_mw")
+        meta = PROFILES.add(
+            filename, data, name=option("name"), time_col=option("time_col"),
+            power_col=option("power_col"),
+            power_to_mw=float(power_to_mw) if power_to_mw is not None else None,
+        )
+    except (ValueError, KeyError) as exc:
+        msg = exc.args[0] if isinstance(exc, KeyError) and exc.args else str(exc)
+        return jsonify(success=False, message=f"Profil nicht lesbar: {msg}"), 400
+    return jsonify(success=True, profile=meta), (200 if meta["profile_id"] in known else 201)
+
+
+@app.route("/profiles", methods=["GET"])
+def profiles_list() -> Any:
+    """Registrierte Profile (Metadaten, loaded = im Speicher-LRU) und LRU-Zaehler."""
+    return jsonify(success=True, profiles=PROFILES.list(), cache=PROFILES.stats())
+
+
+@app.route("/profiles/<profile_id>", methods=["GET"])
+def profiles_get(profile_id: str) -> Any:
+    try:
+        return jsonify(success=True, profile=PROFILES.meta(profile_id))
+    except profile_store.UnknownProfile:
+        return jsonify(success=False, message=f"Unbekanntes Profil: {profile_id}"), 404
+
+
+@app.route("/profiles/<profile_id>", methods=["DELETE"])
+def profiles_delete(profile_id: str) -> Any:
+    if not PROFILES.delete(profile_id):
+        return jsonify(success=False, message=f"Unbekanntes Profil: {profile_id}"), 404
+    _MULTIYEAR_PROFILES.pop(profile_id, None)
+    return jsonify(success=True, cache=PROFILES.stats())
 
 
 @app.route("/gurobi_daily_profile", methods=["POST"])
@@ -581,7 +1885,7 @@ def gurobi_daily_profile() -> Any:
 
     data = request.get_json(force=True) or {}
     decision = (data.get("decision") or {}).copy()
-    params = data.get("params") or {}
+    params = request_params(data)
 
     try:
         s = float(decision.get("s"))
@@ -597,7 +1901,7 @@ def gurobi_daily_profile() -> Any:
             params.get("annual_h2_t") or getattr(cf, "annual_h2_prod_t", 120800.0)
         )
         h2_storage_t_design = (annual_h2_t / 365.0) * h2_days
-        df_profile = get_hourly_profile(params) or cf.df2
+        df_profile = get_hourly_profile(params)
 
         out, _ = cf.simulate_hourly_system(
             s=s,
@@ -608,23 +1912,31 @@ def gurobi_daily_profile() -> Any:
             water_tank_m3_max=water_tank,
             return_timeseries=True,
             df_profile=df_profile,
+            timeseries_format="columns",
+            timeseries_dtype=np.float32,
+            channels=["h2_soc_kg", "nh3_soc_t", "water_soc_m3", "p_wind_mw", "p_el_mw"],
+            aggregate="D",
+            **simulation_options(params, df_profile),
         )
 
-        df = out.copy().resample("D").mean()
-        days = []
-        for idx, row in df.iterrows():
-            days.append({
-                "date": idx.strftime("%Y-%m-%d"),
-                "day_index": len(days) + 1,
-                "h2_t": float(row.get("h2_soc_kg", 0.0) / 1000.0),
-                "nh3_t": float(row.get("nh3_soc_t", 0.0)),
-                "water_m3": float(row.get("water_soc_m3", 0.0)),
-                "p_wind_mw": float(row.get("p_wind_mw", 0.0)),
-                "p_el_mw": float(row.get("p_el_mw", 0.0)),
-            })
+        # Tagesmittel werden schon waehrend der Simulation gebildet (keine Stundenwerte)
+        days = [
+            {
+                "date": str(np.datetime_as_string(out["t"][i], unit="D")),
+                "day_index": i + 1,
+                "h2_t": float(out["h2_soc_kg_mean"][i] / 1000.0),
+                "nh3_t": float(out["nh3_soc_t_mean"][i]),
+                "water_m3": float(out["water_soc_m3_mean"][i]),
+                "p_wind_mw": float(out["p_wind_mw_mean"][i]),
+                "p_el_mw": float(out["p_el_mw_mean"][i]),
+            }
+            for i in range(len(out["t"]))
+        ]
 
         return jsonify(success=True, technology="AEL", days=days)
 
+    except profile_store.UnknownProfile as exc:
+        return jsonify(success=False, message=f"Unbekanntes Profil: {exc.args[0]}"), 404
     except Exception as exc:
         err = str(exc).encode("utf-8", errors="replace").decode("utf-8")
         return jsonify(success=False, message=f"Fehler in /gurobi_daily_profile: {err}"), 500
@@ -0,0 +1,238 @@
+"""
+Job-Warteschlange für lange Optimierungen (gurobi_server: POST /jobs).
+
+Ein Job ist ein Funktionsaufruf fn(job, *args), der in einem begrenzten Thread-Pool
+(max_workers) läuft; weitere Jobs warten in einer lokalen Warteschlange (max_queued).
+Die HTTP-Worker von Flask geben nur den Job-Status zurück und bleiben so erreichbar.
+
+Der laufende Job meldet seinen Fortschritt über job.report(done=..., total=..., best=...)
+und prüft mit job.check_cancelled() regelmäßig, ob er abgebrochen wurde (DELETE):
+dann endet er mit JobCancelled. Noch wartende Jobs werden direkt aus der Queue entfernt.
+
+Jede Änderung (report, Statuswechsel) erhöht job.version; wait_for_update() blockiert bis
+zur nächsten Änderung, darauf bauen die Event-Streams (GET /jobs/<id>/events) auf.
+Verbesserungen von best landen zusätzlich in job.best_history (Konvergenzkurve).
+
+Fertige Jobs (done/failed/cancelled) bleiben für GET .../result erhalten, höchstens
+keep_finished Stück (die ältesten werden zuerst verworfen).
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Höchstzahl gemerkter best-Verbesserungen je Job
+MAX_BEST_HISTORY = 1000
+
+
+class JobCancelled(Exception):
+    """Wird im laufenden Job ausgelöst, sobald cancel() angefordert wurde."""
+
+
+class QueueFull(Exception):
+    """Warteschlange voll: keine weiteren Jobs annehmen."""
+
+
+class Job:
+    """Zustand eines Jobs; Felder werden vom Worker-Thread geschrieben, Lesen über snapshot()."""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.phase: Optional[str] = None
+        self.done = 0
+        self.total: Optional[int] = None
+        self.best: Optional[Dict[str, Any]] = None
+        self.best_history: List[Dict[str, Any]] = []
+        self.metrics: Dict[str, Any] = {}
+        self.version = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._future = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def report(
+        self,
+        done: Optional[int] = None,
+        total: Optional[int] = None,
+        best: Optional[Dict[str, Any]] = None,
+        phase: Optional[str] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Fortschritt setzen (nur angegebene Felder); best ersetzt das bisherige Optimum,
+        metrics wird in job.metrics übernommen (z.B. Durchsatz, Anteil zulässiger Kandidaten).
+        """
+        with self._changed:
+            if done is not None:
+                self.done = int(done)
+            if total is not None:
+                self.total = int(total)
+            if best is not None and best != self.best:
+                self.best = dict(best)
+                if len(self.best_history) < MAX_BEST_HISTORY:
+                    self.best_history.append({
+                        "done": self.done,
+                        "elapsed_s": (time.time() - self.started) if self.started else 0.0,
+                        "best": self.best,
+                    })
+            if phase is not None:
+                self.phase = phase
+            if metrics:
+                self.metrics.update(metrics)
+            self._touch()
+
+    def _touch(self) -> None:
+        # nur mit gehaltenem self._lock aufrufen
+        self.version += 1
+        self._changed.notify_all()
+
+    def wait_for_update(self, since_version: int, timeout: float = 15.0) -> int:
+        """Wartet, bis version > since_version (oder timeout); Rückgabe: aktuelle version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > since_version, timeout=timeout)
+            return self.version
+
+    def eta_s(self) -> Optional[float]:
+        """Restlaufzeit aus der bisherigen Rate (None, solange keine Rate bekannt ist)."""
+        if self.status != RUNNING or not self.total or self.done <= 0 or self.started is None:
+            return None
+        elapsed = time.time() - self.started
+        return max(0.0, elapsed / self.done * (self.total - self.done))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self.finished or time.time()
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "phase": self.phase,
+                "progress": {
+                    "done": self.done,
+                    "total": self.total,
+                    "fraction": (min(1.0, self.done / self.total) if self.total else None),
+                },
+                "best": self.best,
+                "metrics": dict(self.metrics),
+                "eta_s": self.eta_s(),
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "elapsed_s": (now - self.started) if self.started else 0.0,
+                "error": self.error,
+            }
+
+
+class JobManager:
+    """Begrenzter Thread-Pool mit Warteschlange und Job-Register."""
+
+    def __init__(self, max_workers: int = 1, max_queued: int = 16, keep_finished: int = 100):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(0, int(max_queued))
+        self.keep_finished = max(1, int(keep_finished))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _count(self, status: str) -> int:
+        return sum(1 for j in self._jobs.values() if j.status == status)
+
+    def submit(self, fn: Callable[..., Any], *args, kind: str = "job") -> Job:
+        """Job einreihen; QueueFull, wenn bereits max_queued Jobs warten."""
+        with self._lock:
+            if self._count(QUEUED) >= self.max_queued:
+                raise QueueFull(f"Warteschlange voll ({self.max_queued} Jobs wartend).")
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._prune()
+            job._future = self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args) -> None:
+        with job._changed:
+            if job.cancel_requested:
+                return
+            job.status = RUNNING
+            job.started = time.time()
+            job._touch()
+        try:
+            result = fn(job, *args)
+            status, error = DONE, None
+        except JobCancelled:
+            result, status, error = None, CANCELLED, None
+        except Exception as exc:
+            result, status, error = None, FAILED, str(exc)
+        with job._changed:
+            job.result = result
+            job.status = status
+            job.error = error
+            job.finished = time.time()
+            job._touch()
+
+    def _prune(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if j.status in FINISHED_STATES]
+        for jid in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[jid]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Wartende Jobs sofort abbrechen, laufende beim nächsten check_cancelled()."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job._cancel.set()
+        with job._changed:
+            if job.status == QUEUED:
+                job._future.cancel()
+                job.status = CANCELLED
+                job.finished = time.time()
+                job._touch()
+        return job
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """0 = nächster Job, None = läuft bereits oder ist fertig."""
+        with self._lock:
+            queued = [j for j in self._jobs.values() if j.status == QUEUED]
+        return queued.index(job) if job in queued else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.snapshot() for j in jobs]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "queued": self._count(QUEUED),
+                "running": self._count(RUNNING),
+            }
@@ -0,0 +1,638 @@
+"""
+Lineares / gemischt-ganzzahliges Modell für Fahrweise + Auslegung (Dispatch + Sizing).
+
+Statt das Gitter (s, P_el, H2-Tage, NH3-Schiffe, Wassertank) abzusuchen, werden die
+Auslegungsgrößen als Entscheidungsvariablen zusammen mit der stündlichen Fahrweise
+in einem Modell optimiert:
+
+- Windangebot s * p_wind(t) (s als Variable), Energiebilanz inkl. Curtailment
+- EL: Mindestlast (Binärvariable je Zeitschritt, Big-M über P_el), Rampe
+- LH2-Speicher: Boil-off (loss_frac_per_hour), Rückverflüssigung (Strom), eta_in/eta_out,
+  Verflüssigungsstrom beim Einspeichern
+- HB: Mindestlast + Rampe (Anfahren/Abfahren auf Mindestlast erlaubt), N2 und
+  H2-Ausspeicherung als Strombedarf der HB-Kette wie in simulate_hourly_system
+- Wasser: RO-Leistung gekoppelt an P_el (wie in cost_components_proxy), Wassertank mit Verlust
+- NH3-Tank mit Schiffsabholungen (ships_per_year, feste Ladung); Fehlmengen sind erlaubt,
+  kosten aber shortfall_penalty_usd_per_t (je Jahr, über die Lebensdauer)
+- Nebenverbraucher (Rückverflüssigung, NH3-Kühlung, Verladestrom) zuerst aus dem Wind; reicht er
+  nicht, bleibt der Rest wie in der Simulation (max(0, ...)) ungedeckt (aux_deficit, bestraft
+  mit aux_deficit_penalty_usd_per_mwh) – Flauten machen das Modell nicht unzulässig
+
+Zielfunktion: Total_proxy aus cost_components_proxy (affin in P_el, H2-/NH3-Speicher und
+Wassertank; Koeffizienten werden direkt aus cost_components_proxy bestimmt, d.h.
+cost_params-Overrides wirken automatisch) + Fehlmengen- und Defizit-Strafe.
+
+Nicht abgebildet: die regelbasierten Heuristiken der Simulation (H2-Hysterese, NH3-Zielniveau,
+HB-vor-EL-Reihenfolge) – das Modell liefert die optimale Fahrweise und damit eine untere
+Kostenschranke. Die Auslegung lässt sich anschließend mit simulate_hourly_system prüfen.
+
+Zeitaggregation (aggregate_profile):
+- "none":     8760 Stundenschritte
+- "blocks":   chronologische Mittelwerte über n Stunden (Speicher + Schiffe bleiben exakt verknüpft)
+- "rep_days": k repräsentative Tage (k-Medoids über Tagesprofile aus profile_reduction,
+              Gewicht = Anzahl Tage). Innerhalb eines Tages relative Füllstände, über die
+              365 Tage des Jahres werden die Speicher mit Tagesanfangs-Füllständen verkettet
+              (Kotzur et al.: Intra-/Inter-Perioden-Speicher), Schiffe am Tag ihrer Abholung.
+              Kühl-/Rückverflüssigungsstrom des Tagesanfangs-Füllstands geht als Mittelwert
+              je Repräsentant in die Energiebilanz ein, ebenso der Verladestrom der ihm
+              zugeordneten Kalendertage (Abholungen - Fehlmenge).
+
+Solver (solve_program): gurobipy, falls installiert und lizenziert, sonst HiGHS über
+scipy.optimize.milp. Beide lösen dasselbe LinearProgram (dünnbesetzte Matrix).
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import Code_Final as cf
+import profile_reduction
+
+try:
+    import gurobipy as gp
+    from gurobipy import GRB
+    HAS_GUROBI = True
+except ImportError:
+    HAS_GUROBI = False
+
+try:
+    from scipy import sparse
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+# -----------------------------
+# Zeitaggregation
+# -----------------------------
+def _ship_lifts_per_hour(n_hours: int) -> np.ndarray:
+    """Anzahl Schiffsabholungen je Stunde wie in simulate_hourly_system (hour_number >= next_ship_time)."""
+    interval = 8760.0 / float(cf.ships_per_year)
+    lifts = np.zeros(n_hours)
+    k = 1
+    while True:
+        hour_index = int(np.ceil(k * interval - 1e-9)) - 1
+        if hour_index >= n_hours:
+            break
+        lifts[max(hour_index, 0)] += 1.0
+        k += 1
+    return lifts
+
+
+def aggregate_profile(
+    p_mw,
+    method: str = "none",
+    hours: int = 4,
+    n_days: int = 12,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Zeitraster für das Modell aus einem 1-Jahres-Profil (MW je Stunde).
+
+    Rückgabe: p (mittlere Leistung je Schritt), dt (Stunden je Schritt), weight (wie oft
+    der Schritt im Jahr vorkommt), lift (Schiffsladungen je Schritt, Anzahl Schiffe),
+    periods (Liste (start, stop) der Abschnitte; chronologisch zyklisch verknüpft bzw.
+    bei rep_days je repräsentativem Tag, dazu day_map und lift_day).
+    """
+    p = np.asarray(p_mw, dtype=np.float64)
+    n = len(p)
+    method = str(method or "none").lower()
+    lifts_h = _ship_lifts_per_hour(n)
+
+    if method == "none":
+        return {"method": method, "p": p.copy(), "dt": np.ones(n), "weight": np.ones(n),
+                "lift": lifts_h, "periods": [(0, n)]}
+
+    if method == "blocks":
+        hours = max(1, int(hours))
+        edges = np.arange(0, n, hours)
+        dt = np.diff(np.append(edges, n)).astype(np.float64)
+        return {"method": method, "p": np.add.reduceat(p, edges) / dt, "dt": dt,
+                "weight": np.ones(len(edges)), "lift": np.add.reduceat(lifts_h, edges),
+                "periods": [(0, len(edges))], "hours": hours}
+
+    if method == "rep_days":
+        n_full = (n // 24) * 24
+        days = p[:n_full].reshape(-1, 24)
+        medoids, weights, labels = profile_reduction.cluster_periods(days, n_days, seed=seed)
+        medoids, weights = medoids.tolist(), weights.tolist()
+        steps = len(medoids) * 24
+        return {
+            "method": method,
+            "p": np.concatenate([days[d] for d in medoids]),
+            "dt": np.ones(steps),
+            "weight": np.repeat(np.array(weights) * (n / float(n_full)), 24),
+            "lift": np.zeros(steps),
+            "periods": [(24 * i, 24 * (i + 1)) for i in range(len(medoids))],
+            # Tagesfolge des Jahres: Repräsentant je Tag + Schiffe je Tag (für die Speicherkopplung)
+            "day_map": labels,
+            "lift_day": lifts_h[:n_full].reshape(-1, 24).sum(axis=1),
+            "days": medoids,
+            "day_weights": weights,
+        }
+
+    raise ValueError(f"Unbekannte Zeitaggregation '{method}' (erlaubt: none, blocks, rep_days)")
+
+
+# -----------------------------
+# Lineares Programm (gemeinsame Darstellung für alle Solver)
+# -----------------------------
+class LinearProgram:
+    """min c x  s.t.  row_lo <= A x <= row_hi,  lb <= x <= ub,  x_i ganzzahlig falls integer."""
+
+    def __init__(self):
+        self.n_vars = 0
+        self._lb: List[np.ndarray] = []
+        self._ub: List[np.ndarray] = []
+        self._cost: List[np.ndarray] = []
+        self._integer: List[np.ndarray] = []
+        self._rows: List[np.ndarray] = []
+        self._cols: List[np.ndarray] = []
+        self._vals: List[np.ndarray] = []
+        self._row_lo: List[np.ndarray] = []
+        self._row_hi: List[np.ndarray] = []
+        self.n_rows = 0
+        self.constant = 0.0
+
+    def var(self, size: int, lb=0.0, ub=np.inf, cost=0.0, integer: bool = False) -> np.ndarray:
+        idx = np.arange(self.n_vars, self.n_vars + size)
+        self.n_vars += size
+        self._lb.append(np.broadcast_to(np.asarray(lb, dtype=np.float64), (size,)))
+        self._ub.append(np.broadcast_to(np.asarray(ub, dtype=np.float64), (size,)))
+        self._cost.append(np.broadcast_to(np.asarray(cost, dtype=np.float64), (size,)))
+        self._integer.append(np.full(size, 1 if integer else 0, dtype=np.int8))
+        return idx
+
+    def rows(self, m: int, terms, lo=-np.inf, hi=np.inf) -> None:
+        """
+        m Zeilen; terms = [(Variablenindizes (m,) oder Skalar, Koeffizienten (m,) oder Skalar), ...].
+        Ein Term (Zeilen, Indizes, Koeffizienten) summiert beliebig viele Einträge in die
+        angegebenen Zeilen (0..m-1), z.B. Summen über Tage eines Clusters.
+        """
+        row_ids = np.arange(self.n_rows, self.n_rows + m)
+        for term in terms:
+            if len(term) == 3:
+                local, idx, coef = (np.asarray(x) for x in term)
+                n = len(idx)
+                rows = row_ids[np.broadcast_to(local.astype(np.int64), (n,))]
+            else:
+                idx, coef = term
+                n, rows = m, row_ids
+            idx = np.broadcast_to(np.asarray(idx, dtype=np.int64), (n,))
+            coef = np.broadcast_to(np.asarray(coef, dtype=np.float64), (n,))
+            keep = coef != 0.0
+            self._rows.append(rows[keep])
+            self._cols.append(idx[keep])
+            self._vals.append(coef[keep])
+        self._row_lo.append(np.broadcast_to(np.asarray(lo, dtype=np.float64), (m,)))
+        self._row_hi.append(np.broadcast_to(np.asarray(hi, dtype=np.float64), (m,)))
+        self.n_rows += m
+
+    def arrays(self) -> Dict[str, Any]:
+        if not HAS_SCIPY:
+            raise RuntimeError("scipy wird für das MILP-Modell benötigt (pip install scipy).")
+        A = sparse.csr_matrix(
+            (np.concatenate(self._vals), (np.concatenate(self._rows), np.concatenate(self._cols))),
+            shape=(self.n_rows, self.n_vars),
+        )
+        return {
+            "c": np.concatenate(self._cost),
+            "A": A,
+            "row_lo": np.concatenate(self._row_lo),
+            "row_hi": np.concatenate(self._row_hi),
+            "lb": np.concatenate(self._lb),
+            "ub": np.concatenate(self._ub),
+            "integer": np.concatenate(self._integer),
+        }
+
+
+def _solve_highs(arr, time_limit=None, mip_gap=None, verbose=False) -> Dict[str, Any]:
+    options = {"disp": bool(verbose), "presolve": True}
+    if time_limit:
+        options["time_limit"] = float(time_limit)
+    if mip_gap is not None:
+        options["mip_rel_gap"] = float(mip_gap)
+    res = milp(
+        c=arr["c"],
+        integrality=arr["integer"],
+        bounds=Bounds(arr["lb"], arr["ub"]),
+        constraints=LinearConstraint(arr["A"], arr["row_lo"], arr["row_hi"]),
+        options=options,
+    )
+    return {
+        "x": res.x,
+        "objective": None if res.x is None else float(res.fun),
+        "status": str(res.message),
+        "optimal": bool(res.status == 0),
+        "mip_gap": getattr(res, "mip_gap", None),
+    }
+
+
+def _solve_gurobi(arr, time_limit=None, mip_gap=None, verbose=False) -> Dict[str, Any]:
+    m = gp.Model("h2_dispatch_sizing")
+    m.Params.OutputFlag = 1 if verbose else 0
+    if time_limit:
+        m.Params.TimeLimit = float(time_limit)
+    if mip_gap is not None:
+        m.Params.MIPGap = float(mip_gap)
+    vtype = np.where(arr["integer"] == 1, GRB.BINARY, GRB.CONTINUOUS)
+    ub = np.where(np.isinf(arr["ub"]), GRB.INFINITY, arr["ub"])
+    x = m.addMVar(len(arr["c"]), lb=arr["lb"], ub=ub, vtype=vtype)
+
+    A, lo, hi = arr["A"], arr["row_lo"], arr["row_hi"]
+    eq = lo == hi
+    for mask, sense, rhs in (
+        (eq, "=", hi),
+        (~eq & np.isfinite(hi), "<", hi),
+        (~eq & np.isfinite(lo), ">", lo),
+    ):
+        if mask.any():
+            m.addMConstr(A[mask], x, sense, rhs[mask])
+    m.setObjective(arr["c"] @ x, GRB.MINIMIZE)
+    m.optimize()
+
+    has_x = m.SolCount > 0
+    return {
+        "x": np.asarray(x.X) if has_x else None,
+        "objective": float(m.ObjVal) if has_x else None,
+        "status": int(m.Status),
+        "optimal": m.Status == GRB.OPTIMAL,
+        "mip_gap": float(m.MIPGap) if has_x and m.IsMIP else None,
+    }
+
+
+def available_backends() -> List[str]:
+    return (["gurobi"] if HAS_GUROBI else []) + (["highs"] if HAS_SCIPY else [])
+
+
+def solve_program(
+    lp: LinearProgram,
+    backend: str = "auto",
+    time_limit: Optional[float] = None,
+    mip_gap: Optional[float] = None,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """Löst das LinearProgram mit gurobipy oder HiGHS; "auto" = Gurobi, sonst (auch ohne Lizenz) HiGHS."""
+    arr = lp.arrays()
+    backend = str(backend or "auto").lower()
+    if backend not in ("auto", "gurobi", "highs"):
+        raise ValueError(f"Unbekannter Solver '{backend}' (erlaubt: auto, gurobi, highs)")
+
+    t0 = time.perf_counter()
+    out = None
+    if backend in ("auto", "gurobi") and HAS_GUROBI:
+        try:
+            out = _solve_gurobi(arr, time_limit, mip_gap, verbose)
+            out["backend"] = "gurobi"
+        except gp.GurobiError as e:
+            if backend == "gurobi":
+                raise
+            print(f"Gurobi nicht nutzbar ({e}), weiter mit HiGHS.")
+    elif backend == "gurobi":
+        raise RuntimeError("gurobipy ist nicht installiert.")
+    if out is None:
+        out = _solve_highs(arr, time_limit, mip_gap, verbose)
+        out["backend"] = "highs"
+    out["solve_s"] = time.perf_counter() - t0
+    out["objective"] = None if out["objective"] is None else out["objective"] + lp.constant
+    return out
+
+
+# -----------------------------
+# Modell
+# -----------------------------
+def cost_coefficients(technology: str, cost_params_override: dict = None) -> Dict[str, float]:
+    """
+    Total_proxy = const + P_el*c_pel + H2_t*c_h2 + NH3_t*c_nh3 + Wassertank_m3*c_water
+    (cost_components_proxy ist in diesen Größen affin, s geht nicht ein).
+    """
+    probe = np.zeros((5, 4))
+    for i in range(4):
+        probe[i + 1, i] = 1.0
+    total = cf.cost_components_proxy_vec(
+        s=1.0,
+        p_el_mw=probe[:, 0],
+        h2_storage_t_design=probe[:, 1],
+        nh3_storage_t=probe[:, 2],
+        water_tank_m3_design=probe[:, 3],
+        technology=technology,
+        cost_params_override=cost_params_override,
+    )["Total_proxy"].to_numpy()
+    const = float(total[0])
+    return {
+        "const": const,
+        "pel": float(total[1] - const),
+        "h2_t": float(total[2] - const),
+        "nh3_t": float(total[3] - const),
+        "water_m3": float(total[4] - const),
+    }
+
+
+def design_limits(bounds: Dict[str, float], annual_h2_t: float) -> Dict[str, tuple]:
+    """Grid-Bounds (wie clamp_grid_bounds) -> Variablengrenzen der Auslegung in physikalischen Einheiten."""
+    per_ship_t = float(cf.annual_nh3_prod_t) / float(cf.ships_per_year)
+    h2_t_per_day = annual_h2_t / 365.0
+    nh3_min_ships = max(float(bounds["nh3_min"]), float(cf.startup_buffer_ships) + 1.0)
+    return {
+        "s": (float(bounds["s_min"]), float(bounds["s_max"])),
+        "pel": (float(bounds["pel_min"]), float(bounds["pel_max"])),
+        "h2_t": (float(bounds["h2_min"]) * h2_t_per_day, float(bounds["h2_max"]) * h2_t_per_day),
+        "nh3_t": (nh3_min_ships * per_ship_t, max(float(bounds["nh3_max"]), nh3_min_ships) * per_ship_t),
+        "water_m3": (float(bounds["water_min"]), float(bounds["water_max"])),
+    }
+
+
+def build_model(
+    grid: Dict[str, Any],
+    technology: str,
+    limits: Dict[str, tuple],
+    integer: bool = True,
+    shortfall_penalty_usd_per_t: float = 1e5,
+    cost_params_override: dict = None,
+    aux_deficit_penalty_usd_per_mwh: float = 1e5,
+):
+    """LinearProgram + Variablenindizes für eine Technologie auf dem Zeitraster grid."""
+    cp = cf.cost_params
+    tech = technology.upper()
+    el = cp["h2"]["electrolyzer"][tech]
+    h2s = cp["h2"]["storage"]
+    hb = cp["haber_bosch"]
+    nh3s = cp["nh3_storage"]
+    rop = cp.get("water", {}).get("ro", {})
+    tankp = cp.get("water", {}).get("tank", {})
+
+    p, dt, weight, lift = grid["p"], grid["dt"], grid["weight"], grid["lift"]
+    T = len(p)
+    years = float(cp["general"]["project_lifetime_years"])
+    linked = "day_map" in grid
+
+    # Vorgänger je Schritt: zyklisch je Periode; bei rep_days starten die Füllstände jedes Tages relativ bei 0
+    prev = np.arange(T) - 1
+    has_prev = np.ones(T)
+    period_of = np.zeros(T, dtype=np.int64)
+    for k, (start, stop) in enumerate(grid["periods"]):
+        prev[start] = stop - 1
+        period_of[start:stop] = k
+        if linked:
+            has_prev[start] = 0.0
+
+    # physikalische Größen wie in simulate_hourly_system
+    h2_t_per_mwh = (1000.0 / float(el["spec_kwh_per_kgH2"])) / 1000.0
+    eta_in = float(h2s.get("eta_in", 1.0))
+    eta_out = float(h2s.get("eta_out", 1.0))
+    h2_loss = float(h2s.get("loss_frac_per_hour", 0.0))
+    keep_h2 = (1.0 - h2_loss) ** dt
+    reliq_mwh_per_t_bog = float(h2s.get("reliq_frac", 0.0)) * float(h2s.get("reliq_kwh_per_kg_bog", 0.0))
+    el_total_factor = 1.0 + h2_t_per_mwh * 1000.0 * eta_in * float(h2s.get("spec_kwh_per_kg_in", 0.0)) / 1000.0
+
+    h2_t_per_t_nh3 = 6.0 / 34.0
+    kwh_per_t_hbchain = (
+        float(hb["spec_kwh_per_kgNH3"]) * 1000.0
+        + (28.0 / 34.0 * 1000.0) * float(cp["n2"]["spec_kwh_per_kgN2"])
+        + (h2_t_per_t_nh3 * 1000.0) * float(h2s.get("spec_kwh_per_kg_out", 0.0))
+        + float(nh3s.get("spec_kwh_per_t_in", 0.0))
+    )
+    hb_cap = float(cf.hb_capacity_tNH3_per_day) / 24.0
+    cool_mwh_per_t_h = float(nh3s.get("cooling_kwh_per_tNH3_per_day", 0.0)) / 24.0 / 1000.0
+    out_mwh_per_t = float(nh3s.get("spec_kwh_per_t_out", 0.0)) / 1000.0
+    per_ship_t = float(cf.annual_nh3_prod_t) / float(cf.ships_per_year)
+    lift_t = lift * per_ship_t
+
+    water_m3_per_mwh = h2_t_per_mwh * 1000.0 * float(rop.get("water_kg_per_kgH2", 9.0)) / 1000.0
+    ro_mwh_per_m3 = float(rop.get("spec_kwh_per_m3", 4.0)) / 1000.0
+    water_loss = float(tankp.get("loss_frac_per_hour", 0.0))
+    keep_water = (1.0 - water_loss) ** dt
+
+    el_min = float(el["min_load_frac"])
+    el_ramp = float(cf.el_ramp_frac_per_h)
+    hb_min = float(cf.hb_min_frac_when_on)
+    hb_ramp = float(cf.hb_ramp_frac_per_h)
+
+    coef = cost_coefficients(tech, cost_params_override)
+    lp = LinearProgram()
+    lp.constant = coef["const"]
+
+    # Auslegung
+    v = {}
+    v["s"] = lp.var(1, *limits["s"])
+    v["pel"] = lp.var(1, *limits["pel"], cost=coef["pel"])
+    v["h2_t"] = lp.var(1, *limits["h2_t"], cost=coef["h2_t"])
+    v["nh3_t"] = lp.var(1, *limits["nh3_t"], cost=coef["nh3_t"])
+    v["water_m3"] = lp.var(1, *limits["water_m3"], cost=coef["water_m3"])
+    pel_ub = limits["pel"][1]
+    caps = {"h2_soc": limits["h2_t"][1], "nh3_soc": limits["nh3_t"][1], "water_soc": limits["water_m3"][1]}
+    cap_var = {"h2_soc": v["h2_t"][0], "nh3_soc": v["nh3_t"][0], "water_soc": v["water_m3"][0]}
+
+    # Fahrweise (Raten je Schritt: MW, t/h, m3/h; Füllstände am Schrittende, bei rep_days relativ)
+    v["p_el"] = lp.var(T, 0.0, pel_ub)
+    v["u_el"] = lp.var(T, 0.0, 1.0, integer=integer)
+    v["nh3_rate"] = lp.var(T, 0.0, hb_cap)
+    v["u_hb"] = lp.var(T, 0.0, 1.0, integer=integer)
+    v["ro"] = lp.var(T, 0.0, water_m3_per_mwh * pel_ub)
+    v["curtail"] = lp.var(T, 0.0, np.inf)
+    for name, cap in caps.items():
+        v[name] = lp.var(T, -cap if linked else 0.0, cap)
+    if not linked:
+        v["short"] = lp.var(T, 0.0, lift_t, cost=shortfall_penalty_usd_per_t * years * weight)
+
+    P, S = v["pel"][0], v["s"][0]
+    pe, ue = v["p_el"], v["u_el"]
+    r, uh = v["nh3_rate"], v["u_hb"]
+
+    # EL: Kapazität, Mindestlast (Big-M), Rampe
+    lp.rows(T, [(pe, 1.0), (P, -1.0)], hi=0.0)
+    lp.rows(T, [(pe, 1.0), (ue, -pel_ub)], hi=0.0)
+    lp.rows(T, [(pe, 1.0), (P, -el_min), (ue, -el_min * pel_ub)], lo=-el_min * pel_ub)
+    lp.rows(T, [(pe, 1.0), (pe[prev], -1.0), (P, -el_ramp * dt)], hi=0.0)
+    lp.rows(T, [(pe[prev], 1.0), (pe, -1.0), (P, -el_ramp * dt)], hi=0.0)
+
+    # HB: Mindestlast, Rampe (Anfahren/Abfahren über Mindestlast)
+    hb_step = hb_ramp * hb_cap * dt + hb_min * hb_cap
+    lp.rows(T, [(r, 1.0), (uh, -hb_cap)], hi=0.0)
+    lp.rows(T, [(r, 1.0), (uh, -hb_min * hb_cap)], lo=0.0)
+    lp.rows(T, [(r, 1.0), (r[prev], -1.0), (uh[prev], hb_min * hb_cap)], hi=hb_step)
+    lp.rows(T, [(r[prev], 1.0), (r, -1.0), (uh, hb_min * hb_cap)], hi=hb_step)
+
+    # Speicherbilanzen
+    lp.rows(T, [
+        (v["h2_soc"], 1.0), (v["h2_soc"][prev], -keep_h2 * has_prev),
+        (pe, -eta_in * h2_t_per_mwh * dt), (r, h2_t_per_t_nh3 / eta_out * dt),
+    ], lo=0.0, hi=0.0)
+    if linked:
+        lp.rows(T, [(v["nh3_soc"], 1.0), (v["nh3_soc"][prev], -has_prev), (r, -dt)], lo=0.0, hi=0.0)
+    else:
+        lp.rows(T, [(v["nh3_soc"], 1.0), (v["nh3_soc"][prev], -1.0), (r, -dt), (v["short"], -1.0)],
+                lo=-lift_t, hi=-lift_t)
+    lp.rows(T, [(v["ro"], 1.0), (P, -water_m3_per_mwh)], hi=0.0)
+    lp.rows(T, [
+        (v["water_soc"], 1.0), (v["water_soc"][prev], -keep_water * has_prev),
+        (v["ro"], -dt), (pe, water_m3_per_mwh * dt),
+    ], lo=0.0, hi=0.0)
+
+    if not linked:
+        for name in caps:
+            lp.rows(T, [(v[name], 1.0), (cap_var[name], -1.0)], hi=0.0)
+        # NH3: Füllstand vor der Abholung <= Tankgröße
+        lp.rows(T, [(v["nh3_soc"][prev], 1.0), (r, dt), (cap_var["nh3_soc"], -1.0)], hi=0.0)
+        # Verladestrom im Schritt der Abholung (ohne Fehlmenge)
+        load_const = out_mwh_per_t * lift_t
+        load_terms = [(v["short"], -out_mwh_per_t)]
+    else:
+        # Inter-Tages-Kopplung: Füllstand am Tagesanfang je Kalendertag, Min/Max je Repräsentant
+        day_map = np.asarray(grid["day_map"], dtype=np.int64)
+        lift_day_t = np.asarray(grid["lift_day"], dtype=np.float64) * per_ship_t
+        D, K = len(day_map), len(grid["periods"])
+        ends = np.array([stop - 1 for _, stop in grid["periods"]])
+        nxt = (np.arange(D) + 1) % D
+        v["short"] = lp.var(D, 0.0, lift_day_t, cost=shortfall_penalty_usd_per_t * years * (8760.0 / (24.0 * D)))
+        counts = np.bincount(day_map, minlength=K).astype(np.float64)
+        keep_day = {"h2_soc": (1.0 - h2_loss) ** 24, "nh3_soc": 1.0, "water_soc": (1.0 - water_loss) ** 24}
+        for name, cap in caps.items():
+            start = v[name + "_day"] = lp.var(D, 0.0, cap)
+            hi_k = v[name + "_max"] = lp.var(K, 0.0, cap)
+            lo_k = v[name + "_min"] = lp.var(K, -cap, 0.0)
+            lp.rows(T, [(v[name], 1.0), (hi_k[period_of], -1.0)], hi=0.0)
+            lp.rows(T, [(v[name], 1.0), (lo_k[period_of], -1.0)], lo=0.0)
+            lp.rows(D, [(start, 1.0), (hi_k[day_map], 1.0), (cap_var[name], -1.0)], hi=0.0)
+            lp.rows(D, [(start, 1.0), (lo_k[day_map], 1.0)], lo=0.0)
+            terms = [(start[nxt], 1.0), (start, -keep_day[name]), (v[name][ends[day_map]], -1.0)]
+            if name == "nh3_soc":
+                # Schiff am Tagesende; Fehlmenge als Strafe
+                terms.append((v["short"], -1.0))
+                lp.rows(D, terms, lo=-lift_day_t, hi=-lift_day_t)
+            else:
+                lp.rows(D, terms, lo=0.0, hi=0.0)
+            if name == "water_soc":
+                continue
+            # mittlerer Tagesanfangs-Füllstand je Repräsentant (für Kühlung/Rückverflüssigung)
+            base = v[name + "_base"] = lp.var(K, 0.0, cap)
+            lp.rows(K, [(base, counts), (day_map, start, -1.0)], lo=0.0, hi=0.0)
+        # Verladestrom: Mittel über die Kalendertage des Repräsentanten (Abholung - Fehlmenge),
+        # verteilt auf dessen Stunden
+        share = np.zeros(T)
+        for k, (a, b) in enumerate(grid["periods"]):
+            share[a:b] = dt[a:b] / float(np.sum(dt[a:b]))
+        load_const = out_mwh_per_t * share * (np.bincount(day_map, lift_day_t, K) / counts)[period_of]
+        steps = [np.arange(*grid["periods"][k]) for k in day_map]
+        rows_d = np.concatenate(steps)
+        days_d = np.repeat(np.arange(D), [len(x) for x in steps])
+        load_terms = [(rows_d, v["short"][days_d], -out_mwh_per_t * share[rows_d] / counts[day_map[days_d]])]
+
+    # Nebenverbraucher (Rückverflüssigung, NH3-Kühlung, Verladung) je Schritt (MWh). Wie in
+    # simulate_hourly_system (p_rem = max(0, p_wind - Nebenverbraucher)) haben sie Vorrang,
+    # reicht der Wind nicht, bleibt der Rest ungedeckt (aux_deficit, bestraft mit
+    # aux_deficit_penalty_usd_per_mwh, damit vorhandener Strom zuerst dorthin geht).
+    aux_terms = [
+        (v["h2_soc"][prev], (1.0 - keep_h2) * reliq_mwh_per_t_bog * has_prev),
+        (v["nh3_soc"][prev], cool_mwh_per_t_h * dt * has_prev),
+    ] + load_terms
+    if linked:
+        aux_terms.append((v["h2_soc_base"][period_of], (1.0 - keep_h2) * reliq_mwh_per_t_bog))
+        aux_terms.append((v["nh3_soc_base"][period_of], cool_mwh_per_t_h * dt))
+    v["aux_deficit"] = lp.var(T, 0.0, np.inf, cost=aux_deficit_penalty_usd_per_mwh * years * weight)
+    # aux_deficit <= Nebenverbraucher
+    lp.rows(T, [(v["aux_deficit"], 1.0)] + [(*t[:-1], -np.asarray(t[-1])) for t in aux_terms], hi=load_const)
+
+    # Energiebilanz je Schritt (MWh)
+    terms = [
+        (pe, el_total_factor * dt),
+        (v["ro"], ro_mwh_per_m3 * dt),
+        (r, kwh_per_t_hbchain / 1000.0 * dt),
+        (v["curtail"], dt),
+        (v["aux_deficit"], -1.0),
+        (S, -p * dt),
+    ] + aux_terms
+    lp.rows(T, terms, lo=-load_const, hi=-load_const)
+
+    return lp, v
+
+
+def optimize_design(
+    p_mw,
+    bounds: Dict[str, float],
+    annual_h2_t: float,
+    technologies=("AEL", "PEM"),
+    aggregation: Optional[Dict[str, Any]] = None,
+    integer: bool = True,
+    backend: str = "auto",
+    time_limit: Optional[float] = None,
+    mip_gap: Optional[float] = 0.005,
+    shortfall_penalty_usd_per_t: float = 1e5,
+    cost_params_override: dict = None,
+    aux_deficit_penalty_usd_per_mwh: float = 1e5,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Ein Solve je Technologie; liefert die günstigste Auslegung (Entscheidungen im Format
+    von generate_candidate_grid: s, pel, h2_days, nh3_ships, water_tank) und Solver-Infos.
+    """
+    aggregation = dict(aggregation or {})
+    grid = aggregate_profile(p_mw, **aggregation)
+    limits = design_limits(bounds, annual_h2_t)
+    per_ship_t = float(cf.annual_nh3_prod_t) / float(cf.ships_per_year)
+    t_build = 0.0
+
+    runs = []
+    for tech in technologies:
+        t0 = time.perf_counter()
+        lp, v = build_model(
+            grid, tech, limits,
+            integer=integer,
+            shortfall_penalty_usd_per_t=shortfall_penalty_usd_per_t,
+            cost_params_override=cost_params_override,
+            aux_deficit_penalty_usd_per_mwh=aux_deficit_penalty_usd_per_mwh,
+        )
+        t_build += time.perf_counter() - t0
+        sol = solve_program(lp, backend=backend, time_limit=time_limit, mip_gap=mip_gap, verbose=verbose)
+        run = {
+            "technology": tech,
+            "backend": sol["backend"],
+            "status": sol["status"],
+            "optimal": sol["optimal"],
+            "mip_gap": sol["mip_gap"],
+            "solve_s": sol["solve_s"],
+            "objective_usd": sol["objective"],
+            "n_vars": lp.n_vars,
+            "n_rows": lp.n_rows,
+        }
+        x = sol["x"]
+        if x is not None:
+            w = grid["weight"]
+            if "day_map" in grid:
+                short_t = float(np.sum(x[v["short"]])) * 365.0 / len(grid["day_map"])
+            else:
+                short_t = float(np.sum(w * x[v["short"]]))
+            run["design"] = {
+                "s": float(x[v["s"][0]]),
+                "pel": float(x[v["pel"][0]]),
+                "h2_days": float(x[v["h2_t"][0]]) / (annual_h2_t / 365.0),
+                "nh3_ships": float(x[v["nh3_t"][0]]) / per_ship_t,
+                "water_tank": float(x[v["water_m3"][0]]),
+            }
+            run["h2_storage_t"] = float(x[v["h2_t"][0]])
+            run["nh3_storage_t"] = float(x[v["nh3_t"][0]])
+            run["shortfall_t_per_year"] = short_t
+            run["curtail_GWh_per_year"] = float(np.sum(w * grid["dt"] * x[v["curtail"]])) / 1000.0
+            run["el_full_load_hours"] = (
+                float(np.sum(w * grid["dt"] * x[v["p_el"]])) / max(run["design"]["pel"], 1e-9)
+            )
+            aux_deficit_mwh = float(np.sum(w * x[v["aux_deficit"]]))
+            run["aux_deficit_MWh_per_year"] = aux_deficit_mwh
+            run["total_proxy_usd"] = float(
+                run["objective_usd"]
+                - float(cf.cost_params["general"]["project_lifetime_years"])
+                * (shortfall_penalty_usd_per_t * short_t + aux_deficit_penalty_usd_per_mwh * aux_deficit_mwh)
+            )
+        runs.append(run)
+
+    solved = [r for r in runs if r.get("design") is not None]
+    best = min(solved, key=lambda r: r["objective_usd"]) if solved else None
+    return {
+        "best": best,
+        "runs": runs,
+        "aggregation": {k: val for k, val in grid.items() if k in ("method", "hours", "days", "day_weights")},
+        "n_steps": int(len(grid["p"])),
+        "build_s": t_build,
+    }
@@ -0,0 +1,304 @@
+"""
+Mittleres 8760-h-Profil aus mehreren Jahres-CSVs (ersetzt "CSV-Dateien kombinieren").
+
+Statt alle CSVs vollständig zu laden, einen String-Schlüssel MM-DD-HH zu bauen, alles
+zu verketten und danach zu gruppieren, liest ProfileAggregator jede Datei blockweise
+(chunksize) und ordnet jeden Zeitstempel einem ganzzahligen Stunden-Slot des Jahres zu
+(0..8759, 29. Februar entfällt). Je Slot und Spalte werden laufend Summe, Anzahl,
+Minimum und Maximum geführt, optional zusätzlich ein Quantil-Sketch je Spalte
+(quantile_sketch.SlotQuantileSketch); der Speicherbedarf hängt damit nicht von der Zahl
+der Jahre ab.
+
+Ergebnis:
+- mean_frame(): wie mean_profile_8760.csv des Notebooks (Spalte time mit Dummy-Jahr 2001,
+  Mittelwerte aller numerischen Spalten; nicht-numerische Spalten entfallen)
+- stats_frame(): zusätzlich <spalte>_min/_max/_count je Slot
+- profile_frame(column, power_to_mw): df2-Format (DatetimeIndex "t", p_mw) für
+  Code_Final.simulate_hourly_system(df_profile=...)
+- mit Sketches (quantiles=True): quantile_frame() mit <spalte>_p10/_p50/_p90 je Stunde,
+  quantile_profiles(column) -> {"P10": df2, "P50": df2, "P90": df2}; jedes davon geht wie
+  profile_frame() als df_profile an simulate_hourly_system. Die Quantile gelten je Stunde
+  des Jahres über alle Quelljahre (P10 ist also ein durchgehend schwaches Jahr, kein
+  beobachtetes), für vorsichtige Speicher-Auslegungen.
+
+build_quantile_profiles() erledigt beides in einem Durchlauf über die Dateien.
+
+Kommandozeile (wie das Notebook): python profile_builder.py [DATA_DIR] [OUTFILE]
+schreibt zusätzlich QUANTILE_OUTFILE (P10/P50/P90 je Spalte); eine Spalte daraus lässt
+sich z.B. mit wind_profile (power_col="..._p90") oder über POST /profiles als Profil laden.
+"""
+
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import SlotQuantileSketch
+
+HOURS_PER_YEAR = 8760
+# Dummy-Zeitachse für das Ergebnis (Nicht-Schaltjahr, wie im Notebook)
+PROFILE_YEAR = 2001
+
+DATA_DIR = Path(".")
+PATTERN = "*.csv"
+TIME_COL = "time"          # oder "local_time"
+OUTFILE = "mean_profile_8760.csv"
+QUANTILE_OUTFILE = "quantile_profile_8760.csv"
+CHUNKSIZE = 100_000
+
+# Quantile (Prozent) der Quantil-Profile und Kapazität je Sketch-Ebene
+PROFILE_QUANTILES = (10, 50, 90)
+SKETCH_K = 128
+
+
+def hour_of_year_slot(t: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Zeitstempel -> (slot, keep): slot = Stunde des Jahres ohne 29.02. (0..8759),
+    keep = False für Stunden am 29. Februar (slot dort ohne Bedeutung).
+    """
+    t = pd.DatetimeIndex(t)
+    month = t.month.to_numpy()
+    day0 = t.dayofyear.to_numpy() - 1
+    # im Schaltjahr liegen alle Tage ab März einen Tag weiter hinten
+    day0 = day0 - (t.is_leap_year & (month > 2))
+    slot = day0.astype(np.int64) * 24 + t.hour.to_numpy()
+    keep = ~((month == 2) & (t.day.to_numpy() == 29))
+    return slot, keep
+
+
+def profile_time_index(name: str = "t") -> pd.DatetimeIndex:
+    """Stundenachse des Ergebnisprofils (Dummy-Jahr PROFILE_YEAR, 8760 Stunden)."""
+    return pd.date_range(f"{PROFILE_YEAR}-01-01", periods=HOURS_PER_YEAR, freq="h", name=name)
+
+
+class ProfileAggregator:
+    """
+    Laufende Statistik je Stunden-Slot und Spalte (Summe, Anzahl, Min, Max).
+
+    columns: zu aggregierende Spalten (Default: numerische Spalten des ersten Blocks).
+    sketch_factory: optional, erzeugt je Spalte ein Objekt mit update(slots, values)
+    (z.B. Quantil-Sketches); es erhält dieselben Slots/Werte wie die Summen.
+    quantiles=True: SlotQuantileSketch(k=sketch_k) als sketch_factory.
+    sketch_columns: nur für diese Spalten Sketches führen (Default: alle).
+    """
+
+    def __init__(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        time_col: str = TIME_COL,
+        sketch_factory: Optional[Callable[[], Any]] = None,
+        quantiles: bool = False,
+        sketch_k: int = SKETCH_K,
+        sketch_columns: Optional[Sequence[str]] = None,
+    ):
+        if quantiles and sketch_factory is None:
+            sketch_factory = partial(SlotQuantileSketch, HOURS_PER_YEAR, k=sketch_k)
+        self.time_col = time_col
+        self.columns: Optional[List[str]] = list(columns) if columns is not None else None
+        self.sketch_factory = sketch_factory
+        self.sketch_columns = list(sketch_columns) if sketch_columns is not None else None
+        self.sketches: Dict[str, Any] = {}
+        self.rows = 0
+        self.dropped_feb29 = 0
+        self.files: List[str] = []
+        if self.columns is not None:
+            self._allocate()
+
+    def _allocate(self) -> None:
+        k = len(self.columns)
+        self._sum = np.zeros((k, HOURS_PER_YEAR))
+        self._count = np.zeros((k, HOURS_PER_YEAR), dtype=np.int64)
+        self._min = np.full((k, HOURS_PER_YEAR), np.inf)
+        self._max = np.full((k, HOURS_PER_YEAR), -np.inf)
+        if self.sketch_factory is not None:
+            self.sketches = {
+                col: self.sketch_factory() for col in self.columns
+                if self.sketch_columns is None or col in self.sketch_columns
+            }
+
+    def add_frame(self, df: pd.DataFrame) -> None:
+        """Einen Block (Spalte time_col + Datenspalten) einrechnen."""
+        if self.time_col not in df.columns:
+            raise ValueError(f"Spalte '{self.time_col}' nicht gefunden. Spalten: {list(df.columns)}")
+        if self.columns is None:
+            numeric = df.drop(columns=[self.time_col]).select_dtypes(include=[np.number])
+            self.columns = list(numeric.columns)
+            if not self.columns:
+                raise ValueError("Keine numerischen Spalten zum Mitteln gefunden.")
+            self._allocate()
+
+        slot, keep = hour_of_year_slot(pd.to_datetime(df[self.time_col]))
+        self.rows += len(df)
+        self.dropped_feb29 += int((~keep).sum())
+        slot = slot[keep]
+        for j, col in enumerate(self.columns):
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)[keep]
+            valid = ~np.isnan(values)
+            s, v = slot[valid], values[valid]
+            self._sum[j] += np.bincount(s, weights=v, minlength=HOURS_PER_YEAR)
+            self._count[j] += np.bincount(s, minlength=HOURS_PER_YEAR)
+            np.minimum.at(self._min[j], s, v)
+            np.maximum.at(self._max[j], s, v)
+            if col in self.sketches:
+                self.sketches[col].update(s, v)
+
+    def add_file(self, path, chunksize: int = CHUNKSIZE) -> None:
+        """CSV blockweise einlesen (nie die ganze Datei im Speicher)."""
+        path = Path(path)
+        try:
+            for chunk in pd.read_csv(path, comment="#", chunksize=chunksize):
+                self.add_frame(chunk)
+        except ValueError as exc:
+            raise ValueError(f"{path.name}: {exc}") from None
+        self.files.append(path.name)
+
+    def add_files(self, paths: Iterable, chunksize: int = CHUNKSIZE) -> "ProfileAggregator":
+        for path in paths:
+            self.add_file(path, chunksize=chunksize)
+        return self
+
+    # -------------------------
+    # Ergebnis
+    # -------------------------
+    def _require_data(self) -> None:
+        if self.columns is None:
+            raise ValueError("Noch keine Daten aggregiert.")
+
+    def mean(self, column: str) -> np.ndarray:
+        """Mittelwert je Slot (NaN, wo kein Wert vorlag)."""
+        self._require_data()
+        j = self.columns.index(column)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self._count[j] > 0, self._sum[j] / self._count[j], np.nan)
+
+    def mean_frame(self) -> pd.DataFrame:
+        """Mittleres Profil wie mean_profile_8760.csv (time_col zuerst)."""
+        self._require_data()
+        data = {self.time_col: profile_time_index(self.time_col)}
+        data.update({col: self.mean(col) for col in self.columns})
+        return pd.DataFrame(data)
+
+    def stats_frame(self) -> pd.DataFrame:
+        """Je Spalte <col>_mean, <col>_min, <col>_max, <col>_count (Index: Stundenachse "t")."""
+        self._require_data()
+        data = {}
+        for j, col in enumerate(self.columns):
+            has = self._count[j] > 0
+            data[f"{col}_mean"] = self.mean(col)
+            data[f"{col}_min"] = np.where(has, self._min[j], np.nan)
+            data[f"{col}_max"] = np.where(has, self._max[j], np.nan)
+            data[f"{col}_count"] = self._count[j]
+        return pd.DataFrame(data, index=profile_time_index())
+
+    def profile_frame(self, column: str, power_to_mw: float = 1.0) -> pd.DataFrame:
+        """
+        df2-Format (DatetimeIndex "t", Spalte p_mw) aus dem Mittel von column, direkt als
+        df_profile für Code_Final nutzbar. Wie wind_profile: in MW umgerechnet, >= 0;
+        Slots ohne Wert -> ValueError.
+        """
+        p_mw = self.mean(column) * float(power_to_mw)
+        if np.isnan(p_mw).any():
+            raise ValueError(f"{column}: {int(np.isnan(p_mw).sum())} Stunden ohne Werte.")
+        return pd.DataFrame({"p_mw": np.clip(p_mw, 0.0, None)}, index=profile_time_index())
+
+    def quantile(self, column: str, qs: Sequence[float] = PROFILE_QUANTILES) -> np.ndarray:
+        """Quantile qs (Prozent) je Slot aus dem Sketch von column -> Array (len(qs), 8760)."""
+        self._require_data()
+        if column not in self.sketches:
+            raise ValueError(f"{column}: kein Quantil-Sketch (ProfileAggregator(quantiles=True)).")
+        return self.sketches[column].quantiles([q / 100.0 for q in qs])
+
+    def quantile_frame(self, qs: Sequence[float] = PROFILE_QUANTILES) -> pd.DataFrame:
+        """Quantil-Profile aller Sketch-Spalten: time_col, dann <col>_p10, <col>_p50, ..."""
+        self._require_data()
+        data = {self.time_col: profile_time_index(self.time_col)}
+        for col in self.sketches:
+            for q, values in zip(qs, self.quantile(col, qs)):
+                data[f"{col}_p{q:g}"] = values
+        return pd.DataFrame(data)
+
+    def quantile_profiles(
+        self,
+        column: str,
+        qs: Sequence[float] = PROFILE_QUANTILES,
+        power_to_mw: float = 1.0,
+    ) -> Dict[str, pd.DataFrame]:
+        """{"P10": df2, "P50": df2, ...} wie profile_frame(), je Quantil aus dem Sketch."""
+        out = {}
+        for q, values in zip(qs, self.quantile(column, qs)):
+            p_mw = values * float(power_to_mw)
+            if np.isnan(p_mw).any():
+                raise ValueError(f"{column}: {int(np.isnan(p_mw).sum())} Stunden ohne Werte.")
+            out[f"P{q:g}"] = pd.DataFrame({"p_mw": np.clip(p_mw, 0.0, None)}, index=profile_time_index())
+        return out
+
+
+def build_mean_profile(
+    paths: Iterable,
+    time_col: str = TIME_COL,
+    columns: Optional[Sequence[str]] = None,
+    chunksize: int = CHUNKSIZE,
+) -> ProfileAggregator:
+    """Alle Dateien blockweise aggregieren -> ProfileAggregator (mean_frame(), profile_frame(), ...)."""
+    return ProfileAggregator(columns=columns, time_col=time_col).add_files(paths, chunksize=chunksize)
+
+
+def build_quantile_profiles(
+    paths: Iterable,
+    column: str,
+    qs: Sequence[float] = PROFILE_QUANTILES,
+    power_to_mw: float = 1.0,
+    time_col: str = TIME_COL,
+    chunksize: int = CHUNKSIZE,
+    sketch_k: int = SKETCH_K,
+) -> Tuple[Dict[str, pd.DataFrame], ProfileAggregator]:
+    """
+    Ein Durchlauf über alle Dateien -> ({"P10": df2, ...}, Aggregator); der Aggregator
+    liefert zusätzlich das Mittel (profile_frame(column)) und Min/Max.
+    """
+    agg = ProfileAggregator(time_col=time_col, quantiles=True, sketch_k=sketch_k, sketch_columns=[column])
+    agg.add_files(paths, chunksize=chunksize)
+    return agg.quantile_profiles(column, qs, power_to_mw=power_to_mw), agg
+
+
+def output_files(outfile: str) -> List[Path]:
+    """Alle Dateien, die main() schreibt (Mittelwert- und Quantil-Profil)."""
+    return [Path(outfile), Path(outfile).with_name(QUANTILE_OUTFILE)]
+
+
+def input_files(data_dir: Path, outfile: str) -> List[Path]:
+    """
+    Jahres-CSVs in data_dir ohne eigene Ausgaben (auch die unter den Default-Namen), damit
+    ein erneuter Lauf seine Ergebnisse nicht als weiteres Jahr einliest.
+    """
+    outputs = {p.resolve() for p in output_files(outfile)}
+    skip_names = {OUTFILE, QUANTILE_OUTFILE}
+    return sorted(
+        f for f in data_dir.glob(PATTERN)
+        if f.resolve() not in outputs and f.name not in skip_names
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    data_dir = Path(argv[0]) if argv else DATA_DIR
+    outfile = argv[1] if len(argv) > 1 else OUTFILE
+
+    files = input_files(data_dir, outfile)
+    if not files:
+        raise FileNotFoundError(f"Keine CSV-Dateien in {data_dir.resolve()} mit Pattern '{PATTERN}' gefunden")
+
+    agg = ProfileAggregator(quantiles=True).add_files(files)
+    agg.mean_frame().to_csv(outfile, index=False)
+    print(f"✅ Mittleres Profil erstellt: {outfile} ({HOURS_PER_YEAR} Stunden, {len(files)} Dateien)")
+    quantile_outfile = str(output_files(outfile)[1])
+    agg.quantile_frame().to_csv(quantile_outfile, index=False)
+    print(f"✅ Quantil-Profile (P{', P'.join(f'{q:g}' for q in PROFILE_QUANTILES)}) erstellt: {quantile_outfile}")
+
+if __name__ == "__main__":
+    main()
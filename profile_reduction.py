@@ -0,0 +1,310 @@
+"""
+Zeitreduktion des Stundenprofils auf repräsentative Perioden (Tage oder Wochen).
+
+Das Basisjahr wird in Perioden zerlegt (24 h bzw. 168 h) und per k-Medoids auf die
+Leistungsverläufe p_mw geclustert. Jeder Cluster wird durch eine echte Periode des
+Jahres (Medoid) vertreten; Gewicht = Anzahl Perioden, für die sie steht. Die
+Chronologie (Repräsentant je Periode des Jahres) bleibt erhalten.
+
+ReducedProfile wird von simulate_hourly_system (engine="kernel") und
+simulate_hourly_system_batch wie ein Profil angenommen (Screening):
+
+- Die Repräsentanten laufen in chronologischer Reihenfolge ihrer Medoide als ein
+  zusammenhängender Lauf; Speicher- und Reglerzustände (SOCs, Rampen, Hysterese)
+  werden über die Periodengrenzen weitergereicht.
+- Ein erster Durchlauf ohne Gewicht schwingt die Zustände ein (zyklisch wie im
+  MILP), erst der zweite Durchlauf zählt, jede Periode mit ihrem Gewicht.
+- Die NH3-Abholung wird stündlich (annual_nh3_prod_t / 8760) statt in Schiffsladungen
+  simuliert; Schiffsausfälle werden aus der gewichteten Fehlmenge geschätzt. Ist die
+  Periodenlänge ein Vielfaches des Schiffsintervalls (z.B. period=730 bei 12 Schiffen),
+  bleibt der echte Schiffsfahrplan erhalten.
+
+Die Regeln der Simulation sind nichtlinear (Hysterese, Zielniveaus): ein einmal
+simulierter Repräsentant bildet die Speicherdrift seiner Gewichts-Wiederholungen nicht
+ab. Das Screening ist daher optimistisch (Schiffsausfälle und NH3-Maximalfüllstand eher
+unterschätzt) und ersetzt nicht die Nachrechnung auf dem vollen Profil
+(gurobi_server: params["profile_reduction"]). Die Speicherkopplung über das ganze Jahr
+bleibt exakt im synthetischen Jahr (ReducedProfile.expand) und im MILP
+(milp_model, rep_days). kpi_error_report / choose_k vergleichen reduzierte und volle Läufe,
+um k zu wählen.
+"""
+
+import time
+from typing import Any, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+import wind_profile
+
+
+PERIOD_HOURS = {"day": 24, "week": 168}
+
+# KPIs für den Fehlerbericht (Spalten von simulate_hourly_system_batch)
+REPORT_KPIS = [
+    "Curtail_GWh_per_sim",
+    "EL_el_MWh_per_sim",
+    "HB_el_MWh_per_sim",
+    "RO_el_MWh_per_sim",
+    "H2_storage_max_t",
+    "NH3_storage_max_t",
+    "Water_storage_max_m3",
+    "ship_out_total_t",
+    "Total_proxy",
+]
+
+
+def period_hours_of(period) -> int:
+    """"day"/"week" oder Stundenzahl -> Stunden je Periode."""
+    if isinstance(period, str):
+        if period.lower() not in PERIOD_HOURS:
+            raise ValueError(f"Unbekannte Periode '{period}' (erlaubt: {sorted(PERIOD_HOURS)} oder Stunden)")
+        return PERIOD_HOURS[period.lower()]
+    hours = int(period)
+    if hours < 1:
+        raise ValueError("Periodenlänge muss >= 1 Stunde sein.")
+    return hours
+
+
+def cluster_periods(periods: np.ndarray, k: int, seed: int = 0, n_iter: int = 100):
+    """
+    k-Medoids (Voronoi-Iteration, k-medoids++-Start) über Periodenverläufe (n_perioden x Stunden).
+    Rückgabe: (Medoid-Indizes aufsteigend, Gewichte = Clustergrößen, Cluster je Periode).
+    """
+    x = np.asarray(periods, dtype=np.float64)
+    n = len(x)
+    k = max(1, min(int(k), n))
+    sq = (x * x).sum(axis=1)
+    dist = np.maximum(sq[:, None] + sq[None, :] - 2.0 * (x @ x.T), 0.0)
+
+    rng = np.random.default_rng(seed)
+    medoids = [int(rng.integers(n))]
+    for _ in range(1, k):
+        d = dist[:, medoids].min(axis=1)
+        total = d.sum()
+        probs = d / total if total > 0 else np.full(n, 1.0 / n)
+        medoids.append(int(rng.choice(n, p=probs)))
+    medoids = np.array(sorted(set(medoids)), dtype=np.int64)
+
+    for _ in range(n_iter):
+        labels = np.argmin(dist[:, medoids], axis=1)
+        new = medoids.copy()
+        for j in range(len(medoids)):
+            members = np.flatnonzero(labels == j)
+            if len(members):
+                new[j] = members[np.argmin(dist[np.ix_(members, members)].sum(axis=1))]
+        new = np.unique(new)
+        if np.array_equal(new, medoids):
+            break
+        medoids = new
+
+    labels = np.argmin(dist[:, medoids], axis=1)
+    weights = np.bincount(labels, minlength=len(medoids)).astype(np.float64)
+    return medoids, weights, labels
+
+
+class ReducedProfile:
+    """
+    Repräsentative Perioden eines (Mehr-)Jahresprofils.
+
+    base:        Leistungsverlauf der Repräsentanten hintereinander (chronologisch nach Medoid), MW
+    medoids:     Periodenindex des Medoids im Basisjahr je Repräsentant
+    weights:     Anzahl vertretener Perioden je Repräsentant (inkl. angebrochener Rest-Periode
+                 und Mehrjahres-Wiederholungen), Summe * period_hours = n_hours_full
+    chronology:  Repräsentant je Periode des Basisjahres
+    """
+
+    def __init__(self, base, period_hours, medoids, weights, chronology, n_hours_full, k_requested=None):
+        self.base = np.ascontiguousarray(base, dtype=np.float64)
+        self.period_hours = int(period_hours)
+        self.medoids = np.asarray(medoids, dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.chronology = np.asarray(chronology, dtype=np.int64)
+        self.n_hours_full = int(n_hours_full)
+        self.k_requested = k_requested
+        if len(self.base) != len(self.medoids) * self.period_hours:
+            raise ValueError("base passt nicht zu medoids x period_hours.")
+
+    @property
+    def k(self) -> int:
+        return len(self.medoids)
+
+    @property
+    def n_base(self) -> int:
+        return len(self.base)
+
+    def __len__(self) -> int:
+        # vertretene Stunden (für KPIs "per_sim" und sim_years_est)
+        return self.n_hours_full
+
+    def __repr__(self) -> str:
+        return (f"ReducedProfile(k={self.k}, period_hours={self.period_hours}, "
+                f"n_base={self.n_base}, n_hours_full={self.n_hours_full})")
+
+    def ship_aligned(self, ship_interval_h: float) -> bool:
+        """Periodenlänge = Vielfaches des Schiffsintervalls -> Schiffsfahrplan bleibt exakt erhalten."""
+        ratio = self.period_hours / float(ship_interval_h)
+        return ratio >= 1.0 - 1e-9 and abs(ratio - round(ratio)) < 1e-9
+
+    @property
+    def hour_weights(self) -> np.ndarray:
+        return np.repeat(self.weights, self.period_hours)
+
+    def sim_sequence(self):
+        """(p_mw, Gewicht je Stunde) für den Screening-Lauf: Einschwingen mit Gewicht 0, dann gewichtet."""
+        p = np.concatenate([self.base, self.base])
+        w = np.concatenate([np.zeros(self.n_base), self.hour_weights])
+        return p, w
+
+    def sum(self) -> float:
+        """Gewichtete Jahres-/Gesamtenergie (MWh) wie df_profile["p_mw"].sum()."""
+        return float(np.dot(self.hour_weights, self.base))
+
+    def expand(self) -> np.ndarray:
+        """Synthetisches Basisjahr: jede Periode durch ihren Repräsentanten ersetzt (volle Chronologie)."""
+        L = self.period_hours
+        reps = self.base.reshape(self.k, L)
+        return reps[self.chronology].reshape(-1)
+
+    def fingerprint_parts(self) -> Dict[str, Any]:
+        """Zusatz zum Profil-Hash (gleiche Repräsentanten, andere Gewichte -> anderer Cache-Eintrag)."""
+        return {"weights": self.weights.tolist(), "period_hours": self.period_hours,
+                "n_hours_full": self.n_hours_full}
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "k": self.k,
+            "period_hours": self.period_hours,
+            "medoids": self.medoids.tolist(),
+            "weights": self.weights.tolist(),
+            "hours_simulated": 2 * self.n_base,
+            "hours_full": self.n_hours_full,
+        }
+
+
+def _base_year(profile):
+    """(p_mw des Basisjahres, Anzahl Wiederholungen) aus DataFrame, RepeatingProfile oder Array."""
+    if isinstance(profile, wind_profile.RepeatingProfile):
+        return np.asarray(profile.base, dtype=np.float64), profile.n_repeats
+    if isinstance(profile, pd.DataFrame):
+        return profile["p_mw"].to_numpy(dtype=np.float64), 1
+    return np.asarray(profile, dtype=np.float64), 1
+
+
+def reduce_profile(profile, k: int = 12, period="day", seed: int = 0) -> ReducedProfile:
+    """
+    Clustert das Basisjahr in k repräsentative Perioden (k-Medoids auf p_mw-Verläufen).
+    Eine angebrochene Rest-Periode am Jahresende wird dem nächstgelegenen Repräsentanten
+    (Abstand über ihre vorhandenen Stunden) mit anteiligem Gewicht zugeschlagen.
+    """
+    p, n_repeats = _base_year(profile)
+    L = period_hours_of(period)
+    n_periods = len(p) // L
+    if n_periods < 1:
+        raise ValueError(f"Profil ({len(p)} h) ist kürzer als eine Periode ({L} h).")
+
+    periods = p[: n_periods * L].reshape(n_periods, L)
+    medoids, weights, labels = cluster_periods(periods, k, seed=seed)
+
+    chronology = labels
+    tail = len(p) - n_periods * L
+    if tail:
+        d = ((periods[medoids, :tail] - p[n_periods * L:][None, :]) ** 2).sum(axis=1)
+        j = int(np.argmin(d))
+        weights[j] += tail / float(L)
+        chronology = np.append(labels, j)
+
+    return ReducedProfile(
+        base=periods[medoids].reshape(-1),
+        period_hours=L,
+        medoids=medoids,
+        weights=weights * n_repeats,
+        chronology=chronology,
+        n_hours_full=len(p) * n_repeats,
+        k_requested=int(k),
+    )
+
+
+def offtake_shortfall_ships(ship_out_t, n_hours_full: int, annual_nh3_t: float, ships_per_year: float):
+    """
+    Schiffs-KPIs des Screening-Laufs aus der stündlichen NH3-Abnahme:
+    (ship_count, ships_failed) mit ships_failed = ceil(Fehlmenge / Schiffsladung).
+    """
+    years = n_hours_full / 8760.0
+    per_ship_t = float(annual_nh3_t) / float(ships_per_year)
+    ship_count = int(round(years * float(ships_per_year)))
+    shortfall_t = np.maximum(0.0, years * float(annual_nh3_t) - np.asarray(ship_out_t, dtype=np.float64))
+    failed = np.minimum(np.ceil(shortfall_t / per_ship_t - 1e-6), ship_count).astype(np.int64)
+    return ship_count, np.maximum(failed, 0)
+
+
+def kpi_error_report(
+    designs,
+    reduced: ReducedProfile,
+    full_profile,
+    kpis: Sequence[str] = REPORT_KPIS,
+) -> Dict[str, Any]:
+    """
+    Simuliert dieselben Konfigurationen (Format von simulate_hourly_system_batch) auf dem
+    reduzierten und dem vollen Profil und liefert relative KPI-Fehler, Übereinstimmung der
+    Machbarkeit (keine Schiffsausfälle) und Laufzeiten.
+    """
+    import Code_Final as cf
+
+    t0 = time.perf_counter()
+    red = cf.simulate_hourly_system_batch(designs, df_profile=reduced)
+    t1 = time.perf_counter()
+    full = cf.simulate_hourly_system_batch(designs, df_profile=full_profile)
+    t2 = time.perf_counter()
+
+    rows = []
+    for col in kpis:
+        ref = full[col].to_numpy(dtype=np.float64)
+        est = red[col].to_numpy(dtype=np.float64)
+        rel = np.abs(est - ref) / np.maximum(np.abs(ref), 1e-9)
+        rows.append({"kpi": col, "mean_abs_rel_error": float(rel.mean()), "max_abs_rel_error": float(rel.max())})
+
+    ok_red = red["ships_failed_count"].to_numpy() == 0
+    ok_full = full["ships_failed_count"].to_numpy() == 0
+    return {
+        **reduced.info(),
+        "n_designs": int(len(full)),
+        "runtime_reduced_s": t1 - t0,
+        "runtime_full_s": t2 - t1,
+        "feasibility_agreement": float(np.mean(ok_red == ok_full)),
+        "false_feasible": int(np.sum(ok_red & ~ok_full)),
+        "kpi_errors": pd.DataFrame(rows).set_index("kpi"),
+    }
+
+
+def choose_k(
+    designs,
+    full_profile,
+    ks: Sequence[int] = (4, 8, 12, 24),
+    period="day",
+    seed: int = 0,
+    kpi: str = "Total_proxy",
+    tol: float = 0.01,
+) -> pd.DataFrame:
+    """
+    Fehlerbericht für mehrere k; Spalte "ok" markiert k mit max. relativem Fehler von kpi <= tol.
+    Das kleinste k mit ok ist der Kandidat fürs Screening.
+    """
+    rows = []
+    for k in ks:
+        reduced = reduce_profile(full_profile, k=k, period=period, seed=seed)
+        rep = kpi_error_report(designs, reduced, full_profile)
+        err = rep["kpi_errors"]
+        rows.append({
+            "k": reduced.k,
+            "period_hours": reduced.period_hours,
+            "hours_simulated": rep["hours_simulated"],
+            "speedup": rep["runtime_full_s"] / max(rep["runtime_reduced_s"], 1e-12),
+            "feasibility_agreement": rep["feasibility_agreement"],
+            "false_feasible": rep["false_feasible"],
+            f"{kpi}_max_rel_error": float(err.loc[kpi, "max_abs_rel_error"]),
+            "worst_kpi": str(err["max_abs_rel_error"].idxmax()),
+            "worst_max_rel_error": float(err["max_abs_rel_error"].max()),
+            "ok": bool(err.loc[kpi, "max_abs_rel_error"] <= tol),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,257 @@
+"""
+Gemeinsame, schreibgeschützte Windprofile für mehrere Prozesse (Pool-Worker, WSGI-Prozesse).
+
+publish(profile) legt ein Profil (df2-DataFrame, wind_profile.RepeatingProfile oder
+profile_reduction.ReducedProfile) einmal als Datei im Registry-Verzeichnis ab
+(Default /dev/shm/wasserstoff-profiles, sonst im Temp-Verzeichnis; PROFILE_REGISTRY_DIR).
+Der Name ergibt sich aus dem Inhalt (eval_cache.profile_fingerprint), gleiche Profile
+landen also nur einmal dort, egal welcher Prozess sie veröffentlicht.
+
+attach(name) mappt die Datei schreibgeschützt (mmap) und baut das Profilobjekt aus
+Sichten auf die Arrays, ohne Kopie; pro Prozess wird jedes Profil nur einmal gemappt.
+
+Dateiformat: MAGIC (8 Byte), Headerlänge (uint64), JSON-Header (kind, meta, arrays mit
+name/dtype/shape/offset), danach die Arrays, je auf ALIGN Byte ausgerichtet.
+
+Lebensdauer: jeder Prozess, der ein Profil veröffentlicht (auch wenn die Datei schon
+existiert), hält darauf eine geteilte Dateisperre (fcntl.flock, LOCK_SH), solange er es
+nutzt. unpublish() und das Beenden des Prozesses geben sie frei; gelöscht wird die Datei
+erst, wenn kein anderer Prozess sie mehr hält (LOCK_EX ohne Warten gelingt). Ohne fcntl
+(Windows) versucht der freigebende Prozess das Löschen; geöffnete Dateien anderer
+Prozesse lässt das Betriebssystem dort ohnehin nicht löschen.
+"""
+
+import atexit
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+import eval_cache
+import profile_reduction
+import wind_profile
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+MAGIC = b"WKPROF01"
+ALIGN = 64
+
+
+def default_registry_dir() -> str:
+    configured = os.environ.get("PROFILE_REGISTRY_DIR")
+    if configured:
+        return configured
+    root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(root, "wasserstoff-profiles")
+
+
+_LOCK = threading.Lock()
+_ATTACHED: Dict[Tuple[str, str], Any] = {}
+# Pfad -> offener Deskriptor mit geteilter Sperre (Profile, die dieser Prozess nutzt)
+_HELD: Dict[str, int] = {}
+
+
+def _pack(profile) -> Tuple[str, Dict[str, np.ndarray], Dict[str, Any]]:
+    """Profilobjekt -> (kind, Arrays, meta)."""
+    if isinstance(profile, profile_reduction.ReducedProfile):
+        arrays = {
+            "base": profile.base,
+            "medoids": profile.medoids,
+            "weights": profile.weights,
+            "chronology": profile.chronology,
+        }
+        meta = {
+            "period_hours": profile.period_hours,
+            "n_hours_full": profile.n_hours_full,
+            "k_requested": profile.k_requested,
+        }
+        return "reduced", arrays, meta
+    if isinstance(profile, wind_profile.RepeatingProfile):
+        arrays = {"base": np.ascontiguousarray(profile.base, dtype=np.float64)}
+        if profile.base_index is not None:
+            arrays["t"] = np.asarray(pd.DatetimeIndex(profile.base_index), dtype="datetime64[ns]")
+        return "repeating", arrays, {"n_repeats": profile.n_repeats}
+    if isinstance(profile, pd.DataFrame):
+        arrays = {"p_mw": profile["p_mw"].to_numpy(dtype=np.float64)}
+        if isinstance(profile.index, pd.DatetimeIndex):
+            arrays["t"] = np.asarray(profile.index, dtype="datetime64[ns]")
+        return "frame", arrays, {}
+    raise TypeError(f"Profiltyp nicht unterstützt: {type(profile).__name__}")
+
+
+def _unpack(kind: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """(kind, Arrays, meta) -> Profilobjekt (Arrays werden nicht kopiert)."""
+    if kind == "reduced":
+        return profile_reduction.ReducedProfile(
+            arrays["base"], meta["period_hours"], arrays["medoids"], arrays["weights"],
+            arrays["chronology"], meta["n_hours_full"], k_requested=meta.get("k_requested"),
+        )
+    if kind == "repeating":
+        base_index = pd.DatetimeIndex(arrays["t"], name="t") if "t" in arrays else None
+        return wind_profile.RepeatingProfile(arrays["base"], meta["n_repeats"], base_index=base_index)
+    if kind == "frame":
+        index = pd.DatetimeIndex(arrays["t"], name="t") if "t" in arrays else None
+        return pd.DataFrame({"p_mw": arrays["p_mw"]}, index=index, copy=False)
+    raise ValueError(f"Unbekannter Profiltyp in der Registry: {kind!r}")
+
+
+def profile_name(profile) -> str:
+    """Registry-Name eines Profils (Typ + Inhalts-Fingerprint)."""
+    kind, _, _ = _pack(profile)
+    return f"{kind}-{eval_cache.profile_fingerprint(profile)}"
+
+
+def _path(name: str, registry_dir: str = None) -> str:
+    return os.path.join(registry_dir or default_registry_dir(), f"{name}.prof")
+
+
+def _write(path: str, kind: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+    specs = []
+    offset = 0
+    for key, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[key] = arr
+        offset = -(-offset // ALIGN) * ALIGN
+        specs.append({"name": key, "dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset})
+        offset += arr.nbytes
+    header = json.dumps({"kind": kind, "meta": meta, "arrays": specs}).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for spec in specs:
+                f.seek(data_start + spec["offset"])
+                f.write(arrays[spec["name"]].tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _hold(path: str) -> bool:
+    """
+    Geteilte Sperre auf path nehmen (falls noch nicht gehalten). False, falls die Datei
+    fehlt oder zwischenzeitlich gelöscht/ersetzt wurde (Sperre dann auf altem Inode).
+    """
+    if path in _HELD:
+        return True
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    if HAS_FCNTL:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        current = None
+    if current is None or current.st_ino != os.fstat(fd).st_ino:
+        os.close(fd)
+        return False
+    _HELD[path] = fd
+    return True
+
+
+def _release(path: str) -> bool:
+    """Eigene Sperre freigeben; Datei löschen, wenn kein anderer Prozess sie hält."""
+    fd = _HELD.pop(path, None)
+    if fd is None:
+        return False
+    try:
+        if HAS_FCNTL:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False  # noch von anderen Prozessen genutzt
+        try:
+            if os.stat(path).st_ino != os.fstat(fd).st_ino:
+                return False
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+    finally:
+        os.close(fd)
+
+
+def publish(profile, registry_dir: str = None) -> str:
+    """
+    Profil in die Registry legen (falls noch nicht vorhanden) und für diesen Prozess
+    halten, bis unpublish() oder Prozessende; Rückgabe: Name für attach().
+    """
+    name = profile_name(profile)
+    path = _path(name, registry_dir)
+    with _LOCK:
+        while not _hold(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            kind, arrays, meta = _pack(profile)
+            _write(path, kind, dict(arrays), meta)
+        # der veröffentlichende Prozess nutzt direkt sein eigenes Objekt
+        _ATTACHED.setdefault((os.path.dirname(path), name), profile)
+    return name
+
+
+def attach(name: str, registry_dir: str = None):
+    """Profil per Name zero-copy einbinden (pro Prozess gemerkt); KeyError, falls unbekannt."""
+    path = _path(name, registry_dir)
+    key = (os.path.dirname(path), name)
+    with _LOCK:
+        hit = _ATTACHED.get(key)
+        if hit is not None:
+            return hit
+        try:
+            with open(path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise KeyError(f"Profil nicht in der Registry: {name}") from None
+        if buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Keine Profil-Registry-Datei: {path}")
+        (header_len,) = struct.unpack_from("<Q", buf, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(buf[header_start:header_start + header_len]).decode("utf-8"))
+        data_start = -(-(header_start + header_len) // ALIGN) * ALIGN
+        arrays = {}
+        for spec in header["arrays"]:
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[spec["name"]] = np.frombuffer(
+                buf, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+        profile = _unpack(header["kind"], arrays, header["meta"])
+        if len(_ATTACHED) > 64:
+            _ATTACHED.clear()
+        _ATTACHED[key] = profile
+        return profile
+
+
+def unpublish(name: str, registry_dir: str = None) -> bool:
+    """
+    Eigene Nutzung beenden; die Datei wird entfernt, wenn kein anderer Prozess sie hält
+    (bestehende Mappings bleiben gültig). True, falls sie gelöscht wurde.
+    """
+    path = _path(name, registry_dir)
+    with _LOCK:
+        _ATTACHED.pop((os.path.dirname(path), name), None)
+        return _release(path)
+
+
+@atexit.register
+def _release_all() -> None:
+    with _LOCK:
+        for path in list(_HELD):
+            _release(path)
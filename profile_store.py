@@ -0,0 +1,221 @@
+"""
+Benannte Windprofile für gurobi_server (POST/GET /profiles, profile_id im Request).
+
+Hochgeladene Quellen (CSV/Excel/Parquet) werden unter <root>/<profile_id>/ abgelegt und
+einmal über wind_profile.load_profile_arrays geparst; dabei entsteht daneben der
+Binär-Cache (.npy), spätere Ladevorgänge lesen nur noch diesen. profile_id ist ein
+Hash aus Dateiinhalt und Parse-Optionen (gleiche Datei -> gleiche ID).
+
+Geladene Profile (df2-Format: DatetimeIndex "t", Spalte p_mw) liegen in einem LRU mit
+Byte-Budget (max_bytes); verdrängte Profile kommen beim nächsten Zugriff aus dem
+.npy-Cache zurück, ohne die Tabelle erneut zu parsen. Das Verzeichnis enthält zusätzlich
+index.json mit den Metadaten, sodass Profile Neustarts und Pool-Worker überdauern.
+Änderungen am Index (add/delete) laufen unter einer Dateisperre (fcntl.flock auf
+index.lock), damit sich mehrere Server-Prozesse mit demselben Verzeichnis keine
+Einträge überschreiben.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+import wind_profile
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+SOURCE_EXTENSIONS = (".csv", ".xlsx", ".xlsm", ".xls", ".parquet")
+
+
+class UnknownProfile(KeyError):
+    """profile_id ist nicht registriert."""
+
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    return int(df["p_mw"].to_numpy().nbytes + df.index.to_numpy().nbytes)
+
+
+class ProfileStore:
+    """Registry hochgeladener Profile mit Byte-begrenztem LRU im Speicher."""
+
+    def __init__(self, root: str, max_bytes: int = 256 * 2**20):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lru: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    # -------------------------
+    # Index (Metadaten auf der Platte)
+    # -------------------------
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _index_locked(self) -> Iterator[None]:
+        """Exklusive Sperre für read-modify-write des Index (Threads und Prozesse)."""
+        with self._lock:
+            if not HAS_FCNTL:
+                yield
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, "index.lock"), "a") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self._index_path()}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self._index_path())
+
+    # -------------------------
+    # Hochladen / Laden
+    # -------------------------
+    def add(
+        self,
+        filename: str,
+        data: bytes,
+        name: Optional[str] = None,
+        time_col: Optional[str] = None,
+        power_col: Optional[str] = None,
+        power_to_mw: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Quelle ablegen, parsen (inkl. .npy-Cache) und registrieren -> Metadaten.
+        ValueError bei unbekannter Endung oder leerem Profil, KeyError bei fehlenden Spalten.
+        """
+        ext = os.path.splitext(filename or "")[1].lower()
+        if ext not in SOURCE_EXTENSIONS:
+            raise ValueError(f"Nicht unterstütztes Profilformat {ext or '(ohne Endung)'!r} "
+                             f"(erlaubt: {', '.join(SOURCE_EXTENSIONS)})")
+        parse = {"time_col": time_col, "power_col": power_col,
+                 "power_to_mw": None if power_to_mw is None else float(power_to_mw)}
+        h = hashlib.sha256(data)
+        h.update(json.dumps(parse, sort_keys=True).encode("utf-8"))
+        profile_id = h.hexdigest()[:16]
+
+        with self._index_locked():
+            index = self._read_index()
+            if profile_id in index:
+                return index[profile_id]
+
+            folder = os.path.join(self.root, profile_id)
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, "source" + ext)
+            with open(path, "wb") as f:
+                f.write(data)
+            try:
+                t, p_mw = wind_profile.load_profile_arrays(path, mmap=False, **parse)
+                if len(p_mw) == 0:
+                    raise ValueError("Profil enthält keine Stunden.")
+            except Exception:
+                shutil.rmtree(folder, ignore_errors=True)
+                raise
+
+            df = pd.DataFrame({"p_mw": p_mw}, index=pd.DatetimeIndex(t, name="t"), copy=False)
+            meta = {
+                "profile_id": profile_id,
+                "name": name or os.path.splitext(os.path.basename(filename))[0],
+                "filename": os.path.basename(filename),
+                "source": os.path.relpath(path, self.root),
+                "parse": parse,
+                "n_hours": int(len(df)),
+                "start": str(df.index[0]),
+                "end": str(df.index[-1]),
+                "annual_mwh": float(p_mw.sum()) * 8760.0 / len(p_mw),
+                "mean_mw": float(p_mw.mean()),
+                "nbytes": _frame_nbytes(df),
+            }
+            index[profile_id] = meta
+            self._write_index(index)
+            self._put(profile_id, df)
+        return meta
+
+    def _put(self, profile_id: str, df: pd.DataFrame) -> None:
+        # nur mit gehaltenem self._lock aufrufen
+        if profile_id in self._lru:
+            self._bytes -= _frame_nbytes(self._lru.pop(profile_id))
+        self._lru[profile_id] = df
+        self._bytes += _frame_nbytes(df)
+        while self._bytes > self.max_bytes and len(self._lru) > 1:
+            _, old = self._lru.popitem(last=False)
+            self._bytes -= _frame_nbytes(old)
+            self.evictions += 1
+
+    def get(self, profile_id: str) -> pd.DataFrame:
+        """Profil im df2-Format; aus dem LRU oder dem .npy-Cache (UnknownProfile, falls unbekannt)."""
+        with self._lock:
+            df = self._lru.get(profile_id)
+            if df is not None:
+                self._lru.move_to_end(profile_id)
+                self.hits += 1
+                return df
+            meta = self._read_index().get(profile_id)
+            if meta is None:
+                raise UnknownProfile(profile_id)
+            t, p_mw = wind_profile.load_profile_arrays(
+                os.path.join(self.root, meta["source"]), mmap=False, **meta["parse"]
+            )
+            df = pd.DataFrame({"p_mw": p_mw}, index=pd.DatetimeIndex(t, name="t"), copy=False)
+            self.loads += 1
+            self._put(profile_id, df)
+            return df
+
+    def meta(self, profile_id: str) -> Dict[str, Any]:
+        meta = self._read_index().get(profile_id)
+        if meta is None:
+            raise UnknownProfile(profile_id)
+        return dict(meta, loaded=profile_id in self._lru)
+
+    def list(self) -> List[Dict[str, Any]]:
+        index = self._read_index()
+        with self._lock:
+            return [dict(m, loaded=pid in self._lru) for pid, m in index.items()]
+
+    def delete(self, profile_id: str) -> bool:
+        with self._index_locked():
+            index = self._read_index()
+            if profile_id not in index:
+                return False
+            del index[profile_id]
+            self._write_index(index)
+            if profile_id in self._lru:
+                self._bytes -= _frame_nbytes(self._lru.pop(profile_id))
+            shutil.rmtree(os.path.join(self.root, profile_id), ignore_errors=True)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": len(self._lru),
+                "bytes": int(self._bytes),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
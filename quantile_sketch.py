@@ -0,0 +1,120 @@
+"""
+Quantil-Sketch für viele Slots gleichzeitig (z.B. 8760 Stunden des Jahres, profile_builder).
+
+SlotQuantileSketch ist ein KLL-artiger Kompaktor-Stapel, vektorisiert über alle Slots:
+Ebene h hält je Slot bis zu k Werte mit Gewicht 2**h. Ist eine Ebene eines Slots voll,
+wird sie sortiert und jeder zweite Wert (zufälliger Versatz) mit doppeltem Gewicht in
+die nächste Ebene geschoben. Solange ein Slot höchstens k Werte gesehen hat, sind die
+Quantile exakt (wie np.quantile(..., method="inverted_cdf")); darüber wächst der
+Speicher nur logarithmisch (eine Ebene je Verdopplung über k), der Rangfehler liegt
+in der Größenordnung log2(n/k)/k.
+
+Vereinfachung gegenüber KLL: alle Ebenen haben dieselbe Kapazität k.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+class SlotQuantileSketch:
+    """Streaming-Quantile je Slot; update(slots, values) beliebig oft, dann quantiles()."""
+
+    def __init__(self, n_slots: int, k: int = 128, seed: int = 0):
+        if k < 2 or k % 2:
+            raise ValueError("k muss gerade und >= 2 sein.")
+        self.n_slots = int(n_slots)
+        self.k = int(k)
+        self.count = np.zeros(self.n_slots, dtype=np.int64)
+        self._levels: List[np.ndarray] = []
+        self._fill: List[np.ndarray] = []
+        self._rng = np.random.default_rng(seed)
+        self._add_level()
+
+    def _add_level(self) -> None:
+        self._levels.append(np.empty((self.n_slots, self.k)))
+        self._fill.append(np.zeros(self.n_slots, dtype=np.int64))
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(buf.nbytes + fill.nbytes for buf, fill in zip(self._levels, self._fill)))
+
+    def update(self, slots: np.ndarray, values: np.ndarray) -> None:
+        """Werte einrechnen; slots[i] in 0..n_slots-1, NaN-Werte vorher entfernen."""
+        slots = np.asarray(slots, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(slots) == 0:
+            return
+        np.add.at(self.count, slots, 1)
+
+        # Runden bilden: in jeder Runde höchstens ein Wert je Slot
+        order = np.argsort(slots, kind="stable")
+        s, v = slots[order], values[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(s)) + 1]
+        rank = np.arange(len(s)) - np.repeat(starts, np.diff(np.r_[starts, len(s)]))
+        by_round = np.argsort(rank, kind="stable")
+        bounds = np.searchsorted(rank[by_round], np.arange(rank.max() + 2))
+        for r in range(len(bounds) - 1):
+            sel = by_round[bounds[r]:bounds[r + 1]]
+            self._push_one(s[sel], v[sel])
+
+    def _push_one(self, rows: np.ndarray, vals: np.ndarray) -> None:
+        # Ebene 0: je Slot (rows eindeutig) ein Wert
+        buf, fill = self._levels[0], self._fill[0]
+        buf[rows, fill[rows]] = vals
+        fill[rows] += 1
+        full = rows[fill[rows] == self.k]
+        if len(full):
+            self._compact(0, full)
+
+    def _compact(self, level: int, rows: np.ndarray) -> None:
+        half = self.k // 2
+        data = np.sort(self._levels[level][rows], axis=1)
+        offset = self._rng.integers(0, 2, size=len(rows))
+        kept = np.take_along_axis(data, offset[:, None] + 2 * np.arange(half)[None, :], axis=1)
+        self._fill[level][rows] = 0
+
+        if level + 1 == len(self._levels):
+            self._add_level()
+        buf, fill = self._levels[level + 1], self._fill[level + 1]
+        # Füllstand höherer Ebenen ist immer 0 oder k/2
+        buf[rows[:, None], fill[rows][:, None] + np.arange(half)[None, :]] = kept
+        fill[rows] += half
+        full = rows[fill[rows] == self.k]
+        if len(full):
+            self._compact(level + 1, full)
+
+    def quantiles(self, qs: Sequence[float], block: int = 1024) -> np.ndarray:
+        """
+        Quantile qs (Anteile 0..1) je Slot -> Array (len(qs), n_slots); kleinster Wert x
+        mit F(x) >= q. Slots ohne Werte -> NaN. Ausgewertet in Blöcken von block Slots.
+        """
+        for q in qs:
+            if not 0.0 <= q <= 1.0:
+                raise ValueError(f"Quantil {q} nicht in [0, 1].")
+        out = np.empty((len(qs), self.n_slots))
+        for start in range(0, self.n_slots, block):
+            rows = slice(start, min(start + block, self.n_slots))
+            out[:, rows] = self._block_quantiles(qs, rows)
+        return out
+
+    def _block_quantiles(self, qs: Sequence[float], rows: slice) -> np.ndarray:
+        vals = np.concatenate([buf[rows] for buf in self._levels], axis=1)
+        pos = np.arange(self.k)
+        weights = np.concatenate(
+            [np.where(pos[None, :] < fill[rows, None], float(2 ** h), 0.0) for h, fill in enumerate(self._fill)],
+            axis=1,
+        )
+        vals = np.where(weights > 0, vals, np.inf)
+        order = np.argsort(vals, axis=1, kind="stable")
+        vals = np.take_along_axis(vals, order, axis=1)
+        cum = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+        total = cum[:, -1]
+
+        out = np.empty((len(qs), len(vals)))
+        for i, q in enumerate(qs):
+            # Toleranz gegen Rundung von q * total (z.B. 0.3 * 10)
+            target = q * total * (1.0 - 1e-12)
+            idx = np.minimum((cum < target[:, None]).sum(axis=1), vals.shape[1] - 1)
+            out[i] = np.where(total > 0, vals[np.arange(len(vals)), idx], np.nan)
+        return out
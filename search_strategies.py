@@ -0,0 +1,530 @@
+"""
+Suchstrategien für die Gitteroptimierung (/optimize_gurobi).
+
+Alle Strategien arbeiten auf demselben Gitter wie generate_candidate_grid (Lattice mit
+den Achsen s, pel, h2_days, nh3_ships, water_tank), bewerten aber nur die Kandidaten,
+die sie tatsächlich brauchen. Bewertet wird über eine Funktion
+
+    evaluate(candidates) -> [(cost, feasible, tech), ...]
+
+(im Server evaluate_candidates, also mit Batch-Simulation, Cache und Prozess-Pool).
+Unzulässige Kandidaten (Schiffsausfälle) tragen dort Strafkosten 1e6 + 1e5 * Ausfälle;
+die Suche minimiert diese Kosten direkt und wird so zu weniger Ausfällen gelenkt.
+
+Strategien (STRATEGIES):
+- "grid":        vollständiges Gitter (bisheriges Verhalten)
+- "refine":      grobes Teilgitter, dann Verfeinerung um die besten Kandidaten
+                 (Schrittweite je Runde halbiert, bis zu den direkten Gitternachbarn)
+- "pattern":     Kompass-/Pattern-Search auf den Gitterindizes, Start im groben Teilgitter
+- "nelder_mead": Nelder-Mead-Simplex in Index-Koordinaten (auf das Gitter gerundet)
+- "surrogate":   kubisches RBF-Surrogat über log(Kosten); je Runde werden die Punkte mit
+                 der besten Vorhersage abzüglich Abstandsbonus bewertet
+- "frontier":    vollständiges Gitter mit Dominanz-Pruning: bei festem s wird die Machbarkeit
+                 als monoton in pel, h2_days, nh3_ships, water_tank angenommen (größer ->
+                 nie mehr Schiffsausfälle). Gesucht wird nur die Machbarkeitsgrenze;
+                 Kandidaten unter einem unzulässigen Punkt werden nicht simuliert. Achsen,
+                 die der Annahme widersprechen, werden verworfen (siehe search_frontier)
+Nelder-Mead und Surrogat enden mit einer Pattern-Search ab den drei besten Punkten
+(die Kostenfläche hat kleine Wellen, z.B. entlang s).
+"""
+
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# (Entscheidungsname, Präfix in den Grid-Bounds)
+DECISION_AXES = (
+    ("s", "s"),
+    ("pel", "pel"),
+    ("h2_days", "h2"),
+    ("nh3_ships", "nh3"),
+    ("water_tank", "water"),
+)
+
+# Achsen, in denen die Machbarkeit bei festem s monoton steigt (Dominanz-Pruning)
+MONOTONE_AXES = ("pel", "h2_days", "nh3_ships", "water_tank")
+
+
+def axis_values(start: float, stop: float, step: float) -> np.ndarray:
+    """Achsenwerte wie generate_candidate_grid (x += step), damit die Kandidaten bitgleich sind."""
+    if step <= 0:
+        return np.array([float(start)])
+    out = []
+    x = start
+    while x <= stop + 1e-9:
+        out.append(float(x))
+        x += step
+    return np.array(out, dtype=np.float64)
+
+
+def _sub_axis(n: int, stride: int) -> List[int]:
+    """Indizes 0, stride, 2*stride, ... inkl. letztem Index."""
+    idx = list(range(0, n, stride))
+    if idx[-1] != n - 1:
+        idx.append(n - 1)
+    return idx
+
+
+class Lattice:
+    """Kandidatengitter; Punkte werden als Index-Tupel (i_s, i_pel, i_h2, i_nh3, i_water) geführt."""
+
+    def __init__(self, axes: Dict[str, Sequence[float]]):
+        self.names = [name for name, _ in DECISION_AXES]
+        self.axes = [np.asarray(axes[name], dtype=np.float64) for name in self.names]
+        self.shape = tuple(len(a) for a in self.axes)
+
+    @classmethod
+    def from_bounds(cls, bounds: Dict[str, float]) -> "Lattice":
+        return cls({
+            name: axis_values(bounds[f"{key}_min"], bounds[f"{key}_max"], bounds[f"{key}_step"])
+            for name, key in DECISION_AXES
+        })
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def candidate(self, idx: Tuple[int, ...]) -> Dict[str, float]:
+        return {name: float(ax[i]) for name, ax, i in zip(self.names, self.axes, idx)}
+
+    def clip(self, x) -> Tuple[int, ...]:
+        """Beliebige (auch nicht-ganzzahlige) Index-Koordinaten auf den nächsten Gitterpunkt."""
+        x = np.rint(np.asarray(x, dtype=np.float64)).astype(np.int64)
+        return tuple(int(v) for v in np.clip(x, 0, np.array(self.shape) - 1))
+
+    def nearest(self, candidate: Dict[str, float]) -> Tuple[int, ...]:
+        """Gitterpunkt, der einer freien Auslegung (z.B. aus dem MILP) am nächsten liegt."""
+        return tuple(int(np.argmin(np.abs(ax - float(candidate[name])))) for name, ax in zip(self.names, self.axes))
+
+    def all_indices(self) -> np.ndarray:
+        """(size, 5)-Array aller Gitterindizes in generate_candidate_grid-Reihenfolge."""
+        return np.indices(self.shape).reshape(len(self.shape), -1).T
+
+    def coarse_strides(self, points_per_axis: int = 3) -> List[int]:
+        """Zweierpotenz-Schrittweiten, sodass jede Achse grob ca. points_per_axis Punkte hat."""
+        strides = []
+        for n in self.shape:
+            target = max(1.0, (n - 1) / max(points_per_axis - 1, 1))
+            stride = 1
+            while stride * 2 <= target:
+                stride *= 2
+            strides.append(stride)
+        return strides
+
+    def sub_lattice(self, strides: Sequence[int]) -> List[Tuple[int, ...]]:
+        return list(itertools.product(*(_sub_axis(n, st) for n, st in zip(self.shape, strides))))
+
+    def normalized(self, idx) -> np.ndarray:
+        """Index-Koordinaten auf [0, 1] je Achse (Achsen mit nur einem Wert -> 0)."""
+        scale = np.maximum(np.array(self.shape, dtype=np.float64) - 1.0, 1.0)
+        return np.asarray(idx, dtype=np.float64) / scale
+
+
+class SearchState:
+    """Bewertete Gitterpunkte (memoisiert) und Budget einer Suche."""
+
+    def __init__(
+        self,
+        lattice: Lattice,
+        evaluate: Callable[[List[Dict[str, float]]], List[Tuple[float, bool, Optional[str]]]],
+        max_evals: Optional[int] = None,
+    ):
+        self.lattice = lattice
+        self._evaluate = evaluate
+        self.max_evals = int(max_evals) if max_evals else None
+        self.results: Dict[Tuple[int, ...], Tuple[float, bool, Optional[str]]] = {}
+        self.iterations = 0
+        self.stats: Dict[str, Any] = {}
+
+    @property
+    def n_evals(self) -> int:
+        return len(self.results)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_evals is not None and self.n_evals >= self.max_evals
+
+    def evaluate(self, points: Sequence[Tuple[int, ...]]) -> List[float]:
+        """Kosten der Punkte; neue Punkte werden gemeinsam bewertet. Ohne Budget -> inf."""
+        new = list(dict.fromkeys(p for p in points if p not in self.results))
+        if self.max_evals is not None:
+            new = new[: max(0, self.max_evals - self.n_evals)]
+        if new:
+            for p, r in zip(new, self._evaluate([self.lattice.candidate(p) for p in new])):
+                self.results[p] = (float(r[0]), bool(r[1]), r[2])
+        return [self.results[p][0] if p in self.results else float("inf") for p in points]
+
+    def cost(self, point: Tuple[int, ...]) -> float:
+        return self.evaluate([point])[0]
+
+    def best(self, k: int = 1) -> List[Tuple[int, ...]]:
+        # stabile Sortierung -> bei Gleichstand gewinnt der zuerst bewertete Punkt
+        return [p for p, _ in sorted(self.results.items(), key=lambda kv: kv[1][0])[:k]]
+
+
+# -----------------------------
+# Strategien
+# -----------------------------
+def search_grid(state: SearchState, **_opts) -> None:
+    state.evaluate([tuple(int(i) for i in row) for row in state.lattice.all_indices()])
+    state.iterations = 1
+
+
+def search_refine(state: SearchState, points_per_axis: int = 3, top_k: int = 2, **_opts) -> None:
+    lattice = state.lattice
+    strides = lattice.coarse_strides(points_per_axis)
+    state.evaluate(lattice.sub_lattice(strides))
+
+    incumbents = None
+    while not state.exhausted:
+        state.iterations += 1
+        strides = [max(1, st // 2) for st in strides]
+        current = state.best(top_k)
+        if incumbents == current and all(st == 1 for st in strides):
+            break
+        incumbents = current
+        for center in current:
+            box = itertools.product(*(
+                sorted({max(c - st, 0), c, min(c + st, n - 1)})
+                for c, st, n in zip(center, strides, lattice.shape)
+            ))
+            state.evaluate(list(box))
+
+
+def search_pattern(
+    state: SearchState,
+    start: Optional[Tuple[int, ...]] = None,
+    steps: Optional[Sequence[int]] = None,
+    points_per_axis: int = 2,
+    **_opts,
+) -> None:
+    lattice = state.lattice
+    if start is None:
+        strides = lattice.coarse_strides(points_per_axis)
+        state.evaluate(lattice.sub_lattice(strides))
+        start = state.best(1)[0]
+        steps = [max(1, st // 2) for st in strides]
+    steps = np.array(steps if steps is not None else [1] * len(lattice.shape), dtype=np.int64)
+
+    x = tuple(start)
+    fx = state.cost(x)
+    while not state.exhausted:
+        state.iterations += 1
+        polls = []
+        for d in range(len(x)):
+            for sign in (-1, 1):
+                y = list(x)
+                y[d] = min(max(x[d] + sign * int(steps[d]), 0), lattice.shape[d] - 1)
+                if tuple(y) != x:
+                    polls.append(tuple(y))
+        costs = state.evaluate(polls)
+        if polls and min(costs) < fx:
+            prev, x = x, polls[int(np.argmin(costs))]
+            fx = min(costs)
+            # Pattern-Schritt: erfolgreiche Richtung einmal weitergehen
+            ext = lattice.clip(2 * np.array(x) - np.array(prev))
+            f_ext = state.cost(ext)
+            if f_ext < fx:
+                x, fx = ext, f_ext
+        elif np.all(steps == 1):
+            break
+        else:
+            steps = np.maximum(steps // 2, 1)
+
+
+def _polish(state: SearchState, top_k: int = 3, points_per_axis: int = 3) -> None:
+    """Pattern-Search ab den top_k besten Punkten (Startschritt: grobe Schrittweite)."""
+    steps = state.lattice.coarse_strides(points_per_axis)
+    for start in state.best(top_k):
+        if state.exhausted:
+            break
+        search_pattern(state, start=start, steps=steps)
+
+
+def search_nelder_mead(
+    state: SearchState,
+    max_iter: int = 200,
+    points_per_axis: int = 2,
+    **_opts,
+) -> None:
+    lattice = state.lattice
+    strides = lattice.coarse_strides(points_per_axis)
+    state.evaluate(lattice.sub_lattice(strides))
+    x0 = np.array(state.best(1)[0], dtype=np.float64)
+
+    active = [d for d, n in enumerate(lattice.shape) if n > 1]
+    if active:
+        # Startsimplex: je aktiver Achse eine halbe grobe Schrittweite Richtung Gitterinneres
+        simplex = [x0]
+        for d in active:
+            v = x0.copy()
+            step = max(1.0, strides[d] / 2.0)
+            v[d] += step if v[d] + step <= lattice.shape[d] - 1 else -step
+            simplex.append(v)
+        simplex = np.array(simplex)
+        f = np.array([state.cost(lattice.clip(v)) for v in simplex])
+
+        for _ in range(int(max_iter)):
+            if state.exhausted:
+                break
+            state.iterations += 1
+            order = np.argsort(f, kind="stable")
+            simplex, f = simplex[order], f[order]
+            if len({lattice.clip(v) for v in simplex}) == 1:
+                break
+
+            centroid = simplex[:-1].mean(axis=0)
+            xr = centroid + (centroid - simplex[-1])
+            fr = state.cost(lattice.clip(xr))
+            if fr < f[0]:
+                xe = centroid + 2.0 * (centroid - simplex[-1])
+                fe = state.cost(lattice.clip(xe))
+                simplex[-1], f[-1] = (xe, fe) if fe < fr else (xr, fr)
+            elif fr < f[-2]:
+                simplex[-1], f[-1] = xr, fr
+            else:
+                xc = centroid + 0.5 * (simplex[-1] - centroid)
+                fc = state.cost(lattice.clip(xc))
+                if fc < f[-1]:
+                    simplex[-1], f[-1] = xc, fc
+                else:
+                    simplex[1:] = simplex[0] + 0.5 * (simplex[1:] - simplex[0])
+                    f[1:] = [state.cost(lattice.clip(v)) for v in simplex[1:]]
+
+    _polish(state)
+
+
+def _fit_rbf(X: np.ndarray, y: np.ndarray):
+    """Kubisches RBF mit linearem Anteil; liefert predict(Z)."""
+    n, d = X.shape
+    phi = np.linalg.norm(X[:, None, :] - X[None, :, :], axis=2) ** 3
+    P = np.hstack([np.ones((n, 1)), X])
+    A = np.zeros((n + d + 1, n + d + 1))
+    A[:n, :n] = phi
+    A[:n, n:] = P
+    A[n:, :n] = P.T
+    rhs = np.concatenate([y, np.zeros(d + 1)])
+    coef = np.linalg.lstsq(A, rhs, rcond=None)[0]
+    w, c = coef[:n], coef[n:]
+
+    def predict(Z: np.ndarray) -> np.ndarray:
+        out = np.empty(len(Z))
+        for a in range(0, len(Z), 4096):
+            z = Z[a:a + 4096]
+            r = np.linalg.norm(z[:, None, :] - X[None, :, :], axis=2)
+            out[a:a + 4096] = (r ** 3) @ w + c[0] + z @ c[1:]
+        return out
+
+    return predict
+
+
+def search_surrogate(
+    state: SearchState,
+    batch: int = 8,
+    max_iter: int = 30,
+    patience: int = 3,
+    max_pool: int = 50_000,
+    seed: int = 0,
+    points_per_axis: int = 2,
+    **_opts,
+) -> None:
+    lattice = state.lattice
+    rng = np.random.default_rng(seed)
+    state.evaluate(lattice.sub_lattice(lattice.coarse_strides(points_per_axis)))
+
+    all_idx = lattice.all_indices()
+    best_cost = min(r[0] for r in state.results.values())
+    stall = 0
+    for it in range(int(max_iter)):
+        if state.exhausted or len(state.results) >= lattice.size:
+            break
+        state.iterations += 1
+
+        points = list(state.results)
+        X = lattice.normalized(points)
+        y = np.log(np.maximum([state.results[p][0] for p in points], 1e-9))
+        feasible = np.array([state.results[p][1] for p in points])
+        if feasible.any():
+            # Strafkosten-Klippe kappen, sonst schwingt das Surrogat im zulässigen Bereich
+            y = np.minimum(y, y[feasible].max() + 1.0)
+        predict = _fit_rbf(X, y)
+
+        seen = set(points)
+        pool = np.array([row for row in all_idx if tuple(int(i) for i in row) not in seen])
+        if len(pool) > max_pool:
+            pool = pool[rng.choice(len(pool), max_pool, replace=False)]
+        Z = lattice.normalized(pool)
+        pred = predict(Z)
+        dist = np.min(np.linalg.norm(Z[:, None, :] - X[None, :, :], axis=2), axis=1)
+        kappa = float(np.std(y)) * max(0.0, 1.0 - it / max(int(max_iter) - 1, 1))
+
+        picks = []
+        for _ in range(min(int(batch), len(pool))):
+            k = int(np.argmin(pred - kappa * dist))
+            picks.append(tuple(int(i) for i in pool[k]))
+            pred[k] = np.inf
+            dist = np.minimum(dist, np.linalg.norm(Z - Z[k], axis=1))
+        costs = state.evaluate(picks)
+
+        if min(costs) < best_cost:
+            best_cost, stall = min(costs), 0
+        else:
+            stall += 1
+            if stall >= patience:
+                break
+
+    _polish(state)
+
+
+def _dominance_closure(feasible: np.ndarray, infeasible: np.ndarray, axes: Sequence[int]):
+    """
+    Hülle bekannter Punkte in der Produktordnung der monotonen Achsen: alles oberhalb eines
+    zulässigen Punkts ist zulässig, alles unterhalb eines unzulässigen unzulässig.
+    """
+    up, down = feasible.copy(), infeasible.copy()
+    for d in axes:
+        up = np.logical_or.accumulate(up, axis=d)
+        down = np.flip(np.logical_or.accumulate(np.flip(down, axis=d), axis=d), axis=d)
+    return up, down
+
+
+def _known_feasibility(state: SearchState):
+    feasible = np.zeros(state.lattice.shape, dtype=bool)
+    infeasible = np.zeros(state.lattice.shape, dtype=bool)
+    for p, r in state.results.items():
+        (feasible if r[1] else infeasible)[p] = True
+    return feasible, infeasible
+
+
+def _violating_axes(state: SearchState, axes: Sequence[int]) -> List[int]:
+    """Achsen, entlang derer ein bewerteter zulässiger Punkt unter einem unzulässigen liegt."""
+    feasible, infeasible = _known_feasibility(state)
+    no_info = np.zeros(state.lattice.shape, dtype=bool)
+    return [d for d in axes if (_dominance_closure(feasible, no_info, [d])[0] & infeasible).any()]
+
+
+def search_frontier(state: SearchState, axes: Sequence[str] = MONOTONE_AXES, verify=0, seed=0, **_opts) -> None:
+    """
+    Dominanz-Pruning: Bisektion entlang der längsten monotonen Achse, alle Linien (übrige
+    Achsen fest) je Runde gemeinsam, bis die Machbarkeit jedes Gitterpunkts über
+    _dominance_closure bekannt ist. Danach werden alle zulässigen Punkte bewertet (die
+    Kosten brauchen ihre KPIs); unzulässige unterhalb der Grenze werden übersprungen.
+
+    Die Monotonie ist eine Annahme über die Fahrweise: widerspricht ihr eine Achse bei den
+    bewerteten Punkten (zulässiger Punkt unter einem unzulässigen), wird sie sofort
+    verworfen und die Grenze mit den übrigen Achsen weitergesucht (ohne Achsen = volles
+    Gitter). Mit der Regel-Fahrweise aus Code_Final hält sie i.d.R. nur für nh3_ships;
+    axes=["nh3_ships"] spart dann die Runden, in denen die übrigen Achsen verworfen werden.
+
+    verify: Stichprobe der übersprungenen Punkte, die trotzdem bewertet wird (Anzahl oder
+    Anteil < 1); state.stats["violations_verified"] zählt die zulässigen darunter.
+    """
+    lattice = state.lattice
+    shape = lattice.shape
+    active = [lattice.names.index(name) for name in axes]
+    dropped: List[str] = []
+
+    def drop_violating() -> bool:
+        nonlocal active
+        bad = _violating_axes(state, active)
+        dropped.extend(lattice.names[d] for d in bad)
+        active = [d for d in active if d not in bad]
+        return bool(bad)
+
+    while not state.exhausted:
+        if not active:
+            state.iterations += 1
+            state.evaluate([tuple(int(i) for i in row) for row in lattice.all_indices()])
+            break
+        b = max(active, key=lambda d: shape[d])
+        up, down = _dominance_closure(*_known_feasibility(state), active)
+        unknown = np.moveaxis(~(up | down), b, -1)
+        lines = np.argwhere(unknown.any(axis=-1))
+        if not len(lines):
+            # Grenze bekannt: zulässige Punkte bewerten (Kosten), dabei Annahme erneut prüfen
+            state.evaluate([tuple(int(i) for i in p) for p in np.argwhere(up)])
+            if not drop_violating():
+                break
+            continue
+        state.iterations += 1
+        # unbekannter Abschnitt je Linie ist zusammenhängend -> mittleren Punkt bewerten
+        first = np.argmax(unknown, axis=-1)
+        last = unknown.shape[-1] - 1 - np.argmax(unknown[..., ::-1], axis=-1)
+        state.evaluate([
+            tuple(int(i) for i in np.insert(line, b, (first[tuple(line)] + last[tuple(line)]) // 2))
+            for line in lines
+        ])
+        drop_violating()
+
+    feasible, infeasible = _known_feasibility(state)
+    skipped = np.argwhere(~(feasible | infeasible))
+    checked: List[Tuple[int, ...]] = []
+    n_verify = int(round(verify * len(skipped))) if 0 < verify < 1 else int(verify)
+    if n_verify > 0 and len(skipped):
+        rng = np.random.default_rng(seed)
+        sample = skipped[rng.choice(len(skipped), min(n_verify, len(skipped)), replace=False)]
+        checked = [tuple(int(i) for i in p) for p in sample]
+        state.evaluate(checked)
+
+    state.stats = {
+        "monotone_axes": [lattice.names[d] for d in active],
+        "dropped_axes": dropped,
+        "skipped": int(lattice.size - state.n_evals),
+        "verified_skipped": len(checked),
+        "violations_verified": int(sum(state.results[p][1] for p in checked if p in state.results)),
+    }
+
+
+STRATEGIES: Dict[str, Callable[..., None]] = {
+    "grid": search_grid,
+    "refine": search_refine,
+    "pattern": search_pattern,
+    "nelder_mead": search_nelder_mead,
+    "surrogate": search_surrogate,
+    "frontier": search_frontier,
+}
+
+
+def parse_search_options(spec) -> Dict[str, Any]:
+    """Request-Angabe ("refine" oder {"strategy": "refine", "max_evals": 500, ...}) -> Optionen."""
+    if spec is None:
+        spec = {}
+    if isinstance(spec, str):
+        spec = {"strategy": spec}
+    opts = dict(spec)
+    opts["strategy"] = str(opts.get("strategy") or "grid").lower()
+    if opts["strategy"] not in STRATEGIES:
+        raise ValueError(f"Unbekannte Suchstrategie '{opts['strategy']}'. Erlaubt: {sorted(STRATEGIES)}")
+    return opts
+
+
+def run_search(
+    lattice: Lattice,
+    evaluate: Callable[[List[Dict[str, float]]], List[Tuple[float, bool, Optional[str]]]],
+    strategy: str = "grid",
+    max_evals: Optional[int] = None,
+    **opts,
+) -> Dict[str, Any]:
+    """
+    Führt eine Strategie aus und liefert alle bewerteten Kandidaten (in Bewertungsreihenfolge)
+    mit Kosten, Machbarkeit und Technologie sowie die Zahl der Bewertungen
+    (bei "frontier" zusätzlich "pruning" mit übersprungenen Kandidaten).
+    """
+    state = SearchState(lattice, evaluate, max_evals=max_evals)
+    STRATEGIES[strategy](state, **opts)
+    points = list(state.results)
+    out = {
+        "strategy": strategy,
+        "candidates": [lattice.candidate(p) for p in points],
+        "costs": [state.results[p][0] for p in points],
+        "feasible": [state.results[p][1] for p in points],
+        "techs": [state.results[p][2] for p in points],
+        "evaluations": state.n_evals,
+        "iterations": state.iterations,
+        "grid_size": lattice.size,
+    }
+    if state.stats:
+        out["pruning"] = state.stats
+    return out
@@ -0,0 +1,651 @@
+"""
+Flacher Zustandsautomat für simulate_hourly_system (engine="kernel").
+
+Der Kernel bildet die stündliche Fahrweise aus Code_Final.simulate_hourly_system
+1:1 nach (gleiche Reihenfolge der Rechenoperationen), arbeitet aber nur auf
+zusammenhängenden float64-Arrays:
+
+- prm:  Parameter (Indizes P_*), werden einmal pro Simulation gepackt
+- st:   Zustände (Indizes ST_*), werden in-place fortgeschrieben
+- acc:  KPI-Summen/Maxima (Indizes A_*), werden in-place aufsummiert
+- ts:   optionale Zeitreihen-Spalten (TS_COLUMNS x Stunden)
+
+Mit numba wird der Kernel JIT-kompiliert, ohne numba läuft dieselbe Funktion
+als enge Python-Schleife (ohne Closures und Tupel-Rückgaben).
+"""
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+# -----------------------------
+# Parameter-Indizes (prm)
+# -----------------------------
+P_S = 0
+P_EL_MAX = 1
+P_EL_MIN = 2
+P_EL_STEP = 3
+P_H2_KG_PER_MWH = 4
+P_ETA_IN = 5
+P_ETA_OUT = 6
+P_H2_LOSS_FRAC = 7
+P_H2_SPEC_IN = 8
+P_H2_RELIQ_KWH = 9
+P_H2_RELIQ_FRAC = 10
+P_H2_STORAGE_KG_MAX = 11
+P_H2_EL_STOP_KG = 12
+P_H2_EL_START_KG = 13
+P_WATER_KG_PER_KGH2 = 14
+P_RO_SPEC_KWH_PER_M3 = 15
+P_WATER_LOSS_FRAC = 16
+P_WATER_TANK_M3_MAX = 17
+P_HB_SPEC_KWH_PER_KG = 18
+P_N2_SPEC_KWH_PER_KG = 19
+P_H2_SPEC_OUT = 20
+P_NH3_SPEC_IN = 21
+P_NH3_SPEC_OUT = 22
+P_NH3_COOLING_KWH = 23
+P_HB_CAP_T_PER_H = 24
+P_HB_MIN_FRAC = 25
+P_HB_STEP = 26
+P_NH3_STORAGE_T_MAX = 27
+P_NH3_SOC_TARGET_T = 28
+P_NH3_SOC_HIGH_T = 29
+P_NH3_TARGET_TOTAL_T = 30
+P_NH3_PER_SHIP_T = 31
+P_SHIP_INTERVAL = 32
+P_KWH_PER_T_HBCHAIN = 33
+P_MAX_FAILED_SHIPS = 34
+N_PARAMS = 35
+
+# -----------------------------
+# Zustands-Indizes (st)
+# -----------------------------
+ST_SOC_H2_KG = 0
+ST_SOC_NH3_T = 1
+ST_SOC_WATER_M3 = 2
+ST_EL_ALLOWED = 3
+ST_P_STACK_PREV = 4
+ST_NH3_HB_PREV = 5
+ST_NEXT_SHIP_TIME = 6
+ST_NH3_PROD_TOTAL_T = 7
+N_STATE = 8
+
+# -----------------------------
+# KPI-Akkumulatoren (acc)
+# -----------------------------
+A_CURTAILED_MWH = 0
+A_SHIPS_FAILED = 1
+A_SHIP_COUNT = 2
+A_EL_MWH = 3
+A_HB_MWH = 4
+A_N2_MWH = 5
+A_RO_MWH = 6
+A_H2_IN_MWH = 7
+A_H2_OUT_MWH = 8
+A_NH3_IN_MWH = 9
+A_NH3_OUT_MWH = 10
+A_H2_RELIQ_MWH = 11
+A_NH3_COOLING_MWH = 12
+A_NH3_SPILL_T = 13
+A_SHIP_OUT_T = 14
+A_WATER_NEED_M3 = 15
+A_RO_MAKE_M3 = 16
+A_WATER_SHORT_M3 = 17
+A_H2_SOC_MAX_KG = 18
+A_NH3_SOC_MAX_T = 19
+A_WATER_SOC_MAX_M3 = 20
+N_ACC = 21
+
+# Zeitreihen-Spalten (Reihenfolge = Zeilen in ts)
+TS_COLUMNS = (
+    "p_wind_mw",
+    "p_h2_reliq_mw",
+    "p_nh3_cooling_mw",
+    "p_hbchain_mw",
+    "p_ro_mw",
+    "p_el_mw",
+    "p_used_total_mw",
+    "curtail_mwh",
+    "h2_soc_kg",
+    "nh3_soc_t",
+    "water_soc_m3",
+    "nh3_prod_t",
+    "ship_loaded_t",
+    "h2_spill_kg",
+    "ro_make_m3",
+    "water_need_m3",
+    "water_short_m3",
+)
+N_TS = len(TS_COLUMNS)
+
+
+def _run_hours(p_base, i_start, i_stop, prm, st, acc, ts):
+    """
+    Simuliert die Stunden i_start..i_stop-1 von p_base (MW bei s=1).
+    Ist i_stop > len(p_base), wird p_base zyklisch wiederholt (Mehrjahr aus 1 Basisjahr).
+    Schreibt st/acc in-place fort; ts hat Form (N_TS, n) oder (0, 0) ohne Zeitreihe.
+
+    Übersteigen die Schiffsausfälle prm[P_MAX_FAILED_SHIPS], bricht die Schleife nach der
+    Stunde des Ausfalls ab. Rückgabe: erste nicht simulierte Stunde (i_stop ohne Abbruch).
+    """
+    s = prm[P_S]
+    p_el_max = prm[P_EL_MAX]
+    p_el_min = prm[P_EL_MIN]
+    p_step = prm[P_EL_STEP]
+    h2_kg_per_mwh = prm[P_H2_KG_PER_MWH]
+    eta_in = prm[P_ETA_IN]
+    eta_out = prm[P_ETA_OUT]
+    loss_frac_per_hour = prm[P_H2_LOSS_FRAC]
+    h2_spec_kwh_per_kg_in = prm[P_H2_SPEC_IN]
+    h2_reliq_kwh_per_kg = prm[P_H2_RELIQ_KWH]
+    h2_reliq_frac = prm[P_H2_RELIQ_FRAC]
+    h2_storage_kg_max = prm[P_H2_STORAGE_KG_MAX]
+    h2_el_stop_kg = prm[P_H2_EL_STOP_KG]
+    h2_el_start_kg = prm[P_H2_EL_START_KG]
+    water_kg_per_kgH2 = prm[P_WATER_KG_PER_KGH2]
+    ro_spec_kwh_per_m3 = prm[P_RO_SPEC_KWH_PER_M3]
+    water_loss_frac_per_hour = prm[P_WATER_LOSS_FRAC]
+    tank_cap = max(0.0, prm[P_WATER_TANK_M3_MAX])
+    hb_spec_kwh_per_kgNH3 = prm[P_HB_SPEC_KWH_PER_KG]
+    spec_kwh_per_kgN2 = prm[P_N2_SPEC_KWH_PER_KG]
+    h2_spec_kwh_per_kg_out = prm[P_H2_SPEC_OUT]
+    nh3_spec_kwh_per_t_in = prm[P_NH3_SPEC_IN]
+    nh3_spec_kwh_per_t_out = prm[P_NH3_SPEC_OUT]
+    nh3_cooling_kwh_per_t_per_day = prm[P_NH3_COOLING_KWH]
+    hb_capacity_tNH3_per_h = prm[P_HB_CAP_T_PER_H]
+    hb_min_frac_when_on = prm[P_HB_MIN_FRAC]
+    nh3_step = prm[P_HB_STEP]
+    nh3_storage_t_max = prm[P_NH3_STORAGE_T_MAX]
+    nh3_soc_target_t = prm[P_NH3_SOC_TARGET_T]
+    nh3_soc_high_t = prm[P_NH3_SOC_HIGH_T]
+    nh3_target_total_t = prm[P_NH3_TARGET_TOTAL_T]
+    nh3_target_per_ship_t = prm[P_NH3_PER_SHIP_T]
+    ship_interval = prm[P_SHIP_INTERVAL]
+    kwh_per_t_hbchain = prm[P_KWH_PER_T_HBCHAIN]
+    max_failed_ships = prm[P_MAX_FAILED_SHIPS]
+
+    h2_kg_per_kg_nh3 = 6.0 / 34.0
+    n2_kg_per_kg_nh3 = 28.0 / 34.0
+    el_total_factor = 1.0 + (h2_kg_per_mwh * eta_in * h2_spec_kwh_per_kg_in / 1000.0)
+
+    soc_h2_kg = st[ST_SOC_H2_KG]
+    soc_nh3_t = st[ST_SOC_NH3_T]
+    soc_water_m3 = st[ST_SOC_WATER_M3]
+    el_allowed = st[ST_EL_ALLOWED] > 0.5
+    p_stack_prev = st[ST_P_STACK_PREV]
+    nh3_hb_prev_t = st[ST_NH3_HB_PREV]
+    next_ship_time = st[ST_NEXT_SHIP_TIME]
+    nh3_prod_total_t = st[ST_NH3_PROD_TOTAL_T]
+
+    a_curtailed_mwh = acc[A_CURTAILED_MWH]
+    a_ships_failed = acc[A_SHIPS_FAILED]
+    a_ship_count = acc[A_SHIP_COUNT]
+    a_el_mwh = acc[A_EL_MWH]
+    a_hb_mwh = acc[A_HB_MWH]
+    a_n2_mwh = acc[A_N2_MWH]
+    a_ro_mwh = acc[A_RO_MWH]
+    a_h2_in_mwh = acc[A_H2_IN_MWH]
+    a_h2_out_mwh = acc[A_H2_OUT_MWH]
+    a_nh3_in_mwh = acc[A_NH3_IN_MWH]
+    a_nh3_out_mwh = acc[A_NH3_OUT_MWH]
+    a_h2_reliq_mwh = acc[A_H2_RELIQ_MWH]
+    a_nh3_cooling_mwh = acc[A_NH3_COOLING_MWH]
+    a_nh3_spill_t = acc[A_NH3_SPILL_T]
+    a_ship_out_t = acc[A_SHIP_OUT_T]
+    a_water_need_m3 = acc[A_WATER_NEED_M3]
+    a_ro_make_m3 = acc[A_RO_MAKE_M3]
+    a_water_short_m3 = acc[A_WATER_SHORT_M3]
+    a_h2_soc_max_kg = acc[A_H2_SOC_MAX_KG]
+    a_nh3_soc_max_t = acc[A_NH3_SOC_MAX_T]
+    a_water_soc_max_m3 = acc[A_WATER_SOC_MAX_M3]
+
+    with_ts = ts.shape[0] > 0
+
+    n_base = len(p_base)
+    j = i_start % n_base
+    i_end = i_stop
+    for i in range(i_start, i_stop):
+        p_wind = p_base[j] * s
+        j += 1
+        if j == n_base:
+            j = 0
+
+        # Water Tank Verluste
+        if water_loss_frac_per_hour > 0.0:
+            soc_water_m3 *= (1.0 - water_loss_frac_per_hour)
+
+        # Kühlung zuerst
+        bog_kg = soc_h2_kg * loss_frac_per_hour
+        reliq_kg = bog_kg * h2_reliq_frac
+        p_h2_reliq_mw = (reliq_kg * h2_reliq_kwh_per_kg) / 1000.0
+        soc_h2_kg -= bog_kg
+
+        p_nh3_cooling_mw = (soc_nh3_t * nh3_cooling_kwh_per_t_per_day / 24.0) / 1000.0
+
+        a_h2_reliq_mwh += p_h2_reliq_mw
+        a_nh3_cooling_mwh += p_nh3_cooling_mw
+
+        nh3_possible_from_h2_t = ((soc_h2_kg * eta_out) / h2_kg_per_kg_nh3) / 1000.0
+
+        p_rem = max(0.0, p_wind - p_h2_reliq_mw - p_nh3_cooling_mw)
+
+        # ---- HB (1. Aufruf) ----
+        nh3_0 = 0.0
+        p0 = 0.0
+        if nh3_prod_total_t >= nh3_target_total_t - 1e-9:
+            nh3_hb_prev_t = 0.0
+        elif soc_nh3_t >= nh3_soc_high_t:
+            nh3_hb_prev_t = 0.0
+        elif nh3_possible_from_h2_t <= 0.0 or hb_capacity_tNH3_per_h <= 0.0:
+            nh3_hb_prev_t = 0.0
+        else:
+            nh3_free_t = max(0.0, nh3_soc_target_t - soc_nh3_t)
+            if nh3_free_t <= 0.0:
+                nh3_hb_prev_t = 0.0
+            else:
+                if kwh_per_t_hbchain > 0.0:
+                    nh3_power_limit_t = (p_rem * 1000.0) / kwh_per_t_hbchain
+                else:
+                    nh3_power_limit_t = hb_capacity_tNH3_per_h
+                nh3_remaining_total_t = max(0.0, nh3_target_total_t - nh3_prod_total_t)
+                nh3_t = min(hb_capacity_tNH3_per_h, nh3_possible_from_h2_t, nh3_power_limit_t,
+                            nh3_free_t, nh3_remaining_total_t)
+                if nh3_t > 0.0 and nh3_t < hb_min_frac_when_on * hb_capacity_tNH3_per_h:
+                    nh3_hb_prev_t = 0.0
+                else:
+                    nh3_t = max(0.0, min(nh3_hb_prev_t + nh3_step, max(nh3_hb_prev_t - nh3_step, nh3_t)))
+                    nh3_0 = nh3_t
+                    p0 = (nh3_t * kwh_per_t_hbchain) / 1000.0
+                    nh3_hb_prev_t = nh3_t
+        nh3_hb_t = 0.0 + nh3_0
+        p_hbchain_mw = 0.0 + p0
+        p_rem = max(0.0, p_rem - p0)
+
+        # ---- EL + RO + Tank ----
+        p_el = 0.0
+        p_h2_in_mw = 0.0
+        p_el_total_mw = 0.0
+        h2_spill_kg = 0.0
+        p_ro_mw = 0.0
+        ro_make_m3 = 0.0
+        water_need_m3 = 0.0
+        water_short_m3 = 0.0
+        p_stack_used = 0.0
+
+        if soc_h2_kg >= h2_el_stop_kg:
+            el_allowed = False
+        elif soc_h2_kg <= h2_el_start_kg:
+            el_allowed = True
+
+        if el_allowed and p_rem > 0.0:
+            p_el_candidate = min(p_el_max, p_rem / el_total_factor)
+            p_stack_target = 0.0 if p_el_candidate < p_el_min else p_el_candidate
+            if p_stack_target > 0.0:
+                p_stack = max(0.0, min(p_stack_prev + p_step, max(p_stack_prev - p_step, p_stack_target)))
+                if p_stack < p_el_min:
+                    p_stack = 0.0
+                if p_stack > 0.0:
+                    soc_h2_cur = soc_h2_kg
+                    soc_water_cur = soc_water_m3
+
+                    h2_prod_kg = p_stack * h2_kg_per_mwh
+                    w_need = (h2_prod_kg * water_kg_per_kgH2) / 1000.0
+                    water_from_tank = min(max(0.0, soc_water_cur), w_need)
+                    missing_m3 = max(0.0, w_need - water_from_tank)
+                    h2_in_kg = h2_prod_kg * eta_in
+
+                    headroom_kg = max(0.0, h2_storage_kg_max - soc_h2_cur)
+                    if h2_in_kg > headroom_kg + 1e-12 and h2_in_kg > 0:
+                        scale = max(0.0, min(1.0, headroom_kg / h2_in_kg))
+                        p_stack *= scale
+                        h2_prod_kg = p_stack * h2_kg_per_mwh
+                        w_need = (h2_prod_kg * water_kg_per_kgH2) / 1000.0
+                        water_from_tank = min(max(0.0, soc_water_cur), w_need)
+                        missing_m3 = max(0.0, w_need - water_from_tank)
+                        h2_in_kg = h2_prod_kg * eta_in
+
+                    p_in = (h2_in_kg * h2_spec_kwh_per_kg_in) / 1000.0
+                    p_el_total = p_stack + p_in
+
+                    p_left_for_ro = max(0.0, p_rem - p_el_total)
+                    if ro_spec_kwh_per_m3 <= 0.0:
+                        ro_possible_m3 = 0.0
+                    else:
+                        ro_possible_m3 = max(0.0, (p_left_for_ro * 1000.0) / ro_spec_kwh_per_m3)
+                    ro_make = min(missing_m3, ro_possible_m3)
+                    p_ro = max(0.0, (ro_make * ro_spec_kwh_per_m3) / 1000.0)
+
+                    water_available_m3 = water_from_tank + ro_make
+
+                    w_short = 0.0
+                    if w_need > water_available_m3 + 1e-12 and w_need > 0.0:
+                        scale = max(0.0, min(1.0, water_available_m3 / w_need))
+                        p_stack *= scale
+                        h2_prod_kg = p_stack * h2_kg_per_mwh
+                        w_need = (h2_prod_kg * water_kg_per_kgH2) / 1000.0
+                        h2_in_kg = h2_prod_kg * eta_in
+                        p_in = (h2_in_kg * h2_spec_kwh_per_kg_in) / 1000.0
+                        p_el_total = p_stack + p_in
+                        if w_need > water_available_m3 + 1e-12:
+                            w_short = w_need - water_available_m3
+
+                    soc_water_after = soc_water_cur - water_from_tank + ro_make
+                    if tank_cap > 0.0:
+                        soc_water_after = min(tank_cap, soc_water_after)
+                    else:
+                        soc_water_after = 0.0
+
+                    soc_h2_after = min(h2_storage_kg_max, soc_h2_cur + h2_in_kg)
+                    h2_spill_kg = max(0.0, (soc_h2_cur + h2_in_kg) - h2_storage_kg_max)
+
+                    p_used = p_el_total + p_ro
+                    p_rem = max(0.0, p_rem - p_used)
+
+                    p_el = p_stack
+                    p_h2_in_mw = p_in
+                    p_el_total_mw = p_el_total
+                    soc_h2_kg = soc_h2_after
+                    p_ro_mw = p_ro
+                    ro_make_m3 = ro_make
+                    water_need_m3 = w_need
+                    soc_water_m3 = soc_water_after
+                    water_short_m3 = w_short
+                    p_stack_used = p_stack
+
+        p_stack_prev = p_stack_used
+
+        # ---- Tank mit Rest füllen ----
+        if tank_cap > 0.0 and p_rem > 0.0:
+            headroom = max(0.0, tank_cap - soc_water_m3)
+            if headroom > 0.0:
+                if ro_spec_kwh_per_m3 <= 0.0:
+                    ro_possible2 = 0.0
+                else:
+                    ro_possible2 = max(0.0, (p_rem * 1000.0) / ro_spec_kwh_per_m3)
+                ro_make2 = min(headroom, ro_possible2)
+                p_ro2 = max(0.0, (ro_make2 * ro_spec_kwh_per_m3) / 1000.0)
+                soc_water_m3 = soc_water_m3 + ro_make2
+                p_ro_mw += p_ro2
+                ro_make_m3 += ro_make2
+                p_rem = max(0.0, p_rem - p_ro2)
+
+        # ---- HB (2. Aufruf) ----
+        nh3_possible_from_h2_t = ((soc_h2_kg * eta_out) / h2_kg_per_kg_nh3) / 1000.0
+        nh3_1 = 0.0
+        p1 = 0.0
+        if nh3_prod_total_t >= nh3_target_total_t - 1e-9:
+            nh3_hb_prev_t = 0.0
+        elif soc_nh3_t >= nh3_soc_high_t:
+            nh3_hb_prev_t = 0.0
+        elif nh3_possible_from_h2_t <= 0.0 or hb_capacity_tNH3_per_h <= 0.0:
+            nh3_hb_prev_t = 0.0
+        else:
+            nh3_free_t = max(0.0, nh3_soc_target_t - soc_nh3_t)
+            if nh3_free_t <= 0.0:
+                nh3_hb_prev_t = 0.0
+            else:
+                if kwh_per_t_hbchain > 0.0:
+                    nh3_power_limit_t = (p_rem * 1000.0) / kwh_per_t_hbchain
+                else:
+                    nh3_power_limit_t = hb_capacity_tNH3_per_h
+                nh3_remaining_total_t = max(0.0, nh3_target_total_t - nh3_prod_total_t)
+                nh3_t = min(hb_capacity_tNH3_per_h, nh3_possible_from_h2_t, nh3_power_limit_t,
+                            nh3_free_t, nh3_remaining_total_t)
+                if nh3_t > 0.0 and nh3_t < hb_min_frac_when_on * hb_capacity_tNH3_per_h:
+                    nh3_hb_prev_t = 0.0
+                else:
+                    nh3_t = max(0.0, min(nh3_hb_prev_t + nh3_step, max(nh3_hb_prev_t - nh3_step, nh3_t)))
+                    nh3_1 = nh3_t
+                    p1 = (nh3_t * kwh_per_t_hbchain) / 1000.0
+                    nh3_hb_prev_t = nh3_t
+        nh3_hb_t += nh3_1
+        p_hbchain_mw += p1
+        p_rem = max(0.0, p_rem - p1)
+
+        # ---- Material + Energie aus HB ----
+        if nh3_hb_t > 0.0:
+            h2_cons_kg = nh3_hb_t * 1000.0 * h2_kg_per_kg_nh3
+            soc_h2_kg = max(0.0, soc_h2_kg - (h2_cons_kg / eta_out))
+
+            soc_nh3_t += nh3_hb_t
+            nh3_prod_total_t += nh3_hb_t
+
+            if soc_nh3_t > nh3_storage_t_max:
+                a_nh3_spill_t += (soc_nh3_t - nh3_storage_t_max)
+                soc_nh3_t = nh3_storage_t_max
+
+            a_hb_mwh += (nh3_hb_t * 1000.0 * hb_spec_kwh_per_kgNH3) / 1000.0
+            n2_need_kg = nh3_hb_t * 1000.0 * n2_kg_per_kg_nh3
+            a_n2_mwh += (n2_need_kg * spec_kwh_per_kgN2) / 1000.0
+            a_h2_out_mwh += (h2_cons_kg * h2_spec_kwh_per_kg_out) / 1000.0
+            a_nh3_in_mwh += (nh3_hb_t * nh3_spec_kwh_per_t_in) / 1000.0
+
+        a_el_mwh += p_el
+        a_h2_in_mwh += p_h2_in_mw
+        a_ro_mwh += p_ro_mw
+        a_water_need_m3 += water_need_m3
+        a_ro_make_m3 += ro_make_m3
+        a_water_short_m3 += water_short_m3
+
+        # ---- Schiff ----
+        p_nh3_out_mw = 0.0
+        loaded_t = 0.0
+        hour_number = i + 1
+        if hour_number >= next_ship_time - 1e-9:
+            a_ship_count += 1.0
+            if soc_nh3_t >= nh3_target_per_ship_t:
+                loaded_t = nh3_target_per_ship_t
+                soc_nh3_t -= nh3_target_per_ship_t
+            else:
+                a_ships_failed += 1.0
+                loaded_t = soc_nh3_t
+                soc_nh3_t = 0.0
+            a_ship_out_t += loaded_t
+            p_nh3_out_mw = (loaded_t * nh3_spec_kwh_per_t_out) / 1000.0
+            a_nh3_out_mwh += p_nh3_out_mw
+            next_ship_time += ship_interval
+
+        p_used_total = (
+            p_h2_reliq_mw +
+            p_nh3_cooling_mw +
+            p_hbchain_mw +
+            p_ro_mw +
+            p_el_total_mw +
+            p_nh3_out_mw
+        )
+        curtail = max(p_wind - p_used_total, 0.0)
+        a_curtailed_mwh += curtail
+
+        a_h2_soc_max_kg = max(a_h2_soc_max_kg, soc_h2_kg)
+        a_nh3_soc_max_t = max(a_nh3_soc_max_t, soc_nh3_t)
+        a_water_soc_max_m3 = max(a_water_soc_max_m3, soc_water_m3)
+
+        if with_ts:
+            k = i - i_start
+            ts[0, k] = p_wind
+            ts[1, k] = p_h2_reliq_mw
+            ts[2, k] = p_nh3_cooling_mw
+            ts[3, k] = p_hbchain_mw
+            ts[4, k] = p_ro_mw
+            ts[5, k] = p_el
+            ts[6, k] = p_used_total
+            ts[7, k] = curtail
+            ts[8, k] = soc_h2_kg
+            ts[9, k] = soc_nh3_t
+            ts[10, k] = soc_water_m3
+            ts[11, k] = nh3_hb_t
+            ts[12, k] = loaded_t
+            ts[13, k] = h2_spill_kg
+            ts[14, k] = ro_make_m3
+            ts[15, k] = water_need_m3
+            ts[16, k] = water_short_m3
+
+        if a_ships_failed > max_failed_ships:
+            i_end = i + 1
+            break
+
+    st[ST_SOC_H2_KG] = soc_h2_kg
+    st[ST_SOC_NH3_T] = soc_nh3_t
+    st[ST_SOC_WATER_M3] = soc_water_m3
+    st[ST_EL_ALLOWED] = 1.0 if el_allowed else 0.0
+    st[ST_P_STACK_PREV] = p_stack_prev
+    st[ST_NH3_HB_PREV] = nh3_hb_prev_t
+    st[ST_NEXT_SHIP_TIME] = next_ship_time
+    st[ST_NH3_PROD_TOTAL_T] = nh3_prod_total_t
+
+    acc[A_CURTAILED_MWH] = a_curtailed_mwh
+    acc[A_SHIPS_FAILED] = a_ships_failed
+    acc[A_SHIP_COUNT] = a_ship_count
+    acc[A_EL_MWH] = a_el_mwh
+    acc[A_HB_MWH] = a_hb_mwh
+    acc[A_N2_MWH] = a_n2_mwh
+    acc[A_RO_MWH] = a_ro_mwh
+    acc[A_H2_IN_MWH] = a_h2_in_mwh
+    acc[A_H2_OUT_MWH] = a_h2_out_mwh
+    acc[A_NH3_IN_MWH] = a_nh3_in_mwh
+    acc[A_NH3_OUT_MWH] = a_nh3_out_mwh
+    acc[A_H2_RELIQ_MWH] = a_h2_reliq_mwh
+    acc[A_NH3_COOLING_MWH] = a_nh3_cooling_mwh
+    acc[A_NH3_SPILL_T] = a_nh3_spill_t
+    acc[A_SHIP_OUT_T] = a_ship_out_t
+    acc[A_WATER_NEED_M3] = a_water_need_m3
+    acc[A_RO_MAKE_M3] = a_ro_make_m3
+    acc[A_WATER_SHORT_M3] = a_water_short_m3
+    acc[A_H2_SOC_MAX_KG] = a_h2_soc_max_kg
+    acc[A_NH3_SOC_MAX_T] = a_nh3_soc_max_t
+    acc[A_WATER_SOC_MAX_M3] = a_water_soc_max_m3
+    return i_end
+
+
+def _run_hours_py(p_base, i_start, i_stop, prm, st, acc, ts):
+    """Fallback ohne numba: Skalare als Python-floats (numpy-Skalare wären deutlich langsamer)."""
+    st_l = st.tolist()
+    acc_l = acc.tolist()
+    i_end = _run_hours(p_base.tolist(), i_start, i_stop, prm.tolist(), st_l, acc_l, ts)
+    st[:] = st_l
+    acc[:] = acc_l
+    return i_end
+
+
+if HAS_NUMBA:
+    run_hours = numba.njit(cache=True, nogil=True)(_run_hours)
+else:
+    run_hours = _run_hours_py
+
+
+# Summen-Akkumulatoren (alles vor den SOC-Maxima) -> werden bei Steady State hochgerechnet
+N_ACC_SUMS = A_H2_SOC_MAX_KG
+
+
+def _year_start_key(st, hour_offset):
+    """Zustand am Jahresanfang; Schiffstermin relativ zum Jahresbeginn, ohne NH3-Gesamtzähler."""
+    return (
+        st[ST_SOC_H2_KG],
+        st[ST_SOC_NH3_T],
+        st[ST_SOC_WATER_M3],
+        st[ST_EL_ALLOWED],
+        st[ST_P_STACK_PREV],
+        st[ST_NH3_HB_PREV],
+        st[ST_NEXT_SHIP_TIME] - hour_offset,
+    )
+
+
+def _same_state(a, b, tol):
+    if tol <= 0.0:
+        return a == b
+    return all(abs(x - y) <= tol * max(1.0, abs(x), abs(y)) for x, y in zip(a, b))
+
+
+def run_years_steady_state(p_base, n_years, prm, st, acc, tol=0.0):
+    """
+    Simuliert n_years Wiederholungen von p_base Jahr für Jahr und bricht ab, sobald der
+    Zustand am Jahresanfang dem des Vorjahres entspricht (periodischer Steady State).
+    Alle weiteren Jahre sind dann identisch: die Jahres-KPI-Summen werden analytisch
+    hochgerechnet (Maxima bleiben), st wird auf den Stand nach den übersprungenen Jahren gesetzt.
+
+    Der NH3-Gesamtdeckel (P_NH3_TARGET_TOTAL_T) hängt vom kumulierten Produktionszähler ab;
+    übersprungen werden daher nur Jahre, in denen der Deckel sicher nicht greift
+    (Restmenge >= HB-Stundenkapazität). Die restlichen Jahre laufen normal weiter.
+
+    tol: relative Toleranz für den Zustandsvergleich (0.0 = bitgleich).
+    Bricht run_hours wegen Schiffsausfällen ab (P_MAX_FAILED_SHIPS), endet auch die Jahresschleife.
+    Rückgabe: (simulierte Jahre, Jahr des Steady State oder -1, erreichte Stunde).
+    """
+    n_base = len(p_base)
+    no_ts = empty_timeseries()
+    target_total = prm[P_NH3_TARGET_TOTAL_T]
+    hb_cap = prm[P_HB_CAP_T_PER_H]
+
+    year = 0
+    years_simulated = 0
+    steady_year = -1
+    prev_key = None
+    prev_delta = None
+    prev_prod = 0.0
+
+    while year < n_years:
+        key = _year_start_key(st, year * n_base)
+
+        if steady_year < 0 and prev_key is not None and _same_state(key, prev_key, tol):
+            remaining = n_years - year
+            if prev_prod > 0.0:
+                k_cap = int((target_total - hb_cap - st[ST_NH3_PROD_TOTAL_T]) // prev_prod)
+                k = max(0, min(remaining, k_cap))
+            else:
+                k = remaining
+            if k > 0:
+                steady_year = year - 1
+                acc[:N_ACC_SUMS] += k * prev_delta
+                st[ST_NH3_PROD_TOTAL_T] += k * prev_prod
+                st[ST_NEXT_SHIP_TIME] += k * n_base
+                year += k
+                continue
+
+        acc_before = acc[:N_ACC_SUMS].copy()
+        prod_before = st[ST_NH3_PROD_TOTAL_T]
+        i_end = run_hours(p_base, year * n_base, (year + 1) * n_base, prm, st, acc, no_ts)
+        years_simulated += 1
+        if i_end < (year + 1) * n_base:
+            return years_simulated, steady_year, i_end
+        prev_delta = acc[:N_ACC_SUMS] - acc_before
+        prev_prod = st[ST_NH3_PROD_TOTAL_T] - prod_before
+        prev_key = key
+        year += 1
+
+    return years_simulated, steady_year, n_years * n_base
+
+
+def run_weighted_periods(p_base, period_hours, weights, prm, st, acc):
+    """
+    Repräsentative Perioden (profile_reduction.ReducedProfile): p_base enthält die
+    Repräsentanten hintereinander. Ein erster Durchlauf schwingt st ein (zählt nicht),
+    im zweiten geht jede Periode mit ihrem Gewicht in die KPI-Summen und den
+    NH3-Produktionszähler ein; Zustände laufen über die Periodengrenzen weiter.
+    Maxima (SOC) gelten über beide Durchläufe.
+    """
+    n_base = len(p_base)
+    no_ts = empty_timeseries()
+
+    warm = acc.copy()
+    run_hours(p_base, 0, n_base, prm, st, warm, no_ts)
+    acc[N_ACC_SUMS:] = np.maximum(acc[N_ACC_SUMS:], warm[N_ACC_SUMS:])
+    st[ST_NH3_PROD_TOTAL_T] = 0.0
+
+    for k, w in enumerate(weights):
+        acc_before = acc[:N_ACC_SUMS].copy()
+        prod_before = st[ST_NH3_PROD_TOTAL_T]
+        start = n_base + k * period_hours
+        run_hours(p_base, start, start + period_hours, prm, st, acc, no_ts)
+        acc[:N_ACC_SUMS] = acc_before + w * (acc[:N_ACC_SUMS] - acc_before)
+        st[ST_NH3_PROD_TOTAL_T] = prod_before + w * (st[ST_NH3_PROD_TOTAL_T] - prod_before)
+
+
+def empty_timeseries() -> np.ndarray:
+    """Platzhalter für ts, wenn keine Zeitreihe gebraucht wird."""
+    return np.empty((0, 0), dtype=np.float64)
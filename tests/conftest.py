@@ -0,0 +1,44 @@
+"""
+Gemeinsame Test-Einstellungen: Repo-Wurzel im Importpfad, ein synthetisches Windprofil
+(WIND_PROFILE_SOURCE), damit die Tests ohne "Wind Erzeugerprofil3.xlsx" laufen, und
+Profil-Ablage/-Registry des Servers in einem temporären Verzeichnis.
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def synthetic_wind_mw(n_hours: int = 8760, seed: int = 0) -> np.ndarray:
+    """Windleistung in MW mit Tages-/Jahresgang und Rauschen (>= 0)."""
+    t = np.arange(n_hours)
+    rng = np.random.default_rng(seed)
+    p = 450.0 + 250.0 * np.sin(2 * np.pi * t / 8760.0) + 150.0 * np.sin(2 * np.pi * t / 24.0)
+    return np.clip(p + rng.normal(0.0, 80.0, n_hours), 0.0, None)
+
+
+TMP_ROOT = tempfile.mkdtemp(prefix="wasserstoff-tests-")
+atexit.register(shutil.rmtree, TMP_ROOT, True)
+
+
+def _write_wind_source() -> str:
+    path = os.path.join(TMP_ROOT, "wind.csv")
+    pd.DataFrame({
+        "datetime": pd.date_range("2023-01-01", periods=8760, freq="h"),
+        "Leistung  Windpark [GW]": synthetic_wind_mw() / 1000.0,
+    }).to_csv(path, index=False)
+    return path
+
+
+os.environ.setdefault("WIND_PROFILE_SOURCE", _write_wind_source())
+os.environ.setdefault("GUROBI_PROFILE_DIR", os.path.join(TMP_ROOT, "profiles"))
+os.environ.setdefault("PROFILE_REGISTRY_DIR", os.path.join(TMP_ROOT, "registry"))
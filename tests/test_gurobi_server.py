@@ -0,0 +1,172 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("flask")
+
+import Code_Final as cf
+import gurobi_server
+import search_strategies
+import sim_kernel
+
+
+def _candidates(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return [
+        {"s": float(rng.uniform(2.0, 5.0)), "pel": float(rng.uniform(800.0, 2500.0)),
+         "h2_days": float(rng.uniform(1.0, 6.0)), "nh3_ships": float(rng.uniform(1.5, 3.0)),
+         "water_tank": float(rng.uniform(0.0, 20000.0))}
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return gurobi_server.get_hourly_profile({})
+
+
+def test_default_evaluation_uses_kernel(profile, monkeypatch):
+    engines = []
+    simulate = cf.simulate_hourly_system
+
+    def spy(*args, **kwargs):
+        engines.append(kwargs.get("engine"))
+        return simulate(*args, **kwargs)
+
+    batch_calls = []
+    monkeypatch.setattr(cf, "simulate_hourly_system", spy)
+    monkeypatch.setattr(cf, "simulate_hourly_system_batch", lambda *a, **kw: batch_calls.append(a))
+    results = gurobi_server.evaluate_candidates_serial({"cache": False}, _candidates(2), profile)
+    assert len(results) == 2
+    assert engines == ["kernel"] * 4
+    assert batch_calls == []
+
+
+def test_kernel_matches_opt_in_batch(profile):
+    candidates = _candidates(8)
+    jobs, kernel = gurobi_server.candidate_kpis({"cache": False}, candidates, profile)
+    jobs_b, batch = gurobi_server.candidate_kpis({"cache": False, "batch": True}, candidates, profile)
+    assert jobs == jobs_b
+    for a, b in zip(kernel, batch):
+        for key in gurobi_server.BATCH_KPI_COLUMNS:
+            assert a[key] == pytest.approx(b[key], rel=1e-9, abs=1e-9)
+
+
+def test_daily_profile_uses_kernel(monkeypatch):
+    engines = []
+    simulate = cf.simulate_hourly_system
+
+    def spy(*args, **kwargs):
+        engines.append(kwargs.get("engine"))
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(cf, "simulate_hourly_system", spy)
+    client = gurobi_server.app.test_client()
+    decision = {"s": 3.0, "pel": 1500.0, "h2_days": 2.0, "nh3_ships": 2.0, "water_tank": 5000.0}
+    resp = client.post("/gurobi_daily_profile", json={"decision": decision})
+    assert resp.status_code == 200, resp.get_json()
+    assert len(resp.get_json()["days"]) == 365
+    assert engines == ["kernel"]
+
+
+def test_engine_choice(profile):
+    assert gurobi_server.simulation_options({}, profile)["engine"] == "kernel"
+    assert not gurobi_server.use_batch_simulation({}, profile)
+    assert gurobi_server.use_batch_simulation({"batch": True}, profile)
+
+
+def test_run_raster_uses_kernel(monkeypatch):
+    engines = []
+    simulate = cf.simulate_hourly_system
+
+    def spy(*args, **kwargs):
+        engines.append(kwargs.get("engine"))
+        return simulate(*args, **kwargs)
+
+    monkeypatch.setattr(cf, "s_values", [1.0])
+    monkeypatch.setattr(cf, "pel_values", [1000.0])
+    monkeypatch.setattr(cf, "h2_storage_days_values", [1.0])
+    monkeypatch.setattr(cf, "nh3_storage_ships_values", [1.25])
+    monkeypatch.setattr(cf, "water_tank_m3_values", [2500.0])
+    monkeypatch.setattr(cf, "simulate_hourly_system", spy)
+    monkeypatch.setattr(cf, "simulate_hourly_system_batch", lambda *a, **kw: pytest.fail("Batch im Raster"))
+    res_ael, res_pem = cf.run_raster()
+    assert engines == ["kernel", "kernel"]
+    assert list(res_ael.columns) == cf.RASTER_COLUMNS and len(res_pem) == 1
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="Benchmark, nur mit RUN_BENCHMARKS=1")
+@pytest.mark.skipif(not sim_kernel.HAS_NUMBA, reason="numba nicht installiert")
+def test_benchmark_kernel_vs_batch(profile):
+    # 64 Simulationen (32 Kandidaten x AEL/PEM); Wall-Clock, daher nicht im Standardlauf
+    candidates = _candidates(32)
+    gurobi_server.candidate_kpis({"cache": False}, candidates[:1], profile)  # JIT aufwärmen
+
+    t0 = time.perf_counter()
+    gurobi_server.candidate_kpis({"cache": False}, candidates, profile)
+    t_kernel = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    gurobi_server.candidate_kpis({"cache": False, "batch": True}, candidates, profile)
+    t_batch = time.perf_counter() - t0
+    print(f"kernel {t_kernel:.2f}s, batch {t_batch:.2f}s")
+    assert t_kernel < t_batch
+
+
+@pytest.mark.parametrize("name, value", [
+    ("ships_per_year", 13), ("startup_buffer_ships", 1), ("hb_min_frac_when_on", 0.3),
+    ("el_ramp_frac_per_h", 0.5), ("hb_ramp_frac_per_h", 0.2), ("nh3_target_level_ships", 1.5),
+    ("years_sim", 10), ("SIM_VERSION", cf.SIM_VERSION + 1),
+])
+def test_cache_key_covers_simulation_constants(profile, monkeypatch, name, value):
+    decision = _candidates(1)[0]
+    before = gurobi_server.evaluation_cache_key({}, decision, "AEL", profile)
+    monkeypatch.setattr(cf, name, value)
+    assert gurobi_server.evaluation_cache_key({}, decision, "AEL", profile) != before
+
+
+@pytest.mark.parametrize("scenario", [
+    {"wind": {"capex_eur_per_mw": 1.8e6}},                        # flaches Override-dict
+    {"name": "a", "cost_params": {"wind": {"capex_eur_per_mwh": 1.0}}},  # unbekannter Kostenparameter
+    {"name": "a", "cost_params": {"h2": {"storage": {"eta_in": 0.9}}}},  # physikalisch, kein Kostenwert
+    {"name": "a", "params": [1, 2]},
+])
+def test_price_designs_rejects_bad_scenarios(scenario):
+    client = gurobi_server.app.test_client()
+    misses = gurobi_server.EVAL_CACHE.misses
+    resp = client.post("/price_designs", json={"candidates": _candidates(1), "cost_scenarios": [scenario]})
+    assert resp.status_code == 400
+    assert resp.get_json()["success"] is False
+    assert gurobi_server.EVAL_CACHE.misses == misses  # abgelehnt, bevor simuliert wird
+
+
+def test_price_designs_scenarios():
+    client = gurobi_server.app.test_client()
+    resp = client.post("/price_designs", json={
+        "candidates": _candidates(2),
+        "params": {"cache": False},
+        "cost_scenarios": [
+            {"name": "base"},
+            {"name": "cheap wind", "cost_params": {"wind": {"capex_eur_per_mw": 1.0e5}}, "params": {"usd_to_eur": 1.0}},
+        ],
+    })
+    assert resp.status_code == 200, resp.get_json()
+    names = [s["name"] for s in resp.get_json()["scenarios"]]
+    assert names == ["base", "cheap wind"]
+
+
+def test_search_strategies_match_grid_on_simulation(profile):
+    lattice = search_strategies.Lattice({
+        "s": [2.0, 3.0, 4.0, 5.0, 6.0], "pel": [1000.0, 1500.0, 2000.0, 2500.0],
+        "h2_days": [1.0, 2.0, 4.0, 6.0], "nh3_ships": [1.5, 2.0, 2.5, 3.0], "water_tank": [0.0, 5000.0, 10000.0],
+    })
+    evaluate = lambda batch: gurobi_server.evaluate_candidates({}, batch, profile)  # noqa: E731
+    results = {name: search_strategies.run_search(lattice, evaluate, strategy=name)
+               for name in ("grid", "refine", "pattern", "nelder_mead", "surrogate")}
+    grid = results.pop("grid")
+    assert grid["evaluations"] == lattice.size
+    grid_best = min(grid["costs"])
+    for name, res in results.items():
+        assert min(res["costs"]) == grid_best, name
+        assert res["evaluations"] < grid["evaluations"], name
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+import profile_builder
+
+
+def _write_year(path, year: int, seed: int) -> None:
+    t = pd.date_range(f"{year}-01-01", periods=8760, freq="h")
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "time": t.strftime("%Y-%m-%d %H:%M"),
+        "electricity": rng.uniform(0.0, 1000.0, len(t)),
+    }).to_csv(path, index=False)
+
+
+def test_cli_rerun_ignores_own_outputs(tmp_path, monkeypatch):
+    for i, year in enumerate((2017, 2018, 2019)):
+        _write_year(tmp_path / f"wind_{year}.csv", year, seed=i)
+    monkeypatch.chdir(tmp_path)
+    argv = [str(tmp_path), str(tmp_path / profile_builder.OUTFILE)]
+
+    profile_builder.main(argv)
+    mean_1 = pd.read_csv(tmp_path / profile_builder.OUTFILE)
+    quant_1 = pd.read_csv(tmp_path / profile_builder.QUANTILE_OUTFILE)
+
+    profile_builder.main(argv)
+    mean_2 = pd.read_csv(tmp_path / profile_builder.OUTFILE)
+    quant_2 = pd.read_csv(tmp_path / profile_builder.QUANTILE_OUTFILE)
+
+    pd.testing.assert_frame_equal(mean_1, mean_2)
+    pd.testing.assert_frame_equal(quant_1, quant_2)
+    assert list(quant_2.columns) == ["time", "electricity_p10", "electricity_p50", "electricity_p90"]
+
+
+def test_input_files_skip_outputs_under_custom_name(tmp_path):
+    _write_year(tmp_path / "wind_2019.csv", 2019, seed=0)
+    for name in ("custom.csv", profile_builder.OUTFILE, profile_builder.QUANTILE_OUTFILE):
+        (tmp_path / name).write_text("time\n")
+    files = profile_builder.input_files(tmp_path, str(tmp_path / "custom.csv"))
+    assert [f.name for f in files] == ["wind_2019.csv"]
@@ -0,0 +1,26 @@
+import pytest
+
+import Code_Final as cf
+import profile_reduction
+
+CONFIGS = [
+    {"s": s, "P_el_MW": pel, "h2_storage_days": 2.0, "h2_storage_t_design": 660.0,
+     "nh3_storage_ships": 1.5, "water_tank_m3_max": 5000.0, "tech": "AEL"}
+    for s in (1.0, 2.0, 3.0) for pel in (800.0, 1500.0)
+]
+
+
+@pytest.mark.parametrize("k", [3, 8])
+def test_batch_matches_kernel_on_ship_aligned_reduction(k):
+    reduced = profile_reduction.reduce_profile(cf.get_df2(), k=k, period=730)
+    assert reduced.ship_aligned(8760.0 / cf.ships_per_year)
+
+    res = cf.simulate_hourly_system_batch(CONFIGS, df_profile=reduced)
+    for c, (_, row) in zip(CONFIGS, res.iterrows()):
+        _, kpi = cf.simulate_hourly_system(
+            s=c["s"], p_el_mw=c["P_el_MW"], technology=c["tech"],
+            h2_storage_t_max=c["h2_storage_t_design"], nh3_storage_ships=c["nh3_storage_ships"],
+            water_tank_m3_max=c["water_tank_m3_max"], return_timeseries=False, df_profile=reduced,
+        )
+        assert int(row["ships_failed_count"]) == kpi["ships_failed_count"]
+        assert row["ship_out_total_t"] == pytest.approx(kpi["ship_out_total_t"], rel=1e-9)
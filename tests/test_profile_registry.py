@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+import profile_registry
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _profile() -> pd.DataFrame:
+    index = pd.date_range("2023-01-01", periods=48, freq="h", name="t")
+    return pd.DataFrame({"p_mw": np.linspace(0.0, 470.0, 48)}, index=index)
+
+
+def _run(code: str, registry_dir: str) -> str:
+    """Python-Code in einem eigenen Prozess (eigener Interpreter, eigenes atexit)."""
+    env = dict(os.environ, PROFILE_REGISTRY_DIR=registry_dir, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+    return out.stdout.strip()
+
+
+PUBLISH = (
+    "import numpy as np, pandas as pd, profile_registry\n"
+    "index = pd.date_range('2023-01-01', periods=48, freq='h', name='t')\n"
+    "print(profile_registry.publish(pd.DataFrame({'p_mw': np.linspace(0.0, 470.0, 48)}, index=index)))\n"
+)
+
+
+def test_other_process_exit_keeps_file_in_use(tmp_path):
+    registry_dir = str(tmp_path)
+    name = profile_registry.publish(_profile(), registry_dir)
+    path = profile_registry._path(name, registry_dir)
+
+    # zweiter Prozess veröffentlicht dasselbe Profil und beendet sich
+    assert _run(PUBLISH, registry_dir) == name
+    assert os.path.exists(path)
+
+    # ein neuer Worker kann das Profil weiterhin einbinden
+    attached = _run(f"import profile_registry; print(len(profile_registry.attach({name!r})))", registry_dir)
+    assert attached == "48"
+
+    assert profile_registry.unpublish(name, registry_dir)
+    assert not os.path.exists(path)
+
+
+def test_publisher_exit_does_not_remove_file_of_later_user(tmp_path):
+    registry_dir = str(tmp_path)
+    code = PUBLISH + "import sys; sys.stdout.flush(); sys.stdin.readline()\n"
+    env = dict(os.environ, PROFILE_REGISTRY_DIR=registry_dir, PYTHONPATH=ROOT)
+    first = subprocess.Popen([sys.executable, "-c", code], env=env, stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE, text=True)
+    try:
+        name = first.stdout.readline().strip()
+        path = profile_registry._path(name, registry_dir)
+        assert os.path.exists(path)
+        # dieser Prozess nutzt die vorhandene Datei mit
+        assert profile_registry.publish(_profile(), registry_dir) == name
+    finally:
+        first.communicate("\n")
+    assert first.returncode == 0
+    assert os.path.exists(path)
+
+    profile_registry.unpublish(name, registry_dir)
+    assert not os.path.exists(path)
+
+
+def test_last_user_removes_file(tmp_path):
+    registry_dir = str(tmp_path)
+    name = _run(PUBLISH, registry_dir)
+    assert not os.path.exists(profile_registry._path(name, registry_dir))
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import profile_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _csv_bytes(seed: int) -> bytes:
+    p = np.random.default_rng(seed).uniform(0.0, 1.0, 48)
+    return pd.DataFrame({
+        "time": pd.date_range("2023-01-01", periods=48, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "p_mw": p,
+    }).to_csv(index=False).encode("utf-8")
+
+
+def test_add_get_delete(tmp_path):
+    store = profile_store.ProfileStore(str(tmp_path))
+    meta = store.add("a.csv", _csv_bytes(0), power_col="p_mw")
+    assert store.add("a.csv", _csv_bytes(0), power_col="p_mw") == meta
+    assert len(store.get(meta["profile_id"])) == 48
+    assert [m["profile_id"] for m in store.list()] == [meta["profile_id"]]
+    assert store.delete(meta["profile_id"])
+    with pytest.raises(profile_store.UnknownProfile):
+        store.get(meta["profile_id"])
+
+
+ADD_MANY = (
+    "import sys, numpy as np, pandas as pd, profile_store\n"
+    "store = profile_store.ProfileStore(sys.argv[1])\n"
+    "for i in range(int(sys.argv[2]), int(sys.argv[2]) + 8):\n"
+    "    p = np.random.default_rng(i).uniform(0.0, 1.0, 48)\n"
+    "    t = pd.date_range('2023-01-01', periods=48, freq='h').strftime('%Y-%m-%d %H:%M')\n"
+    "    data = pd.DataFrame({'time': t, 'p_mw': p}).to_csv(index=False).encode('utf-8')\n"
+    "    store.add(f'p{i}.csv', data, power_col='p_mw')\n"
+)
+
+
+@pytest.mark.skipif(not profile_store.HAS_FCNTL, reason="fcntl nicht verfügbar")
+def test_concurrent_processes_keep_all_index_entries(tmp_path):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    procs = [
+        subprocess.Popen([sys.executable, "-c", ADD_MANY, str(tmp_path), str(100 * k)], env=env)
+        for k in range(4)
+    ]
+    assert [p.wait() for p in procs] == [0] * 4
+    store = profile_store.ProfileStore(str(tmp_path))
+    assert len(store.list()) == 32
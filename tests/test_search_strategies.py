@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import search_strategies
+
+LATTICE = search_strategies.Lattice({
+    "s": np.arange(1.0, 8.01, 1.0),
+    "pel": np.arange(500.0, 3000.01, 500.0),
+    "h2_days": np.arange(1.0, 6.01, 1.0),
+    "nh3_ships": np.arange(1.0, 3.01, 0.5),
+    "water_tank": np.arange(0.0, 20000.01, 5000.0),
+})
+
+
+def _cost(c):
+    # glatte Kostenfläche mit Optimum an der Machbarkeitsgrenze (pel * s), Strafkosten wie im Server
+    if c["pel"] * c["s"] < 9000.0 or c["nh3_ships"] < 1.75:
+        return 1e6 + 1e5 * 2, False, "AEL"
+    cost = (
+        3.0 + 0.05 * (c["s"] - 4.3) ** 2 + 0.1 * ((c["pel"] - 1700.0) / 500.0) ** 2
+        + 0.02 * (c["h2_days"] - 2.2) ** 2 + 0.3 * (c["nh3_ships"] - 2.1) ** 2
+        + 0.01 * ((c["water_tank"] - 8000.0) / 2500.0) ** 2
+    )
+    return cost, True, "AEL"
+
+
+def _search(strategy):
+    calls = []
+
+    def evaluate(batch):
+        calls.extend(batch)
+        return [_cost(c) for c in batch]
+
+    result = search_strategies.run_search(LATTICE, evaluate, strategy=strategy)
+    assert result["evaluations"] == len(calls) == len(result["candidates"])
+    i = int(np.argmin(result["costs"]))
+    return result["candidates"][i], result["costs"][i], result["evaluations"]
+
+
+@pytest.fixture(scope="module")
+def grid():
+    return _search("grid")
+
+
+@pytest.mark.parametrize("strategy, max_share", [
+    ("refine", 0.25), ("pattern", 0.05), ("nelder_mead", 0.05), ("surrogate", 0.05), ("frontier", 0.75),
+])
+def test_strategy_matches_grid(grid, strategy, max_share):
+    best, cost, evaluations = _search(strategy)
+    grid_best, grid_cost, grid_evaluations = grid
+    assert grid_evaluations == LATTICE.size
+    assert best == grid_best
+    assert cost == grid_cost
+    assert evaluations <= max_share * grid_evaluations
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+import Code_Final as cf
+import wind_profile
+
+# (s, P_el, Technologie, H2-Speicher in Tagen, NH3-Schiffe, Wassertank) – mit und ohne Schiffsausfälle
+CONFIGS = [
+    (1.0, 1000.0, "AEL", 1.0, 1.25, 2500.0),
+    (3.0, 1500.0, "PEM", 2.0, 2.0, 5000.0),
+    (4.5, 2200.0, "AEL", 4.0, 2.5, 0.0),
+    (8.0, 2000.0, "PEM", 4.0, 3.0, 20000.0),
+]
+
+
+def _simulate(config, df_profile, **kwargs):
+    s, pel, tech, h2_days, nh3_ships, water_tank = config
+    return cf.simulate_hourly_system(
+        s=s, p_el_mw=pel, technology=tech,
+        h2_storage_t_max=h2_days * cf.annual_h2_prod_t / 365.0,
+        nh3_storage_ships=nh3_ships, water_tank_m3_max=water_tank,
+        df_profile=df_profile, **kwargs,
+    )
+
+
+def assert_kpis_equal(a, b):
+    assert a.keys() == b.keys()
+    for key, value in a.items():
+        if isinstance(value, (bool, str)) or value is None:
+            assert value == b[key], key
+        else:
+            assert value == pytest.approx(b[key], rel=1e-9, abs=1e-9), key
+
+
+@pytest.fixture(scope="module")
+def df2():
+    return cf.get_df2()
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("repeats", [None, 3])
+def test_kernel_matches_python(df2, config, repeats):
+    profile = df2 if repeats is None else wind_profile.RepeatingProfile(df2, repeats)
+    _, kpi_py = _simulate(config, profile, engine="python")
+    _, kpi_kernel = _simulate(config, profile, engine="kernel")
+    assert_kpis_equal(kpi_kernel, kpi_py)
+
+
+def _without_steady_keys(kpi):
+    return {k: v for k, v in kpi.items() if k not in ("steady_state_year", "years_simulated")}
+
+
+@pytest.mark.parametrize("config, detected", [(CONFIGS[0], True), (CONFIGS[2], True), (CONFIGS[3], False)])
+def test_steady_state_matches_full_run(df2, config, detected):
+    profile = wind_profile.RepeatingProfile(df2, 20)
+    _, kpi_full = _simulate(config, profile, engine="kernel")
+    _, kpi_steady = _simulate(config, profile, engine="kernel", steady_state=True)
+    if detected:
+        assert kpi_steady["steady_state_year"] >= 0
+        assert kpi_steady["years_simulated"] < 20
+    else:
+        assert kpi_steady["steady_state_year"] == -1
+        assert kpi_steady["years_simulated"] == 20
+    if detected:
+        # hochgerechnete Jahressummen: nur Rundungsunterschiede
+        assert_kpis_equal(_without_steady_keys(kpi_steady), _without_steady_keys(kpi_full))
+    else:
+        assert _without_steady_keys(kpi_steady) == _without_steady_keys(kpi_full)
+
+
+@pytest.mark.parametrize("config", CONFIGS[:2])
+@pytest.mark.parametrize("budget", [{"stop_on_first_failed_ship": True}, {"max_failed_ships": 2}])
+def test_early_termination(df2, config, budget):
+    _, kpi_kernel = _simulate(config, df2, engine="kernel", **budget)
+    _, kpi_py = _simulate(config, df2, engine="python", **budget)
+    assert_kpis_equal(kpi_kernel, kpi_py)
+
+    hours = kpi_kernel["hours_simulated"]
+    assert kpi_kernel["terminated_early"] is True
+    assert 0 < hours < len(df2)
+    assert kpi_kernel["ships_failed_count"] == budget.get("max_failed_ships", 0) + 1
+
+    # Teilsummen = voller Lauf auf dem Profil bis zum Abbruch (bis auf die Profillänge)
+    _, kpi_head = _simulate(config, df2.iloc[:hours], engine="kernel")
+    for key, value in kpi_head.items():
+        if key not in ("nh3_target_total_t", "sim_years_est"):
+            assert kpi_kernel[key] == value, key
+
+
+def test_early_termination_without_failures(df2):
+    _, kpi_full = _simulate(CONFIGS[3], df2, engine="kernel")
+    for engine in ("kernel", "python"):
+        _, kpi = _simulate(CONFIGS[3], df2, engine=engine, stop_on_first_failed_ship=True)
+        assert kpi["terminated_early"] is False
+        assert kpi["hours_simulated"] == len(df2)
+        assert_kpis_equal({k: kpi[k] for k in kpi_full}, kpi_full)
+
+
+CHANNELS = ["h2_soc_kg", "nh3_soc_t", "p_wind_mw"]
+
+
+@pytest.fixture(scope="module")
+def hourly(df2):
+    out, _ = _simulate(CONFIGS[1], df2, engine="python", return_timeseries=True)
+    return out
+
+
+@pytest.mark.parametrize("engine", ["python", "kernel"])
+def test_timeseries_formats(df2, hourly, engine):
+    cols, _ = _simulate(CONFIGS[1], df2, engine=engine, return_timeseries=True, timeseries_format="columns")
+    rec, _ = _simulate(CONFIGS[1], df2, engine=engine, return_timeseries=True, timeseries_format="structured")
+    assert list(cols) == ["t"] + list(hourly.columns)
+    assert list(rec.dtype.names) == ["t"] + list(hourly.columns)
+    np.testing.assert_array_equal(cols["t"], hourly.index.to_numpy())
+    np.testing.assert_array_equal(rec["t"], hourly.index.to_numpy())
+    for col in hourly.columns:
+        np.testing.assert_allclose(cols[col], hourly[col].to_numpy(), rtol=1e-9, atol=1e-9)
+        np.testing.assert_array_equal(rec[col], cols[col])
+
+
+@pytest.mark.parametrize("engine", ["python", "kernel"])
+def test_timeseries_float32(df2, hourly, engine):
+    out, _ = _simulate(CONFIGS[1], df2, engine=engine, return_timeseries=True, timeseries_dtype=np.float32)
+    assert (out.dtypes == np.float32).all()
+    np.testing.assert_allclose(out.to_numpy(), hourly.to_numpy(), rtol=1e-6, atol=1e-3)
+
+
+@pytest.mark.parametrize("engine", ["python", "kernel"])
+def test_timeseries_channels(df2, hourly, engine):
+    out, _ = _simulate(CONFIGS[1], df2, engine=engine, return_timeseries=True, channels=CHANNELS)
+    assert list(out.columns) == CHANNELS
+    np.testing.assert_allclose(out.to_numpy(), hourly[CHANNELS].to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("engine", ["python", "kernel"])
+def test_timeseries_daily_aggregate(df2, hourly, engine):
+    out, _ = _simulate(CONFIGS[1], df2, engine=engine, return_timeseries=True, channels=CHANNELS, aggregate="D")
+    daily = hourly[CHANNELS].resample("D").agg(["mean", "min", "max"])
+    daily.columns = [f"{c}_{stat}" for c, stat in daily.columns]
+    daily["hours"] = hourly[CHANNELS[0]].resample("D").count()
+    assert list(out.columns) == list(daily.columns)
+    np.testing.assert_array_equal(out.index.to_numpy(), daily.index.to_numpy())
+    np.testing.assert_allclose(out.to_numpy(), daily.to_numpy(), rtol=1e-9, atol=1e-9)
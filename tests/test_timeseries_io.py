@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import timeseries_io
+
+
+def _frame(start: str, hours: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "time": pd.date_range(start, periods=hours, freq="h"),
+        "H2_SOC_t": np.arange(hours, dtype=np.float64),
+    })
+
+
+def test_partitioned_parquet_overwrite_with_fewer_years(tmp_path):
+    path = str(tmp_path / "soc.parquet")
+    timeseries_io.write_timeseries(_frame("2021-01-01", 3 * 8760), path, metadata={"run": 1})
+    assert sorted(os.listdir(path)) == ["year=2021", "year=2022", "year=2023"]
+
+    timeseries_io.write_timeseries(_frame("2030-01-01", 48), path, metadata={"run": 2})
+    assert sorted(os.listdir(path)) == ["year=2030"]
+    df, meta = timeseries_io.read_timeseries(path)
+    assert len(df) == 48
+    assert meta["run"] == 2
+    assert list(df.columns) == ["time", "H2_SOC_t"]
+
+
+def test_plain_parquet_replaces_partitioned_dataset(tmp_path):
+    path = str(tmp_path / "soc.parquet")
+    timeseries_io.write_timeseries(_frame("2021-01-01", 48), path)
+    assert os.path.isdir(path)
+    timeseries_io.write_timeseries(_frame("2021-01-01", 24), path, partition_time_column=None)
+    assert os.path.isfile(path)
+    df, _ = timeseries_io.read_timeseries(path)
+    assert len(df) == 24
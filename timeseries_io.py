@@ -0,0 +1,189 @@
+"""
+Export/Import von Simulations-Zeitreihen (Winner-Zeitreihe, SOC-Tabellen).
+
+Formate (nach Dateiendung oder fmt=...):
+- "parquet": Parquet, nach Jahr partitioniert (Verzeichnis mit year=YYYY/...), komprimiert
+- "feather": Arrow IPC (eine Datei), komprimiert
+- "csv":     wie bisher to_csv (optional), Metadaten als <pfad>.meta.json daneben
+
+Parquet/Feather speichern Gleitkommaspalten als float32 (float32=False: float64) und
+legen Metadaten (Design-Vektor, Technologie, cost_params-Hash, ...) als JSON im Schema ab.
+read_timeseries(path, columns=[...]) liest nur die angeforderten Spalten.
+
+pyarrow ist optional; ohne pyarrow bleibt nur CSV.
+"""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import eval_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+EXPORT_FORMATS = ("parquet", "feather", "csv")
+
+# Schlüssel der Metadaten im Arrow-Schema
+METADATA_KEY = b"wasserstoff"
+# Spalte, die beim partitionierten Parquet ergänzt (und beim Lesen wieder entfernt) wird
+PARTITION_COLUMN = "year"
+
+_SUFFIXES = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather", ".csv": "csv"}
+
+
+def infer_format(path: str, fmt: Optional[str] = None) -> str:
+    """Format aus fmt oder der Dateiendung (Default parquet)."""
+    if fmt is None:
+        fmt = _SUFFIXES.get(os.path.splitext(str(path))[1].lower(), "parquet")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unbekanntes Format: {fmt!r} (erlaubt: {', '.join(EXPORT_FORMATS)})")
+    if fmt != "csv" and not HAS_PYARROW:
+        raise ImportError(f"Format {fmt!r} benötigt pyarrow (pip install pyarrow); CSV geht ohne.")
+    return fmt
+
+
+def export_metadata(
+    design: Optional[Dict[str, Any]] = None,
+    technology: Optional[str] = None,
+    cost_params: Optional[Dict[str, Any]] = None,
+    **extra,
+) -> Dict[str, Any]:
+    """Metadaten für write_timeseries: Design-Vektor, Technologie, Hash der cost_params."""
+    meta: Dict[str, Any] = {}
+    if design is not None:
+        meta["design"] = {k: (float(v) if isinstance(v, (int, float, np.number)) else v) for k, v in design.items()}
+    if technology is not None:
+        meta["technology"] = str(technology)
+    if cost_params is not None:
+        meta["cost_params_hash"] = eval_cache.dict_fingerprint(cost_params)
+    meta.update(extra)
+    return meta
+
+
+def _to_float32(df: pd.DataFrame) -> pd.DataFrame:
+    cols = [c for c in df.columns if pd.api.types.is_float_dtype(df[c]) and df[c].dtype != np.float32]
+    if not cols:
+        return df
+    return df.astype({c: np.float32 for c in cols})
+
+
+def _remove_existing(path: str) -> None:
+    """Alte Datei bzw. altes Dataset-Verzeichnis entfernen (sonst bleiben z.B. year=-Partitionen stehen)."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.isfile(path):
+        os.remove(path)
+
+
+def write_timeseries(
+    df: pd.DataFrame,
+    path: str,
+    fmt: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    float32: bool = True,
+    compression: str = "zstd",
+    partition_time_column: Optional[str] = "time",
+    index: bool = False,
+) -> str:
+    """
+    Zeitreihe schreiben; Rückgabe: Format. index=True schreibt den Index als Spalte mit
+    (wie to_csv). Parquet wird nach dem Jahr von partition_time_column partitioniert,
+    sofern die Spalte Zeitstempel enthält (sonst eine Datei).
+    """
+    fmt = infer_format(path, fmt)
+    if index:
+        df = df.reset_index()
+
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        if metadata:
+            with open(f"{path}.meta.json", "w", encoding="utf-8") as f:
+                json.dump(metadata, f, indent=2, ensure_ascii=False)
+        return fmt
+
+    if float32:
+        df = _to_float32(df)
+    meta = dict(metadata or {})
+    partition = (
+        fmt == "parquet"
+        and partition_time_column in df.columns
+        and pd.api.types.is_datetime64_any_dtype(df[partition_time_column])
+    )
+    if partition:
+        df = df.assign(**{PARTITION_COLUMN: df[partition_time_column].dt.year})
+        meta["partition"] = PARTITION_COLUMN
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        METADATA_KEY: json.dumps(meta).encode("utf-8"),
+    })
+    if fmt == "feather":
+        feather.write_feather(table, path, compression=compression)
+    elif partition:
+        _remove_existing(path)
+        pq.write_to_dataset(table, path, partition_cols=[PARTITION_COLUMN], compression=compression)
+    else:
+        _remove_existing(path)
+        pq.write_table(table, path, compression=compression)
+    return fmt
+
+
+def _schema_metadata(schema) -> Dict[str, Any]:
+    raw = (schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def read_metadata(path: str, fmt: Optional[str] = None) -> Dict[str, Any]:
+    """Nur die Metadaten (ohne Daten zu lesen)."""
+    fmt = infer_format(path, fmt)
+    if fmt == "csv":
+        meta_path = f"{path}.meta.json"
+        if not os.path.exists(meta_path):
+            return {}
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    if fmt == "feather":
+        with pa.memory_map(path) as source:
+            return _schema_metadata(pa.ipc.open_file(source).schema)
+    return _schema_metadata(pq.ParquetDataset(path).schema)
+
+
+def read_timeseries(
+    path: str,
+    columns: Optional[List[str]] = None,
+    fmt: Optional[str] = None,
+    time_columns: Tuple[str, ...] = ("time",),
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Zeitreihe lesen -> (DataFrame, Metadaten). columns: nur diese Spalten lesen
+    (Spaltenprojektion). time_columns werden bei CSV als Datum geparst.
+    """
+    fmt = infer_format(path, fmt)
+    if fmt == "csv":
+        usecols = list(columns) if columns is not None else None
+        parse_dates = [c for c in time_columns if usecols is None or c in usecols]
+        df = pd.read_csv(path, usecols=usecols, parse_dates=parse_dates)
+        if usecols is not None:
+            df = df[usecols]
+        return df, read_metadata(path, fmt)
+
+    if fmt == "feather":
+        table = feather.read_table(path, columns=columns)
+    else:
+        table = pq.read_table(path, columns=columns)
+    meta = _schema_metadata(table.schema)
+    df = table.to_pandas()
+    if meta.get("partition") in df.columns and (columns is None or meta["partition"] not in columns):
+        df = df.drop(columns=meta["partition"])
+    return df, meta
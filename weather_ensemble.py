@@ -0,0 +1,122 @@
+"""
+Wetterjahr-Ensemble für die Auslegungsbewertung (gurobi_server: POST /ensemble).
+
+df2_sim wiederholt ein einziges Wetterjahr years_sim-mal; Unterschiede zwischen den
+Jahren tauchen so weder bei Schiffsausfällen noch bei den Speichermaxima auf. Hier
+werden stattdessen mehrere echte Wetterjahre verwendet:
+
+- split_weather_years(): Profile (df2-Format, z.B. die Jahres-CSVs aus "CSV-Dateien
+  kombinieren" über POST /profiles) nach Kalenderjahr zerlegen; 29. Februar entfällt,
+  unvollständige Jahre werden übersprungen.
+- ensemble_members(): mode "years" simuliert jedes Jahr einzeln, mode "stitched"
+  n_sequences zufällige Jahresfolgen (Ziehen mit Zurücklegen, n_years lang, seed).
+- summarize_members(): Kosten-/KPI-Verteilung einer Auslegung über die Mitglieder
+  (P50/P90 Kosten, schlimmster Fall Schiffsausfälle, maximale Speicherstände).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 8760
+ENSEMBLE_MODES = ("years", "stitched")
+COST_PERCENTILES = (50, 90)
+
+# KPIs, deren Maximum über alle Mitglieder berichtet wird (Speicher-Auslegung)
+MAX_KPIS = ("h2_storage_max_t", "nh3_storage_max_t", "water_storage_max_m3")
+
+
+def split_weather_years(df_profile: pd.DataFrame) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    Profil (DatetimeIndex, Spalte p_mw) in Kalenderjahre zerlegen -> [("2019", Jahr), ...].
+    Ohne 29. Februar; nur Jahre mit genau HOURS_PER_YEAR Stunden (sonst übersprungen).
+    """
+    index = df_profile.index
+    if not isinstance(index, pd.DatetimeIndex):
+        raise ValueError("Wetterjahre brauchen ein Profil mit Zeitstempeln (DatetimeIndex).")
+    keep = ~((index.month == 2) & (index.day == 29))
+    df = df_profile.loc[keep, ["p_mw"]]
+    out = []
+    for year, block in df.groupby(df.index.year, sort=True):
+        if len(block) != HOURS_PER_YEAR:
+            continue
+        out.append((str(year), block))
+    return out
+
+
+def stitched_sequences(
+    years: Sequence[Tuple[str, pd.DataFrame]],
+    n_sequences: int,
+    n_years: int,
+    seed: int = 0,
+) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    n_sequences zufällige Jahresfolgen aus years (mit Zurücklegen, je n_years Jahre).
+    Label: die Jahres-Labels mit "+" verbunden; Index: fortlaufende Stunde (RangeIndex "t").
+    """
+    if not years:
+        raise ValueError("Keine Wetterjahre für das Ensemble.")
+    if n_sequences < 1 or n_years < 1:
+        raise ValueError("n_sequences und n_years müssen >= 1 sein.")
+    rng = np.random.default_rng(seed)
+    base = [block["p_mw"].to_numpy(dtype=np.float64) for _, block in years]
+    out = []
+    for _ in range(int(n_sequences)):
+        order = rng.integers(0, len(years), size=int(n_years))
+        p_mw = np.concatenate([base[i] for i in order])
+        df = pd.DataFrame({"p_mw": p_mw}, index=pd.RangeIndex(len(p_mw), name="t"), copy=False)
+        out.append(("+".join(years[i][0] for i in order), df))
+    return out
+
+
+def ensemble_members(
+    years: Sequence[Tuple[str, pd.DataFrame]],
+    mode: str = "years",
+    n_sequences: int = 16,
+    n_years: int = 20,
+    seed: int = 0,
+) -> List[Tuple[str, pd.DataFrame]]:
+    """Ensemble-Mitglieder (Label, Profil) für mode "years" oder "stitched"."""
+    if mode not in ENSEMBLE_MODES:
+        raise ValueError(f"Unbekannter Ensemble-Modus: {mode!r} (erlaubt: {', '.join(ENSEMBLE_MODES)})")
+    if not years:
+        raise ValueError("Keine vollständigen Wetterjahre (8760 h ohne 29.02.) gefunden.")
+    if mode == "years":
+        return list(years)
+    return stitched_sequences(years, n_sequences, n_years, seed)
+
+
+def summarize_members(
+    costs: np.ndarray,
+    kpis: Sequence[Dict[str, Any]],
+    labels: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Verteilung einer Auslegung über die Mitglieder: costs[m] (EUR/kg, Strafkosten bei
+    Schiffsausfällen), kpis[m] aus der Simulation. labels -> zusätzlich je Mitglied.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    ships_failed = np.array([int(k.get("ships_failed_count", 0)) for k in kpis], dtype=np.int64)
+    out: Dict[str, Any] = {
+        "cost": {
+            **{f"p{q}": float(np.percentile(costs, q)) for q in COST_PERCENTILES},
+            "mean": float(costs.mean()),
+            "min": float(costs.min()),
+            "max": float(costs.max()),
+        },
+        "feasible_fraction": float(np.mean(ships_failed == 0)),
+        "ships_failed_max": int(ships_failed.max()),
+        "ships_failed_mean": float(ships_failed.mean()),
+    }
+    for key in MAX_KPIS:
+        values = [float(k[key]) for k in kpis if key in k]
+        if values:
+            out[key] = max(values)
+    if labels is not None:
+        out["members"] = [
+            {"label": label, "costPerKg": float(c), "ships_failed_count": int(f),
+             **{key: float(k[key]) for key in MAX_KPIS if key in k}}
+            for label, c, f, k in zip(labels, costs, ships_failed, kpis)
+        ]
+    return out
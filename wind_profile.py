@@ -0,0 +1,276 @@
+"""
+Binärer Cache für das stündliche Windprofil.
+
+Beim ersten Laden wird die Quelle (Excel "Wind Erzeugerprofil3.xlsx", Parquet oder eine
+CSV, z.B. mean_profile_8760.csv aus "CSV-Dateien kombinieren") einmal geparst
+und als zwei .npy-Dateien neben der Quelle abgelegt:
+
+    <quelle>.profile-cache/
+        t.npy       Zeitstempel (datetime64[ns])
+        p_mw.npy    Windleistung in MW (float64 oder float32)
+        meta.json   Schlüssel: mtime_ns, Größe, sha256 der Quelle, dtype
+
+Spätere Aufrufe lesen die Arrays per Memory-Map (np.load(mmap_mode="r")), ohne
+openpyxl. Der Cache ist gültig, solange mtime+Größe übereinstimmen; bei
+geänderter mtime wird der sha256 verglichen (z.B. nach git checkout) und bei
+gleichem Inhalt nur meta.json aktualisiert.
+
+RepeatingProfile bildet das Mehrjahres-Profil (df2_sim) virtuell aus dem Basisjahr.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_SUFFIX = ".profile-cache"
+CACHE_VERSION = 1
+
+# Spalten der Excel-Quelle (auch Default für CSV)
+EXCEL_TIME_COL = "datetime"
+EXCEL_POWER_COL = "Leistung  Windpark [GW]"
+GW_TO_MW = 1000.0
+
+
+def cache_dir_for(source_path: str) -> str:
+    """Cache-Verzeichnis neben der Quelldatei."""
+    return os.path.abspath(source_path) + CACHE_SUFFIX
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_profile_source(
+    path: str,
+    time_col: str = None,
+    power_col: str = None,
+    power_to_mw: float = None,
+):
+    """
+    Liest Excel/CSV/Parquet und liefert (t, p_mw) als NumPy-Arrays.
+
+    Default-Spalten wie im Excel-Profil ("datetime", "Leistung  Windpark [GW]", GW -> MW).
+    Für CSV (mean_profile_8760.csv o.ä.) können time_col/power_col/power_to_mw
+    angegeben werden; "time" wird als Zeitspalte erkannt, falls "datetime" fehlt.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm", ".xls"):
+        df = pd.read_excel(path)
+    elif ext == ".csv":
+        df = pd.read_csv(path, comment="#")
+    elif ext == ".parquet":
+        df = pd.read_parquet(path)
+    else:
+        raise ValueError(f"Nicht unterstütztes Profilformat: {path}")
+
+    if time_col is None:
+        time_col = EXCEL_TIME_COL if EXCEL_TIME_COL in df.columns else "time"
+    if power_col is None:
+        power_col = EXCEL_POWER_COL
+    if power_to_mw is None:
+        power_to_mw = GW_TO_MW if power_col == EXCEL_POWER_COL else 1.0
+
+    for col in (time_col, power_col):
+        if col not in df.columns:
+            raise KeyError(f"{os.path.basename(path)}: Spalte '{col}' nicht gefunden. Spalten: {list(df.columns)}")
+
+    p_mw = (df[power_col].astype(float) * power_to_mw).clip(lower=0).to_numpy(dtype=np.float64)
+    t = pd.to_datetime(df[time_col]).to_numpy(dtype="datetime64[ns]")
+    return t, p_mw
+
+
+def _source_key(path: str) -> dict:
+    st = os.stat(path)
+    return {"mtime_ns": int(st.st_mtime_ns), "size": int(st.st_size)}
+
+
+def _read_meta(cache_dir: str):
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: str, write_fn) -> None:
+    # erst in Temp-Datei, dann os.replace -> parallele Prozesse sehen nie halbe Dateien
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        write_fn(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _write_meta(cache_dir: str, meta: dict) -> None:
+    def _w(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+    _write_atomic(os.path.join(cache_dir, "meta.json"), _w)
+
+
+def _save_npy(path: str, arr: np.ndarray) -> None:
+    def _w(tmp):
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+    _write_atomic(path, _w)
+
+
+def _cache_valid(path: str, cache_dir: str, dtype: str, parse_kwargs: dict) -> bool:
+    meta = _read_meta(cache_dir)
+    if not meta or meta.get("version") != CACHE_VERSION:
+        return False
+    if meta.get("dtype") != dtype or meta.get("parse") != parse_kwargs:
+        return False
+    if not all(os.path.exists(os.path.join(cache_dir, f)) for f in ("t.npy", "p_mw.npy")):
+        return False
+
+    key = _source_key(path)
+    if meta.get("mtime_ns") == key["mtime_ns"] and meta.get("size") == key["size"]:
+        return True
+
+    # mtime geändert -> Inhalt per Hash prüfen
+    if meta.get("size") != key["size"] or meta.get("sha256") != file_sha256(path):
+        return False
+    meta.update(key)
+    _write_meta(cache_dir, meta)
+    return True
+
+
+def load_profile_arrays(
+    path: str,
+    dtype: str = "float64",
+    use_cache: bool = True,
+    mmap: bool = True,
+    time_col: str = None,
+    power_col: str = None,
+    power_to_mw: float = None,
+):
+    """
+    Liefert (t, p_mw) für die Profilquelle, bevorzugt aus dem Binär-Cache.
+
+    dtype: "float64" (bitgleich zur Excel-Variante) oder "float32" (halber Speicher).
+    mmap:  Cache-Arrays schreibgeschützt memory-mappen statt in den RAM zu laden.
+    Ist das Cache-Verzeichnis nicht beschreibbar, wird ohne Cache geparst.
+    """
+    if dtype not in ("float64", "float32"):
+        raise ValueError("dtype muss 'float64' oder 'float32' sein.")
+    parse_kwargs = {"time_col": time_col, "power_col": power_col, "power_to_mw": power_to_mw}
+
+    if not use_cache:
+        t, p_mw = parse_profile_source(path, **parse_kwargs)
+        return t, p_mw.astype(dtype, copy=False)
+
+    cache_dir = cache_dir_for(path)
+    mmap_mode = "r" if mmap else None
+
+    if not _cache_valid(path, cache_dir, dtype, parse_kwargs):
+        t, p_mw = parse_profile_source(path, **parse_kwargs)
+        p_mw = p_mw.astype(dtype, copy=False)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            _save_npy(os.path.join(cache_dir, "t.npy"), t)
+            _save_npy(os.path.join(cache_dir, "p_mw.npy"), p_mw)
+            meta = {"version": CACHE_VERSION, "dtype": dtype, "parse": parse_kwargs,
+                    "source": os.path.basename(path), "sha256": file_sha256(path),
+                    "n_hours": int(len(p_mw))}
+            meta.update(_source_key(path))
+            _write_meta(cache_dir, meta)
+        except OSError as e:
+            print(f"Profil-Cache nicht schreibbar ({cache_dir}): {e}")
+            return t, p_mw
+        if not mmap:
+            return t, p_mw
+
+    t = np.load(os.path.join(cache_dir, "t.npy"), mmap_mode=mmap_mode)
+    p_mw = np.load(os.path.join(cache_dir, "p_mw.npy"), mmap_mode=mmap_mode)
+    return t, p_mw
+
+
+def load_profile_frame(path: str, **kwargs) -> pd.DataFrame:
+    """df2-Format: DatetimeIndex "t" und Spalte p_mw (ohne Kopie der Cache-Arrays)."""
+    t, p_mw = load_profile_arrays(path, **kwargs)
+    index = pd.DatetimeIndex(t, name="t")
+    return pd.DataFrame({"p_mw": p_mw}, index=index, copy=False)
+
+
+class RepeatingProfile:
+    """
+    Virtuelles Mehrjahres-Profil: das Basisjahr n_repeats-mal hintereinander, ohne Kopien.
+
+    Ersetzt make_multi_year_profile (20 DataFrame-Kopien + pd.concat). Gehalten wird nur
+    das p_mw-Array des Basisjahres (ggf. memory-mapped); Zeitstempel (Jahr i um
+    +i Jahre verschoben, wie bei make_multi_year_profile) entstehen erst bei Zugriff
+    auf .index, also nur wenn eine Zeitreihe ausgegeben wird.
+    """
+
+    def __init__(self, base, n_repeats: int, base_index=None):
+        if isinstance(base, pd.DataFrame):
+            if base_index is None:
+                base_index = base.index
+            base = base["p_mw"].to_numpy(dtype=np.float64)
+        self.base = np.asarray(base)
+        self.n_repeats = int(n_repeats)
+        self.base_index = base_index
+        if self.n_repeats < 1:
+            raise ValueError("n_repeats muss >= 1 sein.")
+        if base_index is not None and len(base_index) != len(self.base):
+            raise ValueError("base_index und base haben unterschiedliche Länge.")
+
+    @property
+    def n_base(self) -> int:
+        return len(self.base)
+
+    def __len__(self) -> int:
+        return self.n_base * self.n_repeats
+
+    def __iter__(self):
+        base = self.base.tolist()
+        for _ in range(self.n_repeats):
+            yield from base
+
+    def __getitem__(self, i: int) -> float:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return float(self.base[i % self.n_base])
+
+    def __repr__(self) -> str:
+        return f"RepeatingProfile(n_base={self.n_base}, n_repeats={self.n_repeats})"
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Zeitstempel aller Stunden (wird bei jedem Zugriff neu erzeugt, nicht gehalten)."""
+        if self.base_index is None:
+            return pd.RangeIndex(len(self), name="t")
+        base_index = pd.DatetimeIndex(self.base_index)
+        blocks = [base_index + pd.DateOffset(years=i) for i in range(1, self.n_repeats)]
+        return base_index.append(blocks).rename("t")
+
+    def items(self, with_index: bool = True):
+        """(Zeitstempel, p_mw) je Stunde wie Series.items(); ohne Index ist der Zeitstempel None."""
+        if with_index:
+            return zip(self.index, self)
+        return ((None, p) for p in self)
+
+    def sum(self) -> float:
+        return float(self.base.sum()) * self.n_repeats
+
+    def to_numpy(self) -> np.ndarray:
+        """Materialisiert das volle Profil (nur für Code, das ein zusammenhängendes Array braucht)."""
+        return np.tile(self.base, self.n_repeats)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialisiert das Profil im df2_sim-Format (DatetimeIndex "t", Spalte p_mw)."""
+        return pd.DataFrame({"p_mw": self.to_numpy()}, index=self.index)